@@ -1,7 +1,11 @@
 from fastapi import APIRouter, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import time
 
+from blockchain.snapshot import DEFAULT_CHUNK_SIZE, SnapshotReceiver, iter_snapshot
+
 router = APIRouter()
 
 
@@ -426,6 +430,7 @@ async def sync_blockchain(request: Request, sync_data: dict = None):
                 "current_block_height": len(node.blockchain.blocks),
                 "latest_block_hash": node.blockchain.blocks[-1].payload() if node.blockchain.blocks else None,
                 "node_id": getattr(node, 'public_key', 'unknown')[:20] + "...",
+                "block_sync": node.block_sync.get_stats(),
                 "message": "Node ready for synchronization"
             }
         
@@ -507,33 +512,50 @@ async def sync_blockchain(request: Request, sync_data: dict = None):
         }
 
 
-@router.get("/snapshot/", name="CRITICAL FIX: Create blockchain snapshot")
-async def create_snapshot(request: Request):
+@router.get("/snapshot/", name="Stream blockchain snapshot")
+async def create_snapshot(request: Request, chunk_size: int = DEFAULT_CHUNK_SIZE):
     """
-    CRITICAL FIX: Create a blockchain snapshot for synchronization.
+    Stream a chunked snapshot (NDJSON) for new node catch-up.
     
-    This implements the missing snapshot mechanism for new node catch-up.
+    Account state is sent in sorted chunks of chunk_size accounts, each
+    with its own hash, followed by recent blocks, the leader schedule and
+    a hashed manifest. Accounts are read from the account store one chunk
+    at a time in a single read transaction, so memory holds one chunk plus
+    the accounts changed since the last committed block (an in-memory
+    node's state is held whole regardless).
     """
     node = request.app.state.node
+    chunk_size = max(1, min(chunk_size, 100000))
+    return StreamingResponse(iter_snapshot(node.blockchain, chunk_size), media_type="application/x-ndjson")
+
+
+@router.post("/snapshot/", name="Apply streamed blockchain snapshot")
+async def apply_snapshot(request: Request):
+    """
+    Apply a snapshot produced by GET /snapshot/ while it streams in.
     
-    try:
-        snapshot = node.blockchain.create_snapshot()
-        
-        return {
-            "success": True,
-            "snapshot": snapshot,
-            "timestamp": snapshot.get('timestamp'),
-            "block_height": snapshot.get('block_height'),
-            "total_accounts": len(snapshot.get('account_state', {}).get('balances', {})),
-            "recent_blocks_count": len(snapshot.get('recent_blocks', [])),
-            "message": "Snapshot created successfully"
-        }
-        
-    except Exception as e:
-        return {
-            "success": False,
-            "error": f"Snapshot creation failed: {str(e)}"
-        }
+    Chunks are verified and applied in parallel as they arrive; the node's
+    state only changes once the manifest has been verified.
+    """
+    node = request.app.state.node
+    receiver = SnapshotReceiver(node.blockchain)
+    
+    buffer = b""
+    async for data in request.stream():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            await run_in_threadpool(receiver.feed, line)
+    if buffer:
+        await run_in_threadpool(receiver.feed, buffer)
+    
+    success = await run_in_threadpool(receiver.finish)
+    return {
+        "success": success,
+        "error": receiver.error,
+        "blocks_synchronized": len(node.blockchain.blocks),
+        **receiver.stats
+    }
 
 
 @router.post("/turbine/shreds/", name="CRITICAL FIX: Receive Turbine shreds")
@@ -3,13 +3,33 @@ Account State Model for Sealevel Parallel Execution
 
 This implements the account-based state model that tracks balances
 and other account data, with thread-safe operations for parallel execution.
+
+The state root is a set hash: the sum, modulo 2**256, of the SHA-256 of
+every "public_key:balance" pair. It depends only on the accounts, not on
+their order or history, so one account change moves it by the hash of
+the new pair minus the hash of the old one.
+
+With an AccountStore the model is backed by a database: ``accounts``
+becomes an LRU cache of hot accounts, misses are loaded from the store,
+and the accounts changed by a block are written back in one batch by
+commit_block().
 """
 
+import hashlib
 import time
 import threading
-from typing import Dict, Optional, List, Tuple
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional, List, Tuple
 from blockchain.utils.logger import logger
 
+DEFAULT_CACHE_SIZE = 100000
+STATE_ROOT_MODULUS = 2 ** 256
+
+
+def account_hash(public_key: str, balance: float) -> int:
+    """One account's term in the state root"""
+    return int.from_bytes(hashlib.sha256(f"{public_key}:{balance}".encode()).digest(), 'big')
+
 
 class Account:
     """Represents a single account in the blockchain state"""
@@ -70,15 +90,31 @@ class AccountModel:
     
     This manages all account balances and provides atomic operations
     for the Sealevel parallel executor.
+    
+    Args:
+        genesis_accounts: Initial balances
+        store: Optional AccountStore persisting the state
+        cache_size: Clean accounts kept in memory after a commit (with a store)
     """
     
-    def __init__(self, genesis_accounts: Optional[Dict[str, float]] = None):
-        self.accounts: Dict[str, Account] = {}
+    def __init__(self, genesis_accounts: Optional[Dict[str, float]] = None, store=None,
+                 cache_size: int = DEFAULT_CACHE_SIZE):
+        self.accounts: "OrderedDict[str, Account]" = OrderedDict()
         self.global_lock = threading.RLock()
+        self.store = store
+        self.cache_size = cache_size
+        self.dirty = set()  # Accounts changed since the last commit
+        self.new_accounts = set()  # Created since the last commit, not yet in the store
+        self.deleted = set()  # Removed since the last commit, still in the store
+        # State root term sum of the stored accounts; computed on first use, then kept up to date by commit_block
+        self.committed_root: Optional[int] = None
         self.stats = {
-            'total_accounts': 0,
+            'total_accounts': store.count() if store is not None else 0,
             'total_transactions_processed': 0,
-            'last_state_update': time.time()
+            'last_state_update': time.time(),
+            'cache_hits': 0,
+            'cache_misses': 0,
+            'blocks_committed': 0
         }
         
         # Initialize with genesis accounts if provided
@@ -91,20 +127,48 @@ class AccountModel:
     def create_account(self, public_key: str, initial_balance: float = 0.0) -> Account:
         """Create a new account with thread safety"""
         with self.global_lock:
-            if public_key in self.accounts:
-                return self.accounts[public_key]
+            existing = self.get_account(public_key)
+            if existing is not None:
+                return existing
             
             account = Account(public_key, initial_balance)
             self.accounts[public_key] = account
             self.stats['total_accounts'] += 1
+            if self.store is not None:
+                self.dirty.add(public_key)
+                if public_key in self.deleted:
+                    self.deleted.discard(public_key)  # Row still stored; overwritten on commit
+                else:
+                    self.new_accounts.add(public_key)
             
             logger.debug(f"Created account {public_key[:20]}... with balance {initial_balance}")
             return account
     
     def get_account(self, public_key: str) -> Optional[Account]:
-        """Get account by public key (thread-safe)"""
+        """Get account by public key (thread-safe), loading it from the store on a cache miss"""
         with self.global_lock:
-            return self.accounts.get(public_key)
+            account = self.accounts.get(public_key)
+            if self.store is None:
+                return account
+            if account is not None:
+                self.accounts.move_to_end(public_key)
+                self.stats['cache_hits'] += 1
+                return account
+            
+            self.stats['cache_misses'] += 1
+            if public_key in self.deleted:
+                return None
+            row = self.store.load(public_key)
+            if row is None:
+                return None
+            account = Account(public_key, row[0])
+            account.nonce = row[1]
+            self.accounts[public_key] = account
+            return account
+    
+    def _mark_dirty(self, public_key: str):
+        if self.store is not None:
+            self.dirty.add(public_key)
     
     def get_balance(self, public_key: str) -> float:
         """Get account balance, creating account if it doesn't exist"""
@@ -128,6 +192,7 @@ class AccountModel:
         
         success = account.update_balance(delta)
         if success:
+            self._mark_dirty(public_key)
             self.stats['total_transactions_processed'] += 1
             self.stats['last_state_update'] = time.time()
         
@@ -143,6 +208,7 @@ class AccountModel:
         
         success = account.set_balance(new_balance)
         if success:
+            self._mark_dirty(public_key)
             self.stats['last_state_update'] = time.time()
         
         return success
@@ -187,6 +253,8 @@ class AccountModel:
                 current_time = time.time()
                 from_account.last_modified = current_time
                 to_account.last_modified = current_time
+                self._mark_dirty(from_public_key)
+                self._mark_dirty(to_public_key)
                 
                 # Update stats
                 self.stats['total_transactions_processed'] += 1
@@ -198,10 +266,88 @@ class AccountModel:
         """Get all account balances (thread-safe snapshot)"""
         with self.global_lock:
             balances = {}
+            if self.store is not None:
+                for public_key, balance, _ in self.store.iter_accounts():
+                    balances[public_key] = balance
+                for public_key in self.deleted:
+                    balances.pop(public_key, None)
             for public_key, account in self.accounts.items():
                 balances[public_key] = account.get_balance()
             return balances
     
+    def export_rows(self) -> List[Tuple[str, float, int]]:
+        """Every account as (public_key, balance, nonce), in public-key order"""
+        with self.global_lock:
+            rows = {}
+            if self.store is not None:
+                for public_key, balance, nonce in self.store.iter_accounts():
+                    rows[public_key] = (public_key, balance, nonce)
+                for public_key in self.deleted:
+                    rows.pop(public_key, None)
+            for public_key, account in self.accounts.items():
+                with account.lock:
+                    rows[public_key] = (public_key, account.balance, account.nonce)
+            return [rows[public_key] for public_key in sorted(rows)]
+    
+    def iter_row_batches(self, batch_size: int = 1000) -> Iterator[List[Tuple[str, float, int]]]:
+        """
+        Every account as (public_key, balance, nonce), in public-key order,
+        batch_size rows at a time. With a store, committed rows are read in
+        one store read transaction and merged with the accounts changed
+        since the last commit, both taken at the same moment, so the batches
+        are one consistent state while memory holds a batch plus the
+        uncommitted accounts. Without a store, each account is read when
+        its batch is built.
+        """
+        with self.global_lock:
+            if self.store is None:
+                public_keys = sorted(self.accounts)
+                return self._iter_memory_batches(public_keys, batch_size)
+            changed = []
+            for public_key in sorted(self.dirty):
+                account = self.accounts[public_key]
+                with account.lock:
+                    changed.append((public_key, account.balance, account.nonce))
+            deleted = set(self.deleted)
+            stored = self.store.read_batches(batch_size)
+        return self._merge_batches(stored, changed, deleted, batch_size)
+
+    def _iter_memory_batches(self, public_keys: List[str], batch_size: int) -> Iterator[List[Tuple[str, float, int]]]:
+        for start in range(0, len(public_keys), batch_size):
+            batch = []
+            for public_key in public_keys[start:start + batch_size]:
+                account = self.accounts.get(public_key)
+                if account is not None:
+                    with account.lock:
+                        batch.append((public_key, account.balance, account.nonce))
+            if batch:
+                yield batch
+
+    @staticmethod
+    def _merge_batches(stored: Iterator[List[Tuple[str, float, int]]], changed: List[Tuple[str, float, int]],
+                       deleted: set, batch_size: int) -> Iterator[List[Tuple[str, float, int]]]:
+        """Stored rows with the changed rows (both in key order) merged in and deleted keys left out"""
+        batch = []
+        position = 0
+        for stored_batch in stored:
+            for row in stored_batch:
+                while position < len(changed) and changed[position][0] < row[0]:
+                    batch.append(changed[position])
+                    position += 1
+                if position < len(changed) and changed[position][0] == row[0]:
+                    row = changed[position]
+                    position += 1
+                elif row[0] in deleted:
+                    continue
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        batch.extend(changed[position:])
+        while batch:
+            yield batch[:batch_size]
+            batch = batch[batch_size:]
+
     @property
     def balances(self) -> Dict[str, float]:
         """Property access to all balances for compatibility"""
@@ -212,16 +358,15 @@ class AccountModel:
         """Property setter for balances - updates all account balances"""
         with self.global_lock:
             for public_key, balance in new_balances.items():
-                if public_key in self.accounts:
-                    self.accounts[public_key].set_balance(balance)
-                else:
-                    # Create new account with the balance
-                    self.create_account(public_key, balance)
+                # Creates the account if it doesn't exist
+                self.set_balance(public_key, balance)
     
     def get_total_supply(self) -> float:
         """Calculate total supply across all accounts"""
         total = 0.0
         with self.global_lock:
+            if self.store is not None:
+                return sum(self.get_all_balances().values())
             for account in self.accounts.values():
                 total += account.get_balance()
         return total
@@ -229,6 +374,8 @@ class AccountModel:
     def get_account_count(self) -> int:
         """Get total number of accounts"""
         with self.global_lock:
+            if self.store is not None:
+                return self.store.count() + len(self.new_accounts) - len(self.deleted)
             return len(self.accounts)
     
     def get_state_snapshot(self) -> Dict:
@@ -238,10 +385,14 @@ class AccountModel:
                 'accounts': {},
                 'stats': self.stats.copy(),
                 'total_supply': self.get_total_supply(),
-                'account_count': len(self.accounts),
+                'account_count': self.get_account_count(),
                 'snapshot_time': time.time()
             }
             
+            if self.store is not None:
+                for public_key, balance, nonce in self.export_rows():
+                    snapshot['accounts'][public_key] = {'public_key': public_key, 'balance': balance,
+                                                        'nonce': nonce, 'last_modified': None}
             for public_key, account in self.accounts.items():
                 snapshot['accounts'][public_key] = account.to_dict()
             
@@ -253,9 +404,7 @@ class AccountModel:
             issues = []
             total_balance = 0.0
             
-            for public_key, account in self.accounts.items():
-                balance = account.get_balance()
-                
+            for public_key, balance in self.get_all_balances().items():
                 # Check for negative balances
                 if balance < 0:
                     issues.append(f"Account {public_key[:20]}... has negative balance: {balance}")
@@ -267,13 +416,17 @@ class AccountModel:
             return {
                 'is_consistent': len(issues) == 0,
                 'issues': issues,
-                'total_accounts': len(self.accounts),
+                'total_accounts': self.get_account_count(),
                 'total_balance': total_balance,
                 'validation_time': time.time()
             }
     
     def cleanup_empty_accounts(self) -> int:
-        """Remove accounts with zero balance and no recent activity"""
+        """
+        Remove accounts with zero balance and no recent activity.
+        With a store only cached accounts are considered (activity times
+        are not persisted); the removals are written by the next commit.
+        """
         with self.global_lock:
             current_time = time.time()
             cleanup_threshold = current_time - (24 * 60 * 60)  # 24 hours
@@ -288,6 +441,90 @@ class AccountModel:
             for public_key in accounts_to_remove:
                 del self.accounts[public_key]
                 self.stats['total_accounts'] -= 1
+                if self.store is not None:
+                    self.dirty.discard(public_key)
+                    if public_key in self.new_accounts:
+                        self.new_accounts.discard(public_key)
+                    else:
+                        self.deleted.add(public_key)
             
             logger.info(f"Cleaned up {len(accounts_to_remove)} empty accounts")
             return len(accounts_to_remove)
+    
+    # Persistence
+    
+    @property
+    def committed_height(self) -> Optional[int]:
+        """Height of the last block whose state is in the store (None without one, or when empty)"""
+        return self.store.height if self.store is not None else None
+    
+    def commit_block(self, height: int, block_hash: Optional[str] = None) -> int:
+        """
+        Write every account changed since the last commit to the store in
+        one transaction, tagged with the block it belongs to, then shrink
+        the cache back to cache_size. Returns the number of accounts written.
+        """
+        if self.store is None:
+            return 0
+        with self.global_lock:
+            if self.committed_root is not None:
+                self.committed_root = self._uncommitted_root()
+            rows = []
+            for public_key in self.dirty:
+                account = self.accounts[public_key]
+                with account.lock:
+                    rows.append((public_key, account.balance, account.nonce))
+            self.store.write_batch(rows, height, block_hash, deleted=self.deleted)
+            self.dirty.clear()
+            self.new_accounts.clear()
+            self.deleted.clear()
+            self.stats['blocks_committed'] += 1
+            
+            # Everything is clean now, so the least recently used accounts can go
+            while len(self.accounts) > self.cache_size:
+                self.accounts.popitem(last=False)
+            return len(rows)
+    
+    def get_state_root_hash(self) -> str:
+        """
+        Hex state root of the current state. With a store only the accounts
+        changed since the last commit are hashed (the stored accounts are
+        hashed once, on first use); without one every account is.
+        """
+        with self.global_lock:
+            if self.store is not None:
+                return f"{self._uncommitted_root():064x}"
+            root = 0
+            for public_key, account in self.accounts.items():
+                root += account_hash(public_key, account.get_balance())
+            return f"{root % STATE_ROOT_MODULUS:064x}"
+
+    def _uncommitted_root(self) -> int:
+        """committed_root moved by the accounts changed or deleted since the last commit"""
+        if self.committed_root is None:
+            root = 0
+            for public_key, balance, _ in self.store.iter_accounts():
+                root += account_hash(public_key, balance)
+            self.committed_root = root % STATE_ROOT_MODULUS
+
+        root = self.committed_root
+        for public_key in self.dirty | self.deleted:
+            stored = None if public_key in self.new_accounts else self.store.load(public_key)
+            if stored is not None:
+                root -= account_hash(public_key, stored[0])
+            if public_key in self.dirty:
+                root += account_hash(public_key, self.accounts[public_key].get_balance())
+        return root % STATE_ROOT_MODULUS
+
+    def get_cache_stats(self) -> Dict:
+        with self.global_lock:
+            return {
+                'persistent': self.store is not None,
+                'cached_accounts': len(self.accounts),
+                'cache_size': self.cache_size,
+                'dirty_accounts': len(self.dirty),
+                'cache_hits': self.stats['cache_hits'],
+                'cache_misses': self.stats['cache_misses'],
+                'blocks_committed': self.stats['blocks_committed'],
+                'store': self.store.get_stats() if self.store is not None else None
+            }
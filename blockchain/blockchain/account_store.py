@@ -0,0 +1,187 @@
+"""
+Account State Store
+
+SQLite-backed persistence for ``AccountModel``. The database runs in WAL
+mode, so readers never block the single writer, and every block's
+account changes are written in one transaction together with the height
+and hash of the block they belong to. After a restart the node reloads
+the state from here and only re-executes blocks above the stored height.
+
+Schema:
+
+    accounts(public_key PRIMARY KEY, balance, nonce)
+    meta(key PRIMARY KEY, value)   -- 'height', 'block_hash'
+"""
+
+import sqlite3
+import threading
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from blockchain.utils.logger import logger
+
+ITER_BATCH_SIZE = 10000
+
+
+class AccountStore:
+    """
+    Persistent account table with per-block batched writes
+
+    Args:
+        path: SQLite database file (':memory:' for a throwaway store)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS accounts ('
+                                'public_key TEXT PRIMARY KEY, balance REAL NOT NULL, nonce INTEGER NOT NULL)')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+
+        self.height: Optional[int] = None  # Height of the last committed block
+        self.block_hash: Optional[str] = None
+        meta = dict(self.connection.execute('SELECT key, value FROM meta'))
+        if 'height' in meta:
+            self.height = int(meta['height'])
+            self.block_hash = meta.get('block_hash')
+
+        self.stats = {
+            'batches_written': 0,
+            'accounts_written': 0,
+            'accounts_read': 0
+        }
+        logger.info(f"Account store opened at {path} "
+                    f"(height {self.height if self.height is not None else 'empty'})")
+
+    # Reading
+
+    def load(self, public_key: str) -> Optional[Tuple[float, int]]:
+        """(balance, nonce) of a stored account, or None"""
+        with self.lock:
+            row = self.connection.execute('SELECT balance, nonce FROM accounts WHERE public_key = ?',
+                                          (public_key,)).fetchone()
+            self.stats['accounts_read'] += 1
+        return row
+
+    def contains(self, public_key: str) -> bool:
+        with self.lock:
+            return self.connection.execute('SELECT 1 FROM accounts WHERE public_key = ?',
+                                           (public_key,)).fetchone() is not None
+
+    def iter_accounts(self) -> Iterator[Tuple[str, float, int]]:
+        """Every stored (public_key, balance, nonce), in public-key order, fetched in batches"""
+        last_key = ''
+        while True:
+            with self.lock:
+                rows = self.connection.execute(
+                    'SELECT public_key, balance, nonce FROM accounts WHERE public_key > ? '
+                    'ORDER BY public_key LIMIT ?', (last_key, ITER_BATCH_SIZE)).fetchall()
+            if not rows:
+                return
+            yield from rows
+            last_key = rows[-1][0]
+
+    def read_batches(self, batch_size: int = ITER_BATCH_SIZE) -> Iterator[List[Tuple[str, float, int]]]:
+        """
+        Every stored row in public-key order, batch_size rows at a time, all
+        from one read transaction on a connection of its own: commits made
+        while the batches are consumed are not seen, and are not blocked.
+        The transaction's view is fixed before this returns.
+
+        A ':memory:' store can't be opened twice, so it is paged with
+        iter_accounts() instead, which is consistent per batch only.
+        """
+        if self.path == ':memory:':
+            rows = self.iter_accounts()
+            return iter(lambda: [row for _, row in zip(range(batch_size), rows)], [])
+
+        connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        try:
+            connection.execute('BEGIN')
+            cursor = connection.execute('SELECT public_key, balance, nonce FROM accounts ORDER BY public_key')
+            first_batch = cursor.fetchmany(batch_size)  # Pins the snapshot the whole read sees
+        except Exception:
+            connection.close()
+            raise
+        return self._drain(connection, cursor, first_batch, batch_size)
+
+    @staticmethod
+    def _drain(connection, cursor, batch, batch_size: int) -> Iterator[List[Tuple[str, float, int]]]:
+        try:
+            while batch:
+                yield batch
+                batch = cursor.fetchmany(batch_size)
+        finally:
+            connection.rollback()
+            connection.close()
+
+    def count(self) -> int:
+        with self.lock:
+            return self.connection.execute('SELECT COUNT(*) FROM accounts').fetchone()[0]
+
+    # Writing
+
+    def write_batch(self, rows: List[Tuple[str, float, int]], height: Optional[int] = None,
+                    block_hash: Optional[str] = None, deleted: Iterable[str] = ()):
+        """Upsert rows (and delete keys) in one transaction, recording the block they belong to"""
+        deleted = list(deleted)
+        with self.lock:
+            cursor = self.connection.cursor()
+            cursor.execute('BEGIN')
+            try:
+                if rows:
+                    cursor.executemany('INSERT INTO accounts (public_key, balance, nonce) VALUES (?, ?, ?) '
+                                       'ON CONFLICT(public_key) DO UPDATE SET '
+                                       'balance = excluded.balance, nonce = excluded.nonce', rows)
+                if deleted:
+                    cursor.executemany('DELETE FROM accounts WHERE public_key = ?',
+                                       [(public_key,) for public_key in deleted])
+                if height is not None:
+                    cursor.executemany('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                                       [('height', str(height)), ('block_hash', block_hash)])
+                cursor.execute('COMMIT')
+            except Exception:
+                cursor.execute('ROLLBACK')
+                raise
+            if height is not None:
+                self.height = height
+                self.block_hash = block_hash
+            self.stats['batches_written'] += 1
+            self.stats['accounts_written'] += len(rows)
+
+    def replace_all(self, rows: Iterable[Tuple[str, float, int]], height: Optional[int] = None,
+                    block_hash: Optional[str] = None):
+        """Swap the whole table for rows in one transaction (snapshot installs, rebuilds)"""
+        with self.lock:
+            cursor = self.connection.cursor()
+            cursor.execute('BEGIN')
+            try:
+                cursor.execute('DELETE FROM accounts')
+                cursor.execute('DELETE FROM meta')
+                cursor.executemany('INSERT INTO accounts (public_key, balance, nonce) VALUES (?, ?, ?)', rows)
+                if height is not None:
+                    cursor.executemany('INSERT INTO meta (key, value) VALUES (?, ?)',
+                                       [('height', str(height)), ('block_hash', block_hash)])
+                cursor.execute('COMMIT')
+            except Exception:
+                cursor.execute('ROLLBACK')
+                raise
+            self.height = height
+            self.block_hash = block_hash if height is not None else None
+            self.stats['batches_written'] += 1
+
+    def clear(self):
+        self.replace_all([])
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def get_stats(self) -> dict:
+        return {
+            'path': self.path,
+            'height': self.height,
+            **self.stats
+        }
@@ -2,6 +2,8 @@ import copy
 import time
 import json
 
+from blockchain.transaction.transaction import Transaction
+
 
 class Block:
     def __init__(self, transactions, last_hash, block_proposer, block_count):
@@ -26,6 +28,29 @@ class Block:
         data["transactions"] = transactions_readable
         return data
 
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuild a block from its to_dict() representation.
+
+        Solana-style metadata added after creation (poh_sequence,
+        state_root_hash, ...) is restored as plain attributes. Raises
+        ValueError for keys that are not strings or that would shadow a
+        class attribute such as payload or to_dict.
+        """
+        data = dict(data)
+        for key in data:
+            if not isinstance(key, str) or hasattr(cls, key):
+                raise ValueError(f"Invalid attribute {key!r} for {cls.__name__}")
+        transactions = [
+            Transaction.from_dict(transaction) if isinstance(transaction, dict) else transaction
+            for transaction in data.pop("transactions", [])
+        ]
+        block = cls(transactions, data.pop("last_hash", ""), data.pop("forger", ""), data.pop("block_count", 0))
+        for key, value in data.items():
+            setattr(block, key, value)
+        return block
+
     def payload(self):
         """
         Generate the block payload for signing/verification.
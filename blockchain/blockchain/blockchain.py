@@ -1,21 +1,30 @@
 import logging
+import os
 import time
 import threading
-from typing import Dict, Optional, List
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, List, Tuple
 
 from blockchain.block import Block
 from blockchain.quantum_consensus.quantum_annealing_consensus import QuantumAnnealingConsensus
 from blockchain.consensus.leader_schedule import LeaderSchedule
 from blockchain.account_model import AccountModel
+from blockchain.account_store import AccountStore
 from blockchain.transaction.wallet import Wallet
 from blockchain.utils.helpers import BlockchainUtils
 from blockchain.utils.logger import logger
+from blockchain.utils.node_client import NodeClientError, get_node_client
+from blockchain.p2p.codec import EncodedValue, WireCodec
+from blockchain.p2p.message import BlockHeader
+from blockchain.ledger import BlockLedger
 from blockchain.config.block_config import BlockConfig
 from blockchain.poh_sequencer import PoHSequencer
 from blockchain.turbine_protocol import TurbineProtocol
 from blockchain.gulf_stream import GulfStreamNode
+from blockchain.transaction.transaction_intake import TransactionIntake
 from gossip_protocol.gossip_node import GossipNode, GossipConfig
 from gossip_protocol.crds import ContactInfo
+from gossip_protocol.vote_tally import VoteTally
 
 # Import performance monitoring framework
 try:
@@ -36,10 +45,28 @@ class Blockchain:
     TRANSACTION_BATCH_SIZE = 100  # Process 100 transactions per batch
     MAX_BATCH_WAIT_TIME = 0.05    # Max 50ms wait for batch to fill
 
-    def __init__(self, genesis_public_key=None):
-        """Initialize blockchain with genesis block"""
-        self.blocks = []
-        self.account_model = AccountModel()
+    # Recently requested blocks kept pre-encoded for GETDATA serving
+    ENCODED_BLOCK_CACHE_SIZE = 256
+    
+    # Newest blocks kept in memory when the chain is stored on disk
+    LEDGER_TAIL_BLOCKS = 1024
+    
+    # Hot accounts kept in memory when the account state is stored on disk
+    ACCOUNT_CACHE_SIZE = 100000
+
+    def __init__(self, genesis_public_key=None, data_dir=None):
+        """
+        Initialize blockchain with genesis block.
+        With data_dir the chain is stored in an on-disk ledger there and the
+        account state in a SQLite store next to it; on restart both are
+        reopened and only blocks above the stored state are re-executed.
+        """
+        self.blocks = BlockLedger(data_dir, tail_size=self.LEDGER_TAIL_BLOCKS)
+        self.block_index: Dict[str, int] = self.blocks.hash_index  # block hash -> position in self.blocks
+        self.block_hashes = self.blocks.hashes  # position -> block hash
+        self.encoded_blocks: "OrderedDict[str, EncodedValue]" = OrderedDict()  # LRU of wire-encoded blocks
+        self.account_model = AccountModel(store=self._open_account_store(data_dir),
+                                          cache_size=self.ACCOUNT_CACHE_SIZE)
         
         # Initialize leader schedule
         self.leader_schedule = LeaderSchedule()
@@ -54,14 +81,19 @@ class Blockchain:
         # Initialize PoH sequencer for transaction ordering
         self.poh_sequencer = PoHSequencer()
         
-        # Initialize Turbine protocol for block propagation
-        self.turbine_protocol = TurbineProtocol()
+        # Initialize Turbine protocol for block propagation; blocks are shredded
+        # with their height as the slot, so the chain length is the local slot clock
+        self.turbine_protocol = TurbineProtocol(slot_clock=lambda: len(self.blocks))
+        
+        # Every ingress path queues transactions here once; block packing takes them
+        self.transaction_intake = TransactionIntake(self.leader_schedule.slot_duration_seconds)
         
         # Initialize Gulf Stream for transaction forwarding
         self.gulf_stream_node = GulfStreamNode(self)
         
         # Initialize gossip protocol for leader schedule distribution
         self.gossip_node = None  # Will be initialized when node details are available
+        self.vote_tally = VoteTally()  # Stake-weighted votes per (slot, block hash), shared with gossip
         
         # CRITICAL FIX: Always initialize quantum consensus for leader selection
         # Load bootstrap validator from genesis configuration for consensus
@@ -84,13 +116,17 @@ class Blockchain:
                 logger.warning(f"Failed to initialize performance monitoring: {e}")
         
         self.create_genesis_block()
+        if self.blocks.persistent and len(self.blocks):
+            self._replay_ledger()
     
     def create_genesis_block(self):
         """Create the initial genesis block using Solana-style genesis configuration"""
         from blockchain.transaction.wallet import Wallet
         from blockchain.genesis_config import GenesisConfig
         
-        if len(self.blocks) == 0:
+        # A reopened ledger already holds genesis, but the configuration is still
+        # loaded for the genesis balances and validator registration
+        if len(self.blocks) == 0 or self.blocks.persistent:
             # SOLANA-STYLE FIX: Load shared genesis configuration
             # This ensures ALL nodes start with identical genesis block
             
@@ -107,8 +143,7 @@ class Blockchain:
                 creation_time = genesis_data["creation_time"]
                 
                 # Initialize account model with genesis allocations
-                for public_key, balance in genesis_data["accounts"].items():
-                    self.account_model.update_balance(public_key, balance)
+                self._allocate_genesis_accounts(genesis_data["accounts"])
                 
                 logger.info({
                     "message": "Creating genesis block from Solana-style configuration",
@@ -134,8 +169,7 @@ class Blockchain:
                 genesis_hash = genesis_data["genesis_hash"]
                 
                 # Initialize account model with genesis allocations
-                for public_key, balance in genesis_data["accounts"].items():
-                    self.account_model.update_balance(public_key, balance)
+                self._allocate_genesis_accounts(genesis_data["accounts"])
                 
                 logger.info({
                     "message": "New genesis configuration created and loaded",
@@ -159,7 +193,10 @@ class Blockchain:
             if 'creation_time' in locals():
                 genesis_block.timestamp = creation_time
             
-            self.blocks.append(genesis_block)
+            if len(self.blocks) == 0:
+                self._append_block(genesis_block)
+            elif self.block_hashes[0] != BlockchainUtils.hash(genesis_block.payload()).hex():
+                logger.error("Stored ledger has a different genesis block than the genesis configuration")
             
             # CRITICAL FIX: Initialize quantum consensus with genesis configuration
             if not self._quantum_consensus_initialized and 'genesis_data' in locals():
@@ -193,7 +230,6 @@ class Blockchain:
                     logger.error(f"Failed to initialize quantum consensus: {e}")
             
             # Log genesis block info for debugging sync issues
-            from blockchain.utils.helpers import BlockchainUtils
             actual_genesis_hash = BlockchainUtils.hash(genesis_block.payload()).hex()
             logger.info({
                 "message": "SOLANA-STYLE GENESIS BLOCK CREATED",
@@ -312,7 +348,103 @@ class Blockchain:
             from blockchain.sealevel_executor import SealevelExecutor
             executor = SealevelExecutor()
             executor.execute_transactions_parallel(block.transactions, self.account_model)
-        self.blocks.append(block)
+            # Queued copies are skipped, and later deliveries rejected
+            self.transaction_intake.remove(block.transactions)
+        self._append_block(block)
+
+    def _append_block(self, block):
+        """Append a block to the chain, index it by hash and commit its account changes"""
+        block_hash = BlockchainUtils.hash(block.payload()).hex()
+        self.blocks.append(block, block_hash)
+        self.account_model.commit_block(len(self.blocks) - 1, block_hash)
+
+    def replace_blocks(self, blocks: List[Block]):
+        """Replace the whole chain, e.g. with the blocks of a snapshot"""
+        block_hashes = [BlockchainUtils.hash(block.payload()).hex() for block in blocks]
+        self.blocks.reset(blocks, block_hashes)
+        self.encoded_blocks.clear()
+        if block_hashes:
+            self.account_model.commit_block(len(block_hashes) - 1, block_hashes[-1])
+
+    def install_account_state(self, rows: Iterable[Tuple[str, float, int]]):
+        """Adopt a staged account state (e.g. from a snapshot), streaming it into the store if there is one"""
+        store = self.account_model.store
+        if store is not None:
+            tip = len(self.blocks) - 1
+            store.replace_all(rows, tip, self.block_hashes[tip] if tip >= 0 else None)
+            account_model = AccountModel(store=store, cache_size=self.account_model.cache_size)
+        else:
+            account_model = AccountModel()
+            for public_key, balance, nonce in rows:
+                account_model.create_account(public_key, balance).nonce = nonce
+        self.account_model = account_model
+
+    def _open_account_store(self, data_dir: Optional[str]) -> Optional[AccountStore]:
+        """Open the persisted account state, discarding it if it doesn't match the ledger"""
+        if data_dir is None:
+            return None
+        store = AccountStore(os.path.join(data_dir, 'state.db'))
+        height = store.height
+        if height is not None and (height >= len(self.blocks) or self.block_hashes[height] != store.block_hash):
+            logger.warning(f"Stored account state (height {height}) does not match the ledger "
+                           f"({len(self.blocks)} blocks); rebuilding it from the blocks")
+            store.clear()
+        return store
+
+    def _allocate_genesis_accounts(self, accounts: Dict[str, float]):
+        # A reloaded account state already includes the genesis allocations
+        if self.account_model.committed_height is not None:
+            return
+        for public_key, balance in accounts.items():
+            self.account_model.update_balance(public_key, balance)
+
+    def _replay_ledger(self):
+        """Bring the account state up to a reopened ledger, re-executing only blocks above the stored state"""
+        from blockchain.sealevel_executor import SealevelExecutor
+        executor = SealevelExecutor()
+        started = time.time()
+        loaded = self.account_model.committed_height
+        if loaded is None:
+            self.account_model.commit_block(0, self.block_hashes[0])  # Genesis allocations
+            start = 1
+        else:
+            start = loaded + 1
+        for height in range(start, len(self.blocks)):
+            block = self.blocks[height]
+            if block.transactions:
+                executor.execute_transactions_parallel(block.transactions, self.account_model)
+            self.account_model.commit_block(height, self.block_hashes[height])
+        logger.info(f"Account state loaded at height {loaded if loaded is not None else 0}; "
+                    f"replayed {len(self.blocks) - start} stored blocks in {time.time() - started:.2f}s")
+
+    def get_block_headers(self, start_height: int, count: int) -> List[BlockHeader]:
+        """Headers of the blocks at start_height .. start_height + count - 1 that exist"""
+        end = min(len(self.blocks), start_height + count)
+        return [BlockHeader.from_block(self.blocks[height], self.block_hashes[height])
+                for height in range(max(0, start_height), end)]
+
+    def get_block_by_hash(self, block_hash: str) -> Optional[Block]:
+        position = self.block_index.get(block_hash)
+        return self.blocks[position] if position is not None else None
+
+    def get_encoded_block(self, block_hash: str, cache: bool = True) -> Optional[EncodedValue]:
+        """
+        Wire encoding of a chain block, cached so repeated requests skip serialisation.
+        Bulk readers (range sync) pass cache=False so they don't evict the hot blocks.
+        """
+        encoded = self.encoded_blocks.get(block_hash)
+        if encoded is not None:
+            self.encoded_blocks.move_to_end(block_hash)
+            return encoded
+        block = self.get_block_by_hash(block_hash)
+        if block is None:
+            return None
+        encoded = WireCodec.encode_value(block)
+        if cache:
+            self.encoded_blocks[block_hash] = encoded
+            if len(self.encoded_blocks) > self.ENCODED_BLOCK_CACHE_SIZE:
+                self.encoded_blocks.popitem(last=False)
+        return encoded
 
     def to_dict(self):
         data = {}
@@ -569,12 +701,13 @@ class Blockchain:
         # If no quantum consensus available, return genesis public key or None
         return self.genesis_public_key
     
-    def submit_transaction(self, transaction):
+    def submit_transaction(self, transaction, source: str = 'local'):
         """
         Submit a transaction to the network with Gulf Stream forwarding.
         
         This is the entry point for transactions into the blockchain network.
-        Transactions are automatically forwarded to upcoming leaders.
+        Transactions are queued in the transaction intake (source names the
+        ingress path) and forwarded to upcoming leaders.
         """
         # Record transaction ingress with performance monitoring
         if self.performance_monitor:
@@ -588,7 +721,7 @@ class Blockchain:
             
             # Process transaction through Gulf Stream
             if self.gulf_stream_node:
-                self.gulf_stream_node.receive_transaction(transaction)
+                self.gulf_stream_node.receive_transaction(transaction, source)
             else:
                 logger.warning("Gulf Stream node not initialized")
             
@@ -625,17 +758,26 @@ class Blockchain:
         Should be called regularly to maintain the 2-minute advance schedule.
         """
         if self.quantum_consensus:
-            self.leader_schedule.update_schedule(self.quantum_consensus)
+            # Schedules already gossiped by peers are decoded rather than recomputed
+            if self.gossip_node:
+                current_epoch = self.leader_schedule.current_epoch
+                for epoch in (current_epoch, current_epoch + 1):
+                    self.leader_schedule.adopt_schedule(epoch, self.gossip_node.get_epoch_schedule(epoch))
             
-            # Automatically publish updated leader schedule to gossip network
+            self.leader_schedule.update_schedule(self.quantum_consensus)
+
+            # Turbine reshuffles its stake-weighted tree once per epoch
+            self.turbine_protocol.set_epoch(self.leader_schedule.current_epoch)
+
+            # Automatically publish updated leader schedules to gossip network
+            # (unchanged schedules are not republished)
             if self.gossip_node:
                 try:
                     current_epoch = self.leader_schedule.current_epoch
-                    # Get current schedule - use current_schedule directly
-                    slot_leaders = self.leader_schedule.current_schedule
-                    if slot_leaders:
-                        self.publish_leader_schedule_to_gossip(current_epoch, slot_leaders)
-                        logger.debug(f"Auto-published leader schedule to gossip network: epoch {current_epoch}, {len(slot_leaders)} slots")
+                    for epoch, slot_leaders in ((current_epoch, self.leader_schedule.current_schedule),
+                                                (current_epoch + 1, self.leader_schedule.next_schedule)):
+                        if slot_leaders:
+                            self.publish_leader_schedule_to_gossip(epoch, slot_leaders)
                 except Exception as e:
                     logger.warning(f"Failed to auto-publish leader schedule to gossip: {e}")
             
@@ -745,7 +887,7 @@ class Blockchain:
         
         # Get transactions for this leader
         if use_gulf_stream:
-            # Get all available transactions (local + Gulf Stream forwarded)
+            # Take every queued transaction, whichever path it arrived on
             available_transactions = self.gulf_stream_node.get_transactions_for_leader(proposer_public_key)
         else:
             # Fallback to empty transaction pool for testing
@@ -883,7 +1025,13 @@ class Blockchain:
             "timestamp": new_block.timestamp
         })
         
-        self.blocks.append(new_block)
+        self._append_block(new_block)
+
+        # Transactions left out (not covered yet) go back to the intake for a later block
+        if len(ordered_transactions) < len(available_transactions):
+            included = {transaction.id for transaction in ordered_transactions}
+            self.transaction_intake.requeue(
+                [transaction for transaction in available_transactions if transaction.id not in included])
         
         # Record block finalization
         if self.performance_monitor:
@@ -914,6 +1062,7 @@ class Blockchain:
             
             # Broadcast block using Turbine protocol
             transmission_tasks = self.broadcast_block_with_turbine(new_block, proposer_public_key)
+            nodes_reached = 0
             
             # CRITICAL FIX: Execute transmission tasks over actual network
             if transmission_tasks:
@@ -938,9 +1087,12 @@ class Blockchain:
                             'successful_transmissions': network_results.get('successful_transmissions', 0)
                         }
                     )
+                nodes_reached = network_results.get('successful_transmissions', 0)
             
-            # Force immediate block distribution to all known nodes (fallback)
-            self._force_block_distribution(new_block)
+            # Receivers rebuild the block from shreds, so full-block HTTP
+            # distribution is only a fallback when Turbine reached nobody
+            if not nodes_reached:
+                self._force_block_distribution(new_block)
             
             logger.info(f"CRITICAL FIX: Block {new_block.block_count} automatically propagated to network")
             
@@ -998,6 +1150,10 @@ class Blockchain:
     def register_turbine_validator(self, validator_id: str, stake_weight: float = 1.0, network_address: str = None):
         """Register a validator in the Turbine propagation tree"""
         self.turbine_protocol.register_validator(validator_id, stake_weight, network_address)
+        # The same stake weights votes and the gossip active set
+        self.vote_tally.set_stake(validator_id, stake_weight)
+        if self.gossip_node:
+            self.gossip_node.set_peer_stake(validator_id, stake_weight)
         logger.info(f"Validator registered in Turbine tree: {validator_id} (stake: {stake_weight})")
     
     def process_turbine_shred(self, shred_data: bytes, receiving_node_id: str):
@@ -1017,12 +1173,10 @@ class Blockchain:
             shred = Shred.from_bytes(shred_data)
             forwarding_tasks = self.turbine_protocol.receive_shred(shred, receiving_node_id)
             
-            # Check if block is now reconstructed
+            # The node's TurbineBlockPipeline assembles and validates the block
+            # from the decoded sets; here we only report how far decoding got
             status = self.turbine_protocol.get_block_reconstruction_status(shred.block_hash)
-            
-            if status['is_reconstructed'] and status['block_data']:
-                logger.info(f"Block reconstructed from Turbine shreds: {shred.block_hash[:16]}...")
-                # Here you would validate and add the reconstructed block to the blockchain
+            status['all_sets_decoded'] = status['fec_sets_decoded'] >= shred.fec_set_count
                 
             return {
                 'forwarding_tasks': forwarding_tasks,
@@ -1164,30 +1318,21 @@ class Blockchain:
                 timestamp=time.time()
             )
             
-            # Add vote to gossip network for distribution
+            # Add vote to gossip network for distribution; the gossip node
+            # counts it in the shared vote tally
+            recorded = False
             if self.gossip_node:
                 try:
-                    self.gossip_node.crds.insert_vote(vote)
+                    recorded = self.gossip_node.record_vote(vote)
                     logger.info(f"Vote broadcasted for block {block.block_count} by healthy validator {validator_node_id[:20]}...")
                 except Exception as e:
                     logger.warning(f"Failed to broadcast vote via gossip: {e}")
+            if not recorded:
+                self.vote_tally.add_vote(vote.public_key, vote.slot, vote.block_hash)
             
-            # Store vote locally for consensus tracking
-            if not hasattr(self, 'vote_tracker'):
-                self.vote_tracker = {}
-            
-            block_hash = vote.block_hash
-            if block_hash not in self.vote_tracker:
-                self.vote_tracker[block_hash] = []
-            
-            self.vote_tracker[block_hash].append({
-                'validator_id': validator_node_id,
-                'vote': vote,
-                'state_root': validator_state_root,
-                'timestamp': vote.timestamp
-            })
-            
-            logger.info(f"Vote recorded for block {block.block_count}: {len(self.vote_tracker[block_hash])} total votes")
+            status = self.vote_tally.get_block_status(vote.block_hash, vote.slot)
+            logger.info(f"Vote recorded for block {block.block_count}: {status['votes']} votes, "
+                        f"{status['stake_fraction']:.1%} of stake")
             
         except Exception as e:
             logger.error(f"Failed to create and broadcast vote: {e}")
@@ -1231,50 +1376,25 @@ class Blockchain:
         """
         Get voting status for a specific block.
         
-        Returns information about how many validators have voted for the block
-        and whether it has reached consensus threshold.
+        Returns how much stake has voted for the block, whether it has a
+        supermajority (more than 2/3 of known stake) and how many blocks
+        have been confirmed on top of it. Answered from the incremental
+        vote tally without scanning votes.
         """
-        if not hasattr(self, 'vote_tracker') or block_hash not in self.vote_tracker:
-            return {
-                'block_hash': block_hash,
-                'total_votes': 0,
-                'unique_validators': 0,
-                'consensus_reached': False,
-                'votes': []
-            }
-        
-        votes = self.vote_tracker[block_hash]
-        unique_validators = len(set(vote['validator_id'] for vote in votes))
-        
-        # Healthy-node-based consensus: require majority of HEALTHY validators only
-        if self.quantum_consensus:
-            # Filter to only healthy/active validators (as per specification)
-            current_time = time.time()
-            healthy_validators = []
-            for node_id, node_data in self.quantum_consensus.nodes.items():
-                # Consider node healthy if seen recently and has good uptime
-                node_uptime = self.quantum_consensus.calculate_uptime(node_id)
-                last_seen_diff = current_time - node_data.get('last_seen', 0)
-                
-                if node_uptime > 0.5 and last_seen_diff < self.quantum_consensus.max_delay_tolerance:
-                    healthy_validators.append(node_id)
-            
-            total_healthy_validators = len(healthy_validators)
-            logger.info(f"Consensus calculation: {total_healthy_validators} healthy validators of {len(self.quantum_consensus.nodes)} total")
-        else:
-            total_healthy_validators = 1
-            
-        consensus_threshold = (total_healthy_validators * 2 // 3) + 1  # 2/3 + 1 majority of HEALTHY nodes
-        consensus_reached = unique_validators >= consensus_threshold
-        
+        status = self.vote_tally.get_block_status(block_hash)
         return {
             'block_hash': block_hash,
-            'total_votes': len(votes),
-            'unique_validators': unique_validators,
-            'consensus_threshold': consensus_threshold,
-            'total_healthy_validators': total_healthy_validators if hasattr(locals(), 'total_healthy_validators') else 1,
-            'consensus_reached': consensus_reached,
-            'votes': [{'validator_id': v['validator_id'][:20] + "...", 'timestamp': v['timestamp']} for v in votes]
+            'slot': status['slot'],
+            'total_votes': status['votes'],
+            'unique_validators': status['votes'],  # One counted vote per validator per slot
+            'voted_stake': status['voted_stake'],
+            'total_stake': status['total_stake'],
+            'stake_fraction': status['stake_fraction'],
+            'consensus_reached': status['supermajority'],
+            'confirmation_depth': status['confirmation_depth'],
+            'rooted': status['rooted'],
+            'votes': [{'validator_id': validator_id[:20] + "..."}
+                      for validator_id in self.vote_tally.get_voters(block_hash)]
         }
     
     def _activate_gossip_protocol(self):
@@ -1376,8 +1496,6 @@ class Blockchain:
             Dict with transmission results
         """
         try:
-            import requests
-            
             results = {
                 'total_tasks': len(transmission_tasks),
                 'successful_transmissions': 0,
@@ -1387,6 +1505,7 @@ class Blockchain:
             }
             
             api_base_port = 11000
+            sends = []  # (target_node, node_port, shred count, url, payload)
             
             for task in transmission_tasks:
                 try:
@@ -1417,33 +1536,35 @@ class Blockchain:
                         continue
                     
                     # Send shreds via REST API
-                    url = f"http://127.0.0.1:{node_port}/api/v1/blockchain/turbine/shreds"
+                    url = f"http://127.0.0.1:{node_port}/api/v1/blockchain/turbine/shreds/"
                     payload = {
                         'shreds': shred_data,
                         'sender_node': 'leader_node',
                         'transmission_time': time.time(),
                         'turbine_protocol_version': '1.0'
                     }
-                    
-                    response = requests.post(url, json=payload, timeout=5)
-                    
-                    if response.status_code in [200, 201]:
-                        results['successful_transmissions'] += 1
-                        results['shreds_transmitted'] += len(shred_data)
-                        results['nodes_reached'].append(target_node[:20] + "...")
-                        
-                        logger.debug(f"CRITICAL FIX: Sent {len(shred_data)} shreds to {target_node[:20]}... on port {node_port}")
-                    else:
-                        results['failed_transmissions'] += 1
-                        logger.warning(f"Failed to send shreds to port {node_port}: HTTP {response.status_code}")
+                    sends.append((target_node, node_port, len(shred_data), url, payload))
                 
-                except requests.exceptions.ConnectionError:
-                    results['failed_transmissions'] += 1
-                    logger.debug(f"Node on port {node_port} not reachable for Turbine transmission")
                 except Exception as e:
                     results['failed_transmissions'] += 1
                     logger.warning(f"Turbine transmission failed for {target_node}: {e}")
             
+            # All targets at once over pooled connections
+            responses = get_node_client().fan_out([('POST', url, payload) for _, _, _, url, payload in sends], timeout=5)
+            for (target_node, node_port, shred_count, _, _), response in zip(sends, responses):
+                if isinstance(response, NodeClientError):
+                    results['failed_transmissions'] += 1
+                    logger.debug(f"Node on port {node_port} not reachable for Turbine transmission: {response}")
+                elif response.status_code in [200, 201]:
+                    results['successful_transmissions'] += 1
+                    results['shreds_transmitted'] += shred_count
+                    results['nodes_reached'].append(target_node[:20] + "...")
+                    
+                    logger.debug(f"CRITICAL FIX: Sent {shred_count} shreds to {target_node[:20]}... on port {node_port}")
+                else:
+                    results['failed_transmissions'] += 1
+                    logger.warning(f"Failed to send shreds to port {node_port}: HTTP {response.status_code}")
+            
             return results
             
         except Exception as e:
@@ -1487,9 +1608,6 @@ class Blockchain:
         This is an emergency fix for the 90% network synchronization failure.
         """
         try:
-            import requests
-            import json
-            
             distributed_count = 0
             api_base_port = 11000
             
@@ -1503,36 +1621,29 @@ class Blockchain:
                 'signature': block.signature
             }
             
-            # Try to distribute to all known nodes
-            for i in range(10):  # First 10 nodes
-                api_port = api_base_port + i
-                
-                # Skip self if this is the leader
-                if api_port == 11000:  # Assuming leader is on port 11000
-                    continue
-                
-                try:
-                    # Send block via REST API to the correct sync endpoint
-                    sync_payload = {
-                        'blocks_data': [block_data],  # Send as array for sync endpoint
-                        'source_node': 'leader',
-                        'sync_type': 'emergency_block_distribution'
-                    }
-                    
-                    response = requests.post(
-                        f'http://127.0.0.1:{api_port}/api/v1/blockchain/sync/',
-                        json=sync_payload,
-                        timeout=5
-                    )
-                    
-                    if response.status_code in [200, 201]:
-                        distributed_count += 1
-                        logger.info(f"Block {block.block_count} distributed to Node {i+1}")
-                    else:
-                        logger.warning(f"Failed to distribute to Node {i+1}: HTTP {response.status_code}")
-                        
-                except Exception as e:
-                    logger.debug(f"Node {i+1} not reachable for block distribution: {e}")
+            # Send block via REST API to the correct sync endpoint
+            sync_payload = {
+                'blocks_data': [block_data],  # Send as array for sync endpoint
+                'source_node': 'leader',
+                'sync_type': 'emergency_block_distribution'
+            }
+            
+            # Distribute to all known nodes (first 10) concurrently,
+            # skipping self if this is the leader (assumed to be on port 11000)
+            node_indexes = [i for i in range(10) if api_base_port + i != 11000]
+            responses = get_node_client().fan_out(
+                [('POST', f'http://127.0.0.1:{api_base_port + i}/api/v1/blockchain/sync/', sync_payload)
+                 for i in node_indexes],
+                timeout=5
+            )
+            for i, response in zip(node_indexes, responses):
+                if isinstance(response, NodeClientError):
+                    logger.debug(f"Node {i+1} not reachable for block distribution: {response}")
+                elif response.status_code in [200, 201]:
+                    distributed_count += 1
+                    logger.info(f"Block {block.block_count} distributed to Node {i+1}")
+                else:
+                    logger.warning(f"Failed to distribute to Node {i+1}: HTTP {response.status_code}")
             
             logger.info(f"CRITICAL FIX: Block {block.block_count} distributed to {distributed_count} nodes")
             
@@ -1546,65 +1657,12 @@ class Blockchain:
         except Exception as e:
             logger.error(f"CRITICAL ERROR: Force block distribution failed: {e}")
     
-    def create_snapshot(self) -> Dict:
-        """
-        CRITICAL FIX: Create a blockchain snapshot for new node synchronization.
-        
-        This implements the missing snapshot mechanism identified in the analysis.
-        """
-        try:
-            snapshot_data = {
-                'timestamp': time.time(),
-                'block_height': len(self.blocks),
-                'latest_block_hash': BlockchainUtils.hash(self.blocks[-1].payload()).hex() if self.blocks else None,
-                'account_state': {},
-                'leader_schedule': {},
-                'network_info': {}
-            }
-            
-            # Capture account state
-            if hasattr(self.account_model, 'balances'):
-                snapshot_data['account_state'] = {
-                    'balances': self.account_model.balances.copy(),
-                    'total_accounts': len(self.account_model.balances)
-                }
-            
-            # Capture leader schedule
-            if self.leader_schedule:
-                snapshot_data['leader_schedule'] = {
-                    'current_epoch': getattr(self.leader_schedule, 'current_epoch', 0),
-                    'current_schedule': getattr(self.leader_schedule, 'current_schedule', {}),
-                    'epoch_start_time': getattr(self.leader_schedule, 'epoch_start_time', time.time())
-                }
-            
-            # Capture network info
-            if self.quantum_consensus:
-                snapshot_data['network_info'] = {
-                    'total_nodes': len(self.quantum_consensus.nodes),
-                    'active_nodes': len([n for n, d in self.quantum_consensus.nodes.items() 
-                                       if time.time() - d.get('last_seen', 0) < 60]),
-                    'consensus_type': 'quantum_annealing'
-                }
-            
-            # Capture recent blocks (last 100 for quick sync)
-            recent_blocks = self.blocks[-100:] if len(self.blocks) > 100 else self.blocks
-            snapshot_data['recent_blocks'] = [block.to_dict() if hasattr(block, 'to_dict') else block 
-                                            for block in recent_blocks]
-            
-            logger.info(f"CRITICAL FIX: Snapshot created - {snapshot_data['block_height']} blocks, "
-                       f"{len(snapshot_data.get('account_state', {}).get('balances', {}))} accounts")
-            
-            return snapshot_data
-            
-        except Exception as e:
-            logger.error(f"CRITICAL ERROR: Snapshot creation failed: {e}")
-            return {}
-    
     def apply_snapshot(self, snapshot_data: Dict) -> bool:
         """
         CRITICAL FIX: Apply a blockchain snapshot to synchronize this node.
         
-        This implements the missing snapshot application mechanism.
+        Takes the legacy single-dict format; streamed chunked snapshots are
+        loaded with blockchain.snapshot.SnapshotReceiver.
         """
         try:
             logger.info("CRITICAL FIX: Applying blockchain snapshot for synchronization")
@@ -1625,20 +1683,8 @@ class Blockchain:
             
             # Apply recent blocks
             if 'recent_blocks' in snapshot_data:
-                # Clear current blocks and apply snapshot blocks
-                self.blocks = []
-                for block_data in snapshot_data['recent_blocks']:
-                    # Reconstruct block object
-                    from blockchain.block import Block
-                    block = Block(
-                        transactions=block_data.get('transactions', []),
-                        forger=block_data.get('forger', ''),
-                        block_count=block_data.get('block_count', 0),
-                        last_hash=block_data.get('last_hash', '')
-                    )
-                    block.timestamp = block_data.get('timestamp', time.time())
-                    block.signature = block_data.get('signature', '')
-                    self.blocks.append(block)
+                # Replace current blocks with the snapshot blocks
+                self.replace_blocks([Block.from_dict(block_data) for block_data in snapshot_data['recent_blocks']])
                 
                 logger.info(f"Applied {len(self.blocks)} blocks from snapshot")
             
@@ -1851,7 +1897,8 @@ class Blockchain:
         logger.info("Validation caches cleared")
     
     def initialize_gossip_node(self, public_key: str, ip_address: str = "127.0.0.1", 
-                              gossip_port: int = 12000, tpu_port: int = 13000, tvu_port: int = 14000):
+                              gossip_port: int = 12000, tpu_port: int = 13000, tvu_port: int = 14000,
+                              signing_key=None):
         """
         Initialize the gossip protocol node for leader schedule distribution.
         
@@ -1861,6 +1908,8 @@ class Blockchain:
             gossip_port: Port for gossip protocol (12000-12999)
             tpu_port: Transaction Processing Unit port (13000-13999)
             tvu_port: Transaction Validation Unit port (14000-14999)
+            signing_key: Private key matching public_key; CRDS values are signed
+                and verified only when it is given
         """
         try:
             self.gossip_node = GossipNode(
@@ -1874,7 +1923,9 @@ class Blockchain:
                     pull_interval_ms=2000,  # Pull every 2 seconds
                     prune_interval_ms=30000,  # Prune every 30 seconds
                     max_active_peers=50     # Reasonable peer limit
-                )
+                ),
+                signing_key=signing_key,
+                vote_tally=self.vote_tally
             )
             logger.info(f"Gossip node initialized: {public_key[:20]}... on {ip_address}:{gossip_port}")
             
@@ -2025,48 +2076,23 @@ class Blockchain:
             logger.warning("Cannot add gossip peer - gossip node not initialized")
     
     def publish_leader_schedule_to_gossip(self, epoch: int, slot_leaders: Dict[int, str]):
-        """CRITICAL FIX: Publish leader schedule through gossip protocol"""
+        """Publish a leader schedule through gossip as compressed CRDS fragments"""
         if self.gossip_node:
             try:
-                from gossip_protocol.crds import EpochSlots
-                
-                # Create EpochSlots CRDS value
-                epoch_slots = EpochSlots(
-                    epoch=epoch,
-                    slot_leaders=slot_leaders,
-                    timestamp=time.time()
-                )
-                
-                # Insert into CRDS
-                self.gossip_node.crds.insert_epoch_slots(epoch_slots)
-                
-                logger.info(f"CRITICAL FIX: Published leader schedule for epoch {epoch} with {len(slot_leaders)} slots")
+                self.gossip_node.publish_leader_schedule(epoch, slot_leaders)
             except Exception as e:
                 logger.error(f"Failed to publish leader schedule to gossip: {e}")
         else:
             logger.warning("Cannot publish leader schedule - gossip node not initialized")
     
     def get_gossip_leader_schedule(self) -> Optional[Dict[int, str]]:
-        """CRITICAL FIX: Get current leader schedule from gossip protocol"""
+        """Get the current epoch's leader schedule from gossip protocol"""
         if self.gossip_node:
             try:
-                # Get all epoch slots from CRDS
-                all_values = self.gossip_node.crds.get_all_values()
-                
-                # Find the most recent epoch slots
-                latest_epoch_slots = None
-                latest_wallclock = 0
-                
-                for value in all_values:
-                    if hasattr(value, 'epoch') and hasattr(value, 'slots'):
-                        if value.wallclock > latest_wallclock:
-                            latest_wallclock = value.wallclock
-                            latest_epoch_slots = value
-                
-                if latest_epoch_slots and hasattr(latest_epoch_slots, 'slots'):
-                    logger.debug(f"Retrieved leader schedule from gossip: {len(latest_epoch_slots.slots)} slots")
-                    return latest_epoch_slots.slots
-                    
+                schedule = self.gossip_node.get_epoch_schedule(self.leader_schedule.current_epoch)
+                if schedule:
+                    logger.debug(f"Retrieved leader schedule from gossip: {len(schedule)} slots")
+                    return schedule
                 return None
             except Exception as e:
                 logger.error(f"Failed to get leader schedule from gossip: {e}")
@@ -2100,6 +2126,8 @@ class Blockchain:
         return {
             'blockchain_core': {
                 'blocks': len(self.blocks),
+                'ledger': self.blocks.get_stats(),
+                'account_state': self.account_model.get_cache_stats(),
                 'genesis_key_available': bool(self.genesis_public_key),
                 'max_block_size': self.max_block_size_bytes
             },
@@ -2132,10 +2160,8 @@ class Blockchain:
                 'stats': self.get_gossip_stats() if self.gossip_node else None
             },
             'voting_system': {
-                'initialized': hasattr(self, 'vote_tracker'),
-                'total_votes_tracked': sum(len(votes) for votes in getattr(self, 'vote_tracker', {}).values()),
-                'blocks_with_votes': len(getattr(self, 'vote_tracker', {})),
-                'consensus_threshold': (len(self.quantum_consensus.nodes) * 2 // 3) + 1 if self.quantum_consensus else 1
+                'initialized': True,
+                **self.vote_tally.get_stats()
             },
             'solana_compliance': {
                 'block_reconstruction': True,
@@ -2158,6 +2184,6 @@ class Blockchain:
                 'gossip_auto_publishes': bool(self.gossip_node),
                 'leader_schedule_integrated': True,
                 'metrics_integrated': True,
-                'voting_system_active': hasattr(self, 'vote_tracker')
+                'voting_system_active': self.vote_tally.stats['votes_counted'] > 0
             }
         }
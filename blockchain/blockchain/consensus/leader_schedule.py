@@ -234,6 +234,28 @@ class LeaderSchedule:
             "current_schedule_size": len(self.current_schedule)
         })
     
+    def adopt_schedule(self, epoch: int, slot_leaders: Dict[int, str]) -> bool:
+        """
+        Use a schedule received over gossip for the current or next epoch,
+        so it does not have to be recomputed by quantum selection.
+        Schedules already held are never replaced.
+        """
+        if not slot_leaders:
+            return False
+        if epoch == self.current_epoch and not self.current_schedule:
+            self.current_schedule = dict(slot_leaders)
+        elif epoch == self.current_epoch + 1 and not self.next_schedule:
+            self.next_schedule = dict(slot_leaders)
+        else:
+            return False
+        
+        logger.info({
+            "message": "Adopted leader schedule from gossip",
+            "epoch": epoch,
+            "slots": len(slot_leaders)
+        })
+        return True
+    
     def update_schedule(self, quantum_consensus):
         """
         Update the leader schedule, handling epoch transitions.
@@ -1,8 +1,7 @@
 import socket
-import json
-import threading
-import time
 from typing import Callable, Dict, List
+from blockchain.consensus.tpu_ingest import TPUIngestEngine, encode_transaction_packet
+from blockchain.p2p.codec import WireCodec
 from blockchain.utils.logger import logger
 from blockchain.utils.helpers import BlockchainUtils
 
@@ -23,17 +22,10 @@ class TPUListener:
         
         # TPU state
         self.is_listening = False
-        self.socket = None
-        self.listener_thread = None
+        self.ingest_engine = None
         
-        # Transaction collection for current slot
-        self.current_slot_transactions = []
-        self.slot_transaction_lock = threading.Lock()
-        
-        # Performance metrics
-        self.packets_received = 0
+        # Performance metrics (packet counters live in the ingest engine)
         self.transactions_received = 0
-        self.invalid_packets = 0
         
         logger.info({
             "message": "TPU Listener initialized",
@@ -48,18 +40,13 @@ class TPUListener:
             return
         
         try:
-            # Create UDP socket for TPU
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            self.socket.bind(('localhost', self.tpu_port))
-            self.socket.settimeout(1.0)  # Non-blocking with timeout
+            # Batched ingest: drain-per-wakeup receive thread feeding a
+            # separate verification thread through a bounded ring
+            self.ingest_engine = TPUIngestEngine('localhost', self.tpu_port, self._process_transaction_batch)
+            self.ingest_engine.start()
             
             self.is_listening = True
             
-            # Start listener thread
-            self.listener_thread = threading.Thread(target=self._listen_for_transactions, daemon=True)
-            self.listener_thread.start()
-            
             logger.info({
                 "message": "TPU listener started",
                 "node": self.node_public_key[:20] + "...",
@@ -80,12 +67,8 @@ class TPUListener:
         """Stop the TPU listener"""
         self.is_listening = False
         
-        if self.socket:
-            self.socket.close()
-            self.socket = None
-        
-        if self.listener_thread:
-            self.listener_thread.join(timeout=2.0)
+        if self.ingest_engine:
+            self.ingest_engine.stop()
         
         logger.info({
             "message": "TPU listener stopped",
@@ -93,174 +76,74 @@ class TPUListener:
             "tpu_port": self.tpu_port
         })
     
-    def _listen_for_transactions(self):
-        """Main listening loop for TPU transactions"""
-        logger.info({
-            "message": "TPU listener thread started",
-            "node": self.node_public_key[:20] + "...",
-            "tpu_port": self.tpu_port
-        })
-        
-        while self.is_listening:
-            try:
-                # Receive UDP packet
-                data, addr = self.socket.recvfrom(65536)  # Max UDP packet size
-                self.packets_received += 1
-                
-                # Parse transaction packet
-                self._process_transaction_packet(data, addr)
-                
-            except socket.timeout:
-                # Normal timeout, continue listening
-                continue
-            except Exception as e:
-                if self.is_listening:  # Only log if we're still supposed to be listening
-                    logger.error({
-                        "message": "TPU listener error",
-                        "node": self.node_public_key[:20] + "...",
-                        "error": str(e)
-                    })
-        
-        logger.info({
-            "message": "TPU listener thread terminated",
-            "node": self.node_public_key[:20] + "...",
-            "packets_received": self.packets_received,
-            "transactions_received": self.transactions_received
-        })
+    @property
+    def packets_received(self) -> int:
+        return self.ingest_engine.stats['packets_received'] if self.ingest_engine else 0
     
-    def _process_transaction_packet(self, data: bytes, addr: tuple):
-        """Process incoming transaction packet from Gulf Stream"""
-        try:
-            # Decode JSON packet
-            packet = json.loads(data.decode('utf-8'))
-            
-            # Validate packet structure
-            if not self._validate_packet(packet):
-                self.invalid_packets += 1
-                return
-            
-            # Extract transaction data
-            transaction_data = packet.get('transaction')
-            source_node = packet.get('source_node', 'unknown')
-            packet_id = packet.get('packet_id', 'unknown')
-            
-            # Decode transaction
-            transaction = BlockchainUtils.decode(transaction_data)
-            
-            # Add to current slot transaction collection
-            with self.slot_transaction_lock:
-                self.current_slot_transactions.append({
-                    'transaction': transaction,
-                    'source_node': source_node,
-                    'packet_id': packet_id,
-                    'received_time': time.time(),
-                    'source_addr': addr
-                })
-            
-            self.transactions_received += 1
-            
-            # Handle transaction immediately (leader must pack ALL transactions)
-            self.transaction_handler(transaction, from_tpu=True)
-            
-            logger.debug({
-                "message": "TPU transaction received",
-                "node": self.node_public_key[:20] + "...",
-                "tx_id": transaction.id[:16] + "...",
-                "source": source_node[:16] + "...",
-                "packet_id": packet_id
-            })
-            
-        except json.JSONDecodeError:
-            logger.warning({
-                "message": "Invalid JSON in TPU packet",
-                "node": self.node_public_key[:20] + "...",
-                "source_addr": addr
-            })
-            self.invalid_packets += 1
-        except Exception as e:
-            logger.error({
-                "message": "Error processing TPU packet",
-                "node": self.node_public_key[:20] + "...",
-                "error": str(e),
-                "source_addr": addr
-            })
-            self.invalid_packets += 1
+    @property
+    def invalid_packets(self) -> int:
+        return self.ingest_engine.stats['invalid_packets'] if self.ingest_engine else 0
     
-    def _validate_packet(self, packet: dict) -> bool:
-        """Validate Gulf Stream transaction packet"""
-        required_fields = ['transaction', 'source_node', 'packet_id', 'timestamp']
-        
-        for field in required_fields:
-            if field not in packet:
-                logger.warning({
-                    "message": "Missing required field in TPU packet",
+    def _process_transaction_batch(self, batch: List[tuple]):
+        """Process a decoded batch of (transaction, source_node, addr) on the verification thread"""
+        self.transactions_received += len(batch)
+        
+        # The handler queues each transaction in the node's intake (leader
+        # must pack ALL transactions); it runs here so a slow one never
+        # stalls the socket
+        for transaction, source_node, _ in batch:
+            try:
+                self.transaction_handler(transaction)
+            except Exception as e:
+                logger.error({
+                    "message": "Error processing TPU transaction",
                     "node": self.node_public_key[:20] + "...",
-                    "missing_field": field
+                    "tx_id": transaction.id[:16] + "...",
+                    "source": source_node[:16] + "...",
+                    "error": str(e)
                 })
-                return False
-        
-        return True
-    
-    def get_slot_transactions(self) -> List[Dict]:
-        """
-        Get all transactions received for the current slot.
-        Leader MUST pack ALL transactions regardless of count.
-        """
-        with self.slot_transaction_lock:
-            transactions = self.current_slot_transactions.copy()
-            return transactions
-    
-    def clear_slot_transactions(self):
-        """Clear transaction collection for new slot"""
-        with self.slot_transaction_lock:
-            self.current_slot_transactions.clear()
-            
-        logger.debug({
-            "message": "TPU slot transactions cleared",
-            "node": self.node_public_key[:20] + "..."
-        })
     
     def get_tpu_metrics(self) -> Dict:
         """Get TPU performance metrics"""
-        with self.slot_transaction_lock:
-            current_slot_count = len(self.current_slot_transactions)
-        
         return {
             "tpu_port": self.tpu_port,
             "is_listening": self.is_listening,
             "packets_received": self.packets_received,
             "transactions_received": self.transactions_received,
             "invalid_packets": self.invalid_packets,
-            "current_slot_transactions": current_slot_count,
             "packet_success_rate": (
                 (self.packets_received - self.invalid_packets) / max(1, self.packets_received) * 100
-            )
+            ),
+            "ingest": self.ingest_engine.get_stats() if self.ingest_engine else {}
         }
     
-    def send_transaction_to_tpu(self, target_tpu_port: int, transaction_data: str, source_node: str) -> bool:
+    def send_transaction_to_tpu(self, target_tpu_port: int, transaction_data, source_node: str) -> bool:
         """
         Send transaction to another leader's TPU port via Gulf Stream.
         This is used by non-leaders to forward transactions to upcoming leaders.
+        
+        transaction_data may be a Transaction, a WireCodec text frame or a
+        legacy BlockchainUtils.encode() string; either way it goes out in
+        the compact binary packet format.
         """
         try:
-            # Create Gulf Stream packet
-            packet = {
-                'transaction': transaction_data,
-                'source_node': source_node,
-                'packet_id': f"{source_node}_{int(time.time() * 1000000)}",  # Microsecond precision
-                'timestamp': time.time(),
-                'gulf_stream_version': '1.0'
-            }
+            transaction = transaction_data
+            if WireCodec.is_text_frame(transaction_data):
+                transaction = WireCodec.decode_text(transaction_data)
+            elif isinstance(transaction_data, str):
+                transaction = BlockchainUtils.decode(transaction_data)
+            packet = encode_transaction_packet(transaction, source_node)
             
             # Send UDP packet to target TPU
             with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
-                sock.sendto(json.dumps(packet).encode(), ('localhost', target_tpu_port))
+                sock.sendto(packet, ('localhost', target_tpu_port))
             
             logger.debug({
                 "message": "Transaction forwarded to TPU",
                 "source": source_node[:16] + "...",
                 "target_tpu_port": target_tpu_port,
-                "packet_id": packet['packet_id']
+                "tx_id": transaction.id,
+                "packet_bytes": len(packet)
             })
             
             return True
@@ -1,46 +1,95 @@
 import socket
 import json
+import struct
 import time
 import threading
 from typing import List, Dict, Optional, Tuple
 from blockchain.utils.logger import logger
-from blockchain.utils.helpers import BlockchainUtils
+from blockchain.p2p.codec import CodecError, WireCodec
+from blockchain.transaction.transaction import Transaction
+from blockchain.transaction.transaction_intake import TransactionIntake
+
+# Forwarded transactions travel in batch datagrams:
+#   magic(2) version(1) count(u16) then count x [length(u16) wire codec frame]
+BATCH_MAGIC = b'GS'
+BATCH_VERSION = 1
+_BATCH_HEADER = struct.Struct('>2sBH')
+_ENTRY_LENGTH = struct.Struct('>H')
+
+# Ethernet MTU (1500) minus IPv4 and UDP headers, so a batch is never fragmented
+DEFAULT_MAX_DATAGRAM_BYTES = 1472
+DEFAULT_FLUSH_INTERVAL = 0.005  # Longest a partial batch waits before it is sent
+UDP_MAX_PAYLOAD = 65507
+
+
+class _LeaderBatch:
+    """Transactions queued for one leader that have not been sent yet"""
+
+    __slots__ = ('address', 'entries', 'size', 'first_queued')
+
+    def __init__(self, address: Tuple[str, int]):
+        self.address = address
+        self.entries: List[bytes] = []
+        self.size = _BATCH_HEADER.size
+        self.first_queued = time.monotonic()
+
+    def datagram(self) -> bytes:
+        return _BATCH_HEADER.pack(BATCH_MAGIC, BATCH_VERSION, len(self.entries)) + b''.join(self.entries)
+
 
 class FastGulfStreamForwarder:
     """
     Fast UDP-based Gulf Stream transaction forwarding.
-    
+
     When nodes receive transactions, they immediately forward them to:
     1. Current leader (for immediate block inclusion)
     2. Next scheduled leader (for leader transition continuity)
-    
-    Uses direct UDP transfers to minimize delays during leader transitions.
+
+    The leader window is looked up once per slot, not per transaction.
+    Each transaction is encoded once and appended to a batch per target
+    leader; a batch is sent as one datagram as soon as the next
+    transaction would not fit in max_datagram_bytes, or by the flush
+    thread at most flush_interval after its first transaction arrived.
+
+    Received transactions go into intake (the node's shared transaction
+    intake, or a private one when none is given).
     """
-    
-    def __init__(self, node_public_key: str, leader_schedule, port_base: int = 15000):
+
+    def __init__(self, node_public_key: str, leader_schedule, port_base: int = 15000,
+                 max_datagram_bytes: int = DEFAULT_MAX_DATAGRAM_BYTES,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 intake: Optional[TransactionIntake] = None):
         self.node_public_key = node_public_key
         self.leader_schedule = leader_schedule
         self.port_base = port_base  # Base port for Gulf Stream UDP (15000-15999)
-        
+        self.max_datagram_bytes = max_datagram_bytes
+        self.flush_interval = flush_interval
+
         # UDP socket for sending transactions
         self.udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.udp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        
+
         # UDP server for receiving forwarded transactions
         self.server_port = port_base + self._get_node_index()
         self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self.server_socket.bind(('localhost', self.server_port))
-        
-        # Transaction pools for different purposes
-        self.current_leader_pool = []      # Transactions for current leader
-        self.next_leader_pool = []         # Transactions for next leader
-        self.received_transactions = []    # Transactions received via UDP
-        
+
+        # Transactions received via UDP, taken by the leader when it packs a block
+        self.intake = intake if intake is not None else TransactionIntake()
+
         # Node registry: public_key -> (ip, port) mapping
         self.node_registry = {}
         self._populate_node_registry()
-        
+
+        # ((epoch, slot), [(role, leader, address), ...]) for the slot it was computed in
+        self.leader_window = (None, [])
+
+        # Unsent batches by leader address
+        self.batch_lock = threading.Lock()
+        self.batch_ready = threading.Condition(self.batch_lock)
+        self.batches: Dict[Tuple[str, int], _LeaderBatch] = {}
+
         # Performance metrics
         self.forwarding_stats = {
             'total_sent': 0,
@@ -49,22 +98,35 @@ class FastGulfStreamForwarder:
             'current_leader_forwards': 0,
             'next_leader_forwards': 0,
             'udp_receives': 0,
-            'last_forward_time': 0
+            'transactions_received': 0,
+            'invalid_datagrams': 0,
+            'last_forward_time': 0,
+            'leader_window_refreshes': 0,
+            'datagrams_sent': 0,
+            'datagram_send_failures': 0,
+            'batched_transactions': 0,
+            'batch_bytes': 0,
+            'full_flushes': 0,
+            'timed_flushes': 0,
+            'batch_latency_ms_total': 0.0,
+            'batch_latency_ms_max': 0.0
         }
-        
-        # Start UDP server thread
+
+        # Start UDP server and batch flush threads
         self.server_running = True
         self.server_thread = threading.Thread(target=self._udp_server_loop, daemon=True)
         self.server_thread.start()
-        
+        self.flush_thread = threading.Thread(target=self._flush_loop, name="gulf-stream-flush", daemon=True)
+        self.flush_thread.start()
+
         logger.info(f"Fast Gulf Stream forwarder initialized on UDP port {self.server_port}")
-    
+
     def _get_node_index(self) -> int:
         """Get node index based on public key hash for consistent port assignment"""
         import hashlib
         hash_digest = hashlib.md5(self.node_public_key.encode()).hexdigest()
         return int(hash_digest[:4], 16) % 1000  # 0-999 range
-    
+
     def _populate_node_registry(self):
         """Populate node registry with known nodes and their UDP ports"""
         # In a real implementation, this would come from peer discovery or configuration
@@ -75,264 +137,338 @@ class FastGulfStreamForwarder:
             udp_port = self.port_base + i
             node_key = f"node_{i+1}"  # Placeholder - in real implementation use actual public keys
             self.node_registry[node_key] = ('localhost', udp_port)
-            
+
         logger.debug(f"Node registry populated with {len(self.node_registry)} entries")
-    
+
     def register_node(self, public_key: str, ip: str, udp_port: int):
         """Register a node for Gulf Stream forwarding"""
         self.node_registry[public_key] = (ip, udp_port)
+        self.leader_window = (None, [])  # Addresses may have changed
         logger.info(f"Registered node for Gulf Stream: {public_key[:20]}... at {ip}:{udp_port}")
-    
-    def get_transactions_for_leader(self, leader_id: str) -> List[Dict]:
-        """
-        Get pending transactions that should be forwarded to a specific leader.
-        
-        Args:
-            leader_id: The public key of the leader
-            
-        Returns:
-            List[Dict]: List of transactions for the leader
-        """
-        # Return transactions from pending pool for this leader
-        # In a full implementation, this would filter by leader assignment
-        return []
-    
+
+    def _leader_targets(self) -> List[Tuple[str, str, Tuple[str, int]]]:
+        """Current and next leader with their UDP addresses, recomputed only when the slot changes"""
+        schedule = self.leader_schedule
+        window_key = (getattr(schedule, 'current_epoch', None), schedule.get_current_slot())
+        cached_key, targets = self.leader_window
+        if cached_key == window_key:
+            return targets
+
+        current_leader = schedule.get_current_leader()
+        upcoming_leaders = schedule.get_upcoming_leaders(1)
+        next_leader = upcoming_leaders[0][1] if upcoming_leaders else None
+
+        targets = []
+        if current_leader and current_leader != self.node_public_key:
+            targets.append(('current_leader', current_leader, self._leader_address(current_leader)))
+        if next_leader and next_leader != self.node_public_key and next_leader != current_leader:
+            targets.append(('next_leader', next_leader, self._leader_address(next_leader)))
+
+        self.leader_window = (window_key, targets)
+        self.forwarding_stats['leader_window_refreshes'] += 1
+        return targets
+
+    def _leader_address(self, leader_public_key: str) -> Tuple[str, int]:
+        """Look up a leader's UDP endpoint"""
+        if leader_public_key in self.node_registry:
+            return self.node_registry[leader_public_key]
+        # Fallback: try to derive port from public key
+        leader_index = self._get_node_index_from_key(leader_public_key)
+        logger.debug(f"Using derived UDP port {self.port_base + leader_index} for leader {leader_public_key[:20]}...")
+        return 'localhost', self.port_base + leader_index
+
     def forward_transaction_fast(self, transaction) -> Dict:
         """
-        Immediately forward transaction to current leader and next leader via UDP.
-        
-        This is the core fast forwarding function called when a transaction is received.
+        Queue a transaction for the current leader and the next leader.
+
+        This is the core fast forwarding function called when a transaction
+        is received. It only encodes the transaction and appends it to the
+        per-leader batches; datagrams go out when a batch is full or when
+        the flush thread sends it.
         """
         start_time = time.time()
-        
-        # Get current and next leaders
-        current_leader = self.leader_schedule.get_current_leader()
-        upcoming_leaders = self.leader_schedule.get_upcoming_leaders(2)  # Next 2 leaders
-        next_leader = upcoming_leaders[0][1] if upcoming_leaders else None
-        
+
         forwarding_results = {
-            'transaction_id': transaction.transaction_id,
+            'transaction_id': transaction.id,
             'current_leader_sent': False,
             'next_leader_sent': False,
             'forward_time_ms': 0,
             'errors': []
         }
-        
-        # Serialize transaction for UDP transmission
+
+        # Serialize transaction once for every leader
         try:
-            transaction_data = {
-                'type': 'gulf_stream_transaction',
-                'transaction': BlockchainUtils.encode(transaction),
-                'sender_node': self.node_public_key[:20] + '...',
-                'timestamp': time.time(),
-                'priority': 'high'  # Gulf Stream transactions have high priority
-            }
-            message_bytes = json.dumps(transaction_data).encode('utf-8')
-            
-            if len(message_bytes) > 65507:  # UDP max payload size
-                logger.error(f"Transaction too large for UDP forwarding: {len(message_bytes)} bytes")
-                forwarding_results['errors'].append("Transaction exceeds UDP size limit")
-                return forwarding_results
-                
-        except Exception as e:
+            encoded = WireCodec.encode(transaction)
+        except CodecError as e:
             logger.error(f"Failed to serialize transaction for UDP forwarding: {e}")
             forwarding_results['errors'].append(f"Serialization error: {e}")
             return forwarding_results
-        
-        # Forward to current leader (highest priority)
-        if current_leader and current_leader != self.node_public_key:
-            try:
-                sent = self._send_udp_transaction(current_leader, message_bytes, 'current_leader')
-                forwarding_results['current_leader_sent'] = sent
-                if sent:
-                    self.forwarding_stats['current_leader_forwards'] += 1
-            except Exception as e:
-                error_msg = f"Failed to forward to current leader: {e}"
-                forwarding_results['errors'].append(error_msg)
-                logger.warning(error_msg)
-        
-        # Forward to next leader (for transition continuity)
-        if next_leader and next_leader != self.node_public_key and next_leader != current_leader:
-            try:
-                sent = self._send_udp_transaction(next_leader, message_bytes, 'next_leader')
-                forwarding_results['next_leader_sent'] = sent
-                if sent:
-                    self.forwarding_stats['next_leader_forwards'] += 1
-            except Exception as e:
-                error_msg = f"Failed to forward to next leader: {e}"
-                forwarding_results['errors'].append(error_msg)
-                logger.warning(error_msg)
-        
+
+        entry = _ENTRY_LENGTH.pack(len(encoded)) + encoded
+        if _BATCH_HEADER.size + len(entry) > UDP_MAX_PAYLOAD:
+            logger.error(f"Transaction too large for UDP forwarding: {len(encoded)} bytes")
+            forwarding_results['errors'].append("Transaction exceeds UDP size limit")
+            return forwarding_results
+
+        try:
+            targets = self._leader_targets()
+        except Exception as e:
+            error_msg = f"Failed to look up leaders: {e}"
+            forwarding_results['errors'].append(error_msg)
+            logger.warning(error_msg)
+            targets = []
+
+        full_batches = []
+        with self.batch_lock:
+            for leader_type, leader_public_key, address in targets:
+                batch = self.batches.get(address)
+                if batch is not None and batch.size + len(entry) > self.max_datagram_bytes:
+                    full_batches.append(self.batches.pop(address))
+                    batch = None
+                if batch is None:
+                    batch = self.batches[address] = _LeaderBatch(address)
+                    self.batch_ready.notify()
+                batch.entries.append(entry)
+                batch.size += len(entry)
+                forwarding_results[f'{leader_type}_sent'] = True
+                self.forwarding_stats[f'{leader_type}_forwards'] += 1
+
+        for batch in full_batches:
+            self._send_batch(batch, 'full_flushes')
+
         # Update performance metrics
         forward_time_ms = (time.time() - start_time) * 1000
         forwarding_results['forward_time_ms'] = forward_time_ms
         self.forwarding_stats['last_forward_time'] = forward_time_ms
         self.forwarding_stats['total_sent'] += 1
-        
+
         if forwarding_results['current_leader_sent'] or forwarding_results['next_leader_sent']:
             self.forwarding_stats['successful_sends'] += 1
-            logger.info(f"Fast Gulf Stream forward completed in {forward_time_ms:.2f}ms: "
-                       f"current={forwarding_results['current_leader_sent']}, "
-                       f"next={forwarding_results['next_leader_sent']}")
+            logger.debug(f"Fast Gulf Stream queued {transaction.id[:16]}... in {forward_time_ms:.3f}ms: "
+                         f"current={forwarding_results['current_leader_sent']}, "
+                         f"next={forwarding_results['next_leader_sent']}")
         else:
             self.forwarding_stats['failed_sends'] += 1
-            logger.warning(f"Fast Gulf Stream forward failed for transaction {transaction.transaction_id}")
-        
+            logger.debug(f"Fast Gulf Stream had no leader to forward transaction {transaction.id} to")
+
         return forwarding_results
-    
-    def _send_udp_transaction(self, leader_public_key: str, message_bytes: bytes, leader_type: str) -> bool:
-        """Send transaction to a specific leader via UDP"""
+
+    def flush(self, reason: str = 'timed_flushes'):
+        """Send every pending batch now"""
+        with self.batch_lock:
+            batches = list(self.batches.values())
+            self.batches.clear()
+        for batch in batches:
+            self._send_batch(batch, reason)
+
+    def _flush_loop(self):
+        """Send partial batches flush_interval after they were started"""
+        while self.server_running:
+            with self.batch_lock:
+                while self.server_running and not self.batches:
+                    self.batch_ready.wait()
+                if not self.batches:
+                    break
+                oldest = min(batch.first_queued for batch in self.batches.values())
+            delay = oldest + self.flush_interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+            now = time.monotonic()
+            with self.batch_lock:
+                due = [address for address, batch in self.batches.items()
+                       if now - batch.first_queued >= self.flush_interval]
+                batches = [self.batches.pop(address) for address in due]
+            for batch in batches:
+                self._send_batch(batch, 'timed_flushes')
+
+    def _send_batch(self, batch: _LeaderBatch, reason: str):
+        """Send one batch datagram to its leader"""
+        datagram = batch.datagram()
+        latency_ms = (time.monotonic() - batch.first_queued) * 1000
         try:
-            # Look up leader's UDP endpoint
-            if leader_public_key in self.node_registry:
-                ip, port = self.node_registry[leader_public_key]
-            else:
-                # Fallback: try to derive port from public key
-                leader_index = self._get_node_index_from_key(leader_public_key)
-                ip, port = 'localhost', self.port_base + leader_index
-                logger.debug(f"Using derived UDP port {port} for leader {leader_public_key[:20]}...")
-            
-            # Send UDP packet
-            self.udp_socket.sendto(message_bytes, (ip, port))
-            
-            logger.debug(f"UDP transaction sent to {leader_type} {leader_public_key[:20]}... at {ip}:{port}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"UDP send failed to {leader_type} {leader_public_key[:20]}...: {e}")
-            return False
-    
+            self.udp_socket.sendto(datagram, batch.address)
+        except OSError as e:
+            self.forwarding_stats['datagram_send_failures'] += 1
+            logger.error(f"UDP batch send to {batch.address[0]}:{batch.address[1]} failed "
+                         f"({len(batch.entries)} transactions): {e}")
+            return
+
+        stats = self.forwarding_stats
+        stats['datagrams_sent'] += 1
+        stats[reason] += 1
+        stats['batched_transactions'] += len(batch.entries)
+        stats['batch_bytes'] += len(datagram)
+        stats['batch_latency_ms_total'] += latency_ms
+        stats['batch_latency_ms_max'] = max(stats['batch_latency_ms_max'], latency_ms)
+
     def _get_node_index_from_key(self, public_key: str) -> int:
         """Derive node index from public key for port calculation"""
         import hashlib
         hash_digest = hashlib.md5(public_key.encode()).hexdigest()
         return int(hash_digest[:4], 16) % 1000
-    
+
     def _udp_server_loop(self):
         """UDP server loop to receive forwarded transactions"""
         logger.info(f"Gulf Stream UDP server listening on port {self.server_port}")
-        
+
         while self.server_running:
             try:
                 self.server_socket.settimeout(1.0)  # 1 second timeout for graceful shutdown
                 data, addr = self.server_socket.recvfrom(65536)  # Max UDP size
-                
-                # Process received transaction
-                self._process_received_transaction(data, addr)
+
+                # Process received transactions
                 self.forwarding_stats['udp_receives'] += 1
-                
+                if data[:len(BATCH_MAGIC)] == BATCH_MAGIC:
+                    self._process_received_batch(data, addr)
+                else:
+                    self._process_received_transaction(data, addr)
+
             except socket.timeout:
                 continue  # Normal timeout, keep listening
             except Exception as e:
                 if self.server_running:  # Only log if we're still supposed to be running
                     logger.error(f"Gulf Stream UDP server error: {e}")
                     time.sleep(0.1)  # Brief pause before retrying
-    
+
+    def _process_received_batch(self, data: bytes, addr: Tuple[str, int]):
+        """Unpack a batch datagram into the received transactions pool"""
+        view = memoryview(data)
+        transactions = []
+        try:
+            _, version, count = _BATCH_HEADER.unpack_from(view, 0)
+            if version != BATCH_VERSION:
+                raise CodecError(f"Unsupported batch version {version}")
+            offset = _BATCH_HEADER.size
+            for _ in range(count):
+                length, = _ENTRY_LENGTH.unpack_from(view, offset)
+                offset += _ENTRY_LENGTH.size
+                if offset + length > len(view):
+                    raise CodecError("Truncated batch entry")
+                transaction = WireCodec.decode(view[offset:offset + length])
+                offset += length
+                if not isinstance(transaction, Transaction):
+                    raise CodecError(f"Unexpected {type(transaction).__name__} in batch")
+                transactions.append(transaction)
+        except (CodecError, struct.error) as e:
+            self.forwarding_stats['invalid_datagrams'] += 1
+            logger.warning(f"Dropped malformed Gulf Stream batch from {addr}: {e}")
+            return
+
+        added = self.intake.add_many(transactions, 'fast_gulf_stream')
+        self.forwarding_stats['transactions_received'] += len(transactions)
+        logger.debug(f"Gulf Stream batch of {len(transactions)} transactions received from {addr} "
+                     f"({len(transactions) - added} already known)")
+
     def _process_received_transaction(self, data: bytes, addr: Tuple[str, int]):
-        """Process a transaction received via UDP"""
+        """Process a single JSON-wrapped transaction (sent by peers without batching)"""
         try:
             message = json.loads(data.decode('utf-8'))
-            
+
             if message.get('type') != 'gulf_stream_transaction':
                 logger.debug(f"Ignoring non-Gulf Stream message from {addr}")
                 return
-            
+
             # Decode transaction
             transaction_data = message.get('transaction')
             sender_node = message.get('sender_node', 'unknown')
             timestamp = message.get('timestamp', time.time())
-            
+
             # Decode transaction object
-            transaction = BlockchainUtils.decode(transaction_data)
-            
-            # Add to received transactions pool
-            self.received_transactions.append({
-                'transaction': transaction,
-                'received_from': addr,
-                'sender_node': sender_node,
-                'received_at': time.time(),
-                'original_timestamp': timestamp
-            })
-            
+            transaction = WireCodec.decode_text(transaction_data)
+
+            # Queue for the leader's block
+            self.intake.add(transaction, 'fast_gulf_stream')
+            self.forwarding_stats['transactions_received'] += 1
+
             logger.info(f"Gulf Stream transaction received from {sender_node} via UDP: "
-                       f"{transaction.transaction_id[:16]}... (delay: {time.time() - timestamp:.3f}s)")
-            
+                       f"{transaction.id[:16]}... (delay: {time.time() - timestamp:.3f}s)")
+
         except Exception as e:
+            self.forwarding_stats['invalid_datagrams'] += 1
             logger.error(f"Failed to process Gulf Stream UDP transaction from {addr}: {e}")
-    
-    def get_transactions_for_leader(self, leader_public_key: str) -> List:
-        """
-        Get all transactions available for a specific leader.
-        Called by leaders when their slot starts.
-        """
-        current_leader = self.leader_schedule.get_current_leader()
-        
-        # If this node is the current leader, return received transactions
-        if leader_public_key == current_leader:
-            transactions = [item['transaction'] for item in self.received_transactions]
-            
-            # Clear received transactions after retrieval
-            self.received_transactions.clear()
-            
-            logger.info(f"Leader {leader_public_key[:20]}... retrieved {len(transactions)} Gulf Stream transactions")
-            return transactions
-        
-        return []
-    
+
     def get_fast_forwarding_stats(self) -> Dict:
         """Get comprehensive Gulf Stream forwarding statistics"""
-        current_time = time.time()
+        stats = self.forwarding_stats
+        datagrams = stats['datagrams_sent']
+        with self.batch_lock:
+            pending_batches = len(self.batches)
+            pending_transactions = sum(len(batch.entries) for batch in self.batches.values())
         return {
             'udp_server_port': self.server_port,
             'node_registry_size': len(self.node_registry),
             'performance': {
-                'total_sent': self.forwarding_stats['total_sent'],
-                'successful_sends': self.forwarding_stats['successful_sends'],
-                'failed_sends': self.forwarding_stats['failed_sends'],
+                'total_sent': stats['total_sent'],
+                'successful_sends': stats['successful_sends'],
+                'failed_sends': stats['failed_sends'],
                 'success_rate': (
-                    self.forwarding_stats['successful_sends'] / 
-                    max(1, self.forwarding_stats['total_sent'])
+                    stats['successful_sends'] /
+                    max(1, stats['total_sent'])
                 ) * 100,
-                'last_forward_time_ms': self.forwarding_stats['last_forward_time']
+                'last_forward_time_ms': stats['last_forward_time']
             },
             'leader_forwarding': {
-                'current_leader_forwards': self.forwarding_stats['current_leader_forwards'],
-                'next_leader_forwards': self.forwarding_stats['next_leader_forwards']
+                'current_leader_forwards': stats['current_leader_forwards'],
+                'next_leader_forwards': stats['next_leader_forwards'],
+                'leader_window_refreshes': stats['leader_window_refreshes']
+            },
+            'batching': {
+                'max_datagram_bytes': self.max_datagram_bytes,
+                'flush_interval_ms': self.flush_interval * 1000,
+                'datagrams_sent': datagrams,
+                'datagram_send_failures': stats['datagram_send_failures'],
+                'full_flushes': stats['full_flushes'],
+                'timed_flushes': stats['timed_flushes'],
+                'avg_transactions_per_datagram': stats['batched_transactions'] / datagrams if datagrams else 0,
+                'avg_fill_percent': (stats['batch_bytes'] / datagrams / self.max_datagram_bytes * 100
+                                     if datagrams else 0),
+                'avg_latency_ms': stats['batch_latency_ms_total'] / datagrams if datagrams else 0,
+                'max_latency_ms': stats['batch_latency_ms_max'],
+                'pending_batches': pending_batches,
+                'pending_transactions': pending_transactions
             },
             'reception': {
-                'udp_receives': self.forwarding_stats['udp_receives'],
-                'pending_transactions': len(self.received_transactions)
+                'udp_receives': stats['udp_receives'],
+                'transactions_received': stats['transactions_received'],
+                'invalid_datagrams': stats['invalid_datagrams'],
+                'pending_transactions': len(self.intake)
             },
             'network': {
                 'registered_nodes': list(self.node_registry.keys()),
                 'server_running': self.server_running
             }
         }
-    
+
     def shutdown(self):
         """Gracefully shutdown the Gulf Stream forwarder"""
         logger.info("Shutting down Fast Gulf Stream forwarder...")
-        
+
         self.server_running = False
-        
+        with self.batch_lock:
+            self.batch_ready.notify_all()
+        if self.flush_thread.is_alive():
+            self.flush_thread.join(timeout=2.0)
+        self.flush('timed_flushes')  # Send whatever is still queued
+
         # Close sockets
         try:
             self.server_socket.close()
             self.udp_socket.close()
         except:
             pass
-        
+
         # Wait for server thread to finish
         if self.server_thread.is_alive():
             self.server_thread.join(timeout=2.0)
-        
+
         logger.info("Fast Gulf Stream forwarder shutdown complete")
-    
+
     def get_network_status(self) -> Dict:
         """Get current network status for monitoring"""
         current_leader = self.leader_schedule.get_current_leader()
         upcoming_leaders = self.leader_schedule.get_upcoming_leaders(3)
-        
+
         return {
             'current_leader': current_leader[:20] + '...' if current_leader else None,
             'upcoming_leaders': [
@@ -12,7 +12,9 @@ class GulfStreamProtocol:
     
     def __init__(self, leader_schedule):
         self.leader_schedule = leader_schedule
-        self.forwarded_transactions = {}  # leader_id -> [transactions]
+        # leader_id -> transactions forwarded to it; the transactions themselves
+        # are queued once, in the blockchain's transaction intake
+        self.forward_counts = {}
         self.forwarding_stats = {
             'total_forwarded': 0,
             'successful_forwards': 0,
@@ -71,11 +73,7 @@ class GulfStreamProtocol:
         
         for leader_id in target_leaders:
             try:
-                # Add transaction to leader's forwarded pool
-                if leader_id not in self.forwarded_transactions:
-                    self.forwarded_transactions[leader_id] = []
-                
-                self.forwarded_transactions[leader_id].append(transaction)
+                self.forward_counts[leader_id] = self.forward_counts.get(leader_id, 0) + 1
                 forwarding_results['forwarded_to'].append(leader_id)
                 
                 self.forwarding_stats['successful_forwards'] += 1
@@ -92,23 +90,9 @@ class GulfStreamProtocol:
         
         self.forwarding_stats['total_forwarded'] += 1
         
-        logger.info(f"Gulf Stream forwarded transaction {transaction.id[:8]} to {len(forwarding_results['forwarded_to'])} leaders (max 4: current + 3 upcoming)")
+        logger.debug(f"Gulf Stream forwarded transaction {transaction.id[:8]} to {len(forwarding_results['forwarded_to'])} leaders (max 4: current + 3 upcoming)")
         return forwarding_results
     
-    def get_forwarded_transactions(self, leader_id: str) -> List:
-        """
-        Get transactions that have been forwarded to a specific leader.
-        Called by leaders when their slot starts.
-        """
-        transactions = self.forwarded_transactions.get(leader_id, [])
-        
-        # Clear the forwarded transactions for this leader
-        if leader_id in self.forwarded_transactions:
-            del self.forwarded_transactions[leader_id]
-        
-        logger.info(f"Leader {leader_id[:20]}... retrieved {len(transactions)} forwarded transactions")
-        return transactions
-    
     def clean_expired_forwards(self, current_time: float = None):
         """
         Clean up forwarded transactions for leaders whose slots have passed.
@@ -123,10 +107,10 @@ class GulfStreamProtocol:
         active_leaders = set([current_leader] + upcoming_leaders)
         
         expired_leaders = []
-        for leader_id in list(self.forwarded_transactions.keys()):
+        for leader_id in list(self.forward_counts.keys()):
             if leader_id not in active_leaders:
                 expired_leaders.append(leader_id)
-                del self.forwarded_transactions[leader_id]
+                del self.forward_counts[leader_id]
         
         if expired_leaders:
             logger.info(f"Cleaned up forwarded transactions for {len(expired_leaders)} expired leaders")
@@ -141,8 +125,8 @@ class GulfStreamProtocol:
                 self.forwarding_stats['successful_forwards'] / 
                 max(1, self.forwarding_stats['total_forwarded'])
             ) * 100,
-            'active_forward_pools': len(self.forwarded_transactions),
-            'total_queued_transactions': sum(len(txs) for txs in self.forwarded_transactions.values())
+            'active_forward_pools': len(self.forward_counts),
+            'total_queued_transactions': sum(self.forward_counts.values())
         }
     
     def get_network_view(self) -> Dict:
@@ -164,11 +148,11 @@ class GulfStreamProtocol:
                 'leader': target['leader'][:20] + "...",
                 'slot': target['slot'],
                 'time_until_slot': round(target['time_until_slot'], 1),
-                'receiving_forwards': target['leader'] in self.forwarded_transactions
+                'receiving_forwards': target['leader'] in self.forward_counts
             })
         
-        for leader_id, transactions in self.forwarded_transactions.items():
-            network_view['forwarding_pools'][leader_id[:20] + "..."] = len(transactions)
+        for leader_id, count in self.forward_counts.items():
+            network_view['forwarding_pools'][leader_id[:20] + "..."] = count
         
         return network_view
 
@@ -181,18 +165,20 @@ class GulfStreamNode:
     def __init__(self, blockchain):
         self.blockchain = blockchain
         self.gulf_stream = GulfStreamProtocol(blockchain.leader_schedule)
-        self.local_transaction_pool = []
+        self.intake = blockchain.transaction_intake
         
         logger.info("Gulf Stream node integration initialized")
     
-    def receive_transaction(self, transaction):
+    def receive_transaction(self, transaction, source: str = 'gulf_stream'):
         """
         Process incoming transaction with Gulf Stream forwarding.
         
         This is called when a transaction first enters the network.
         """
-        # Add to local pool
-        self.local_transaction_pool.append(transaction)
+        # Queue for block packing; a transaction seen before is not forwarded again
+        if not self.intake.add(transaction, source):
+            logger.debug(f"Transaction {transaction.id[:8]} already in the intake")
+            return
         
         # Determine if and where to forward
         forward_targets = self.gulf_stream.should_forward_transaction(transaction)
@@ -200,34 +186,20 @@ class GulfStreamNode:
         if forward_targets:
             # Forward to upcoming leaders
             result = self.gulf_stream.forward_transaction(transaction, forward_targets)
-            logger.info(f"Transaction {transaction.id[:8]} forwarded via Gulf Stream to {len(result['forwarded_to'])} leaders")
+            logger.debug(f"Transaction {transaction.id[:8]} forwarded via Gulf Stream to {len(result['forwarded_to'])} leaders")
         else:
             logger.debug(f"Transaction {transaction.id[:8]} not forwarded - no suitable upcoming leaders")
     
     def get_transactions_for_leader(self, leader_id: str) -> List:
         """
-        Get all transactions available for a leader to include in their block.
-        Combines local pool + Gulf Stream forwarded transactions.
+        Take every transaction queued in the intake, oldest first, for the
+        leader's block. They are deduplicated already, whatever path they
+        arrived on.
         """
-        # Get locally received transactions
-        local_transactions = self.local_transaction_pool.copy()
-        
-        # Get Gulf Stream forwarded transactions
-        forwarded_transactions = self.gulf_stream.get_forwarded_transactions(leader_id)
-        
-        # Combine and deduplicate
-        all_transactions = local_transactions + forwarded_transactions
+        transactions = self.intake.take()
         
-        # Remove duplicates based on transaction ID
-        seen_ids = set()
-        unique_transactions = []
-        for tx in all_transactions:
-            if tx.id not in seen_ids:
-                unique_transactions.append(tx)
-                seen_ids.add(tx.id)
-        
-        logger.info(f"Leader {leader_id[:20]}... has {len(unique_transactions)} total transactions ({len(local_transactions)} local + {len(forwarded_transactions)} forwarded)")
-        return unique_transactions
+        logger.info(f"Leader {leader_id[:20]}... has {len(transactions)} transactions from the intake")
+        return transactions
     
     def start_leader_slot(self, leader_id: str):
         """
@@ -243,14 +215,13 @@ class GulfStreamNode:
         """Regular cleanup of expired Gulf Stream data"""
         self.gulf_stream.clean_expired_forwards()
         
-        # Optional: Clean old transactions from local pool
-        # In production, you might want to implement transaction TTL
+        self.intake.expire()
     
     def get_gulf_stream_status(self) -> Dict:
         """Get comprehensive Gulf Stream status for monitoring"""
         return {
             'forwarding_stats': self.gulf_stream.get_forwarding_stats(),
             'network_view': self.gulf_stream.get_network_view(),
-            'local_pool_size': len(self.local_transaction_pool),
+            'intake': self.intake.get_stats(),
             'leader_schedule_info': self.blockchain.leader_schedule.get_schedule_info()
         }
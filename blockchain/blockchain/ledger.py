@@ -0,0 +1,259 @@
+"""
+Block Ledger
+
+Append-only block storage behind ``Blockchain.blocks``. The ledger
+behaves like the list it replaces (len, indexing, negative indexes,
+slices, iteration), so callers are unchanged, but only the newest
+``tail_size`` blocks are kept in memory.
+
+On disk, blocks are wire-encoded and appended to segment files of about
+``segment_bytes`` each. A fixed-width index file, memory-mapped, holds
+one record per height:
+
+    segment (u32) | offset (u64) | length (u32) | block hash (32 bytes)
+
+so any height is one index read plus one segment read, and a hash is
+looked up through an in-memory hash -> height map rebuilt from the index
+when the ledger is opened. A block is only counted once its segment
+bytes and index record are written, and bytes left past the last
+counted block by a crash are truncated away on open.
+
+With no path the ledger is purely in memory and keeps every block.
+"""
+
+import mmap
+import os
+import struct
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional
+
+from blockchain.p2p.codec import WireCodec
+from blockchain.utils.logger import logger
+
+INDEX_MAGIC = b'BLIX'
+INDEX_VERSION = 1
+_INDEX_HEADER = struct.Struct('>4sIQ')  # magic, version, block count
+_INDEX_RECORD = struct.Struct('>IQI32s')  # segment, offset, length, block hash
+
+INITIAL_INDEX_CAPACITY = 4096
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+
+
+class _HashView:
+    """Read-only, list-like view of block hashes by height"""
+
+    def __init__(self, ledger: 'BlockLedger'):
+        self.ledger = ledger
+
+    def __len__(self) -> int:
+        return len(self.ledger)
+
+    def __getitem__(self, height: int) -> str:
+        return self.ledger.hash_at(height)
+
+    def __iter__(self) -> Iterator[str]:
+        for height in range(len(self.ledger)):
+            yield self.ledger.hash_at(height)
+
+
+class BlockLedger:
+    """
+    Append-only block store with a bounded in-memory tail
+
+    Args:
+        path: Directory for segment and index files (None = memory only)
+        tail_size: Newest blocks kept decoded in memory (ignored in memory-only mode)
+        segment_bytes: Size at which a new segment file is started
+    """
+
+    def __init__(self, path: Optional[str] = None, tail_size: int = 1024,
+                 segment_bytes: int = DEFAULT_SEGMENT_BYTES):
+        self.path = path
+        self.tail_size = tail_size
+        self.segment_bytes = segment_bytes
+
+        self.tail: "OrderedDict[int, object]" = OrderedDict()  # height -> block
+        self.hash_index: Dict[str, int] = {}  # block hash -> height
+        self.hashes = _HashView(self)
+
+        self._memory_hashes: List[str] = []
+        self._count = 0
+        self._index_file = None
+        self._index_map: Optional[mmap.mmap] = None
+        self._segments: Dict[int, int] = {}  # segment number -> file descriptor
+        self._segment = 0
+        self._segment_size = 0
+
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+            self._open()
+
+    @property
+    def persistent(self) -> bool:
+        return self.path is not None
+
+    # Opening
+
+    def _open(self):
+        index_path = os.path.join(self.path, 'index.dat')
+        new_index = not os.path.exists(index_path)
+        self._index_file = open(index_path, 'a+b')
+        if new_index or os.path.getsize(index_path) < _INDEX_HEADER.size:
+            self._index_file.truncate(_INDEX_HEADER.size + INITIAL_INDEX_CAPACITY * _INDEX_RECORD.size)
+        self._index_map = mmap.mmap(self._index_file.fileno(), 0)
+
+        magic, version, count = _INDEX_HEADER.unpack_from(self._index_map, 0)
+        if magic == b'\0\0\0\0':
+            _INDEX_HEADER.pack_into(self._index_map, 0, INDEX_MAGIC, INDEX_VERSION, 0)
+            count = 0
+        elif magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError(f"Unsupported ledger index in {self.path}")
+        self._count = count
+
+        for height in range(count):
+            self.hash_index[self._record(height)[3].hex()] = height
+
+        if count:
+            segment, offset, length, _ = self._record(count - 1)
+            self._segment = segment
+            self._segment_size = offset + length
+            # Drop bytes written after the last indexed block (interrupted append)
+            fd = self._segment_fd(segment)
+            if os.fstat(fd).st_size > self._segment_size:
+                os.ftruncate(fd, self._segment_size)
+            # Warm the tail with the newest blocks
+            for height in range(max(0, count - self.tail_size), count):
+                self.tail[height] = self._read(height)
+        logger.info(f"Ledger opened at {self.path} with {count} blocks")
+
+    def _segment_fd(self, segment: int) -> int:
+        fd = self._segments.get(segment)
+        if fd is None:
+            segment_path = os.path.join(self.path, f'segment-{segment:06d}.dat')
+            fd = self._segments[segment] = os.open(segment_path, os.O_RDWR | os.O_CREAT, 0o644)
+        return fd
+
+    def close(self):
+        if self._index_map is not None:
+            self._index_map.flush()
+            self._index_map.close()
+            self._index_map = None
+        if self._index_file is not None:
+            self._index_file.close()
+            self._index_file = None
+        for fd in self._segments.values():
+            os.close(fd)
+        self._segments.clear()
+
+    # Index
+
+    def _record(self, height: int):
+        return _INDEX_RECORD.unpack_from(self._index_map, _INDEX_HEADER.size + height * _INDEX_RECORD.size)
+
+    def _ensure_index_capacity(self, count: int):
+        needed = _INDEX_HEADER.size + count * _INDEX_RECORD.size
+        if needed <= len(self._index_map):
+            return
+        capacity = (len(self._index_map) - _INDEX_HEADER.size) // _INDEX_RECORD.size
+        while _INDEX_HEADER.size + capacity * _INDEX_RECORD.size < needed:
+            capacity *= 2
+        self._index_map.flush()
+        self._index_map.close()
+        self._index_file.truncate(_INDEX_HEADER.size + capacity * _INDEX_RECORD.size)
+        self._index_map = mmap.mmap(self._index_file.fileno(), 0)
+
+    def _set_count(self, count: int):
+        self._count = count
+        if self._index_map is not None:
+            _INDEX_HEADER.pack_into(self._index_map, 0, INDEX_MAGIC, INDEX_VERSION, count)
+
+    # Writing
+
+    def append(self, block, block_hash: str):
+        height = self._count
+        if self.persistent:
+            data = WireCodec.encode(block)
+            if self._segment_size and self._segment_size + len(data) > self.segment_bytes:
+                self._segment += 1
+                self._segment_size = 0
+            fd = self._segment_fd(self._segment)
+            os.pwrite(fd, data, self._segment_size)
+            self._ensure_index_capacity(height + 1)
+            _INDEX_RECORD.pack_into(self._index_map, _INDEX_HEADER.size + height * _INDEX_RECORD.size,
+                                    self._segment, self._segment_size, len(data), bytes.fromhex(block_hash))
+            self._segment_size += len(data)
+        else:
+            self._memory_hashes.append(block_hash)
+
+        self.hash_index[block_hash] = height
+        self._set_count(height + 1)
+        self.tail[height] = block
+        if self.persistent and len(self.tail) > self.tail_size:
+            self.tail.popitem(last=False)
+
+    def reset(self, blocks: List, block_hashes: List[str]):
+        """Replace the whole chain (e.g. from a snapshot)"""
+        self.tail.clear()
+        self.hash_index.clear()
+        self._memory_hashes = []
+        if self.persistent:
+            for fd in self._segments.values():
+                os.ftruncate(fd, 0)
+            self._segment = 0
+            self._segment_size = 0
+        self._set_count(0)
+        for block, block_hash in zip(blocks, block_hashes):
+            self.append(block, block_hash)
+
+    def flush(self):
+        if self._index_map is not None:
+            for fd in self._segments.values():
+                os.fsync(fd)
+            self._index_map.flush()
+
+    # Reading
+
+    def _read(self, height: int):
+        segment, offset, length, _ = self._record(height)
+        return WireCodec.decode(os.pread(self._segment_fd(segment), length, offset))
+
+    def hash_at(self, height: int) -> str:
+        if height < 0:
+            height += self._count
+        if not 0 <= height < self._count:
+            raise IndexError("ledger height out of range")
+        if not self.persistent:
+            return self._memory_hashes[height]
+        return self._record(height)[3].hex()
+
+    def get(self, height: int):
+        """Block at a height; blocks outside the tail are read from disk and not cached"""
+        block = self.tail.get(height)
+        if block is None:
+            block = self._read(height)
+        return block
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self.get(height) for height in range(*key.indices(self._count))]
+        if key < 0:
+            key += self._count
+        if not 0 <= key < self._count:
+            raise IndexError("ledger height out of range")
+        return self.get(key)
+
+    def __iter__(self):
+        for height in range(self._count):
+            yield self.get(height)
+
+    def get_stats(self) -> dict:
+        return {
+            'persistent': self.persistent,
+            'blocks': self._count,
+            'blocks_in_memory': len(self.tail),
+            'segments': self._segment + 1 if self.persistent else 0,
+            'index_bytes': len(self._index_map) if self._index_map is not None else 0
+        }
@@ -1,4 +1,3 @@
-import copy
 import time
 from threading import Timer
 
@@ -6,22 +5,26 @@ from api.main import NodeAPI
 from blockchain.blockchain import Blockchain
 from blockchain.consensus.gulf_stream import GulfStreamProcessor
 from blockchain.consensus.tpu_listener import TPUListener
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from fast_gulf_stream import FastGulfStreamForwarder
+from blockchain.fast_gulf_stream import FastGulfStreamForwarder
 from blockchain.slot_producer import SlotBasedBlockProducer
+from blockchain.p2p.codec import WireCodec
 from blockchain.p2p.message import Message, MessageType, InventoryItem, InventoryMessage, GetDataMessage
+from blockchain.p2p.inv_trickle import InventoryTrickler
+from blockchain.p2p.block_sync import BlockSync
 from blockchain.p2p.socket_communication import SocketCommunication
 from blockchain.p2p.transaction_mempool import TransactionMempool
 from blockchain.transaction.transaction_pool import TransactionPool
 from blockchain.transaction.wallet import Wallet
+from blockchain.turbine_pipeline import TurbineBlockPipeline, TurbineRetransmitter
 from blockchain.utils.helpers import BlockchainUtils
 from blockchain.utils.logger import logger
 
 
 class Node:
-    def __init__(self, ip, port, key=None):
+    # Largest BLOCK_DATA reply; bigger GETDATA answers are streamed as several messages
+    MAX_BLOCK_DATA_BYTES = 8 * 1024 * 1024
+
+    def __init__(self, ip, port, key=None, data_dir=None):
         self.p2p = None
         self.ip = ip
         self.port = port
@@ -38,13 +41,19 @@ class Node:
         # New Bitcoin-style mempool for efficient P2P propagation
         self.mempool = TransactionMempool()
         
+        # Announcements are queued per peer and flushed as batched INVs on randomised timers
+        self.inv_trickler = InventoryTrickler(self._send_inventory)
+        
+        # Headers-first catch-up with parallel block range downloads
+        self.block_sync = BlockSync(self)
+        
         self.wallet = Wallet()
         if key is not None:
             self.wallet.from_key(key)
             
         # CRITICAL FIX: Initialize blockchain WITHOUT genesis_public_key to force shared genesis
         # This ensures ALL nodes use the same genesis block from keys/genesis_private_key.pem
-        self.blockchain = Blockchain()
+        self.blockchain = Blockchain(data_dir=data_dir)
         
         # ENHANCED: Register this node with quantum consensus immediately at startup
         if self.blockchain.quantum_consensus:
@@ -66,7 +75,8 @@ class Node:
                     ip_address=self.ip,
                     gossip_port=self.gossip_port,
                     tpu_port=self.tpu_port,
-                    tvu_port=self.tvu_port
+                    tvu_port=self.tvu_port,
+                    signing_key=self.wallet.key_pair
                 )
                 logger.info(f"Gossip node reconfigured for node-specific ports: gossip={self.gossip_port}, tpu={self.tpu_port}, tvu={self.tvu_port}")
             except Exception as e:
@@ -79,7 +89,7 @@ class Node:
         self.tpu_listener = TPUListener(
             node_public_key=self.wallet.public_key_string(),
             tpu_port=self.tpu_port,
-            transaction_handler=self.handle_transaction
+            transaction_handler=lambda transaction: self.handle_transaction(transaction, source='tpu')
         )
         
         # Start TPU listener immediately
@@ -90,7 +100,8 @@ class Node:
         self.fast_gulf_stream = FastGulfStreamForwarder(
             node_public_key=self.wallet.public_key_string(),
             leader_schedule=self.blockchain.leader_schedule,
-            port_base=15000  # Use ports 15000-15999 for Gulf Stream UDP
+            port_base=15000,  # Use ports 15000-15999 for Gulf Stream UDP
+            intake=self.blockchain.transaction_intake
         )
         logger.info("Gulf Stream processor initialized with TPU integration")
         
@@ -100,6 +111,15 @@ class Node:
         # Track seen blocks to prevent rebroadcast loops
         self.seen_blocks = set()
         
+        # Blocks reconstructed from Turbine shreds are decoded and fed to
+        # handle_block through a bounded pipeline
+        self.turbine_pipeline = TurbineBlockPipeline(self.handle_block)
+        self.turbine_pipeline.start()
+        
+        # Received shreds are retransmitted to this node's children off the receive path
+        self.turbine_retransmitter = TurbineRetransmitter(self.blockchain._execute_turbine_transmission_tasks)
+        self.turbine_retransmitter.start()
+        
         # Connection health tracking
         self.peer_health = {}  # peer_id -> last_ping_time
         self.ping_interval = 60  # Ping peers every 60 seconds
@@ -328,7 +348,7 @@ class Node:
                 'legacy_pool': len(self.transaction_pool.transactions),
                 'mempool': len(self.mempool.transactions),
                 'gulf_stream': self.blockchain.gulf_stream_node.get_gulf_stream_status() if self.blockchain.gulf_stream_node else None,
-                'fast_gulf_stream': self.fast_gulf_stream.get_metrics() if self.fast_gulf_stream else None
+                'fast_gulf_stream': self.fast_gulf_stream.get_fast_forwarding_stats() if self.fast_gulf_stream else None
             },
             'gossip_protocol': self.blockchain.get_gossip_stats(),
             'slot_production': {
@@ -343,7 +363,7 @@ class Node:
         self.api.inject_node(self)
         self.api.start(self.ip, api_port)
 
-    def handle_transaction(self, transaction, from_api=False, source_peer=None):
+    def handle_transaction(self, transaction, from_api=False, source_peer=None, source=None):
         """
         Handle incoming transaction with Gulf Stream integration.
         
@@ -351,6 +371,7 @@ class Node:
             transaction: Transaction object to process
             from_api: True if transaction came from API, False if from P2P
             source_peer: Peer ID that sent the transaction (for P2P tracking)
+            source: Ingress path recorded in the intake stats (default 'api' or 'p2p')
         """
         # Register node in quantum consensus if available
         if self.blockchain and self.blockchain.quantum_consensus:
@@ -398,23 +419,13 @@ class Node:
             if not self.blockchain:
                 raise Exception("Blockchain not initialized")
                 
-            result = self.blockchain.submit_transaction(transaction)
-            
-            # 3. FAST FORWARD: Immediately forward to current and next leaders via UDP
-            # Convert transaction object to dictionary format for Fast Gulf Stream
-            transaction_dict = {
-                'sender_public_key': transaction.sender_public_key,
-                'receiver_public_key': transaction.receiver_public_key,
-                'amount': transaction.amount,
-                'transaction_type': transaction.type,  # Use .type instead of .transaction_type
-                'timestamp': transaction.timestamp,    # Use .timestamp directly
-                'transaction_id': transaction.id       # Use .id instead of .transaction_id
-            }
+            result = self.blockchain.submit_transaction(transaction, source or ('api' if from_api else 'p2p'))
             
+            # 3. FAST FORWARD: Queue for the current and next leaders' UDP batches
             # Check if Fast Gulf Stream is available before using it
             fast_forward_result = {}
             if hasattr(self, 'fast_gulf_stream') and self.fast_gulf_stream:
-                fast_forward_result = self.fast_gulf_stream.forward_transaction_fast(transaction_dict)
+                fast_forward_result = self.fast_gulf_stream.forward_transaction_fast(transaction)
                 # Ensure result is a dictionary (handle legacy boolean returns)
                 if not isinstance(fast_forward_result, dict):
                     fast_forward_result = {
@@ -460,38 +471,22 @@ class Node:
         current_leader = self.blockchain.leader_schedule.get_current_leader()
         am_current_leader = (current_leader == self.wallet.public_key_string())
         
-        # Get available transactions for block creation (Fast Gulf Stream + regular Gulf Stream + local)
-        available_transactions = []
-        gulf_stream_transactions = []
-        fast_gulf_stream_transactions = []
-        
-        if am_current_leader:
-            # PRIORITY 1: Get Fast Gulf Stream transactions (UDP forwarded)
-            fast_gulf_stream_transactions = self.fast_gulf_stream.get_transactions_for_leader(self.wallet.public_key_string())
-            available_transactions.extend(fast_gulf_stream_transactions)
-            
-            # PRIORITY 2: Get regular Gulf Stream transactions (in-memory forwarded)
-            gulf_stream_transactions = self.blockchain.gulf_stream_node.get_transactions_for_leader(self.wallet.public_key_string())
-            available_transactions.extend(gulf_stream_transactions)
-        
-        # PRIORITY 3: Add local transaction pool
-        available_transactions.extend(self.transaction_pool.transactions)
+        # Transactions from every ingress path wait in the intake; counting them doesn't take them
+        available_transactions = len(self.blockchain.transaction_intake)
         
         # ENHANCED: Immediate block creation if I'm leader with transactions
         should_create_block = (
-            am_current_leader and len(available_transactions) > 0
+            am_current_leader and available_transactions > 0
         ) or block_proposal_required
         
         if should_create_block:
             logger.info({
                 "message": "Triggering block creation as current leader",
                 "am_current_leader": am_current_leader,
-                "fast_gulf_stream_transactions": len(fast_gulf_stream_transactions) if am_current_leader else 0,
-                "gulf_stream_transactions": len(gulf_stream_transactions) if am_current_leader else 0,
+                "intake_transactions": available_transactions,
                 "legacy_pool_size": len(self.transaction_pool.transactions),
-                "total_available_transactions": len(available_transactions),
                 "mempool_size": len(self.mempool.transactions),
-                "reason": "Current leader with transactions" if am_current_leader and len(available_transactions) > 0 else "450ms interval reached"
+                "reason": "Current leader with transactions" if am_current_leader and available_transactions > 0 else "450ms interval reached"
             })
             self.propose_block()
         
@@ -530,7 +525,7 @@ class Node:
         Responds with GETDATA for items we don't have.
         """
         try:
-            inv_message = InventoryMessage.from_dict(inv_data)
+            inv_message = inv_data if isinstance(inv_data, InventoryMessage) else InventoryMessage.from_dict(inv_data)
             peer_id = f"{connected_node.host}:{connected_node.port}"
             
             # Separate transaction and block inventories
@@ -563,8 +558,8 @@ class Node:
                     requested_items.append(InventoryItem(InventoryItem.TYPE_BLOCK, block_hash))
                 
                 getdata_message = GetDataMessage(requested_items)
-                message = Message(self.p2p.socket_connector, MessageType.GETDATA, getdata_message.to_dict())
-                encoded_message = BlockchainUtils.encode(message)
+                message = Message(self.p2p.socket_connector, MessageType.GETDATA, getdata_message)
+                encoded_message = WireCodec.encode(message)
                 
                 self.p2p.send_to_node(connected_node, encoded_message)
                 
@@ -585,10 +580,12 @@ class Node:
         Responds with TX or BLOCK_DATA messages.
         """
         try:
-            getdata_message = GetDataMessage.from_dict(getdata_data)
+            getdata_message = (getdata_data if isinstance(getdata_data, GetDataMessage)
+                               else GetDataMessage.from_dict(getdata_data))
             peer_id = f"{connected_node.host}:{connected_node.port}"
             
             served_count = 0
+            block_hashes = []
             
             for item in getdata_message.inventory:
                 if item.type == InventoryItem.TYPE_TX:
@@ -596,7 +593,7 @@ class Node:
                     transaction = self.mempool.get_transaction(item.hash)
                     if transaction:
                         message = Message(self.p2p.socket_connector, MessageType.TX, transaction)
-                        encoded_message = BlockchainUtils.encode(message)
+                        encoded_message = WireCodec.encode(message)
                         self.p2p.send_to_node(connected_node, encoded_message)
                         served_count += 1
                         
@@ -604,26 +601,54 @@ class Node:
                         self.mempool.stats['total_served'] += 1
                 
                 elif item.type == InventoryItem.TYPE_BLOCK:
-                    # Send block data (simplified - would need block lookup by hash)
-                    # For now, use the last block as a placeholder
-                    if self.blockchain.blocks:
-                        last_block = self.blockchain.blocks[-1]
-                        message = Message(self.p2p.socket_connector, MessageType.BLOCK_DATA, last_block)
-                        encoded_message = BlockchainUtils.encode(message)
-                        self.p2p.send_to_node(connected_node, encoded_message)
-                        served_count += 1
+                    block_hashes.append(item.hash)
+            
+            if block_hashes:
+                served_blocks = self._serve_blocks(connected_node, block_hashes)
+                served_count += served_blocks
             
             if served_count > 0:
                 logger.info({
                     "message": "Served data requests via TX/BLOCK_DATA",
                     "peer": peer_id,
                     "served_items": served_count,
+                    "unknown_blocks": len(block_hashes) - served_blocks if block_hashes else 0,
                     "total_requested": len(getdata_message.inventory)
                 })
                 
         except Exception as e:
             logger.error(f"Error handling GETDATA message from {connected_node.host}:{connected_node.port}: {e}")
 
+    def _serve_blocks(self, connected_node, block_hashes):
+        """
+        Answer block GETDATA with chain blocks looked up by hash.
+        Blocks go out in chain order as BLOCK_DATA lists built from the chain's
+        pre-encoded block cache, split only when a message would exceed
+        MAX_BLOCK_DATA_BYTES. Unknown hashes are skipped.
+        """
+        found = []
+        for block_hash in dict.fromkeys(block_hashes):
+            position = self.blockchain.block_index.get(block_hash)
+            if position is not None:
+                found.append((position, block_hash))
+        found.sort()
+        
+        batch, batch_bytes = [], 0
+        for _, block_hash in found:
+            encoded = self.blockchain.get_encoded_block(block_hash)
+            if batch and batch_bytes + len(encoded) > self.MAX_BLOCK_DATA_BYTES:
+                self._send_block_data(connected_node, batch)
+                batch, batch_bytes = [], 0
+            batch.append(encoded)
+            batch_bytes += len(encoded)
+        if batch:
+            self._send_block_data(connected_node, batch)
+        return len(found)
+
+    def _send_block_data(self, connected_node, encoded_blocks):
+        message = Message(self.p2p.socket_connector, MessageType.BLOCK_DATA, encoded_blocks)
+        self.p2p.send_to_node(connected_node, WireCodec.encode(message))
+
     def handle_transaction_data(self, transaction):
         """
         Handle TX message - transaction data received in response to our GETDATA request.
@@ -634,12 +659,15 @@ class Node:
         # Process the transaction normally
         self.handle_transaction(transaction, from_api=False, source_peer=source_peer)
 
-    def handle_block_data(self, block):
+    def handle_block_data(self, block_data):
         """
         Handle BLOCK_DATA message - block data received in response to our GETDATA request.
+        Carries a list of blocks in chain order (or a single block from older peers).
         """
-        # Process the block normally
-        self.handle_block(block)
+        blocks = block_data if isinstance(block_data, list) else [block_data]
+        for block in blocks:
+            # Process each block normally
+            self.handle_block(block)
 
     def handle_ping(self, connected_node, ping_data):
         """Handle PING message and respond with PONG"""
@@ -650,7 +678,7 @@ class Node:
             # Respond with PONG containing the same nonce
             pong_data = {'nonce': nonce, 'timestamp': time.time()}
             message = Message(self.p2p.socket_connector, MessageType.PONG, pong_data)
-            encoded_message = BlockchainUtils.encode(message)
+            encoded_message = WireCodec.encode(message)
             self.p2p.send_to_node(connected_node, encoded_message)
             
             peer_id = f"{connected_node.host}:{connected_node.port}"
@@ -677,6 +705,13 @@ class Node:
         except Exception as e:
             logger.error(f"Error handling PONG from {connected_node.host}:{connected_node.port}: {e}")
 
+    def handle_peer_disconnected(self, connected_node):
+        """Drop per-peer state when a connection closes"""
+        peer_id = f"{connected_node.host}:{connected_node.port}"
+        self.inv_trickler.remove_peer(peer_id)
+        self.mempool.cleanup_peer(peer_id)
+        self.peer_health.pop(peer_id, None)
+
     def start_peer_health_monitoring(self):
         """Start periodic ping to maintain connection health (Bitcoin-style)"""
         def ping_peers():
@@ -687,7 +722,7 @@ class Node:
                 try:
                     ping_data = {'nonce': int(time.time()), 'timestamp': time.time()}
                     message = Message(self.p2p.socket_connector, MessageType.PING, ping_data)
-                    encoded_message = BlockchainUtils.encode(message)
+                    encoded_message = WireCodec.encode(message)
                     self.p2p.send_to_node(peer, encoded_message)
                 except Exception as e:
                     logger.debug(f"Failed to ping peer {peer.host}:{peer.port}: {e}")
@@ -751,50 +786,63 @@ class Node:
         
         # Add mempool statistics
         base_stats["mempool"] = self.mempool.get_mempool_stats()
+        base_stats["inv_trickle"] = self.inv_trickler.get_stats()
+        base_stats["block_sync"] = self.block_sync.get_stats()
         
         # Add P2P statistics
         if self.p2p and hasattr(self.p2p, 'all_nodes'):
             base_stats["p2p"] = {
                 "connected_peers": len(self.p2p.all_nodes),
                 "peer_health_tracked": len(self.peer_health),
-                "seen_blocks": len(self.seen_blocks)
+                "seen_blocks": len(self.seen_blocks),
+                **self.p2p.get_stats()
             }
         
         return base_stats
 
+    def _send_inventory(self, peer_id, items):
+        """
+        Trickle flush callback: send one INV carrying every queued item for a peer.
+        """
+        if not self.p2p or not hasattr(self.p2p, 'all_nodes'):
+            return False
+        
+        peer = next((p for p in self.p2p.all_nodes if f"{p.host}:{p.port}" == peer_id), None)
+        if peer is None:
+            self.inv_trickler.remove_peer(peer_id)
+            return False
+        
+        inv_message = InventoryMessage([InventoryItem(inv_type, item_hash) for inv_type, item_hash in items])
+        message = Message(self.p2p.socket_connector, MessageType.INV, inv_message)
+        if not self.p2p.send_to_node(peer, WireCodec.encode(message)):
+            return False  # Peer's outbound queue is full
+        
+        tx_hashes = [item_hash for inv_type, item_hash in items if inv_type == InventoryItem.TYPE_TX]
+        if tx_hashes:
+            self.mempool.mark_announced_to_peer(peer_id, tx_hashes)
+        return True
+
     def _announce_transaction_to_peers(self, tx_hash):
         """
         Announce transaction using Bitcoin-style INV message to all connected peers.
-        Used for transactions received via API.
+        Used for transactions received via API. The hash is queued on each peer's
+        trickle and goes out in that peer's next batched INV.
         """
         if not self.p2p or not hasattr(self.p2p, 'all_nodes') or not self.p2p.all_nodes:
             return
         
-        # Create inventory item for the transaction
-        inv_item = InventoryItem(InventoryItem.TYPE_TX, tx_hash)
-        inv_message = InventoryMessage([inv_item])
-        
-        # Send INV message to all connected peers
-        message = Message(self.p2p.socket_connector, MessageType.INV, inv_message.to_dict())
-        encoded_message = BlockchainUtils.encode(message)
-        
-        announced_to = 0
+        queued_for = 0
         for peer in self.p2p.all_nodes:
-            try:
-                self.p2p.send_to_node(peer, encoded_message)
-                announced_to += 1
-                
-                # Track that we announced this transaction to this peer
-                peer_id = f"{peer.host}:{peer.port}"
-                self.mempool.mark_announced_to_peer(peer_id, [tx_hash])
-                
-            except Exception as e:
-                logger.debug(f"Failed to announce transaction to peer {peer.host}:{peer.port}: {e}")
+            peer_id = f"{peer.host}:{peer.port}"
+            if self.mempool.peer_knows_transaction(peer_id, tx_hash):
+                continue
+            self.inv_trickler.queue(peer_id, InventoryItem.TYPE_TX, [tx_hash])
+            queued_for += 1
         
-        logger.info({
-            "message": "Transaction announced to network via INV",
+        logger.debug({
+            "message": "Transaction queued for INV announcement",
             "tx_hash": tx_hash[:16] + "...",
-            "announced_to_peers": announced_to,
+            "queued_for_peers": queued_for,
             "total_peers": len(self.p2p.all_nodes)
         })
 
@@ -810,12 +858,6 @@ class Node:
         max_forwards = min(8, len(self.p2p.all_nodes))
         forwarded_to = 0
         
-        # Create inventory item for the transaction
-        inv_item = InventoryItem(InventoryItem.TYPE_TX, tx_hash)
-        inv_message = InventoryMessage([inv_item])
-        message = Message(self.p2p.socket_connector, MessageType.INV, inv_message.to_dict())
-        encoded_message = BlockchainUtils.encode(message)
-        
         for peer in self.p2p.all_nodes:
             if forwarded_to >= max_forwards:
                 break
@@ -826,20 +868,15 @@ class Node:
             if exclude_peer and peer_id == exclude_peer:
                 continue
             
-            # Check if this peer likely already has this transaction
-            if not self.mempool.get_transactions_for_announcement(peer_id):
+            # Skip peers that already know this transaction
+            if self.mempool.peer_knows_transaction(peer_id, tx_hash):
                 continue
             
-            try:
-                self.p2p.send_to_node(peer, encoded_message)
-                self.mempool.mark_announced_to_peer(peer_id, [tx_hash])
-                forwarded_to += 1
-                
-            except Exception as e:
-                logger.debug(f"Failed to gossip transaction to peer {peer_id}: {e}")
+            self.inv_trickler.queue(peer_id, InventoryItem.TYPE_TX, [tx_hash])
+            forwarded_to += 1
         
-        logger.info({
-            "message": "Transaction gossiped to network subset",
+        logger.debug({
+            "message": "Transaction queued for gossip to network subset",
             "tx_hash": tx_hash[:16] + "...",
             "forwarded_to_peers": forwarded_to,
             "excluded_peer": exclude_peer[:20] + "..." if exclude_peer else None
@@ -858,8 +895,8 @@ class Node:
             return
         
         # Create transaction message for direct forwarding
-        message = Message(self.p2p.socket_connector, MessageType.TRANSACTION, transaction.to_dict())
-        encoded_message = BlockchainUtils.encode(message)
+        message = Message(self.p2p.socket_connector, MessageType.TRANSACTION, transaction)
+        encoded_message = WireCodec.encode(message)
         
         forwarded_count = 0
         
@@ -896,37 +933,30 @@ class Node:
             result = self.blockchain.process_turbine_shred(shred_data, self.wallet.public_key_string())
             
             forwarding_tasks = result.get('forwarding_tasks', [])
-            reconstruction_status = result.get('reconstruction_status', {})
+            reconstruction_status = result.get('reconstruction_status') or {}
             
-            # Execute forwarding tasks to continue propagation
-            for task in forwarding_tasks:
-                try:
-                    target_node = task['target_node']
-                    shreds = task['shreds']
-                    
-                    # In production, this would send shreds over network to target_node
-                    logger.debug(f"Turbine: Forwarding {len(shreds)} shreds to {target_node[:15]}...")
-                    
-                except Exception as e:
-                    logger.warning(f"Failed to forward Turbine shred to {task.get('target_node', 'unknown')}: {e}")
+            # Continue propagation: the retransmitter sends to this node's children
+            if forwarding_tasks:
+                self.turbine_retransmitter.submit(forwarding_tasks)
             
-            # Check if block reconstruction is complete
-            if reconstruction_status.get('is_reconstructed'):
-                block_data = reconstruction_status.get('block_data')
-                if block_data:
-                    logger.info({
-                        "message": "Block reconstructed via Turbine protocol",
-                        "block_hash": reconstruction_status.get('block_hash', 'unknown')[:16] + "...",
-                        "shreds_received": reconstruction_status.get('shreds_received', 0),
-                        "reconstruction_method": "turbine_erasure_coding"
-                    })
-                    
-                    # Process the reconstructed block normally
-                    # (In production, you'd deserialize block_data back to a Block object)
+            # Hand every decoded FEC set to the pipeline so transactions are
+            # verified while the rest of the block is still arriving
+            for fec_set in self.blockchain.turbine_protocol.drain_completed_fec_sets():
+                self.turbine_pipeline.submit_fec_set(fec_set)
+            
+            # Every FEC set of the block is decoded; the pipeline assembles it
+            if reconstruction_status.get('all_sets_decoded'):
+                logger.info({
+                    "message": "Block decoded via Turbine protocol",
+                    "block_hash": reconstruction_status.get('block_hash', 'unknown')[:16] + "...",
+                    "shreds_received": reconstruction_status.get('shreds_received', 0),
+                    "fec_sets_decoded": reconstruction_status.get('fec_sets_decoded', 0),
+                    "reconstruction_method": "turbine_erasure_coding"
+                })
             
             return {
                 'forwarding_tasks_executed': len(forwarding_tasks),
-                'reconstruction_complete': reconstruction_status.get('is_reconstructed', False),
+                'reconstruction_complete': reconstruction_status.get('all_sets_decoded', False),
                 'shreds_received': reconstruction_status.get('shreds_received', 0)
             }
             
@@ -952,7 +982,8 @@ class Node:
                 'children_count': len(children),
                 'children_ids': [child_id[:15] + "..." for child_id in children[:3]],  # Show first 3
                 'total_validators': len(turbine_validators),
-                'fanout_configured': getattr(self.blockchain.turbine_protocol.propagation_tree, 'fanout', 0)
+                'fanout_configured': getattr(self.blockchain.turbine_protocol.propagation_tree, 'fanout', 0),
+                'retransmission': self.turbine_retransmitter.get_stats()
             }
             
         except Exception as e:
@@ -1095,7 +1126,7 @@ class Node:
                     "validation_type": "solana_compliant"
                 })
                 message = Message(self.p2p.socket_connector, "BLOCK", block)
-                self.p2p.broadcast(BlockchainUtils.encode(message))
+                self.p2p.broadcast(WireCodec.encode(message))
             else:
                 logger.warning({
                     "message": "Block failed Solana-compliant validation",
@@ -1116,25 +1147,32 @@ class Node:
             })
 
     def request_chain(self):
-        message = Message(self.p2p.socket_connector, "BLOCKCHAINREQUEST", None)
-        encoded_message = BlockchainUtils.encode(message)
-        self.p2p.broadcast(encoded_message)
+        """Catch up with peers: headers first, then block ranges in parallel"""
+        self.block_sync.start()
+
+    def handle_getheaders(self, connected_node, request):
+        self.block_sync.handle_getheaders(connected_node, request)
+
+    def handle_headers(self, connected_node, headers_message):
+        self.block_sync.handle_headers(connected_node, headers_message)
+
+    def handle_getblocks(self, connected_node, request):
+        self.block_sync.handle_getblocks(connected_node, request)
+
+    def handle_blocks(self, connected_node, blocks_message):
+        self.block_sync.handle_blocks(connected_node, blocks_message)
 
     def handle_blockchain_request(self, requesting_node):
-        message = Message(self.p2p.socket_connector, "BLOCKCHAIN", self.blockchain)
-        encoded_message = BlockchainUtils.encode(message)
-        self.p2p.send(requesting_node, encoded_message)
+        # Legacy whole-chain transfer, still answered (bounded) for peers that predate block sync
+        self.block_sync.handle_blockchain_request(requesting_node)
 
     def handle_blockchain(self, blockchain):
-        local_blockchain_copy = copy.deepcopy(self.blockchain)
-        local_block_count = len(local_blockchain_copy.blocks)
-        received_chain_block_count = len(blockchain.blocks)
-        if local_block_count < received_chain_block_count:
-            for block_number, block in enumerate(blockchain.blocks):
-                if block_number >= local_block_count:
-                    local_blockchain_copy.add_block(block)
-                    self.transaction_pool.remove_from_pool(block.transactions)
-            self.blockchain = local_blockchain_copy
+        # Append the blocks we are missing in place; the chain may be backed by
+        # an on-disk ledger, so it is not deep-copied
+        local_block_count = len(self.blockchain.blocks)
+        for block in blockchain.blocks[local_block_count:]:
+            self.blockchain.add_block(block)
+            self.transaction_pool.remove_from_pool(block.transactions)
 
     def propose_block(self):
         # FIXED: Check if we should propose a block using LEADER SCHEDULE (not quantum consensus directly)
@@ -1165,60 +1203,19 @@ class Node:
                     "transactions_available": len(self.transaction_pool.transactions)
                 })
                 
-                # LEADER MUST PACK ALL TRANSACTIONS - Get from ALL sources
-                
-                # PRIORITY 1: Get TPU transactions (direct UDP from Gulf Stream)
-                tpu_transactions = []
-                tpu_slot_data = self.tpu_listener.get_slot_transactions()
-                for tpu_entry in tpu_slot_data:
-                    tpu_transactions.append(tpu_entry['transaction'])
-                
-                # PRIORITY 2: Get Fast Gulf Stream transactions (UDP forwarded)
-                fast_gulf_stream_transactions = self.fast_gulf_stream.get_transactions_for_leader(my_public_key)
-                
-                # PRIORITY 3: Get regular Gulf Stream transactions (in-memory forwarded)
-                gulf_stream_transactions = self.blockchain.gulf_stream_node.get_transactions_for_leader(my_public_key)
-                
-                # PRIORITY 4: Get local transaction pool transactions
-                local_transactions = self.transaction_pool.transactions.copy()
-                
-                # CRITICAL: Leader MUST pack ALL received transactions (Solana behavior)
-                all_available_transactions = (
-                    tpu_transactions + 
-                    fast_gulf_stream_transactions + 
-                    gulf_stream_transactions + 
-                    local_transactions
-                )
-                
-                # Remove duplicates while preserving order
-                seen_tx_ids = set()
-                unique_transactions = []
-                for tx in all_available_transactions:
-                    if tx.id not in seen_tx_ids:
-                        unique_transactions.append(tx)
-                        seen_tx_ids.add(tx.id)
-                
-                transactions_for_block = unique_transactions
-                
-                logger.info({
-                    "message": "Leader packing ALL received transactions (Solana-style)",
-                    "tpu_transactions": len(tpu_transactions),
-                    "fast_gulf_stream_count": len(fast_gulf_stream_transactions),
-                    "gulf_stream_count": len(gulf_stream_transactions),
-                    "local_pool_count": len(local_transactions),
-                    "total_before_dedup": len(all_available_transactions),
-                    "total_after_dedup": len(unique_transactions),
-                    "duplicates_removed": len(all_available_transactions) - len(unique_transactions),
-                    "slot_based_creation": True,
-                    "pack_all_policy": "ENABLED"
-                })
+                # LEADER MUST PACK ALL TRANSACTIONS: TPU, Fast Gulf Stream, P2P and
+                # API transactions all wait, deduplicated and in arrival order, in
+                # the blockchain's transaction intake, which create_block drains
+                intake_stats = self.blockchain.transaction_intake.get_stats()
                 
                 # Allow block proposal with any number of transactions (including zero)
                 # Every slot, create a block regardless of transaction count or size
                 logger.info({
                     "message": "Creating block for slot interval",
                     "pool_size": len(self.transaction_pool.transactions),
-                    "transactions_for_block": len(transactions_for_block),
+                    "transactions_for_block": intake_stats['pending'],
+                    "duplicates_rejected": intake_stats['duplicates'],
+                    "by_source": intake_stats['by_source'],
                     "size_limit": "none"
                 })
                 
@@ -1265,12 +1262,9 @@ class Node:
                     }
                 })
                 
-                # CLEAN UP: Clear TPU slot transactions after successful block creation
-                self.tpu_listener.clear_slot_transactions()
-                
                 # Remove only the transactions that were included in the block
+                # (the intake already handed them over when the block was packed)
                 self.transaction_pool.remove_from_pool(block.transactions)
-                self.gulf_stream.remove_transactions(block.transactions)  # Clean up Gulf Stream too
                 
                 # Mark our own block as seen to prevent rebroadcast loops
                 proposed_block_hash = BlockchainUtils.hash(block.payload()).hex()
@@ -1279,7 +1273,7 @@ class Node:
                 # ENHANCED: Broadcast via both P2P and Turbine protocols for maximum reach
                 # 1. Traditional P2P broadcast for immediate propagation
                 message = Message(self.p2p.socket_connector, "BLOCK", block)
-                self.p2p.broadcast(BlockchainUtils.encode(message))
+                self.p2p.broadcast(WireCodec.encode(message))
                 
                 # 2. TURBINE PROTOCOL: Efficient shredded propagation to all validators
                 try:
@@ -1364,6 +1358,12 @@ class Node:
             except Exception as e:
                 logger.error(f"Error shutting down Fast Gulf Stream: {e}")
         
+        # Shutdown Turbine block pipeline
+        if hasattr(self, 'turbine_pipeline') and self.turbine_pipeline:
+            self.turbine_pipeline.stop()
+        if hasattr(self, 'turbine_retransmitter') and self.turbine_retransmitter:
+            self.turbine_retransmitter.stop()
+        
         # Shutdown slot producer
         if hasattr(self, 'slot_producer') and self.slot_producer:
             try:
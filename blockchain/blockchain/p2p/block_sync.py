@@ -0,0 +1,365 @@
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from blockchain.p2p.codec import WireCodec
+from blockchain.p2p.message import (BlocksMessage, ChainSnapshot, GetBlocksMessage, GetHeadersMessage,
+                                    HeadersMessage, Message, MessageType)
+from blockchain.transaction.wallet import Wallet
+from blockchain.utils.helpers import BlockchainUtils
+from blockchain.utils.logger import logger
+
+
+class BlockSync:
+    """
+    Headers-first block synchronisation.
+
+    Catching up runs in three overlapping stages:
+
+    1. Headers are fetched from every peer in batches of MAX_HEADERS and
+       accepted only if each one links to the previous header's hash and
+       its proposer is a known network participant.
+    2. Bodies for accepted headers are requested as ranges of
+       BLOCKS_PER_RANGE heights, spread over every peer whose chain covers
+       the range, with at most MAX_RANGES_PER_PEER ranges in flight per
+       peer. A body is accepted only if it hashes to its header's hash and
+       carries a valid proposer signature; ranges that time out or fail
+       these checks go back to the queue, and the peer that failed gets no
+       ranges for a backoff that doubles with each consecutive failure.
+    3. A worker thread appends verified bodies in height order, so
+       re-execution of early blocks overlaps the download of later ones.
+
+    Bodies are never fetched more than MAX_BUFFERED_BLOCKS ahead of the
+    chain tip, which bounds memory while the worker catches up. When no
+    peer's chain covers the next pending range, sync stops so that the
+    next start() begins again from the local tip.
+    """
+
+    MAX_HEADERS = 2000
+    BLOCKS_PER_RANGE = 32
+    MAX_RANGES_PER_PEER = 2
+    MAX_BUFFERED_BLOCKS = 1024
+    RANGE_TIMEOUT = 10.0
+    PEER_BACKOFF = 2.0
+    MAX_PEER_BACKOFF = 60.0
+    LEGACY_CHAIN_BLOCKS = 256
+
+    def __init__(self, node):
+        self.node = node
+
+        self.lock = threading.Condition()
+        self.headers: Dict[int, object] = {}  # height -> accepted BlockHeader not yet applied
+        self.next_header_height: Optional[int] = None  # First height without an accepted header
+        self.last_header_hash: Optional[str] = None
+
+        self.peers: Dict[str, object] = {}  # peer_id -> connected node
+        self.peer_heights: Dict[str, int] = {}  # peer_id -> chain height it reported
+        self.peer_failures: Dict[str, int] = {}  # peer_id -> consecutive failed ranges
+        self.peer_backoff: Dict[str, float] = {}  # peer_id -> when it may be given ranges again
+        self.header_requests: Dict[str, float] = {}  # peer_id -> when headers were last requested
+
+        self.pending_ranges: deque = deque()  # (start, count) waiting to be requested
+        self.next_range_height: Optional[int] = None  # First height not yet put in a range
+        self.in_flight: Dict[Tuple[int, int], Tuple[str, float]] = {}  # range -> (peer_id, sent at)
+        self.bodies: Dict[int, object] = {}  # height -> verified block waiting to be applied
+
+        self.worker: Optional[threading.Thread] = None
+        self.active = False
+
+        self.stats = {
+            'sync_rounds': 0,
+            'headers_accepted': 0,
+            'headers_rejected': 0,
+            'ranges_requested': 0,
+            'ranges_timed_out': 0,
+            'bodies_rejected': 0,
+            'blocks_applied': 0,
+            'blocks_failed': 0
+        }
+
+    # Client side
+
+    def start(self):
+        """Begin (or refresh) catching up with every connected peer"""
+        p2p = self.node.p2p
+        if not p2p or not getattr(p2p, 'all_nodes', None):
+            return
+
+        with self.lock:
+            chain = self.node.blockchain
+            if not self.active:
+                self._reset(len(chain.blocks), chain.block_hashes[-1] if chain.block_hashes else None)
+                self.active = True
+            self.stats['sync_rounds'] += 1
+            start_height = self.next_header_height
+            peers = list(p2p.all_nodes)
+            for peer in peers:
+                peer_id = f"{peer.host}:{peer.port}"
+                self.peers[peer_id] = peer
+                self.header_requests[peer_id] = time.monotonic()
+            if self.worker is None or not self.worker.is_alive():
+                self.worker = threading.Thread(target=self._apply_loop, name="block-sync", daemon=True)
+                self.worker.start()
+
+        for peer in peers:
+            self._send(peer, MessageType.GETHEADERS, GetHeadersMessage(start_height, self.MAX_HEADERS))
+
+    def _reset(self, height: int, tip_hash: Optional[str]):
+        self.headers.clear()
+        self.bodies.clear()
+        self.in_flight.clear()
+        self.pending_ranges.clear()
+        self.header_requests.clear()
+        self.next_header_height = height
+        self.next_range_height = height
+        self.last_header_hash = tip_hash
+
+    def handle_headers(self, connected_node, headers_message: HeadersMessage):
+        peer_id = f"{connected_node.host}:{connected_node.port}"
+        request_more = False
+        with self.lock:
+            if not self.active:
+                return
+            self.peers[peer_id] = connected_node
+            chain = self.node.blockchain
+            peer_height = self.peer_heights.get(peer_id, 0)
+
+            for header in headers_message.headers:
+                height = header.block_count
+                if height < self.next_header_height:
+                    # Already have this height; the peer agrees with us if the hashes match
+                    known = self.headers.get(height)
+                    known_hash = known.block_hash if known else (
+                        chain.block_hashes[height] if height < len(chain.block_hashes) else None)
+                    if known_hash != header.block_hash:
+                        break
+                    peer_height = max(peer_height, height + 1)
+                    continue
+                if (height != self.next_header_height or header.last_hash != self.last_header_hash
+                        or not chain.is_known_network_participant(header.forger)):
+                    self.stats['headers_rejected'] += 1
+                    break
+                self.headers[height] = header
+                self.next_header_height = height + 1
+                self.last_header_hash = header.block_hash
+                peer_height = height + 1
+                self.stats['headers_accepted'] += 1
+
+            self.peer_heights[peer_id] = peer_height
+            self.header_requests.pop(peer_id, None)
+            request_more = (len(headers_message.headers) >= self.MAX_HEADERS
+                            and peer_height == self.next_header_height
+                            and headers_message.chain_height > self.next_header_height)
+            if request_more:
+                self.header_requests[peer_id] = time.monotonic()
+            next_start = self.next_header_height
+            self._schedule_ranges()
+            requests = self._assign_ranges()
+
+        if request_more:
+            self._send(connected_node, MessageType.GETHEADERS, GetHeadersMessage(next_start, self.MAX_HEADERS))
+        self._send_range_requests(requests)
+
+    def handle_blocks(self, connected_node, blocks_message: BlocksMessage):
+        peer_id = f"{connected_node.host}:{connected_node.port}"
+        start, blocks = blocks_message.start_height, blocks_message.blocks
+        with self.lock:
+            expected = self._headers_for_range(start, len(blocks))
+
+        # Hash and signature checks run here, on the receiving thread, in
+        # parallel with the worker that executes earlier blocks
+        verified = {}
+        for block, header in zip(blocks, expected):
+            if header is None or block.block_count != header.block_count:
+                break
+            payload = block.payload()
+            if (BlockchainUtils.hash(payload).hex() != header.block_hash
+                    or not Wallet.signature_valid(payload, block.signature, block.forger)):
+                break
+            verified[header.block_count] = block
+
+        with self.lock:
+            request = self._find_in_flight(start, peer_id)
+            if request is not None:
+                del self.in_flight[request]
+                if len(verified) < request[1]:
+                    # Missing or bad bodies go back to the queue for another peer
+                    self.stats['bodies_rejected'] += request[1] - len(verified)
+                    missing_start = request[0] + len(verified)
+                    self.pending_ranges.appendleft((missing_start, request[0] + request[1] - missing_start))
+                    self._back_off(peer_id)
+                else:
+                    self.peer_failures.pop(peer_id, None)
+            self.bodies.update(verified)
+            self.lock.notify_all()
+            requests = self._assign_ranges()
+        self._send_range_requests(requests)
+
+    def _headers_for_range(self, start: int, count: int) -> List:
+        return [self.headers.get(height) for height in range(start, start + count)]
+
+    def _find_in_flight(self, start: int, peer_id: str) -> Optional[Tuple[int, int]]:
+        for request, (owner, _) in self.in_flight.items():
+            if request[0] == start and owner == peer_id:
+                return request
+        return None
+
+    def _back_off(self, peer_id: str):
+        failures = self.peer_failures.get(peer_id, 0) + 1
+        self.peer_failures[peer_id] = failures
+        delay = min(self.PEER_BACKOFF * 2 ** (failures - 1), self.MAX_PEER_BACKOFF)
+        self.peer_backoff[peer_id] = time.monotonic() + delay
+
+    def _schedule_ranges(self):
+        while self.next_range_height < self.next_header_height:
+            count = min(self.BLOCKS_PER_RANGE, self.next_header_height - self.next_range_height)
+            self.pending_ranges.append((self.next_range_height, count))
+            self.next_range_height += count
+
+    def _assign_ranges(self) -> List[Tuple[object, Tuple[int, int]]]:
+        """Hand pending ranges to peers that have them, within the buffer window"""
+        window_end = len(self.node.blockchain.blocks) + self.MAX_BUFFERED_BLOCKS
+        now = time.monotonic()
+        load: Dict[str, int] = {peer_id: 0 for peer_id in self.peers}
+        for owner, _ in self.in_flight.values():
+            load[owner] = load.get(owner, 0) + 1
+
+        requests = []
+        deferred = []
+        while self.pending_ranges:
+            start, count = self.pending_ranges.popleft()
+            if start >= window_end:
+                deferred.append((start, count))
+                break
+            candidates = [peer_id for peer_id, height in self.peer_heights.items()
+                          if height >= start + count and load.get(peer_id, 0) < self.MAX_RANGES_PER_PEER
+                          and peer_id in self.peers and self.peer_backoff.get(peer_id, 0) <= now]
+            if not candidates:
+                deferred.append((start, count))
+                break
+            peer_id = min(candidates, key=lambda candidate: load[candidate])
+            load[peer_id] += 1
+            self.in_flight[(start, count)] = (peer_id, time.monotonic())
+            requests.append((self.peers[peer_id], (start, count)))
+            self.stats['ranges_requested'] += 1
+        self.pending_ranges.extendleft(reversed(deferred))
+        return requests
+
+    def _range_available(self, start: int, count: int) -> bool:
+        """Whether any peer, backed off or not, reported a chain covering the range"""
+        return any(height >= start + count and peer_id in self.peers
+                   for peer_id, height in self.peer_heights.items())
+
+    def _send_range_requests(self, requests):
+        for peer, (start, count) in requests:
+            self._send(peer, MessageType.GETBLOCKS, GetBlocksMessage(start, count))
+
+    def _expire_requests(self):
+        now = time.monotonic()
+        for request, (peer_id, sent_at) in list(self.in_flight.items()):
+            if now - sent_at > self.RANGE_TIMEOUT:
+                del self.in_flight[request]
+                self.pending_ranges.appendleft(request)
+                self.stats['ranges_timed_out'] += 1
+                self._back_off(peer_id)
+        for peer_id, sent_at in list(self.header_requests.items()):
+            if now - sent_at > self.RANGE_TIMEOUT:
+                del self.header_requests[peer_id]
+
+    def _apply_loop(self):
+        while True:
+            with self.lock:
+                chain = self.node.blockchain
+                height = len(chain.blocks)
+                block = self.bodies.pop(height, None)
+                if block is None:
+                    # Heights the chain reached some other way (e.g. a gossiped block)
+                    for stale in [stale for stale in self.bodies if stale < height]:
+                        del self.bodies[stale]
+                    self._expire_requests()
+                    requests = self._assign_ranges()
+                    if not requests:
+                        if (not self.in_flight and not self.pending_ranges and not self.header_requests
+                                and height >= self.next_header_height):
+                            # Caught up with every header we were given
+                            self.active = False
+                            self.worker = None
+                            return
+                        if (self.pending_ranges and not self.in_flight and not self.header_requests
+                                and not self._range_available(*self.pending_ranges[0])):
+                            logger.warning(f"Sync: no peer has blocks from height {self.pending_ranges[0][0]}, "
+                                           f"stopping until the next sync round")
+                            self.active = False
+                            self.worker = None
+                            return
+                        self.lock.wait(1.0)
+                        continue
+                else:
+                    requests = []
+            self._send_range_requests(requests)
+            if block is not None:
+                self._apply(block, height)
+
+    def _apply(self, block, height: int):
+        chain = self.node.blockchain
+        if not chain.block_count_valid(block) or not chain.last_block_hash_valid(block):
+            self.stats['blocks_failed'] += 1
+            logger.warning(f"Sync: block {height} does not extend the local chain, restarting sync")
+            with self.lock:
+                self.active = False
+            self.start()
+            return
+
+        chain.add_block(block)
+        self.node.transaction_pool.remove_from_pool(block.transactions)
+        self.node.seen_blocks.add(chain.block_hashes[-1])
+        with self.lock:
+            self.headers.pop(height, None)
+        self.stats['blocks_applied'] += 1
+
+    # Server side
+
+    def handle_getheaders(self, connected_node, request: GetHeadersMessage):
+        chain = self.node.blockchain
+        count = max(0, min(request.max_count, self.MAX_HEADERS))
+        headers = chain.get_block_headers(request.start_height, count)
+        self._send(connected_node, MessageType.HEADERS, HeadersMessage(headers, len(chain.blocks)))
+
+    def handle_getblocks(self, connected_node, request: GetBlocksMessage):
+        chain = self.node.blockchain
+        start = max(0, request.start_height)
+        end = min(len(chain.blocks), start + max(0, min(request.count, self.BLOCKS_PER_RANGE)))
+        blocks = [chain.get_encoded_block(chain.block_hashes[height], cache=False) for height in range(start, end)]
+        self._send(connected_node, MessageType.BLOCKS, BlocksMessage(start, blocks))
+
+    def handle_blockchain_request(self, connected_node):
+        """
+        Legacy whole-chain transfer for peers that predate block sync.
+
+        Only the first LEGACY_CHAIN_BLOCKS blocks are sent, as a plain list
+        (the ledger itself has no wire schema); a peer further behind has
+        to catch up with GETHEADERS/GETBLOCKS.
+        """
+        blocks = self.node.blockchain.blocks[:self.LEGACY_CHAIN_BLOCKS]
+        self._send(connected_node, MessageType.BLOCKCHAIN, ChainSnapshot(blocks))
+
+    def _send(self, peer, message_type: str, data):
+        try:
+            message = Message(self.node.p2p.socket_connector, message_type, data)
+            self.node.p2p.send_to_node(peer, WireCodec.encode(message))
+        except Exception as e:
+            logger.debug(f"Sync: failed to send {message_type} to {peer.host}:{peer.port}: {e}")
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {
+                'active': self.active,
+                'chain_height': len(self.node.blockchain.blocks),
+                'header_height': self.next_header_height,
+                'bodies_buffered': len(self.bodies),
+                'ranges_in_flight': len(self.in_flight),
+                'ranges_pending': len(self.pending_ranges),
+                'peers': len(self.peer_heights),
+                **self.stats
+            }
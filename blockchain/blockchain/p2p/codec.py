@@ -0,0 +1,487 @@
+"""
+Binary Wire Codec
+=================
+
+Versioned, schema-based binary encoding for everything the node sends
+over P2P and UDP, replacing jsonpickle.
+
+Every registered type has a numeric type id and a schema version. The
+encoder always writes the newest version of a type, and the decoder
+keeps every registered version, so peers one release apart still
+understand each other. Only registered types can be decoded, so unlike
+jsonpickle a peer can never make us instantiate arbitrary classes.
+
+Frame layout: magic(2) format_version(1) value, where a value is a
+one-byte tag followed by its payload. Objects are encoded as
+type_id(u16) schema_version(u8) followed by their fields in schema
+order. Decoding works directly on a memoryview of the received buffer.
+
+A value encoded once with encode_value() can be wrapped in EncodedValue
+and embedded in later frames verbatim, so objects that are sent many
+times (such as recent blocks) are serialised only once.
+"""
+
+import binascii
+import struct
+from typing import Any, Callable, Dict, List, Tuple
+
+from blockchain.block import Block
+from blockchain.p2p.message import (BlockHeader, BlocksMessage, ChainSnapshot, GetBlocksMessage, GetDataMessage,
+                                    GetHeadersMessage, HeadersMessage, InventoryItem, InventoryMessage, Message)
+from blockchain.p2p.socket_connector import SocketConnector
+from blockchain.transaction.transaction import Transaction
+
+MAGIC = b'BW'
+FORMAT_VERSION = 1
+
+# Binary frames travel base64-encoded behind this prefix on text
+# transports; the P2P transport turns them back into binary frames
+TEXT_PREFIX = 'BW1:'
+
+TAG_NONE = 0
+TAG_FALSE = 1
+TAG_TRUE = 2
+TAG_INT = 3
+TAG_FLOAT = 4
+TAG_STR = 5
+TAG_BYTES = 6
+TAG_LIST = 7
+TAG_DICT = 8
+TAG_OBJECT = 9
+TAG_BIGINT = 10
+
+# Schema field kinds
+STR = 'str'
+INT = 'int'
+FLOAT = 'float'
+ANY = 'any'
+
+_U32 = struct.Struct('>I')
+_I64 = struct.Struct('>q')
+_F64 = struct.Struct('>d')
+_OBJECT_HEADER = struct.Struct('>HB')
+_FRAME_HEADER = struct.Struct('>2sB')
+
+_I64_MIN = -2 ** 63
+_I64_MAX = 2 ** 63 - 1
+
+# Deepest list/dict/object nesting a frame may contain; legitimate
+# messages stay well below this, hostile ones would exhaust the stack
+MAX_NESTING_DEPTH = 32
+
+
+class CodecError(ValueError):
+    """Raised for values that cannot be encoded and for malformed frames"""
+
+
+class EncodedValue:
+    """A value already encoded by encode_value(), written into frames as is"""
+
+    __slots__ = ('data',)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+class Schema:
+    """
+    Wire layout of one version of a registered type.
+
+    ``fields`` is a list of (attribute, kind) pairs. With ``extras`` set,
+    attributes outside the schema travel as a trailing dict, so ad-hoc
+    metadata such as a block's poh_sequence survives the round trip.
+    Decoded extras must have str names that are neither schema fields nor
+    class attributes, so a peer cannot shadow methods or fields.
+    ``build`` turns the decoded field dict into an instance; by default
+    the attributes are restored without calling ``__init__``.
+    """
+
+    def __init__(self, cls: type, type_id: int, version: int, fields: List[Tuple[str, str]],
+                 extras: bool = False, build: Callable[[Dict], Any] = None):
+        self.cls = cls
+        self.type_id = type_id
+        self.version = version
+        self.fields = fields
+        self.field_names = frozenset(name for name, _ in fields)
+        self.extras = extras
+        self.build = build or self._restore
+
+    def _restore(self, values: Dict) -> Any:
+        instance = self.cls.__new__(self.cls)
+        instance.__dict__.update(values)
+        return instance
+
+
+class CodecRegistry:
+    """Maps types to their schemas and encodes/decodes frames"""
+
+    def __init__(self):
+        self._latest: Dict[type, Schema] = {}
+        self._schemas: Dict[Tuple[int, int], Schema] = {}
+
+    def register(self, schema: Schema):
+        key = (schema.type_id, schema.version)
+        existing = self._schemas.get(key)
+        if existing is not None and existing.cls is not schema.cls:
+            raise CodecError(f"Type id {schema.type_id} v{schema.version} already registered")
+        self._schemas[key] = schema
+
+        current = self._latest.get(schema.cls)
+        if current is None or schema.version > current.version:
+            self._latest[schema.cls] = schema
+
+    # Encoding
+
+    def encode(self, obj: Any) -> bytes:
+        out = bytearray(_FRAME_HEADER.pack(MAGIC, FORMAT_VERSION))
+        self._write_value(out, obj)
+        return bytes(out)
+
+    def encode_value(self, obj: Any) -> EncodedValue:
+        """Encode a value without a frame header, for embedding in other frames"""
+        out = bytearray()
+        self._write_value(out, obj)
+        return EncodedValue(bytes(out))
+
+    def encode_text(self, obj: Any) -> str:
+        """Encode for text-only transports"""
+        return TEXT_PREFIX + binascii.b2a_base64(self.encode(obj), newline=False).decode('ascii')
+
+    def _write_value(self, out: bytearray, value: Any):
+        if value is None:
+            out.append(TAG_NONE)
+        elif value is True:
+            out.append(TAG_TRUE)
+        elif value is False:
+            out.append(TAG_FALSE)
+        elif isinstance(value, int):
+            if _I64_MIN <= value <= _I64_MAX:
+                out.append(TAG_INT)
+                out += _I64.pack(value)
+            else:
+                out.append(TAG_BIGINT)
+                self._write_str(out, str(value))
+        elif isinstance(value, float):
+            out.append(TAG_FLOAT)
+            out += _F64.pack(value)
+        elif isinstance(value, str):
+            out.append(TAG_STR)
+            self._write_str(out, value)
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            out.append(TAG_BYTES)
+            out += _U32.pack(len(value))
+            out += value
+        elif isinstance(value, (list, tuple)):
+            out.append(TAG_LIST)
+            out += _U32.pack(len(value))
+            for item in value:
+                self._write_value(out, item)
+        elif isinstance(value, dict):
+            out.append(TAG_DICT)
+            self._write_dict(out, value)
+        elif isinstance(value, EncodedValue):
+            out += value.data
+        else:
+            schema = self._latest.get(type(value))
+            if schema is not None:
+                out.append(TAG_OBJECT)
+                self._write_object(out, value, schema)
+            elif hasattr(value, 'to_dict'):
+                # Unregistered helper objects travel as plain data
+                out.append(TAG_DICT)
+                self._write_dict(out, value.to_dict())
+            else:
+                raise CodecError(f"No wire schema for {type(value).__name__}")
+
+    def _write_str(self, out: bytearray, value: str):
+        encoded = value.encode('utf-8')
+        out += _U32.pack(len(encoded))
+        out += encoded
+
+    def _write_dict(self, out: bytearray, value: Dict):
+        out += _U32.pack(len(value))
+        for key, item in value.items():
+            self._write_value(out, key)
+            self._write_value(out, item)
+
+    def _write_object(self, out: bytearray, obj: Any, schema: Schema):
+        out += _OBJECT_HEADER.pack(schema.type_id, schema.version)
+        for name, kind in schema.fields:
+            value = getattr(obj, name)
+            if kind == STR:
+                self._write_str(out, value if value is not None else '')
+            elif kind == FLOAT:
+                out += _F64.pack(value)
+            elif kind == INT:
+                out += _I64.pack(value)
+            else:
+                self._write_value(out, value)
+        if schema.extras:
+            extra = {key: value for key, value in obj.__dict__.items() if key not in schema.field_names}
+            self._write_dict(out, extra)
+
+    # Decoding
+
+    def decode(self, data) -> Any:
+        view = memoryview(data)
+        try:
+            magic, version = _FRAME_HEADER.unpack_from(view, 0)
+            if magic != MAGIC:
+                raise CodecError("Not a wire codec frame")
+            if version != FORMAT_VERSION:
+                raise CodecError(f"Unsupported frame format version {version}")
+            value, offset = self._read_value(view, _FRAME_HEADER.size, 0)
+        except CodecError:
+            raise
+        except Exception as e:
+            # Anything else a hostile frame can trigger (struct.error,
+            # UnicodeDecodeError, a failing build(), ...) is a malformed frame
+            raise CodecError(f"Malformed frame: {type(e).__name__}: {e}")
+        if offset != len(view):
+            raise CodecError("Trailing bytes after frame")
+        return value
+
+    def decode_text(self, text: str) -> Any:
+        return self.decode(text_to_frame(text))
+
+    def _read_str(self, view, offset: int) -> Tuple[str, int]:
+        (length,) = _U32.unpack_from(view, offset)
+        offset += 4
+        end = offset + length
+        if end > len(view):
+            raise CodecError("Truncated string")
+        return str(view[offset:end], 'utf-8'), end
+
+    def _read_value(self, view, offset: int, depth: int) -> Tuple[Any, int]:
+        tag = view[offset]
+        offset += 1
+
+        if tag == TAG_STR:
+            return self._read_str(view, offset)
+        if tag == TAG_INT:
+            return _I64.unpack_from(view, offset)[0], offset + 8
+        if tag == TAG_FLOAT:
+            return _F64.unpack_from(view, offset)[0], offset + 8
+        if tag == TAG_OBJECT:
+            return self._read_object(view, offset, _nested(depth))
+        if tag == TAG_LIST:
+            depth = _nested(depth)
+            (count,) = _U32.unpack_from(view, offset)
+            offset += 4
+            items = []
+            for _ in range(count):
+                item, offset = self._read_value(view, offset, depth)
+                items.append(item)
+            return items, offset
+        if tag == TAG_DICT:
+            return self._read_dict(view, offset, _nested(depth))
+        if tag == TAG_NONE:
+            return None, offset
+        if tag == TAG_TRUE:
+            return True, offset
+        if tag == TAG_FALSE:
+            return False, offset
+        if tag == TAG_BYTES:
+            (length,) = _U32.unpack_from(view, offset)
+            offset += 4
+            if offset + length > len(view):
+                raise CodecError("Truncated bytes")
+            return bytes(view[offset:offset + length]), offset + length
+        if tag == TAG_BIGINT:
+            text, offset = self._read_str(view, offset)
+            return int(text), offset
+        raise CodecError(f"Unknown value tag {tag}")
+
+    def _read_dict(self, view, offset: int, depth: int) -> Tuple[Dict, int]:
+        (count,) = _U32.unpack_from(view, offset)
+        offset += 4
+        result = {}
+        for _ in range(count):
+            key, offset = self._read_value(view, offset, depth)
+            if isinstance(key, (list, dict)):
+                raise CodecError(f"Unhashable dict key of type {type(key).__name__}")
+            value, offset = self._read_value(view, offset, depth)
+            result[key] = value
+        return result, offset
+
+    def _read_object(self, view, offset: int, depth: int) -> Tuple[Any, int]:
+        type_id, version = _OBJECT_HEADER.unpack_from(view, offset)
+        offset += _OBJECT_HEADER.size
+        schema = self._schemas.get((type_id, version))
+        if schema is None:
+            raise CodecError(f"Unknown wire type {type_id} v{version}")
+
+        values = {}
+        for name, kind in schema.fields:
+            if kind == STR:
+                values[name], offset = self._read_str(view, offset)
+            elif kind == FLOAT:
+                values[name] = _F64.unpack_from(view, offset)[0]
+                offset += 8
+            elif kind == INT:
+                values[name] = _I64.unpack_from(view, offset)[0]
+                offset += 8
+            else:
+                values[name], offset = self._read_value(view, offset, depth)
+        if schema.extras:
+            extra, offset = self._read_dict(view, offset, depth)
+            for key in extra:
+                if not isinstance(key, str) or key in schema.field_names or hasattr(schema.cls, key):
+                    raise CodecError(f"Invalid extra attribute {key!r} for {schema.cls.__name__}")
+            values.update(extra)
+        return schema.build(values), offset
+
+
+def _nested(depth: int) -> int:
+    depth += 1
+    if depth > MAX_NESTING_DEPTH:
+        raise CodecError(f"Frame nested deeper than {MAX_NESTING_DEPTH} levels")
+    return depth
+
+
+def text_to_frame(text: str) -> bytes:
+    """Binary frame carried by a text frame"""
+    if not text.startswith(TEXT_PREFIX):
+        raise CodecError("Not a wire codec text frame")
+    try:
+        return binascii.a2b_base64(text[len(TEXT_PREFIX):])
+    except binascii.Error as e:
+        raise CodecError(f"Malformed text frame: {e}")
+
+
+def _build_block(values: Dict) -> Block:
+    block = Block.__new__(Block)
+    block.__dict__.update(values)
+    if not isinstance(block.transactions, list):
+        raise CodecError("Block transactions must be a list")
+    return block
+
+
+def _build_inventory(cls):
+    def build(values: Dict):
+        items = values['inventory']
+        if not all(isinstance(item, InventoryItem) for item in items):
+            raise CodecError(f"{cls.__name__} inventory must hold InventoryItems")
+        return cls(items)
+    return build
+
+
+def _build_headers(values: Dict) -> HeadersMessage:
+    headers = values['headers']
+    if not isinstance(headers, list) or not all(isinstance(header, BlockHeader) for header in headers):
+        raise CodecError("HeadersMessage headers must be a list of BlockHeaders")
+    return HeadersMessage(headers, values['chain_height'])
+
+
+def _build_blocks(values: Dict) -> BlocksMessage:
+    blocks = values['blocks']
+    if not isinstance(blocks, list) or not all(isinstance(block, Block) for block in blocks):
+        raise CodecError("BlocksMessage blocks must be a list of Blocks")
+    return BlocksMessage(values['start_height'], blocks)
+
+
+def _register_defaults(registry: CodecRegistry):
+    registry.register(Schema(Transaction, 1, 1, [
+        ('sender_public_key', STR),
+        ('receiver_public_key', STR),
+        ('amount', ANY),
+        ('type', STR),
+        ('id', STR),
+        ('timestamp', FLOAT),
+        ('signature', STR)
+    ], extras=True))
+    registry.register(Schema(Block, 2, 1, [
+        ('transactions', ANY),
+        ('last_hash', STR),
+        ('forger', STR),
+        ('block_count', INT),
+        ('timestamp', FLOAT),
+        ('signature', STR)
+    ], extras=True, build=_build_block))
+    registry.register(Schema(SocketConnector, 3, 1, [
+        ('ip', STR),
+        ('port', INT)
+    ], build=lambda values: SocketConnector(values['ip'], values['port'])))
+    registry.register(Schema(Message, 4, 1, [
+        ('sender_connector', ANY),
+        ('message_type', STR),
+        ('data', ANY),
+        ('timestamp', FLOAT),
+        ('message_id', STR)
+    ]))
+    registry.register(Schema(InventoryItem, 5, 1, [
+        ('type', INT),
+        ('hash', STR)
+    ], build=lambda values: InventoryItem(values['type'], values['hash'])))
+    registry.register(Schema(InventoryMessage, 6, 1, [
+        ('inventory', ANY)
+    ], build=_build_inventory(InventoryMessage)))
+    registry.register(Schema(GetDataMessage, 7, 1, [
+        ('inventory', ANY)
+    ], build=_build_inventory(GetDataMessage)))
+    registry.register(Schema(ChainSnapshot, 8, 1, [
+        ('blocks', ANY)
+    ], build=lambda values: ChainSnapshot(values['blocks'])))
+    registry.register(Schema(BlockHeader, 9, 1, [
+        ('block_count', INT),
+        ('block_hash', STR),
+        ('last_hash', STR),
+        ('forger', STR),
+        ('timestamp', FLOAT),
+        ('tx_count', INT)
+    ]))
+    registry.register(Schema(GetHeadersMessage, 10, 1, [
+        ('start_height', INT),
+        ('max_count', INT)
+    ]))
+    registry.register(Schema(HeadersMessage, 11, 1, [
+        ('headers', ANY),
+        ('chain_height', INT)
+    ], build=_build_headers))
+    registry.register(Schema(GetBlocksMessage, 12, 1, [
+        ('start_height', INT),
+        ('count', INT)
+    ]))
+    registry.register(Schema(BlocksMessage, 13, 1, [
+        ('start_height', INT),
+        ('blocks', ANY)
+    ], build=_build_blocks))
+
+
+default_registry = CodecRegistry()
+_register_defaults(default_registry)
+
+
+class WireCodec:
+    """Entry points for the default registry"""
+
+    @staticmethod
+    def encode(obj) -> bytes:
+        return default_registry.encode(obj)
+
+    @staticmethod
+    def decode(data):
+        return default_registry.decode(data)
+
+    @staticmethod
+    def encode_value(obj) -> EncodedValue:
+        return default_registry.encode_value(obj)
+
+    @staticmethod
+    def encode_text(obj) -> str:
+        return default_registry.encode_text(obj)
+
+    @staticmethod
+    def decode_text(text: str):
+        return default_registry.decode_text(text)
+
+    @staticmethod
+    def text_to_frame(text: str) -> bytes:
+        return text_to_frame(text)
+
+    @staticmethod
+    def is_text_frame(data) -> bool:
+        return isinstance(data, str) and data.startswith(TEXT_PREFIX)
@@ -0,0 +1,161 @@
+import heapq
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from blockchain.utils.logger import logger
+
+
+class InventoryTrickler:
+    """
+    Bitcoin-style trickled INV announcements.
+
+    Inventory to announce is queued per peer instead of being sent as it
+    arrives. Each peer has its own flush timer drawn from an exponential
+    distribution (a Poisson process, as in Bitcoin's trickle), so
+    announcements from many transactions coalesce into a single INV of up
+    to max_items_per_inv hashes, and the timing of a flush reveals little
+    about which transaction arrived first. Whatever does not fit in one
+    flush waits for the peer's next timer.
+
+    A single daemon thread flushes every peer; send_inventory(peer_id, items)
+    is called with the (type, hash) pairs to announce and reports whether
+    they were sent.
+    """
+
+    def __init__(self, send_inventory: Callable[[str, List[Tuple[str, str]]], bool],
+                 mean_interval: float = 0.1, max_items_per_inv: int = 1000,
+                 max_queue_per_peer: int = 50000, rng: random.Random = None):
+        self.send_inventory = send_inventory
+        self.mean_interval = mean_interval
+        self.max_items_per_inv = max_items_per_inv
+        self.max_queue_per_peer = max_queue_per_peer
+        self.rng = rng or random.Random()
+
+        # peer_id -> ordered (type, hash) set still to announce
+        self.queues: Dict[str, "OrderedDict[Tuple[str, str], None]"] = {}
+        self.flush_due: Dict[str, float] = {}  # peer_id -> time of its next flush
+        self.timers: List[Tuple[float, str]] = []  # heap of (due, peer_id); stale entries are skipped
+
+        self.condition = threading.Condition()
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+
+        self.stats = {
+            'items_queued': 0,
+            'items_announced': 0,
+            'inv_messages_sent': 0,
+            'items_dropped': 0,
+            'send_failures': 0
+        }
+
+    def start(self):
+        with self.condition:
+            if self.running:
+                return
+            self.running = True
+        self.thread = threading.Thread(target=self._run, name="inv-trickle", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+
+    def queue(self, peer_id: str, inv_type: str, hashes: List[str]):
+        """Schedule hashes for announcement to a peer on its next trickle"""
+        if not self.running:
+            self.start()
+
+        with self.condition:
+            pending = self.queues.get(peer_id)
+            if pending is None:
+                pending = self.queues[peer_id] = OrderedDict()
+            for item_hash in hashes:
+                item = (inv_type, item_hash)
+                if item in pending:
+                    continue
+                if len(pending) >= self.max_queue_per_peer:
+                    self.stats['items_dropped'] += 1
+                    continue
+                pending[item] = None
+                self.stats['items_queued'] += 1
+
+            if pending and peer_id not in self.flush_due:
+                due = time.monotonic() + self.rng.expovariate(1.0 / self.mean_interval)
+                self.flush_due[peer_id] = due
+                heapq.heappush(self.timers, (due, peer_id))
+                if self.timers[0][1] == peer_id:
+                    self.condition.notify()  # New earliest timer
+
+    def remove_peer(self, peer_id: str):
+        """Drop everything queued for a disconnected peer"""
+        with self.condition:
+            self.queues.pop(peer_id, None)
+            self.flush_due.pop(peer_id, None)
+
+    def queued_items(self, peer_id: str = None) -> int:
+        with self.condition:
+            if peer_id is not None:
+                return len(self.queues.get(peer_id, ()))
+            return sum(len(pending) for pending in self.queues.values())
+
+    def _run(self):
+        while True:
+            with self.condition:
+                batch = self._next_batch()
+                if batch is None:
+                    return
+            peer_id, items = batch
+            try:
+                sent = self.send_inventory(peer_id, items)
+            except Exception as e:
+                logger.debug(f"Failed to send INV to peer {peer_id}: {e}")
+                sent = False
+
+            if sent:
+                self.stats['inv_messages_sent'] += 1
+                self.stats['items_announced'] += len(items)
+            else:
+                self.stats['send_failures'] += 1
+
+    def _next_batch(self) -> Optional[Tuple[str, List[Tuple[str, str]]]]:
+        """Wait for the earliest due peer and take up to max_items_per_inv of its queue"""
+        while self.running:
+            if not self.timers:
+                self.condition.wait()
+                continue
+            due, peer_id = self.timers[0]
+            if self.flush_due.get(peer_id) != due:
+                heapq.heappop(self.timers)  # Peer removed or rescheduled
+                continue
+            delay = due - time.monotonic()
+            if delay > 0:
+                self.condition.wait(delay)
+                continue
+
+            heapq.heappop(self.timers)
+            del self.flush_due[peer_id]
+            pending = self.queues.get(peer_id)
+            if not pending:
+                continue
+            items = []
+            while pending and len(items) < self.max_items_per_inv:
+                items.append(pending.popitem(last=False)[0])
+            if pending:
+                next_due = time.monotonic() + self.rng.expovariate(1.0 / self.mean_interval)
+                self.flush_due[peer_id] = next_due
+                heapq.heappush(self.timers, (next_due, peer_id))
+            else:
+                del self.queues[peer_id]
+            return peer_id, items
+        return None
+
+    def get_stats(self) -> dict:
+        return {
+            'peers_with_pending': len(self.queues),
+            'items_pending': self.queued_items(),
+            **self.stats
+        }
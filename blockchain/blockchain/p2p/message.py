@@ -36,6 +36,12 @@ class MessageType:
     TX = "TX"                # Transaction data response
     BLOCK_DATA = "BLOCK_DATA" # Block data response
     
+    # Headers-first block sync
+    GETHEADERS = "GETHEADERS"  # Request headers from a height
+    HEADERS = "HEADERS"        # Headers response
+    GETBLOCKS = "GETBLOCKS"    # Request a range of block bodies
+    BLOCKS = "BLOCKS"          # Block range response
+    
     # Ping/Pong for connection health
     PING = "PING"
     PONG = "PONG"
@@ -95,3 +101,56 @@ class GetDataMessage:
     def from_dict(cls, data):
         items = [InventoryItem.from_dict(item_data) for item_data in data['inventory']]
         return cls(items)
+
+
+class ChainSnapshot:
+    """Blocks sent in reply to BLOCKCHAINREQUEST (the receiver only needs .blocks)"""
+    def __init__(self, blocks):
+        self.blocks = blocks
+
+
+class BlockHeader:
+    """
+    A block without its transactions. block_hash commits to the full block,
+    so a body fetched later is checked against the header it was requested for.
+    """
+    def __init__(self, block_count, block_hash, last_hash, forger, timestamp, tx_count):
+        self.block_count = block_count
+        self.block_hash = block_hash
+        self.last_hash = last_hash
+        self.forger = forger
+        self.timestamp = timestamp
+        self.tx_count = tx_count
+    
+    @classmethod
+    def from_block(cls, block, block_hash):
+        return cls(block.block_count, block_hash, block.last_hash, block.forger,
+                   block.timestamp, len(block.transactions))
+
+
+class GetHeadersMessage:
+    """Request for up to max_count headers starting at start_height"""
+    def __init__(self, start_height, max_count):
+        self.start_height = start_height
+        self.max_count = max_count
+
+
+class HeadersMessage:
+    """Consecutive headers plus the sender's chain height"""
+    def __init__(self, headers, chain_height):
+        self.headers = headers  # List of BlockHeader
+        self.chain_height = chain_height
+
+
+class GetBlocksMessage:
+    """Request for the block bodies at heights start_height .. start_height + count - 1"""
+    def __init__(self, start_height, count):
+        self.start_height = start_height
+        self.count = count
+
+
+class BlocksMessage:
+    """Block bodies answering a GetBlocksMessage, in height order"""
+    def __init__(self, start_height, blocks):
+        self.start_height = start_height
+        self.blocks = blocks
@@ -2,8 +2,8 @@ import os
 import threading
 import time
 
+from blockchain.p2p.codec import WireCodec
 from blockchain.p2p.message import Message
-from blockchain.utils.helpers import BlockchainUtils
 from blockchain.utils.logger import logger
 
 
@@ -79,7 +79,7 @@ class PeerDiscoveryHandler:
         data = peers_self
         message_type = "DISCOVERY"
         message = Message(connector_self, message_type, data)
-        encoded_message = BlockchainUtils.encode(message)
+        encoded_message = WireCodec.encode(message)
         return encoded_message
 
     def handle_message(self, message):
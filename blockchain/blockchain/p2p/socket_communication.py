@@ -1,24 +1,63 @@
-import json
-import socket
+import threading
 import time
 
-from p2pnetwork.node import Node
-
+from blockchain.p2p.codec import WireCodec
 from blockchain.p2p.peer_discovery_handler import PeerDiscoveryHandler
 from blockchain.p2p.socket_connector import SocketConnector
-from blockchain.utils.helpers import BlockchainUtils
+from blockchain.p2p.transport import AsyncTransport
 from blockchain.utils.logger import logger
 
 
-class SocketCommunication(Node):
-    def __init__(self, ip, port):
-        super(SocketCommunication, self).__init__(ip, port, None)
+class SocketCommunication:
+    """
+    Node-facing P2P layer on top of the asyncio transport.
+
+    Sends take binary wire codec frames from WireCodec.encode (text frames
+    from WireCodec.encode_text are still accepted and converted back to
+    binary, at the cost of a base64 round trip). A dispatcher thread
+    takes received frames in batches of up to MAX_BATCH_SIZE and hands
+    them to the node; it wakes every FLUSH_INTERVAL even when idle, so a
+    frame is handled as soon as the dispatcher is free and housekeeping
+    runs on a timer rather than on message arrival.
+    """
+
+    MAX_BATCH_SIZE = 64
+    FLUSH_INTERVAL = 0.05
+    DECODE_ERROR_LOG_EVERY = 100
+
+    def __init__(self, ip, port, max_queued_frames=1024, max_inbound_frames=10000):
+        self.host = ip
+        self.port = port
+        self.id = f"{ip}:{port}"
         self.peers = []
         self.peer_discovery_handler = PeerDiscoveryHandler(self)
         self.socket_connector = SocketConnector(ip, port)
+        self.transport = AsyncTransport(ip, port,
+                                        on_connected=self.node_connected,
+                                        on_disconnected=self.node_disconnected,
+                                        max_queued_frames=max_queued_frames,
+                                        max_inbound_frames=max_inbound_frames)
+        self.node = None
+        self.running = False
+        self.dispatcher = None
         # Message deduplication cache
         self._processed_messages = {}
         self._last_cache_cleanup = time.time()
+        self.stats = {
+            'messages_dispatched': 0,
+            'batches_dispatched': 0,
+            'decode_errors': 0,
+            'handler_errors': 0,
+            'send_failures': 0
+        }
+
+    @property
+    def all_nodes(self):
+        return self.transport.all_connections
+
+    @property
+    def undecodable_messages(self):
+        return self.stats['decode_errors']
 
     def init_server(self):
         logger.info(
@@ -27,10 +66,7 @@ class SocketCommunication(Node):
                 "node": {"id": self.id, "ip": self.host, "port": self.port},
             }
         )
-        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.sock.bind((self.host, self.port))
-        self.sock.settimeout(10.0)
-        self.sock.listen(1)
+        self.transport.start()
 
     def connect_to_first_node(self):
         port = self.socket_connector.first_node_config()["port"]
@@ -48,10 +84,6 @@ class SocketCommunication(Node):
                 "target": f"{ip}:{port}"
             })
             self.connect_with_node(ip, port)
-            logger.info({
-                "message": "Connect call completed",
-                "target": f"{ip}:{port}"
-            })
         else:
             logger.info({
                 "message": "I am the first node, skipping connection",
@@ -60,101 +92,170 @@ class SocketCommunication(Node):
 
     def start_socket_communication(self, node):
         self.node = node
-        self.start()
+        self.init_server()
+        self.running = True
+        self.dispatcher = threading.Thread(target=self._dispatch_loop, name="p2p-dispatch", daemon=True)
+        self.dispatcher.start()
         self.peer_discovery_handler.start()
         self.connect_to_first_node()
 
-    def inbound_node_connected(self, connected_node):
-        self.peer_discovery_handler.handshake(connected_node)
+    def stop(self):
+        self.running = False
+        self.transport.stop()
 
-    def outbound_node_connected(self, connected_node):
+    def connect_with_node(self, ip, port):
+        """Dial a peer in the background; the handshake follows once connected"""
+        if (ip, port) == (self.host, self.port):
+            return None
+        return self.transport.connect(ip, port)
+
+    def node_connected(self, connected_node):
         self.peer_discovery_handler.handshake(connected_node)
 
-    def node_message(self, connected_node, message):
-        # Batch message processing to reduce CPU overhead
-        if not hasattr(self, '_message_batch'):
-            self._message_batch = []
-            self._last_batch_process = time.time()
-        
-        # Add to batch
-        self._message_batch.append((connected_node, message))
-        
-        # Process batch every 0.5 seconds or when batch reaches 10 messages
-        current_time = time.time()
-        batch_ready = (len(self._message_batch) >= 10 or 
-                      current_time - self._last_batch_process >= 0.5)
-        
-        if batch_ready:
-            self._process_message_batch()
-            self._message_batch = []
-            self._last_batch_process = current_time
-    
-    def _process_message_batch(self):
-        # Process messages in batch for efficiency
-        for connected_node, message in self._message_batch:
+    def node_disconnected(self, connected_node):
+        if self.node is not None and hasattr(self.node, 'handle_peer_disconnected'):
+            self.node.handle_peer_disconnected(connected_node)
+
+    # Receiving
+
+    def _dispatch_loop(self):
+        while self.running:
+            # Nothing a peer sends may stop the only thread that handles messages
             try:
-                message = BlockchainUtils.decode(json.dumps(message))
-                
-                # Message deduplication for discovery messages
-                if message.message_type == "DISCOVERY" and hasattr(message, 'message_id'):
-                    if message.message_id in self._processed_messages:
-                        continue  # Skip duplicate message
-                    self._processed_messages[message.message_id] = time.time()
-                
-                # Clean up old message cache periodically
+                batch = self.transport.receive(self.MAX_BATCH_SIZE, self.FLUSH_INTERVAL)
+                if batch:
+                    self._process_message_batch(batch)
+
                 current_time = time.time()
                 if current_time - self._last_cache_cleanup > 300:  # Every 5 minutes
                     self._cleanup_message_cache()
                     self._last_cache_cleanup = current_time
-                
-                if message.message_type == "DISCOVERY":
-                    # Discovery messages are frequent - batch process them
-                    self.peer_discovery_handler.handle_message(message)
-                elif message.message_type == "TRANSACTION":
-                    # Legacy direct transaction broadcast (deprecated)
-                    transaction = message.data
-                    self.node.handle_transaction(transaction)
-                elif message.message_type == "INV":
-                    # Bitcoin-style inventory announcement
-                    self.node.handle_inventory(connected_node, message.data)
-                elif message.message_type == "GETDATA":
-                    # Request for specific transaction/block data
-                    self.node.handle_getdata(connected_node, message.data)
-                elif message.message_type == "TX":
-                    # Transaction data response
-                    self.node.handle_transaction_data(message.data)
-                elif message.message_type == "BLOCK":
-                    # Legacy direct block broadcast
-                    block = message.data
-                    self.node.handle_block(block)
-                elif message.message_type == "BLOCK_DATA":
-                    # Block data response
-                    self.node.handle_block_data(message.data)
-                elif message.message_type == "BLOCKCHAINREQUEST":
-                    self.node.handle_blockchain_request(connected_node)
-                elif message.message_type == "BLOCKCHAIN":
-                    blockchain = message.data
-                    self.node.handle_blockchain(blockchain)
-                elif message.message_type == "PING":
-                    # Respond to ping with pong
-                    self.node.handle_ping(connected_node, message.data)
-                elif message.message_type == "PONG":
-                    # Handle pong response
-                    self.node.handle_pong(connected_node, message.data)
             except Exception as e:
-                # Silently handle decode errors to prevent log spam
-                pass
-    
+                logger.error(f"P2P dispatcher error: {e}")
+
+    def _process_message_batch(self, batch):
+        self.stats['batches_dispatched'] += 1
+        for connected_node, frame in batch:
+            # Only registered wire types are decoded; arbitrary objects
+            # from the network are never instantiated
+            try:
+                message = WireCodec.decode(frame)
+                message_type = message.message_type
+            except Exception as e:  # CodecError, or a frame that isn't a Message
+                self._decode_error(connected_node, e)
+                continue
+
+            # Message deduplication for discovery messages
+            if message_type == "DISCOVERY" and hasattr(message, 'message_id'):
+                if message.message_id in self._processed_messages:
+                    continue  # Skip duplicate message
+                self._processed_messages[message.message_id] = time.time()
+
+            try:
+                self._handle_message(connected_node, message)
+                self.stats['messages_dispatched'] += 1
+            except Exception as e:
+                self.stats['handler_errors'] += 1
+                logger.error(f"Error handling {message_type} from {connected_node}: {e}")
+
+    def _decode_error(self, connected_node, error):
+        self.stats['decode_errors'] += 1
+        count = self.stats['decode_errors']
+        if count == 1 or count % self.DECODE_ERROR_LOG_EVERY == 0:
+            logger.warning(f"Dropped undecodable frame from {connected_node}: {error} "
+                           f"({count} undecodable frames so far)")
+
+    def _handle_message(self, connected_node, message):
+        message_type = message.message_type
+        if message_type == "DISCOVERY":
+            # Discovery messages are frequent - batch process them
+            self.peer_discovery_handler.handle_message(message)
+        elif message_type == "TRANSACTION":
+            # Legacy direct transaction broadcast (deprecated)
+            transaction = message.data
+            self.node.handle_transaction(transaction)
+        elif message_type == "INV":
+            # Bitcoin-style inventory announcement
+            self.node.handle_inventory(connected_node, message.data)
+        elif message_type == "GETDATA":
+            # Request for specific transaction/block data
+            self.node.handle_getdata(connected_node, message.data)
+        elif message_type == "TX":
+            # Transaction data response
+            self.node.handle_transaction_data(message.data)
+        elif message_type == "BLOCK":
+            # Legacy direct block broadcast
+            block = message.data
+            self.node.handle_block(block)
+        elif message_type == "BLOCK_DATA":
+            # Block data response
+            self.node.handle_block_data(message.data)
+        elif message_type == "GETHEADERS":
+            self.node.handle_getheaders(connected_node, message.data)
+        elif message_type == "HEADERS":
+            self.node.handle_headers(connected_node, message.data)
+        elif message_type == "GETBLOCKS":
+            self.node.handle_getblocks(connected_node, message.data)
+        elif message_type == "BLOCKS":
+            self.node.handle_blocks(connected_node, message.data)
+        elif message_type == "BLOCKCHAINREQUEST":
+            self.node.handle_blockchain_request(connected_node)
+        elif message_type == "BLOCKCHAIN":
+            blockchain = message.data
+            self.node.handle_blockchain(blockchain)
+        elif message_type == "PING":
+            # Respond to ping with pong
+            self.node.handle_ping(connected_node, message.data)
+        elif message_type == "PONG":
+            # Handle pong response
+            self.node.handle_pong(connected_node, message.data)
+
     def _cleanup_message_cache(self):
         """Remove old message IDs from cache to prevent memory leaks"""
         current_time = time.time()
-        old_messages = [msg_id for msg_id, timestamp in self._processed_messages.items() 
+        old_messages = [msg_id for msg_id, timestamp in self._processed_messages.items()
                        if current_time - timestamp > 600]  # Remove messages older than 10 minutes
         for msg_id in old_messages:
             del self._processed_messages[msg_id]
 
+    # Sending
+
+    def _frame(self, message) -> bytes:
+        if isinstance(message, str):
+            return WireCodec.text_to_frame(message)
+        return bytes(message)
+
+    def send_to_node(self, receiver, message, block=False, timeout=None) -> bool:
+        """
+        Queue a frame for one peer. Returns False when the peer's queue is
+        full (or, with block=True, stays full for timeout seconds).
+        """
+        sent = receiver.send(self._frame(message), block=block, timeout=timeout)
+        if not sent:
+            self.stats['send_failures'] += 1
+        return sent
+
+    def send_to_nodes(self, message, exclude=None) -> int:
+        """Queue a frame for every connected peer; returns how many accepted it"""
+        frame = self._frame(message)
+        sent = 0
+        for connection in self.all_nodes:
+            if exclude is not None and connection in exclude:
+                continue
+            if connection.send(frame):
+                sent += 1
+            else:
+                self.stats['send_failures'] += 1
+        return sent
+
     def send(self, receiver, message):
         self.send_to_node(receiver, message)
 
     def broadcast(self, message):
         self.send_to_nodes(message)
+
+    def get_stats(self) -> dict:
+        return {
+            'transport': self.transport.get_stats(),
+            **self.stats
+        }
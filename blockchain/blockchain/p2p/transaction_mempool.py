@@ -96,6 +96,11 @@ class TransactionMempool:
         peer_known = self.peer_inventories.get(exclude_peer, set())
         return [tx_hash for tx_hash in self.transaction_hashes if tx_hash not in peer_known]
     
+    def peer_knows_transaction(self, peer_id: str, tx_hash: str) -> bool:
+        """Check whether a peer has announced or been sent a transaction"""
+        known = self.peer_inventories.get(peer_id)
+        return known is not None and tx_hash in known
+    
     def mark_announced_to_peer(self, peer_id: str, tx_hashes: List[str]):
         """Mark that we've announced these transactions to a peer"""
         current_time = time.time()
@@ -0,0 +1,359 @@
+"""
+Asyncio P2P Transport
+=====================
+
+Every peer connection is served by one asyncio event loop running on a
+single thread, instead of a thread per socket. Frames are length
+prefixed:
+
+    length (u32, big endian) | payload (length bytes)
+
+Outbound frames go into a bounded per-peer queue. A writer task per peer
+drains its queue into the socket and waits for the socket to drain, so a
+slow peer first fills its kernel and transport buffers, then its queue,
+and only then pushes back on senders: send() either fails fast (and
+counts the frame as dropped) or, with block=True, waits for room.
+
+Inbound frames go into one bounded queue consumed by the owner's
+dispatcher thread. When it is full the reading task stops reading, and
+TCP flow control slows the sending peer down. A stalled reader waits on
+an asyncio event that receive() sets once it has taken frames, so any
+number of stalled peers cost no threads.
+"""
+
+import asyncio
+import itertools
+import queue
+import struct
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from blockchain.utils.logger import logger
+
+_LENGTH = struct.Struct('>I')
+
+DEFAULT_MAX_FRAME_BYTES = 32 * 1024 * 1024
+DEFAULT_MAX_QUEUED_FRAMES = 1024
+DEFAULT_MAX_INBOUND_FRAMES = 10000
+DEFAULT_MAX_WRITE_BATCH = 64
+CONNECT_TIMEOUT = 10.0
+
+
+class PeerConnection:
+    """
+    One TCP connection to a peer
+
+    host and port are the remote address (for outbound connections, the
+    address that was dialled). send() may be called from any thread.
+    """
+
+    def __init__(self, transport: 'AsyncTransport', connection_id: int, host: str, port: int,
+                 inbound: bool, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.transport = transport
+        self.id = connection_id
+        self.host = host
+        self.port = port
+        self.inbound = inbound
+        self.reader = reader
+        self.writer = writer
+
+        self.outbound: deque = deque()
+        self.space = threading.Condition()  # Guards outbound; notified when frames leave the queue
+        self.wakeup = asyncio.Event()
+        self.wakeup_pending = False
+        self.closed = False
+
+        self.stats = {
+            'frames_sent': 0,
+            'bytes_sent': 0,
+            'frames_received': 0,
+            'bytes_received': 0,
+            'frames_dropped': 0
+        }
+
+    def send(self, payload: bytes, block: bool = False, timeout: Optional[float] = None) -> bool:
+        """
+        Queue one frame. With a full queue this returns False at once,
+        or with block=True waits up to timeout for room.
+        """
+        frame = _LENGTH.pack(len(payload)) + payload
+        with self.space:
+            while len(self.outbound) >= self.transport.max_queued_frames and not self.closed:
+                if not block or not self.space.wait(timeout):
+                    self.stats['frames_dropped'] += 1
+                    return False
+            if self.closed:
+                return False
+            self.outbound.append(frame)
+            if self.wakeup_pending:
+                return True
+            self.wakeup_pending = True
+        self.transport.loop.call_soon_threadsafe(self.wakeup.set)
+        return True
+
+    def queued_frames(self) -> int:
+        with self.space:
+            return len(self.outbound)
+
+    def close(self):
+        self.transport.loop.call_soon_threadsafe(self._close)
+
+    def _close(self):
+        if self.closed:
+            return
+        with self.space:
+            self.closed = True
+            self.outbound.clear()
+            self.space.notify_all()
+        self.wakeup.set()
+        self.writer.close()
+
+    def __str__(self):
+        return f"{self.host}:{self.port}"
+
+
+class AsyncTransport:
+    """
+    Length-prefixed TCP transport for many peers on one event loop thread
+
+    Args:
+        host, port: Address to listen on
+        on_connected: Called as on_connected(connection) for each new connection
+        on_disconnected: Called as on_disconnected(connection) when one closes
+        max_queued_frames: Outbound frames queued per peer before senders are pushed back
+        max_inbound_frames: Received frames buffered before reading pauses
+        max_frame_bytes: Largest frame accepted; a peer sending more is disconnected
+        max_write_batch: Frames written to a socket per drain
+    """
+
+    def __init__(self, host: str, port: int,
+                 on_connected: Callable[[PeerConnection], None] = None,
+                 on_disconnected: Callable[[PeerConnection], None] = None,
+                 max_queued_frames: int = DEFAULT_MAX_QUEUED_FRAMES,
+                 max_inbound_frames: int = DEFAULT_MAX_INBOUND_FRAMES,
+                 max_frame_bytes: int = DEFAULT_MAX_FRAME_BYTES,
+                 max_write_batch: int = DEFAULT_MAX_WRITE_BATCH):
+        self.host = host
+        self.port = port
+        self.on_connected = on_connected
+        self.on_disconnected = on_disconnected
+        self.max_queued_frames = max_queued_frames
+        self.max_frame_bytes = max_frame_bytes
+        self.max_write_batch = max_write_batch
+
+        self.inbound: "queue.Queue[Tuple[PeerConnection, bytes]]" = queue.Queue(maxsize=max_inbound_frames)
+        self.connections: Dict[int, PeerConnection] = {}
+        self.dialling = set()  # (host, port) of outbound connects in progress
+        self.connection_ids = itertools.count(1)
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.started = threading.Event()
+        self.inbound_space: Optional[asyncio.Event] = None  # Set by receive() while readers are stalled
+        self.stalled_readers = 0
+
+        self.stats = {
+            'connections_accepted': 0,
+            'connections_opened': 0,
+            'connect_failures': 0,
+            'connections_closed': 0,
+            'oversized_frames': 0,
+            'inbound_stalls': 0
+        }
+
+    # Lifecycle
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name="p2p-transport", daemon=True)
+        self.thread.start()
+        self.started.wait()
+        if self.server is None:
+            raise OSError(f"Could not listen on {self.host}:{self.port}")
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.inbound_space = asyncio.Event()
+        try:
+            self.server = self.loop.run_until_complete(
+                asyncio.start_server(self._accept, self.host, self.port, reuse_address=True))
+            logger.info(f"P2P transport listening on {self.host}:{self.port}")
+        except OSError as e:
+            logger.error(f"P2P transport failed to listen on {self.host}:{self.port}: {e}")
+        self.started.set()
+        if self.server is not None:
+            self.loop.run_forever()
+        self.loop.close()
+
+    def stop(self):
+        if self.loop is None or not self.loop.is_running():
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(timeout=5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+
+    async def _shutdown(self):
+        self.server.close()
+        for connection in list(self.connections.values()):
+            connection._close()
+        self.inbound_space.set()  # Stalled readers see their connection closed
+        await self.server.wait_closed()
+
+    # Connections
+
+    @property
+    def all_connections(self) -> List[PeerConnection]:
+        return list(self.connections.values())
+
+    def is_connected(self, host: str, port: int) -> bool:
+        return any(connection.host == host and connection.port == port and not connection.inbound
+                   for connection in list(self.connections.values()))
+
+    def connect(self, host: str, port: int):
+        """Dial a peer in the background; returns a future for the PeerConnection (or None)"""
+        return asyncio.run_coroutine_threadsafe(self._connect(host, port), self.loop)
+
+    async def _connect(self, host: str, port: int) -> Optional[PeerConnection]:
+        key = (host, port)
+        if key in self.dialling or self.is_connected(host, port):
+            return None
+        self.dialling.add(key)
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), CONNECT_TIMEOUT)
+        except (OSError, asyncio.TimeoutError) as e:
+            self.stats['connect_failures'] += 1
+            logger.debug(f"Could not connect to {host}:{port}: {e}")
+            return None
+        finally:
+            self.dialling.discard(key)
+        self.stats['connections_opened'] += 1
+        return self._open(host, port, False, reader, writer)
+
+    async def _accept(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        host, port = writer.get_extra_info('peername')[:2]
+        self.stats['connections_accepted'] += 1
+        self._open(host, port, True, reader, writer)
+
+    def _open(self, host: str, port: int, inbound: bool,
+              reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> PeerConnection:
+        connection = PeerConnection(self, next(self.connection_ids), host, port, inbound, reader, writer)
+        self.connections[connection.id] = connection
+        self.loop.create_task(self._write_loop(connection))
+        self.loop.create_task(self._read_loop(connection))
+        if self.on_connected:
+            # Callbacks may block (e.g. a handshake send), so they run off the loop thread
+            self.loop.run_in_executor(None, self.on_connected, connection)
+        return connection
+
+    def _closed(self, connection: PeerConnection):
+        connection._close()
+        if self.connections.pop(connection.id, None) is None:
+            return
+        self.stats['connections_closed'] += 1
+        logger.debug(f"Connection to {connection} closed")
+        if self.on_disconnected:
+            self.loop.run_in_executor(None, self.on_disconnected, connection)
+
+    # Reading and writing
+
+    async def _read_loop(self, connection: PeerConnection):
+        reader = connection.reader
+        try:
+            while not connection.closed:
+                length, = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+                if length > self.max_frame_bytes:
+                    self.stats['oversized_frames'] += 1
+                    logger.warning(f"Disconnecting {connection}: {length} byte frame exceeds "
+                                   f"{self.max_frame_bytes} bytes")
+                    break
+                payload = await reader.readexactly(length)
+                connection.stats['frames_received'] += 1
+                connection.stats['bytes_received'] += length + _LENGTH.size
+                try:
+                    self.inbound.put_nowait((connection, payload))
+                except queue.Full:
+                    # Stop reading from this peer until the dispatcher catches up
+                    self.stats['inbound_stalls'] += 1
+                    await self._wait_to_queue(connection, payload)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.error(f"Error reading from {connection}: {e}")
+        finally:
+            self._closed(connection)
+
+    async def _wait_to_queue(self, connection: PeerConnection, payload: bytes):
+        self.stalled_readers += 1
+        try:
+            while not connection.closed:
+                # Cleared before the retry: a frame taken after a failed retry
+                # sees stalled_readers and sets the event again
+                self.inbound_space.clear()
+                try:
+                    self.inbound.put_nowait((connection, payload))
+                    return
+                except queue.Full:
+                    await self.inbound_space.wait()
+        finally:
+            self.stalled_readers -= 1
+
+    async def _write_loop(self, connection: PeerConnection):
+        writer = connection.writer
+        try:
+            while True:
+                await connection.wakeup.wait()
+                connection.wakeup.clear()
+                with connection.space:
+                    if connection.closed:
+                        return
+                    frames = []
+                    while connection.outbound and len(frames) < self.max_write_batch:
+                        frames.append(connection.outbound.popleft())
+                    if connection.outbound:
+                        connection.wakeup.set()  # More to write after this batch
+                    else:
+                        connection.wakeup_pending = False
+                    connection.space.notify_all()
+                writer.writelines(frames)
+                connection.stats['frames_sent'] += len(frames)
+                connection.stats['bytes_sent'] += sum(len(frame) for frame in frames)
+                await writer.drain()  # Waits while the socket is backed up
+        except ConnectionError:
+            pass
+        except Exception as e:
+            logger.error(f"Error writing to {connection}: {e}")
+        finally:
+            self._closed(connection)
+
+    def receive(self, max_frames: int, timeout: float) -> List[Tuple[PeerConnection, bytes]]:
+        """
+        Wait up to timeout for a frame, then take whatever else is already
+        buffered, up to max_frames. Returns [] when the timeout expires.
+        """
+        try:
+            frames = [self.inbound.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while len(frames) < max_frames:
+            try:
+                frames.append(self.inbound.get_nowait())
+            except queue.Empty:
+                break
+        if self.stalled_readers:
+            self.loop.call_soon_threadsafe(self.inbound_space.set)
+        return frames
+
+    def get_stats(self) -> dict:
+        connections = self.all_connections
+        return {
+            'connections': len(connections),
+            'inbound_connections': sum(1 for connection in connections if connection.inbound),
+            'inbound_queue': self.inbound.qsize(),
+            'outbound_queued': sum(connection.queued_frames() for connection in connections),
+            'frames_dropped': sum(connection.stats['frames_dropped'] for connection in connections),
+            **self.stats
+        }
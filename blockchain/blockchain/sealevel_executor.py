@@ -346,51 +346,13 @@ class SealevelExecutor:
     
     def _compute_state_root_hash(self, account_model) -> str:
         """
-        Compute a cryptographic hash of the entire account state.
-        
-        This is equivalent to Solana's state root hash that proves the
-        state after all transactions have been executed.
+        Cryptographic hash of the entire account state after execution,
+        equivalent to Solana's state root. The account model keeps it as a
+        set hash, so only the accounts this block changed are hashed.
         """
         try:
-            # Get all account balances using the proper method
-            all_accounts = account_model.get_all_balances()
-            
-            # Sort accounts for deterministic hashing
-            sorted_accounts = sorted(all_accounts.items())
-            
-            # Create state string for hashing (deterministic - no timestamp)
-            state_string = ""
-            for account_id, balance in sorted_accounts:
-                state_string += f"{account_id}:{balance};"
-            
-            # Remove trailing semicolon for cleaner hash
-            if state_string.endswith(';'):
-                state_string = state_string[:-1]
-            
-            # Compute SHA-256 hash (deterministic)
-            state_hash = hashlib.sha256(state_string.encode()).hexdigest()
-            
-            logger.debug(f"Computed state root hash: {state_hash[:16]}... from {len(sorted_accounts)} accounts")
-            
-            return state_hash
-            
-        except Exception as e:
-            logger.error(f"Failed to compute state root hash: {e}")
-            # Return a fallback hash
-            return hashlib.sha256(f"fallback:{time.time()}".encode()).hexdigest()
-            state_string = ""
-            for account_id, balance in sorted_accounts:
-                state_string += f"{account_id}:{balance};"
-            
-            # Remove trailing semicolon for cleaner hash
-            if state_string.endswith(';'):
-                state_string = state_string[:-1]
-            
-            # Compute SHA-256 hash (deterministic)
-            state_hash = hashlib.sha256(state_string.encode()).hexdigest()
-            
-            logger.debug(f"Computed state root hash: {state_hash[:16]}... from {len(sorted_accounts)} accounts")
-            
+            state_hash = account_model.get_state_root_hash()
+            logger.debug(f"Computed state root hash: {state_hash[:16]}...")
             return state_hash
             
         except Exception as e:
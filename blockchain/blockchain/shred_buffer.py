@@ -0,0 +1,315 @@
+"""
+Shred Reassembly Buffer for Turbine
+===================================
+
+Collects shreds per (slot, FEC set) into preallocated payload buffers.
+A bitmap of received indices drops duplicates in O(1), decoding is only
+attempted once a set holds enough shreds to cover its data, and whole
+slots are evicted by age or when the buffer exceeds its memory cap.
+
+Shred headers are not authenticated, so set sizes are checked against
+the shredder's limits and the memory cap before a buffer is allocated.
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class FecSetBuffer:
+    """Reassembly state for a single FEC set"""
+
+    def __init__(self, slot: int, fec_set_index: int, block_hash: str,
+                 num_data: int, total_shreds: int, shred_size: int, payload_hash: str = None):
+        self.slot = slot
+        self.fec_set_index = fec_set_index
+        self.block_hash = block_hash
+        self.payload_hash = payload_hash  # sha256 of the unpadded payload, when known
+        self.num_data = num_data
+        self.total_shreds = total_shreds
+        self.shred_size = shred_size
+
+        # Data shreds are copied straight into their final offsets
+        self.payload = bytearray(num_data * shred_size)
+        self.bitmap = bytearray((total_shreds + 7) // 8)
+        self.data_received = 0
+        self.coding_shreds = []  # Kept only until the set is decoded
+
+        self.decode_attempted_at = -1  # received count at the last failed attempt
+        self.completed = False
+
+    def has(self, index: int) -> bool:
+        return bool(self.bitmap[index >> 3] & (1 << (index & 7)))
+
+    def insert(self, shred) -> bool:
+        """
+        Store a shred; returns False for duplicates and out-of-range indices.
+        Shreds that arrive after the set decoded are only marked as seen,
+        so they are still retransmitted once.
+        """
+        index = shred.index
+        if index < 0 or index >= self.total_shreds or self.has(index):
+            return False
+        if len(shred.data) != self.shred_size:
+            return False  # Would resize the payload buffer
+
+        self.bitmap[index >> 3] |= 1 << (index & 7)
+
+        if self.completed:
+            pass
+        elif shred.is_data_shred and index < self.num_data:
+            offset = index * self.shred_size
+            self.payload[offset:offset + len(shred.data)] = shred.data
+            self.data_received += 1
+        else:
+            self.coding_shreds.append(shred)
+        return True
+
+    @property
+    def received(self) -> int:
+        return self.data_received + len(self.coding_shreds)
+
+    def memory_bytes(self) -> int:
+        return len(self.payload) + len(self.coding_shreds) * self.shred_size
+
+    def should_decode(self) -> bool:
+        """Decode once k shreds are present, and retry only after another shred arrives"""
+        if self.completed or self.received < self.num_data:
+            return False
+        return self.received != self.decode_attempted_at
+
+    def try_decode(self, shredder) -> Optional[bytes]:
+        """Return the set's payload (padding stripped) once it can be recovered"""
+        if self.data_received == self.num_data:
+            return self._complete(bytes(self.payload))
+
+        self.decode_attempted_at = self.received
+        if not self.coding_shreds:
+            return None
+
+        view = memoryview(self.payload)
+        data_shreds = []
+        for index in range(self.num_data):
+            if self.has(index):
+                offset = index * self.shred_size
+                data_shreds.append(_PayloadShred(index, view[offset:offset + self.shred_size]))
+
+        # Recovered shreds fill the payload but are not marked in the bitmap,
+        # which only records shreds actually received (and so retransmitted)
+        coding_shreds = sorted(self.coding_shreds, key=lambda shred: shred.index)  # First recovery shred first
+        recovered = shredder.recover_missing_data_shreds(data_shreds, coding_shreds, self.num_data)
+        recovered_indices = set()
+        for shred in recovered:
+            if shred.index < self.num_data and not self.has(shred.index) and shred.index not in recovered_indices:
+                offset = shred.index * self.shred_size
+                self.payload[offset:offset + self.shred_size] = shred.data[:self.shred_size]
+                recovered_indices.add(shred.index)
+
+        if self.data_received + len(recovered_indices) == self.num_data:
+            payload = bytes(self.payload)
+            if self.payload_hash is None or hashlib.sha256(payload.rstrip(b'\x00')).hexdigest() == self.payload_hash:
+                return self._complete(payload)
+
+        # Recovery was partial or produced a payload that fails the hash
+        # check; the real shreds overwrite the recovered bytes when they land
+        return None
+
+    def _complete(self, payload: bytes) -> bytes:
+        self.completed = True
+        # Release reassembly memory; the bitmap keeps rejecting late duplicates
+        self.payload = bytearray()
+        self.coding_shreds = []
+        return payload.rstrip(b'\x00')
+
+
+class _PayloadShred:
+    """Lightweight view of a buffered data shred for erasure recovery"""
+
+    is_data_shred = True
+
+    def __init__(self, index: int, data):
+        self.index = index
+        self.data = data
+
+
+class ShredReassemblyBuffer:
+    """
+    Bounded reassembly buffer keyed by (slot, FEC set index).
+
+    Slots older than ``max_slot_age`` behind the newest slot seen are
+    evicted, as are the oldest slots whenever buffered payloads exceed
+    ``max_memory_bytes``.
+
+    With a ``slot_clock`` (the local slot), shreds more than
+    ``max_future_slots`` ahead of it are dropped, and ages are measured
+    from the local slot once the newest slot seen runs ahead of it, so a
+    forged slot number cannot make honest shreds look stale.
+    """
+
+    def __init__(self, shredder, max_slot_age: int = 64, max_memory_bytes: int = 64 * 1024 * 1024,
+                 slot_clock: Optional[Callable[[], int]] = None, max_future_slots: int = 64):
+        self.shredder = shredder
+        self.max_slot_age = max_slot_age
+        self.max_memory_bytes = max_memory_bytes
+        self.slot_clock = slot_clock
+        self.max_future_slots = max_future_slots
+
+        self.fec_sets: Dict[Tuple[int, int], FecSetBuffer] = {}
+        self.slots: "OrderedDict[int, List[Tuple[int, int]]]" = OrderedDict()  # slot -> keys, oldest first
+        self.block_sets: Dict[str, List[Tuple[int, int]]] = {}  # block_hash -> keys
+        self.memory_bytes = 0
+        self.newest_slot = -1
+
+        self.stats = {
+            'shreds_inserted': 0,
+            'duplicates_dropped': 0,
+            'conflicting_dropped': 0,
+            'stale_dropped': 0,
+            'future_dropped': 0,
+            'malformed_dropped': 0,
+            'over_budget_dropped': 0,
+            'decode_attempts': 0,
+            'sets_completed': 0,
+            'slots_evicted': 0
+        }
+
+    def insert(self, shred) -> Tuple[bool, Optional[bytes]]:
+        """
+        Buffer a shred.
+
+        Returns (accepted, payload): accepted is False for duplicate, stale,
+        malformed or conflicting shreds and for new sets that do not fit
+        the memory cap, and payload is the decoded FEC set the first time
+        the set completes.
+        """
+        slot = shred.slot if shred.slot is not None else 0
+        if slot < self._reference_slot() - self.max_slot_age:
+            self.stats['stale_dropped'] += 1
+            return False, None
+        if self.slot_clock is not None and slot > self.slot_clock() + self.max_future_slots:
+            self.stats['future_dropped'] += 1
+            return False, None
+        if len(shred.data) != self.shredder.shred_size:
+            self.stats['malformed_dropped'] += 1
+            return False, None
+
+        key = (slot, getattr(shred, 'fec_set_index', 0) or 0)
+        fec_set = self.fec_sets.get(key)
+        if fec_set is None:
+            fec_set = self._create_set(key, shred)
+            if fec_set is None:
+                return False, None
+        elif fec_set.block_hash != shred.block_hash:
+            # A different block for the same slot and set (duplicate leader output)
+            self.stats['conflicting_dropped'] += 1
+            return False, None
+
+        before = fec_set.memory_bytes()
+        if not fec_set.insert(shred):
+            self.stats['duplicates_dropped'] += 1
+            return False, None
+        self.stats['shreds_inserted'] += 1
+
+        decoded = None
+        if fec_set.should_decode():
+            self.stats['decode_attempts'] += 1
+            decoded = fec_set.try_decode(self.shredder)
+            if decoded is not None:
+                self.stats['sets_completed'] += 1
+
+        self.memory_bytes += fec_set.memory_bytes() - before
+        self._enforce_limits()
+        return True, decoded
+
+    def _create_set(self, key: Tuple[int, int], shred) -> Optional[FecSetBuffer]:
+        slot = key[0]
+        num_data = shred.original_data_shred_count or shred.total_shreds
+        if not (0 < num_data <= self.shredder.max_data_shreds_per_fec_set
+                and num_data <= shred.total_shreds <= self.shredder.max_shreds_per_fec_set()):
+            self.stats['malformed_dropped'] += 1
+            return None
+        if not self._make_room(num_data * len(shred.data), slot):
+            self.stats['over_budget_dropped'] += 1
+            return None
+
+        fec_set = FecSetBuffer(
+            slot=slot,
+            fec_set_index=key[1],
+            block_hash=shred.block_hash,
+            num_data=num_data,
+            total_shreds=shred.total_shreds,
+            shred_size=len(shred.data),
+            payload_hash=getattr(shred, 'payload_hash', None)
+        )
+        self.fec_sets[key] = fec_set
+        self.slots.setdefault(slot, []).append(key)
+        self.block_sets.setdefault(shred.block_hash, []).append(key)
+        self.memory_bytes += fec_set.memory_bytes()
+
+        if slot > self.newest_slot:
+            self.newest_slot = slot
+        else:
+            # Keep slots ordered oldest first for eviction
+            self._reorder_slot(slot)
+        return fec_set
+
+    def _reference_slot(self) -> int:
+        """Slot that ages are measured from"""
+        if self.slot_clock is None:
+            return self.newest_slot
+        return min(self.newest_slot, self.slot_clock())
+
+    def _make_room(self, needed: int, slot: int) -> bool:
+        """Evict slots older than ``slot`` until ``needed`` more bytes fit the memory cap"""
+        while self.slots and self.memory_bytes + needed > self.max_memory_bytes:
+            oldest = next(iter(self.slots))
+            if oldest >= slot:
+                break
+            self.evict_slot(oldest)
+        return self.memory_bytes + needed <= self.max_memory_bytes
+
+    def _reorder_slot(self, slot: int):
+        later = [s for s in self.slots if s > slot]
+        for s in later:
+            self.slots.move_to_end(s)
+
+    def _enforce_limits(self):
+        while self.slots:
+            oldest = next(iter(self.slots))
+            too_old = oldest < self._reference_slot() - self.max_slot_age
+            over_budget = self.memory_bytes > self.max_memory_bytes and len(self.slots) > 1
+            if not (too_old or over_budget):
+                break
+            self.evict_slot(oldest)
+
+    def evict_slot(self, slot: int):
+        """Drop every FEC set buffered for a slot"""
+        for key in self.slots.pop(slot, []):
+            fec_set = self.fec_sets.pop(key, None)
+            if fec_set is None:
+                continue
+            self.memory_bytes -= fec_set.memory_bytes()
+            keys = self.block_sets.get(fec_set.block_hash)
+            if keys is not None:
+                keys.remove(key)
+                if not keys:
+                    del self.block_sets[fec_set.block_hash]
+        self.stats['slots_evicted'] += 1
+
+    def get_block_sets(self, block_hash: str) -> List[FecSetBuffer]:
+        """FEC sets currently buffered for a block, ordered by set index"""
+        keys = self.block_sets.get(block_hash, [])
+        return sorted((self.fec_sets[key] for key in keys), key=lambda s: s.fec_set_index)
+
+    def shreds_received(self, block_hash: str) -> int:
+        return sum(fec_set.received if not fec_set.completed else fec_set.num_data
+                   for fec_set in self.get_block_sets(block_hash))
+
+    def get_stats(self) -> Dict:
+        return {
+            'buffered_sets': len(self.fec_sets),
+            'buffered_slots': len(self.slots),
+            'memory_bytes': self.memory_bytes,
+            'newest_slot': self.newest_slot,
+            **self.stats
+        }
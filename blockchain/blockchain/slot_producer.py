@@ -85,38 +85,26 @@ class SlotBasedBlockProducer:
         try:
             start_time = time.time()
             
-            # Get all transactions available for this slot
-            gulf_stream_transactions = self.node.gulf_stream.get_transactions_for_block()
-            
-            # Fallback to legacy pool if Gulf Stream is empty
-            if gulf_stream_transactions:
-                transactions_for_block = gulf_stream_transactions
-                source = "gulf_stream"
-            else:
-                transactions_for_block = self.node.transaction_pool.transactions.copy()
-                source = "legacy_pool"
-            
             logger.info({
                 "message": "Producing block for slot",
                 "slot": slot_number,
-                "transactions_count": len(transactions_for_block),
-                "source": source
+                "transactions_count": len(self.node.blockchain.transaction_intake),
+                "source": "transaction_intake"
             })
             
-            # Create block with all available transactions
-            block = self.node.blockchain.create_block(transactions_for_block, self.node.wallet)
+            # Create block with all transactions waiting in the intake
+            block = self.node.blockchain.create_block(self.node.wallet)
             
             # Clean up processed transactions
             self.node.transaction_pool.remove_from_pool(block.transactions)
-            self.node.gulf_stream.remove_transactions(block.transactions)
             
             # Broadcast block to network
             if hasattr(self.node, 'p2p') and self.node.p2p:
+                from blockchain.p2p.codec import WireCodec
                 from blockchain.p2p.message import Message
-                from blockchain.utils.helpers import BlockchainUtils
                 
                 message = Message(self.node.p2p.socket_connector, "BLOCK", block)
-                self.node.p2p.broadcast(BlockchainUtils.encode(message))
+                self.node.p2p.broadcast(WireCodec.encode(message))
             
             production_time = time.time() - start_time
             
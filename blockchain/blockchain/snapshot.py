@@ -0,0 +1,293 @@
+"""
+Chunked State Snapshots
+
+A snapshot is a stream of newline-delimited JSON records, so it can be
+written to disk or sent over HTTP without ever existing in memory as a
+whole:
+
+    {"type": "accounts", "index": 0, "hash": ..., "payload": "<json>"}
+    ...
+    {"type": "blocks", "index": 0, "hash": ..., "payload": "<json>"}
+    {"type": "schedule", "index": 0, "hash": ..., "payload": "<json>"}
+    {"type": "manifest", ..., "chunks": [[type, hash], ...], "manifest_hash": ...}
+
+Accounts are written in public-key order, ``chunk_size`` accounts per
+chunk; recent blocks are chunked the same way. Each payload is kept as
+the exact JSON text that was hashed, so receivers verify it byte for
+byte. The manifest comes last, lists every chunk hash in stream order,
+and is itself hashed.
+
+Account rows are read one chunk at a time. For a persistent state they
+come from a single read transaction on the account store, merged with
+the accounts changed since the last committed block, so the sender holds
+one chunk plus those uncommitted accounts and the snapshot is one
+consistent state even while blocks are applied. An in-memory state is
+already held whole; its accounts are read chunk by chunk, each under its
+account lock.
+
+The receiver verifies chunks on a thread pool as they arrive and writes
+them to a temporary account store next to the node's own (or in the
+temp directory for an in-memory node). The staged state, blocks and
+leader schedule are installed only once the manifest checks out.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from blockchain.account_store import AccountStore
+from blockchain.block import Block
+from blockchain.utils.logger import logger
+
+SNAPSHOT_FORMAT_VERSION = 1
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_RECENT_BLOCKS = 100
+
+
+class SnapshotError(ValueError):
+    """Raised for snapshots that are malformed or fail verification"""
+
+
+def _hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _manifest_hash(manifest: Dict) -> str:
+    fields = {key: value for key, value in manifest.items() if key != 'manifest_hash'}
+    return _hash_text(json.dumps(fields, sort_keys=True, separators=(',', ':')))
+
+
+def _record(record_type: str, index: int, data) -> Tuple[bytes, str]:
+    payload = json.dumps(data, separators=(',', ':'))
+    chunk_hash = _hash_text(payload)
+    line = json.dumps({'type': record_type, 'index': index, 'hash': chunk_hash, 'payload': payload})
+    return (line + '\n').encode('utf-8'), chunk_hash
+
+
+def iter_snapshot(blockchain, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  recent_blocks: int = DEFAULT_RECENT_BLOCKS) -> Iterator[bytes]:
+    """Yield a snapshot of the chain as NDJSON lines, one chunk at a time"""
+    chunks: List[List[str]] = []
+    block_height = len(blockchain.blocks)
+    latest_block_hash = blockchain.block_hashes[-1] if blockchain.block_hashes else None
+    total_accounts = 0
+
+    for index, rows in enumerate(blockchain.account_model.iter_row_batches(chunk_size)):
+        line, chunk_hash = _record('accounts', index, [list(row) for row in rows])
+        chunks.append(['accounts', chunk_hash])
+        total_accounts += len(rows)
+        yield line
+
+    blocks = blockchain.blocks[-recent_blocks:] if recent_blocks else []
+    for index, start in enumerate(range(0, len(blocks), chunk_size)):
+        line, chunk_hash = _record('blocks', index, [block.to_dict() for block in blocks[start:start + chunk_size]])
+        chunks.append(['blocks', chunk_hash])
+        yield line
+
+    schedule = blockchain.leader_schedule
+    if schedule:
+        line, chunk_hash = _record('schedule', 0, {
+            'current_epoch': getattr(schedule, 'current_epoch', 0),
+            'current_schedule': [[slot, leader] for slot, leader in getattr(schedule, 'current_schedule', {}).items()],
+            'epoch_start_time': getattr(schedule, 'epoch_start_time', time.time())
+        })
+        chunks.append(['schedule', chunk_hash])
+        yield line
+
+    manifest = {
+        'type': 'manifest',
+        'version': SNAPSHOT_FORMAT_VERSION,
+        'timestamp': time.time(),
+        'block_height': block_height,
+        'latest_block_hash': latest_block_hash,
+        'chunk_size': chunk_size,
+        'total_accounts': total_accounts,
+        'chunks': chunks
+    }
+    manifest['manifest_hash'] = _manifest_hash(manifest)
+    logger.info(f"Snapshot streamed - {block_height} blocks, {total_accounts} accounts, "
+                f"{len(chunks)} chunks")
+    yield (json.dumps(manifest) + '\n').encode('utf-8')
+
+
+def write_snapshot(blockchain, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   recent_blocks: int = DEFAULT_RECENT_BLOCKS) -> str:
+    """Stream a snapshot to a file; returns its manifest hash"""
+    last_line = None
+    with open(path, 'wb') as snapshot_file:
+        for line in iter_snapshot(blockchain, chunk_size, recent_blocks):
+            snapshot_file.write(line)
+            last_line = line
+    return json.loads(last_line)['manifest_hash']
+
+
+class SnapshotReceiver:
+    """
+    Incremental snapshot loader
+
+    feed() takes NDJSON lines as they arrive; finish() waits for every
+    chunk, checks the manifest and installs the snapshot into the chain.
+    Nothing in the chain changes unless finish() returns True. At most
+    two chunks per worker are buffered; feed() blocks beyond that, and
+    account chunks are staged in a temporary store, so memory stays
+    proportional to the chunk size.
+
+    Args:
+        blockchain: Chain to install the snapshot into
+        workers: Threads verifying and applying chunks
+    """
+
+    def __init__(self, blockchain, workers: int = 4):
+        self.blockchain = blockchain
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.pending: deque = deque()
+        self.max_pending = workers * 2
+        self.stats_lock = threading.Lock()
+        self.received: List[List[str]] = []  # [type, hash] in stream order
+        self.manifest: Optional[Dict] = None
+        self.error: Optional[str] = None
+
+        store = blockchain.account_model.store
+        staging_dir = None
+        if store is not None and store.path != ':memory:':
+            staging_dir = os.path.dirname(os.path.abspath(store.path))
+        descriptor, self.staging_path = tempfile.mkstemp(prefix='snapshot-', suffix='.db', dir=staging_dir)
+        os.close(descriptor)
+        self.accounts = AccountStore(self.staging_path)
+        self.blocks: Dict[int, List[Block]] = {}  # chunk index -> blocks
+        self.schedule: Optional[Dict] = None
+
+        self.stats = {
+            'chunks_received': 0,
+            'accounts_loaded': 0,
+            'blocks_loaded': 0
+        }
+
+    def feed(self, line):
+        """Take one snapshot line (bytes or str)"""
+        if self.error or self.manifest is not None:
+            return
+        if isinstance(line, (bytes, bytearray)):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line:
+            return
+        try:
+            record = json.loads(line)
+            record_type = record['type']
+        except (ValueError, KeyError, TypeError) as e:
+            self.error = f"Malformed snapshot record: {e}"
+            return
+
+        if record_type == 'manifest':
+            self.manifest = record
+            return
+        if record_type not in ('accounts', 'blocks', 'schedule'):
+            self.error = f"Unknown snapshot record type {record_type}"
+            return
+        self.received.append([record_type, record.get('hash')])
+        self.stats['chunks_received'] += 1
+        self.pending.append(self.executor.submit(self._apply_chunk, record))
+        while len(self.pending) > self.max_pending and not self.error:
+            self._wait_oldest()
+
+    def _wait_oldest(self):
+        try:
+            self.pending.popleft().result()
+        except (ValueError, KeyError, TypeError, sqlite3.Error) as e:
+            self.error = str(e)
+
+    def feed_lines(self, lines: Iterable):
+        for line in lines:
+            self.feed(line)
+
+    def _apply_chunk(self, record: Dict):
+        payload = record['payload']
+        if _hash_text(payload) != record['hash']:
+            raise SnapshotError(f"{record['type']} chunk {record['index']} hash mismatch")
+        data = json.loads(payload)
+
+        if record['type'] == 'accounts':
+            self.accounts.write_batch([(public_key, balance, nonce) for public_key, balance, nonce in data])
+            with self.stats_lock:
+                self.stats['accounts_loaded'] += len(data)
+        elif record['type'] == 'blocks':
+            self.blocks[record['index']] = [Block.from_dict(block_data) for block_data in data]
+            with self.stats_lock:
+                self.stats['blocks_loaded'] += len(data)
+        else:
+            self.schedule = data
+
+    def finish(self) -> bool:
+        """Verify the manifest and install the snapshot"""
+        try:
+            while self.pending:
+                self._wait_oldest()
+            self._verify_manifest()
+        except SnapshotError as e:
+            self.error = str(e)
+        finally:
+            self.executor.shutdown(wait=False)
+        try:
+            if self.error:
+                logger.error(f"Snapshot rejected: {self.error}")
+                return False
+
+            self._install()
+            return True
+        finally:
+            self._discard_staging()
+
+    def _discard_staging(self):
+        self.accounts.close()
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.remove(self.staging_path + suffix)
+            except FileNotFoundError:
+                pass
+
+    def _verify_manifest(self):
+        if self.error:
+            raise SnapshotError(self.error)
+        manifest = self.manifest
+        if manifest is None:
+            raise SnapshotError("Snapshot stream ended without a manifest")
+        if manifest.get('version') != SNAPSHOT_FORMAT_VERSION:
+            raise SnapshotError(f"Unsupported snapshot version {manifest.get('version')}")
+        if _manifest_hash(manifest) != manifest.get('manifest_hash'):
+            raise SnapshotError("Manifest hash mismatch")
+        if manifest.get('chunks') != self.received:
+            raise SnapshotError("Chunks do not match the manifest")
+        if self.accounts.count() != manifest.get('total_accounts'):
+            raise SnapshotError("Account count does not match the manifest")
+
+    def _install(self):
+        chain = self.blockchain
+        chain.install_account_state(self.accounts.iter_accounts())
+
+        blocks = [block for index in sorted(self.blocks) for block in self.blocks[index]]
+        if blocks:
+            chain.replace_blocks(blocks)
+
+        if self.schedule and chain.leader_schedule:
+            chain.leader_schedule.current_epoch = self.schedule.get('current_epoch', 0)
+            chain.leader_schedule.current_schedule = {slot: leader for slot, leader in self.schedule['current_schedule']}
+            chain.leader_schedule.epoch_start_time = self.schedule.get('epoch_start_time', time.time())
+
+        logger.info(f"Snapshot installed - {self.stats['accounts_loaded']} accounts, "
+                    f"{len(blocks)} blocks, height {self.manifest.get('block_height')}")
+
+
+def read_snapshot(blockchain, path: str, workers: int = 4) -> bool:
+    """Load a snapshot file written by write_snapshot"""
+    receiver = SnapshotReceiver(blockchain, workers)
+    with open(path, 'rb') as snapshot_file:
+        receiver.feed_lines(snapshot_file)
+    return receiver.finish()
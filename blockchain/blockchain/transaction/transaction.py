@@ -16,6 +16,21 @@ class Transaction:
     def to_dict(self):
         return self.__dict__
 
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuild a transaction from its to_dict() representation.
+
+        Raises ValueError for keys that are not strings or that would
+        shadow a class attribute such as payload or to_dict.
+        """
+        for key in data:
+            if not isinstance(key, str) or hasattr(cls, key):
+                raise ValueError(f"Invalid attribute {key!r} for {cls.__name__}")
+        transaction = cls.__new__(cls)
+        transaction.__dict__.update(data)
+        return transaction
+
     def sign(self, signature):
         self.signature = signature
 
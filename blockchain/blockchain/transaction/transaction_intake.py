@@ -0,0 +1,193 @@
+"""
+Leader Transaction Intake
+
+The one buffer every ingress path (API, P2P, TPU, Fast Gulf Stream) puts
+transactions into, and block packing takes them from.
+
+Transactions are bucketed by the slot-length interval they arrived in and
+kept in arrival order within a bucket, so packing walks the buckets
+oldest first and pops k transactions in O(k). A transaction id is
+accepted once: re-deliveries over another path, and transactions that
+are already in a block, are rejected at add() with a single dict lookup.
+Ids are forgotten once their bucket is retention_slots old, which also
+drops transactions nobody packed. Transactions taken for a block that
+then left them out (not yet covered by the sender's balance) are put
+back in their arrival bucket with requeue(), so they keep their place
+and their lifetime.
+
+There is no lock. Writers and the packer only use dict.setdefault/pop
+and deque append/popleft, which are atomic, so any number of receive
+threads can add while a leader packs.
+"""
+
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+from blockchain.utils.logger import logger
+
+DEFAULT_SLOT_DURATION = 0.45
+DEFAULT_RETENTION_SLOTS = 200  # 90 seconds, the Gulf Stream transaction lifetime
+
+
+class TransactionIntake:
+    """
+    Deduplicating, arrival-ordered transaction buffer with one bucket per slot
+
+    Args:
+        slot_duration: Seconds per bucket (the leader schedule's slot length)
+        retention_slots: Slots a transaction id is remembered, packed or not
+    """
+
+    def __init__(self, slot_duration: float = DEFAULT_SLOT_DURATION,
+                 retention_slots: int = DEFAULT_RETENTION_SLOTS):
+        self.slot_duration = slot_duration
+        self.retention_slots = retention_slots
+
+        # slot -> entries in arrival order; an entry is (slot, transaction)
+        self.slots: Dict[int, deque] = {}
+        # transaction id -> its queued entry, or the slot it was packed or
+        # removed in (an int), so late duplicates are still rejected
+        self.seen: Dict[str, object] = {}
+        self.retired: deque = deque()  # (slot, transaction id) in retirement order
+        # transaction id -> the entry take() popped, until the id is requeued or forgotten
+        self.taken: Dict[str, tuple] = {}
+        self.expired_through = self._slot() - retention_slots
+
+        self.stats = {
+            'added': 0,
+            'duplicates': 0,
+            'packed': 0,
+            'requeued': 0,
+            'removed': 0,
+            'expired': 0,
+            'by_source': {}
+        }
+
+    def _slot(self) -> int:
+        return int(time.monotonic() / self.slot_duration)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in list(self.slots.values()))
+
+    # Writing
+
+    def add(self, transaction, source: str = 'local') -> bool:
+        """Queue a transaction; False if its id was already seen"""
+        slot = self._slot()
+        if slot - self.retention_slots > self.expired_through:
+            self.expire(slot)
+
+        entry = (slot, transaction)
+        if self.seen.setdefault(transaction.id, entry) is not entry:
+            self.stats['duplicates'] += 1
+            return False
+
+        entries = self.slots.get(slot)
+        if entries is None:
+            entries = self.slots.setdefault(slot, deque())
+        entries.append(entry)
+
+        self.stats['added'] += 1
+        by_source = self.stats['by_source']
+        by_source[source] = by_source.get(source, 0) + 1
+        return True
+
+    def add_many(self, transactions: Iterable, source: str = 'local') -> int:
+        """Queue several transactions; returns how many were new"""
+        return sum(1 for transaction in transactions if self.add(transaction, source))
+
+    def remove(self, transactions: Iterable):
+        """Forget transactions that made it into a block; queued copies are skipped when packing"""
+        slot = self._slot()
+        for transaction in transactions:
+            self.taken.pop(transaction.id, None)
+            if isinstance(self.seen.get(transaction.id), int):
+                continue  # Already packed or removed
+            self.seen[transaction.id] = slot
+            self.retired.append((slot, transaction.id))
+            self.stats['removed'] += 1
+
+    # Packing
+
+    def take(self, max_transactions: Optional[int] = None) -> List:
+        """Pop queued transactions, oldest first; O(k) for k transactions"""
+        slot = self._slot()
+        taken = []
+        for bucket in sorted(list(self.slots)):
+            entries = self.slots.get(bucket)
+            while entries:
+                if max_transactions is not None and len(taken) >= max_transactions:
+                    break
+                try:
+                    entry = entries.popleft()
+                except IndexError:
+                    break
+                transaction = entry[1]
+                if self.seen.get(transaction.id) is not entry:
+                    continue  # Removed after it was queued
+                self.seen[transaction.id] = slot
+                self.retired.append((slot, transaction.id))
+                self.taken[transaction.id] = entry
+                taken.append(transaction)
+            if max_transactions is not None and len(taken) >= max_transactions:
+                break
+            # Writers may still hold the previous slot's bucket, so only older ones are dropped
+            if bucket < slot - 1 and entries is not None and not entries:
+                self.slots.pop(bucket, None)
+
+        self.stats['packed'] += len(taken)
+        return taken
+
+    def requeue(self, transactions: Iterable) -> int:
+        """Put taken transactions that no block included back in their arrival buckets, in order"""
+        requeued = 0
+        for transaction in reversed(list(transactions)):
+            entry = self.taken.pop(transaction.id, None)
+            if entry is None or entry[0] < self.expired_through:
+                continue  # Removed since it was taken, or past its lifetime
+            self.seen[transaction.id] = entry
+            self.slots.setdefault(entry[0], deque()).appendleft(entry)
+            requeued += 1
+
+        self.stats['requeued'] += requeued
+        return requeued
+
+    # Expiry
+
+    def expire(self, slot: Optional[int] = None):
+        """Drop buckets, and forget ids, older than retention_slots"""
+        if slot is None:
+            slot = self._slot()
+        cutoff = slot - self.retention_slots
+        self.expired_through = cutoff
+
+        expired = 0
+        for bucket in [bucket for bucket in list(self.slots) if bucket < cutoff]:
+            for entry in self.slots.pop(bucket, ()):
+                if self.seen.get(entry[1].id) is entry:
+                    self.seen.pop(entry[1].id, None)
+                    expired += 1
+
+        retired = self.retired
+        try:
+            while retired[0][0] < cutoff:
+                retired_slot, transaction_id = retired.popleft()
+                if self.seen.get(transaction_id) == retired_slot:
+                    self.seen.pop(transaction_id, None)
+                    self.taken.pop(transaction_id, None)
+        except IndexError:
+            pass  # Drained, possibly by a concurrent expire()
+
+        if expired:
+            self.stats['expired'] += expired
+            logger.info(f"Transaction intake expired {expired} unpacked transactions")
+
+    def get_stats(self) -> dict:
+        return {
+            'pending': len(self),
+            'slots': len(self.slots),
+            'tracked_ids': len(self.seen),
+            **self.stats,
+            'by_source': dict(self.stats['by_source'])
+        }
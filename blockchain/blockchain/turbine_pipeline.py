@@ -0,0 +1,319 @@
+"""
+Turbine Block Pipeline
+======================
+
+Turns decoded Turbine FEC sets into Block objects for Node.handle_block.
+
+Two stages run on their own threads and are joined by bounded queues:
+
+1. Decode: each FEC set is turned into Transaction objects and their
+   signatures are checked as soon as the set arrives, so most of a
+   block's validation is done while its later sets are still in flight.
+   A block with a bad signature is rejected before it is ever assembled.
+2. Validate: assembled blocks are handed to the block handler in order,
+   overlapping full validation of one block with decoding of the next.
+
+TurbineRetransmitter runs next to it and forwards received shreds to this
+node's children in their per-shred trees.
+"""
+
+import queue
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from blockchain.block import Block
+from blockchain.transaction.transaction import Transaction
+from blockchain.transaction.wallet import Wallet
+from blockchain.utils.logger import logger
+
+
+class _PendingBlock:
+    """FEC sets decoded so far for one block"""
+
+    def __init__(self, fec_set_count: int):
+        self.fec_set_count = fec_set_count
+        self.header: Optional[Dict] = None
+        self.batches: Dict[int, List[Transaction]] = {}
+
+    def is_complete(self) -> bool:
+        return self.header is not None and len(self.batches) == self.fec_set_count - 1
+
+
+class TurbineBlockPipeline:
+    """
+    Bounded decode -> validate pipeline for blocks received via Turbine.
+
+    ``submit_fec_set`` never blocks the shred receive path: when the decode
+    queue is full the set is dropped and counted, and the block will still
+    arrive through the regular P2P path.
+    """
+
+    def __init__(self, block_handler: Callable[[Block], None], max_queued_sets: int = 1024,
+                 max_queued_blocks: int = 16, max_pending_blocks: int = 64, verify_signatures: bool = True):
+        self.block_handler = block_handler
+        self.verify_signatures = verify_signatures
+        self.max_pending_blocks = max_pending_blocks
+
+        self.set_queue = queue.Queue(maxsize=max_queued_sets)
+        self.block_queue = queue.Queue(maxsize=max_queued_blocks)
+
+        self.pending_blocks: "OrderedDict[str, _PendingBlock]" = OrderedDict()
+        self.finished_blocks: "OrderedDict[str, bool]" = OrderedDict()  # block_hash -> accepted
+
+        self.running = False
+        self.decode_thread = None
+        self.validate_thread = None
+
+        self.stats = {
+            'sets_submitted': 0,
+            'sets_dropped': 0,
+            'transactions_verified': 0,
+            'blocks_assembled': 0,
+            'blocks_rejected': 0,
+            'blocks_dropped': 0,
+            'blocks_handled': 0,
+            'handler_errors': 0
+        }
+
+    def start(self):
+        """Start the decode and validate threads"""
+        if self.running:
+            return
+        self.running = True
+        self.decode_thread = threading.Thread(target=self._decode_loop, daemon=True)
+        self.validate_thread = threading.Thread(target=self._validate_loop, daemon=True)
+        self.decode_thread.start()
+        self.validate_thread.start()
+
+    def stop(self):
+        """Stop both stages; queued work is discarded"""
+        self.running = False
+        for thread in (self.decode_thread, self.validate_thread):
+            if thread is not None:
+                thread.join(timeout=2)
+
+    def submit_fec_set(self, fec_set: Dict) -> bool:
+        """Queue a decoded FEC set from TurbineProtocol.drain_completed_fec_sets()"""
+        try:
+            self.set_queue.put_nowait(fec_set)
+        except queue.Full:
+            self.stats['sets_dropped'] += 1
+            return False
+        self.stats['sets_submitted'] += 1
+        return True
+
+    def _decode_loop(self):
+        while self.running:
+            try:
+                fec_set = self.set_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self.process_fec_set(fec_set)
+            except Exception as e:
+                logger.warning(f"Turbine pipeline failed to decode FEC set: {e}")
+
+    def _validate_loop(self):
+        while self.running:
+            try:
+                block = self.block_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self.block_handler(block)
+                self.stats['blocks_handled'] += 1
+            except Exception as e:
+                self.stats['handler_errors'] += 1
+                logger.error(f"Turbine pipeline block handler failed: {e}")
+
+    def process_fec_set(self, fec_set: Dict) -> Optional[Block]:
+        """
+        Decode one FEC set; returns the assembled Block when it completes one.
+
+        The block is also queued for the validate stage.
+        """
+        block_hash = fec_set['block_hash']
+        if block_hash in self.finished_blocks:
+            return None
+
+        pending = self.pending_blocks.get(block_hash)
+        if pending is None:
+            pending = _PendingBlock(fec_set['fec_set_count'])
+            self.pending_blocks[block_hash] = pending
+            while len(self.pending_blocks) > self.max_pending_blocks:
+                self.pending_blocks.popitem(last=False)
+
+        fec_set_index = fec_set['fec_set_index']
+        if fec_set_index == 0:
+            pending.header = fec_set['payload']
+        else:
+            try:
+                transactions = [Transaction.from_dict(data) for data in fec_set['payload']]
+            except (TypeError, ValueError) as e:
+                self._finish(block_hash, accepted=False)
+                self.stats['blocks_rejected'] += 1
+                logger.warning(f"Turbine block {block_hash[:16]}... rejected: malformed transaction ({e})")
+                return None
+            if not self._signatures_valid(transactions):
+                self._finish(block_hash, accepted=False)
+                self.stats['blocks_rejected'] += 1
+                logger.warning(f"Turbine block {block_hash[:16]}... rejected: invalid transaction signature")
+                return None
+            pending.batches[fec_set_index] = transactions
+
+        if not pending.is_complete():
+            return None
+
+        block = self._assemble(block_hash, pending)
+        if block is None:
+            return None
+
+        try:
+            self.block_queue.put(block, timeout=1)
+        except queue.Full:
+            # Validation is falling behind; P2P propagation still delivers the block
+            self.stats['blocks_dropped'] += 1
+            return block
+        return block
+
+    def _signatures_valid(self, transactions: List[Transaction]) -> bool:
+        if not self.verify_signatures:
+            return True
+        for transaction in transactions:
+            if not Wallet.signature_valid(transaction.payload(), transaction.signature,
+                                          transaction.sender_public_key):
+                return False
+            self.stats['transactions_verified'] += 1
+        return True
+
+    def _assemble(self, block_hash: str, pending: _PendingBlock) -> Optional[Block]:
+        header = dict(pending.header)
+        expected = header.pop('transaction_count', None)
+        transactions = [
+            transaction
+            for fec_set_index in range(1, pending.fec_set_count)
+            for transaction in pending.batches[fec_set_index]
+        ]
+        if expected is not None and expected != len(transactions):
+            self._finish(block_hash, accepted=False)
+            self.stats['blocks_rejected'] += 1
+            return None
+
+        header['transactions'] = transactions
+        try:
+            block = Block.from_dict(header)
+        except ValueError as e:
+            self._finish(block_hash, accepted=False)
+            self.stats['blocks_rejected'] += 1
+            logger.warning(f"Turbine block {block_hash[:16]}... rejected: malformed header ({e})")
+            return None
+        self._finish(block_hash, accepted=True)
+        self.stats['blocks_assembled'] += 1
+        return block
+
+    def _finish(self, block_hash: str, accepted: bool):
+        self.pending_blocks.pop(block_hash, None)
+        self.finished_blocks[block_hash] = accepted
+        while len(self.finished_blocks) > self.max_pending_blocks * 4:
+            self.finished_blocks.popitem(last=False)
+
+    def get_stats(self) -> Dict:
+        return {
+            'running': self.running,
+            'queued_sets': self.set_queue.qsize(),
+            'queued_blocks': self.block_queue.qsize(),
+            'pending_blocks': len(self.pending_blocks),
+            **self.stats
+        }
+
+
+class TurbineRetransmitter:
+    """
+    Sends the forwarding tasks of received shreds to this node's children.
+
+    ``submit`` only queues the tasks, so the shred receive path never
+    waits on the network. A sender thread takes everything queued so far,
+    merges the shreds per target and hands them to ``send_tasks`` (the
+    same executor the leader broadcasts with) in one call, so a burst of
+    shreds costs one concurrent fan-out rather than one request per
+    shred. When the queue is full new tasks are dropped and counted; the
+    children still get the block through the P2P path.
+    """
+
+    def __init__(self, send_tasks: Callable[[List[Dict]], Dict], max_queued_tasks: int = 4096,
+                 max_batch_tasks: int = 1024):
+        self.send_tasks = send_tasks
+        self.max_batch_tasks = max_batch_tasks
+        self.task_queue = queue.Queue(maxsize=max_queued_tasks)
+
+        self.running = False
+        self.thread = None
+
+        self.stats = {
+            'tasks_submitted': 0,
+            'tasks_dropped': 0,
+            'batches_sent': 0,
+            'shreds_forwarded': 0,
+            'send_errors': 0
+        }
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._send_loop, name="turbine-retransmit", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+
+    def submit(self, tasks: List[Dict]) -> int:
+        """Queue forwarding tasks from TurbineProtocol.receive_shred; returns how many were queued"""
+        queued = 0
+        for task in tasks:
+            try:
+                self.task_queue.put_nowait(task)
+            except queue.Full:
+                self.stats['tasks_dropped'] += len(tasks) - queued
+                break
+            queued += 1
+        self.stats['tasks_submitted'] += queued
+        return queued
+
+    def _send_loop(self):
+        while self.running:
+            try:
+                tasks = [self.task_queue.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            while len(tasks) < self.max_batch_tasks:
+                try:
+                    tasks.append(self.task_queue.get_nowait())
+                except queue.Empty:
+                    break
+            self.flush(tasks)
+
+    def flush(self, tasks: List[Dict]):
+        """Send a batch of tasks, merged into one task per target"""
+        shreds_by_target: "OrderedDict[str, List]" = OrderedDict()
+        for task in tasks:
+            shreds_by_target.setdefault(task['target_node'], []).extend(task['shreds'])
+        merged = [{'target_node': target, 'shreds': shreds, 'action': 'forward_shred'}
+                  for target, shreds in shreds_by_target.items()]
+        try:
+            self.send_tasks(merged)
+            self.stats['batches_sent'] += 1
+            self.stats['shreds_forwarded'] += sum(len(task['shreds']) for task in merged)
+        except Exception as e:
+            self.stats['send_errors'] += 1
+            logger.warning(f"Turbine retransmission failed: {e}")
+
+    def get_stats(self) -> Dict:
+        return {
+            'running': self.running,
+            'queued_tasks': self.task_queue.qsize(),
+            **self.stats
+        }
@@ -1,19 +1,35 @@
 import json
 import hashlib
+from collections import deque
 from typing import List, Dict, Optional
 from dataclasses import dataclass
 
+from blockchain.shred_buffer import ShredReassemblyBuffer
+from blockchain.turbine_tree import TurbinePropagationTree
+
 @dataclass
 class Shred:
     """A single data packet for Turbine transmission"""
     
-    def __init__(self, index: int, total_shreds: int, data: bytes, is_data_shred: bool, block_hash: str, original_data_shred_count: int = None):
-        self.index = index
-        self.total_shreds = total_shreds
+    def __init__(self, index: int, total_shreds: int, data: bytes, is_data_shred: bool, block_hash: str,
+                 original_data_shred_count: int = None, slot: int = None, fec_set_index: int = 0,
+                 fec_set_count: int = 1, payload_hash: str = None, leader: str = None):
+        self.index = index  # Index within the shred's FEC set
+        self.total_shreds = total_shreds  # Shreds in the FEC set (data + recovery)
         self.data = data
         self.is_data_shred = is_data_shred
         self.block_hash = block_hash
         self.original_data_shred_count = original_data_shred_count
+        self.slot = slot
+        self.fec_set_index = fec_set_index
+        self.fec_set_count = fec_set_count
+        self.payload_hash = payload_hash  # sha256 of the FEC set's unpadded payload
+        self.leader = leader  # Slot leader that broadcast the block; selects the per-shred tree
+    
+    @property
+    def shred_id(self) -> int:
+        """Index of the shred within its block, used to pick its propagation tree"""
+        return (self.fec_set_index << 16) | self.index
     
     def to_bytes(self) -> bytes:
         """Serialize shred for network transmission"""
@@ -22,7 +38,12 @@ class Shred:
             'total_shreds': self.total_shreds,
             'is_data_shred': self.is_data_shred,
             'block_hash': self.block_hash,
-            'original_data_shred_count': self.original_data_shred_count
+            'original_data_shred_count': self.original_data_shred_count,
+            'slot': self.slot,
+            'fec_set_index': self.fec_set_index,
+            'fec_set_count': self.fec_set_count,
+            'payload_hash': self.payload_hash,
+            'leader': self.leader
         }
         header_bytes = json.dumps(header).encode()
         header_len = len(header_bytes).to_bytes(4, 'big')
@@ -42,60 +63,120 @@ class Shred:
             data=shred_data,
             is_data_shred=header['is_data_shred'],
             block_hash=header['block_hash'],
-            original_data_shred_count=header.get('original_data_shred_count')
+            original_data_shred_count=header.get('original_data_shred_count'),
+            slot=header.get('slot'),
+            fec_set_index=header.get('fec_set_index', 0),
+            fec_set_count=header.get('fec_set_count', 1),
+            payload_hash=header.get('payload_hash'),
+            leader=header.get('leader')
         )
 
 class BlockShredder:
     """Handles block shredding and erasure coding for Turbine protocol"""
     
-    def __init__(self, shred_size: int = 1024, redundancy_ratio: float = 0.3):
+    def __init__(self, shred_size: int = 1024, redundancy_ratio: float = 0.3, data_shreds_per_fec_set: int = 32,
+                 max_data_shreds_per_fec_set: int = 256):
         self.shred_size = shred_size
         self.redundancy_ratio = redundancy_ratio
+        self.data_shreds_per_fec_set = data_shreds_per_fec_set
+        # Hard limit for a set holding one oversized transaction; receivers
+        # reject set headers above it
+        self.max_data_shreds_per_fec_set = max(max_data_shreds_per_fec_set, data_shreds_per_fec_set)
+    
+    def _recovery_shred_count(self, data_shred_count: int) -> int:
+        return max(1, int(data_shred_count * self.redundancy_ratio))
+    
+    def max_shreds_per_fec_set(self) -> int:
+        """Largest total_shreds (data + recovery) a valid FEC set can have"""
+        return self.max_data_shreds_per_fec_set + self._recovery_shred_count(self.max_data_shreds_per_fec_set)
     
     def shred_block(self, block) -> List[Shred]:
         """
-        Shred a block into fixed-size packets with Reed-Solomon style erasure coding.
+        Shred a block into entry-aligned FEC sets with Reed-Solomon style erasure coding.
+        
+        FEC set 0 carries the block header (everything except the
+        transactions); every later set carries a JSON array of whole
+        transactions. Each set decodes on its own, so receivers can start
+        validating early sets while later ones are still in flight.
         
         Args:
             block: Block to shred
             
         Returns:
-            List of shreds (data + recovery shreds)
+            List of shreds (data + recovery shreds of every FEC set)
         """
-        # Serialize block to bytes
-        block_data = json.dumps(block.to_dict()).encode()
-        block_hash = hashlib.sha256(block_data).hexdigest()
-        
-        # Split into data shreds
+        block_dict = block.to_dict()
+        transactions = block_dict.pop('transactions', [])
+        block_dict['transaction_count'] = len(transactions)
+        
+        payloads = [json.dumps(block_dict).encode()]
+        payloads.extend(self._batch_transactions(transactions))
+        
+        block_hasher = hashlib.sha256()
+        for payload in payloads:
+            block_hasher.update(payload)
+        block_hash = block_hasher.hexdigest()
+        
+        slot = getattr(block, 'slot', block.block_count)
+        shreds = []
+        for fec_set_index, payload in enumerate(payloads):
+            shreds.extend(self._shred_fec_set(payload, block_hash, slot, fec_set_index, len(payloads)))
+        return shreds
+    
+    def _batch_transactions(self, transactions: List[Dict]) -> List[bytes]:
+        """Pack whole transactions into JSON arrays that fit one FEC set each"""
+        capacity = self.shred_size * self.data_shreds_per_fec_set
+        batches = []
+        batch = []
+        batch_size = 2  # Enclosing brackets
+        
+        for transaction in transactions:
+            encoded = json.dumps(transaction).encode()
+            # An oversized transaction still gets a set of its own
+            if batch and batch_size + len(encoded) + 1 > capacity:
+                batches.append(b'[' + b','.join(batch) + b']')
+                batch = []
+                batch_size = 2
+            batch.append(encoded)
+            batch_size += len(encoded) + 1
+        
+        if batch:
+            batches.append(b'[' + b','.join(batch) + b']')
+        return batches
+    
+    def _shred_fec_set(self, payload: bytes, block_hash: str, slot: int,
+                       fec_set_index: int, fec_set_count: int) -> List[Shred]:
+        """Split one FEC set payload into data shreds and generate its recovery shreds"""
         data_shreds = []
-        for i in range(0, len(block_data), self.shred_size):
-            chunk = block_data[i:i + self.shred_size]
+        for i in range(0, len(payload), self.shred_size):
+            chunk = payload[i:i + self.shred_size]
             # Pad last chunk if necessary
             if len(chunk) < self.shred_size:
                 chunk += b'\x00' * (self.shred_size - len(chunk))
             
-            shred = Shred(
+            data_shreds.append(Shred(
                 index=len(data_shreds),
                 total_shreds=0,  # Will be set after calculating recovery shreds
                 data=chunk,
                 is_data_shred=True,
-                block_hash=block_hash,
-                original_data_shred_count=None  # Will be set after calculating recovery shreds
-            )
-            data_shreds.append(shred)
+                block_hash=block_hash
+            ))
         
-        # Generate recovery shreds using Reed-Solomon style erasure coding
-        recovery_shreds = self._generate_recovery_shreds(data_shreds, block_hash)
+        if len(data_shreds) > self.max_data_shreds_per_fec_set:
+            raise ValueError(f"FEC set payload of {len(payload)} bytes exceeds "
+                             f"{self.max_data_shreds_per_fec_set} data shreds")
         
-        # Store the original data shred count for reconstruction
-        self.original_data_shred_count = len(data_shreds)
-        print(f"DEBUG shred_block: Set original_data_shred_count to {self.original_data_shred_count}, total_shreds: {len(data_shreds) + len(recovery_shreds)}")
+        recovery_shreds = self._generate_recovery_shreds(data_shreds, block_hash)
         
-        # Update total shred count and original data shred count
         total_shreds = len(data_shreds) + len(recovery_shreds)
+        payload_hash = hashlib.sha256(payload).hexdigest()
         for shred in data_shreds + recovery_shreds:
             shred.total_shreds = total_shreds
-            shred.original_data_shred_count = self.original_data_shred_count
+            shred.original_data_shred_count = len(data_shreds)
+            shred.slot = slot
+            shred.fec_set_index = fec_set_index
+            shred.fec_set_count = fec_set_count
+            shred.payload_hash = payload_hash
         
         return data_shreds + recovery_shreds
     
@@ -106,7 +187,7 @@ class BlockShredder:
         This implements a more robust erasure coding scheme that provides
         better fault tolerance and reconstruction capabilities.
         """
-        num_recovery = max(1, int(len(data_shreds) * self.redundancy_ratio))
+        num_recovery = self._recovery_shred_count(len(data_shreds))
         recovery_shreds = []
         
         # Improved erasure coding using systematic approach
@@ -239,13 +320,23 @@ class BlockShredder:
         if len(data_shreds) + len(recovery_shreds) < expected_count:
             return None
         
+        data_shreds = self.recover_missing_data_shreds(data_shreds, recovery_shreds, expected_count)
+        return self._reconstruct_from_data_shreds(data_shreds, expected_count)
+    
+    def recover_missing_data_shreds(self, data_shreds: List[Shred], recovery_shreds: List[Shred], expected_count: int) -> List[Shred]:
+        """
+        Rebuild missing data shreds from recovery shreds.
+        
+        Returns the data shreds extended with every shred that could be recovered.
+        """
+        data_shreds = list(data_shreds)
+        
         # Create a map of available data shreds
         available_data = {shred.index: shred for shred in data_shreds}
         missing_indices = [i for i in range(expected_count) if i not in available_data]
         
         if not missing_indices or not recovery_shreds:
-            # Try direct reconstruction if we have enough data shreds
-            return self._reconstruct_from_data_shreds(data_shreds, expected_count)
+            return data_shreds
         
         # Attempt to recover missing data shreds using recovery shreds
         # This is a simplified recovery algorithm - in production, use Reed-Solomon
@@ -283,6 +374,19 @@ class BlockShredder:
             for j in range(len(hash_bytes)):
                 reconstructed_data[j] ^= hash_bytes[j]
             
+            # What remains is the missing shred's own rotated and mixed
+            # contribution; undo both to get its data back
+            mixing_factor = missing_index + 1
+            for k in range(0, len(reconstructed_data), 4):
+                if k + 3 < len(reconstructed_data):
+                    reconstructed_data[k] ^= (mixing_factor >> 24) & 0xFF
+                    reconstructed_data[k+1] ^= (mixing_factor >> 16) & 0xFF
+                    reconstructed_data[k+2] ^= (mixing_factor >> 8) & 0xFF
+                    reconstructed_data[k+3] ^= mixing_factor & 0xFF
+            pattern_offset = (missing_index * 3) % len(reconstructed_data)
+            reconstructed_data = reconstructed_data[-pattern_offset:] + reconstructed_data[:-pattern_offset] \
+                if pattern_offset else reconstructed_data
+            
             # Create reconstructed shred
             reconstructed_shred = Shred(
                 index=missing_index,
@@ -290,7 +394,11 @@ class BlockShredder:
                 data=bytes(reconstructed_data),
                 is_data_shred=True,
                 block_hash=block_hash,
-                original_data_shred_count=recovery_shred.original_data_shred_count
+                original_data_shred_count=recovery_shred.original_data_shred_count,
+                slot=recovery_shred.slot,
+                fec_set_index=recovery_shred.fec_set_index,
+                fec_set_count=recovery_shred.fec_set_count,
+                payload_hash=recovery_shred.payload_hash
             )
             
             # Add to available data
@@ -301,105 +409,65 @@ class BlockShredder:
             if len(available_data) >= expected_count:
                 break
         
-        # Try reconstruction again with recovered shreds
-        return self._reconstruct_from_data_shreds(data_shreds, expected_count)
-
-class TurbinePropagationTree:
-    """Manages the tree structure for Turbine block propagation"""
-    
-    def __init__(self, fanout: int = 200):
-        self.fanout = fanout
-        self.nodes = {}  # node_id -> node_info
-        self.tree_structure = {}  # node_id -> [child_node_ids]
-    
-    def register_node(self, node_id: str, stake_weight: float = 1.0, network_address: str = None):
-        """Register a node in the propagation tree"""
-        self.nodes[node_id] = {
-            'stake_weight': stake_weight,
-            'network_address': network_address,
-            'children': []
-        }
-        self._rebuild_tree()
-    
-    def _rebuild_tree(self):
-        """Rebuild the propagation tree based on stake weights"""
-        if not self.nodes:
-            return
-        
-        # Sort nodes by stake weight (descending)
-        sorted_nodes = sorted(self.nodes.items(), key=lambda x: x[1]['stake_weight'], reverse=True)
-        
-        # Build tree structure
-        self.tree_structure = {node_id: [] for node_id, _ in sorted_nodes}
-        
-        # Assign children based on fanout
-        for i, (parent_id, _) in enumerate(sorted_nodes):
-            start_child = i * self.fanout + 1
-            end_child = min(start_child + self.fanout, len(sorted_nodes))
-            
-            for j in range(start_child, end_child):
-                if j < len(sorted_nodes):
-                    child_id = sorted_nodes[j][0]
-                    self.tree_structure[parent_id].append(child_id)
-                    self.nodes[parent_id]['children'].append(child_id)
-    
-    def get_children(self, node_id: str) -> List[str]:
-        """Get the children of a node in the propagation tree"""
-        return self.tree_structure.get(node_id, [])
-    
-    def get_propagation_path(self, from_node: str) -> List[str]:
-        """Get the propagation path from a node to all its descendants"""
-        path = []
-        to_visit = [from_node]
-        
-        while to_visit:
-            current = to_visit.pop(0)
-            if current != from_node:
-                path.append(current)
-            children = self.get_children(current)
-            to_visit.extend(children)
-        
-        return path
+        return data_shreds
 
 class TurbineProtocol:
     """Main Turbine protocol implementation for block propagation"""
     
-    def __init__(self, fanout: int = 200, shred_size: int = 1024):
+    def __init__(self, fanout: int = 200, shred_size: int = 1024, max_slot_age: int = 64,
+                 max_buffer_bytes: int = 64 * 1024 * 1024, slot_clock=None):
         self.shredder = BlockShredder(shred_size=shred_size)
         self.propagation_tree = TurbinePropagationTree(fanout=fanout)
-        self.received_shreds = {}  # block_hash -> List[Shred]
-        self.reconstructed_blocks = {}  # block_hash -> block_data
+        self.shred_buffer = ShredReassemblyBuffer(
+            self.shredder, max_slot_age=max_slot_age, max_memory_bytes=max_buffer_bytes,
+            slot_clock=slot_clock, max_future_slots=max_slot_age
+        )
+        
+        # Decoded FEC sets waiting for the block pipeline, which is the only
+        # place blocks are assembled; the oldest are dropped if nobody drains them
+        self.completed_fec_sets = deque(maxlen=4096)
     
     def register_validator(self, validator_id: str, stake_weight: float = 1.0, network_address: str = None):
         """Register a validator in the Turbine network"""
         self.propagation_tree.register_node(validator_id, stake_weight, network_address)
     
+    def register_validators(self, validators):
+        """Register many (validator_id, stake_weight, network_address) entries at once"""
+        self.propagation_tree.register_nodes(validators)
+    
+    def set_epoch(self, epoch: int):
+        """Advance the propagation tree to a new epoch's shuffle"""
+        self.propagation_tree.set_epoch(epoch)
+    
     def broadcast_block(self, block, leader_id: str) -> List[Dict]:
         """
         Broadcast a block using Turbine protocol.
         
-        In proper Turbine, all validators eventually receive all shreds through gossip.
-        This simulates the gossip propagation by sending all shreds to all validators.
+        Every shred goes only to the stake-weighted root of its own tree;
+        the root and the nodes below it retransmit it from there. Shreds
+        carry the leader so receivers build the same trees.
         
-        Returns list of transmission tasks for the network layer.
+        Returns list of transmission tasks for the network layer, one per
+        root with all the shreds that root was picked for.
         """
-        # Shred the block
         shreds = self.shredder.shred_block(block)
         
-        # Get direct children of the leader
-        children = self.propagation_tree.get_children(leader_id)
-        
-        # In Turbine, shreds are gossiped across the network so all validators
-        # eventually receive all shreds. For simulation, send all shreds to all children.
-        transmission_tasks = []
-        for child_id in children:
-            transmission_tasks.append({
-                'target_node': child_id,
-                'shreds': shreds,  # Send ALL shreds to each validator
+        shreds_by_root: Dict[str, List[Shred]] = {}
+        for shred in shreds:
+            shred.leader = leader_id
+            slot = shred.slot if shred.slot is not None else 0
+            root = self.propagation_tree.get_shred_root(slot, shred.shred_id, leader_id)
+            if root is not None:
+                shreds_by_root.setdefault(root, []).append(shred)
+        
+        return [
+            {
+                'target_node': root,
+                'shreds': root_shreds,
                 'action': 'send_shreds'
-            })
-        
-        return transmission_tasks
+            }
+            for root, root_shreds in shreds_by_root.items()
+        ]
     
     def receive_shred(self, shred: Shred, receiving_node_id: str) -> List[Dict]:
         """
@@ -407,21 +475,25 @@ class TurbineProtocol:
         
         Returns list of forwarding tasks.
         """
-        block_hash = shred.block_hash
-        
-        # Store the shred
-        if block_hash not in self.received_shreds:
-            self.received_shreds[block_hash] = []
-        self.received_shreds[block_hash].append(shred)
-        
-        # Try to reconstruct the block
-        if block_hash not in self.reconstructed_blocks:
-            reconstructed = self.shredder.reconstruct_block(self.received_shreds[block_hash])
-            if reconstructed:
-                self.reconstructed_blocks[block_hash] = reconstructed
-        
-        # Forward the shred to children
-        children = self.propagation_tree.get_children(receiving_node_id)
+        # Duplicates are dropped without forwarding, so loops die out at
+        # once. Shreds first seen after their set was decoded are still
+        # forwarded: the nodes below this one in their trees need them.
+        accepted, payload = self.shred_buffer.insert(shred)
+        if not accepted:
+            return []
+        
+        if payload is not None:
+            try:
+                self._on_fec_set_decoded(shred, json.loads(payload.decode()))
+            except ValueError:
+                pass
+        
+        # Forward the shred to this node's children in the shred's own tree,
+        # which is the one the leader rooted it in
+        slot = shred.slot if shred.slot is not None else 0
+        _, children = self.propagation_tree.get_retransmit_peers(
+            receiving_node_id, slot, shred.shred_id, shred.leader
+        )
         forwarding_tasks = []
         
         for child_id in children:
@@ -433,14 +505,28 @@ class TurbineProtocol:
         
         return forwarding_tasks
     
+    def _on_fec_set_decoded(self, shred: Shred, decoded):
+        """Queue a decoded FEC set for the pipeline"""
+        self.completed_fec_sets.append({
+            'block_hash': shred.block_hash,
+            'slot': shred.slot,
+            'fec_set_index': shred.fec_set_index,
+            'fec_set_count': shred.fec_set_count,
+            'payload': decoded
+        })
+    
+    def drain_completed_fec_sets(self) -> List[Dict]:
+        """Take every decoded FEC set queued since the last call, in arrival order"""
+        drained = []
+        while self.completed_fec_sets:
+            drained.append(self.completed_fec_sets.popleft())
+        return drained
+    
     def get_block_reconstruction_status(self, block_hash: str) -> Dict:
-        """Get the status of block reconstruction"""
-        received_count = len(self.received_shreds.get(block_hash, []))
-        is_reconstructed = block_hash in self.reconstructed_blocks
-        
+        """Shreds received and FEC sets decoded so far for a block"""
         return {
             'block_hash': block_hash,
-            'shreds_received': received_count,
-            'is_reconstructed': is_reconstructed,
-            'block_data': self.reconstructed_blocks.get(block_hash)
+            'shreds_received': self.shred_buffer.shreds_received(block_hash),
+            'fec_sets_decoded': sum(1 for fec_set in self.shred_buffer.get_block_sets(block_hash)
+                                    if fec_set.completed)
         }
@@ -0,0 +1,305 @@
+"""
+Stake-weighted Turbine propagation tree.
+
+The epoch-level weighted shuffle is computed once and cached until the
+validator set or the epoch changes. Per-shred trees are derived from it
+by sampling a stake-weighted root for every (slot, shred index) from a
+Fenwick tree, so parent/children lookups cost O(log n) and never rebuild
+the shuffle.
+"""
+
+import hashlib
+import random
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Stakes are converted to integer units so every validator derives
+# bit-identical shuffles regardless of float summation order.
+STAKE_UNITS_PER_WEIGHT = 1_000_000
+
+
+class FenwickTree:
+    """Binary indexed tree over integer weights with prefix search"""
+
+    def __init__(self, weights: List[int]):
+        self.size = len(weights)
+        self.tree = [0] * (self.size + 1)
+        self.weights = list(weights)
+
+        # O(n) construction: push each partial sum to its parent once
+        for i in range(1, self.size + 1):
+            self.tree[i] += self.weights[i - 1]
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self.tree[parent] += self.tree[i]
+
+        self._top_bit = 1 << (self.size.bit_length() - 1) if self.size else 0
+
+    def update(self, index: int, delta: int):
+        """Add delta to the weight at index"""
+        self.weights[index] += delta
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, count: int) -> int:
+        """Sum of the first count weights"""
+        total = 0
+        i = count
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def total(self) -> int:
+        return self.prefix_sum(self.size)
+
+    def find(self, target: int) -> int:
+        """Return the smallest index whose inclusive prefix sum exceeds target"""
+        position = 0
+        remaining = target
+        step = self._top_bit
+        while step:
+            next_position = position + step
+            if next_position <= self.size and self.tree[next_position] <= remaining:
+                position = next_position
+                remaining -= self.tree[next_position]
+            step >>= 1
+        return position
+
+
+def _stake_units(stake_weight: float) -> int:
+    if stake_weight <= 0:
+        return 0
+    return max(1, int(stake_weight * STAKE_UNITS_PER_WEIGHT))
+
+
+def _seed_from(*parts) -> int:
+    digest = hashlib.sha256(":".join(str(part) for part in parts).encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def weighted_shuffle(node_ids: List[str], weights: List[int], seed: int) -> List[str]:
+    """
+    Deterministic stake-weighted shuffle without replacement.
+
+    Each draw is O(log n) on a Fenwick tree, so the full shuffle is
+    O(n log n). Zero-stake nodes are appended in uniformly shuffled order.
+    """
+    rng = random.Random(seed)
+    tree = FenwickTree(weights)
+    order = []
+
+    remaining = tree.total()
+    while remaining > 0:
+        index = tree.find(rng.randrange(remaining))
+        order.append(node_ids[index])
+        remaining -= tree.weights[index]
+        tree.update(index, -tree.weights[index])
+
+    unstaked = [node_id for node_id, weight in zip(node_ids, weights) if weight == 0]
+    rng.shuffle(unstaked)
+    order.extend(unstaked)
+    return order
+
+
+class TurbinePropagationTree:
+    """
+    Manages the tree structure for Turbine block propagation.
+
+    Registrations only mark the tree dirty; the weighted shuffle is
+    rebuilt lazily on the next lookup, so bulk registration and validator
+    churn cost one rebuild instead of one per node.
+    """
+
+    def __init__(self, fanout: int = 200, shred_cache_size: int = 4096):
+        self.fanout = fanout
+        self.nodes = {}  # node_id -> node_info
+        self.epoch = 0
+        self.shred_cache_size = shred_cache_size
+
+        self._dirty = True
+        self._order: List[str] = []  # epoch-level weighted shuffle
+        self._position: Dict[str, int] = {}  # node_id -> index in _order
+        self._stake_tree: Optional[FenwickTree] = None  # stake units in _order positions
+        self._shred_roots: "OrderedDict[Tuple, int]" = OrderedDict()  # (slot, index, leader) -> root position
+
+        self.stats = {
+            'rebuilds': 0,
+            'shred_root_cache_hits': 0,
+            'shred_root_cache_misses': 0
+        }
+
+    def register_node(self, node_id: str, stake_weight: float = 1.0, network_address: str = None):
+        """Register a node in the propagation tree"""
+        existing = self.nodes.get(node_id)
+        if existing and existing['stake_weight'] == stake_weight:
+            existing['network_address'] = network_address or existing['network_address']
+            return
+
+        self.nodes[node_id] = {
+            'stake_weight': stake_weight,
+            'network_address': network_address
+        }
+        self._dirty = True
+
+    def register_nodes(self, validators: Iterable[Tuple[str, float, Optional[str]]]):
+        """Register many (node_id, stake_weight, network_address) entries with a single rebuild"""
+        for node_id, stake_weight, network_address in validators:
+            self.register_node(node_id, stake_weight, network_address)
+
+    def unregister_node(self, node_id: str):
+        """Remove a node from the propagation tree"""
+        if self.nodes.pop(node_id, None) is not None:
+            self._dirty = True
+
+    def set_epoch(self, epoch: int):
+        """Switch to a new epoch; the shuffle is recomputed on the next lookup"""
+        if epoch != self.epoch:
+            self.epoch = epoch
+            self._dirty = True
+
+    def _ensure_built(self):
+        if not self._dirty:
+            return
+
+        node_ids = sorted(self.nodes)
+        weights = [_stake_units(self.nodes[node_id]['stake_weight']) for node_id in node_ids]
+
+        self._order = weighted_shuffle(node_ids, weights, _seed_from('turbine-epoch', self.epoch))
+        self._position = {node_id: index for index, node_id in enumerate(self._order)}
+        self._stake_tree = FenwickTree(
+            [_stake_units(self.nodes[node_id]['stake_weight']) for node_id in self._order]
+        )
+        self._shred_roots.clear()
+        self._dirty = False
+        self.stats['rebuilds'] += 1
+
+    # Epoch-level tree (legacy block broadcast path)
+
+    def get_children(self, node_id: str) -> List[str]:
+        """Get the children of a node in the epoch-level propagation tree"""
+        self._ensure_built()
+        position = self._position.get(node_id)
+        if position is None:
+            return []
+
+        start = position * self.fanout + 1
+        end = min(start + self.fanout, len(self._order))
+        return self._order[start:end]
+
+    def get_parent(self, node_id: str) -> Optional[str]:
+        """Get the parent of a node in the epoch-level propagation tree"""
+        self._ensure_built()
+        position = self._position.get(node_id)
+        if not position:
+            return None
+        return self._order[(position - 1) // self.fanout]
+
+    def get_propagation_path(self, from_node: str) -> List[str]:
+        """Get the propagation path from a node to all its descendants"""
+        path = []
+        to_visit = deque([from_node])
+
+        while to_visit:
+            current = to_visit.popleft()
+            if current != from_node:
+                path.append(current)
+            to_visit.extend(self.get_children(current))
+
+        return path
+
+    # Per-shred trees
+
+    def _shred_root_position(self, slot: int, shred_index: int, leader_id: Optional[str]) -> Optional[int]:
+        key = (slot, shred_index, leader_id)
+        cached = self._shred_roots.get(key)
+        if cached is not None:
+            self._shred_roots.move_to_end(key)
+            self.stats['shred_root_cache_hits'] += 1
+            return cached
+        self.stats['shred_root_cache_misses'] += 1
+
+        leader_position = self._position.get(leader_id) if leader_id else None
+        total = self._stake_tree.total()
+        leader_units = self._stake_tree.weights[leader_position] if leader_position is not None else 0
+        eligible = total - leader_units
+
+        if eligible > 0:
+            target = _seed_from('turbine-shred', self.epoch, slot, shred_index) % eligible
+            # Skip over the leader's stake range so it can never be sampled
+            if leader_position is not None and target >= self._stake_tree.prefix_sum(leader_position):
+                target += leader_units
+            root_position = self._stake_tree.find(target)
+        else:
+            candidates = [p for p in range(len(self._order)) if p != leader_position]
+            if not candidates:
+                return None
+            root_position = candidates[0]
+
+        self._shred_roots[key] = root_position
+        if len(self._shred_roots) > self.shred_cache_size:
+            self._shred_roots.popitem(last=False)
+        return root_position
+
+    def get_shred_root(self, slot: int, shred_index: int, leader_id: str = None) -> Optional[str]:
+        """Get the stake-weighted root the leader sends this shred to"""
+        self._ensure_built()
+        root_position = self._shred_root_position(slot, shred_index, leader_id)
+        return self._order[root_position] if root_position is not None else None
+
+    def get_retransmit_peers(self, node_id: str, slot: int, shred_index: int,
+                             leader_id: str = None) -> Tuple[Optional[str], List[str]]:
+        """
+        Get (parent, children) of a node in the tree for one shred.
+
+        The per-shred tree is the epoch shuffle with the sampled root moved
+        to the front and the slot leader removed. Positions are translated
+        arithmetically, so only the root sample touches the Fenwick tree.
+        """
+        self._ensure_built()
+        position = self._position.get(node_id)
+        if position is None or node_id == leader_id:
+            return None, []
+
+        root_position = self._shred_root_position(slot, shred_index, leader_id)
+        if root_position is None:
+            return None, []
+
+        removed = sorted({root_position, self._position.get(leader_id, root_position)})
+        tree_size = len(self._order) - len(removed) + 1
+
+        if position == root_position:
+            tree_position = 0
+        else:
+            tree_position = position - sum(1 for r in removed if r < position) + 1
+
+        def node_at(index: int) -> str:
+            if index == 0:
+                return self._order[root_position]
+            epoch_position = index - 1
+            for r in removed:
+                if r <= epoch_position:
+                    epoch_position += 1
+            return self._order[epoch_position]
+
+        if tree_position == 0:
+            parent = leader_id
+        else:
+            parent = node_at((tree_position - 1) // self.fanout)
+
+        start = tree_position * self.fanout + 1
+        end = min(start + self.fanout, tree_size)
+        children = [node_at(index) for index in range(start, end)]
+        return parent, children
+
+    def get_stats(self) -> Dict:
+        """Get propagation tree statistics"""
+        return {
+            'validators': len(self.nodes),
+            'fanout': self.fanout,
+            'epoch': self.epoch,
+            'cached_shred_roots': len(self._shred_roots),
+            **self.stats
+        }
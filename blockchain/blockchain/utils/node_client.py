@@ -0,0 +1,349 @@
+"""
+Inter-node HTTP Client
+======================
+
+Shared client for REST calls between nodes (and from the monitoring
+scripts to nodes). One asyncio event loop on a background thread serves
+every request, so:
+
+- connections are HTTP/1.1 keep-alive and pooled per host, instead of a
+  new TCP connection per call;
+- fan_out() sends a batch of requests concurrently, so asking N nodes
+  costs one round trip (bounded by the timeout) rather than N serial
+  timeouts;
+- every host has a circuit breaker. After failure_threshold consecutive
+  connection failures or timeouts, calls to that host fail at once
+  with CircuitOpenError for reset_timeout seconds. After that, one
+  probe request is let through to test whether the host is back;
+- 307/308 redirects to the same host (FastAPI's trailing-slash
+  redirects) are followed with the same method and body, like requests.
+
+Only plain http:// URLs are supported, which is all the node API serves.
+Calls are synchronous for the caller and safe from any thread except the
+client's own loop thread.
+"""
+
+import asyncio
+import json as jsonlib
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urljoin, urlsplit
+
+from blockchain.utils.logger import logger
+
+DEFAULT_TIMEOUT = 3.0
+DEFAULT_MAX_CONNECTIONS_PER_HOST = 8
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_RESET_TIMEOUT = 10.0
+MAX_IDLE_SECONDS = 30.0
+MAX_REDIRECTS = 3
+
+
+class NodeClientError(ConnectionError):
+    """Request failed: connection refused or reset, timeout, or malformed response"""
+
+
+class CircuitOpenError(NodeClientError):
+    """Request not attempted because the host's circuit breaker is open"""
+
+
+class NodeResponse:
+    """Response of one request (the subset of requests.Response the callers use)"""
+
+    def __init__(self, url: str, status_code: int, headers: Dict[str, str], content: bytes, elapsed: float):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status_code < 300
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self) -> Any:
+        return jsonlib.loads(self.content)
+
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures -> half open (one probe) -> closed or open"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN  # Let this one request probe the host
+            return True
+        return False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class _HostPool:
+    """Idle keep-alive connections and a concurrency limit for one host"""
+
+    def __init__(self, max_connections: int):
+        self.idle: deque = deque()  # (reader, writer, idle_since)
+        self.semaphore = asyncio.Semaphore(max_connections)
+
+    def take_idle(self):
+        while self.idle:
+            reader, writer, idle_since = self.idle.pop()
+            if time.monotonic() - idle_since < MAX_IDLE_SECONDS and not writer.is_closing() and not reader.at_eof():
+                return reader, writer
+            writer.close()
+        return None
+
+    def close(self):
+        while self.idle:
+            self.idle.pop()[1].close()
+
+
+class _ProtocolError(Exception):
+    pass
+
+
+class NodeClient:
+    """
+    Pooled, concurrent HTTP client with per-host circuit breakers
+
+    Args:
+        timeout: Default per-request timeout in seconds (connect + response)
+        max_connections_per_host: Concurrent requests (and pooled connections) per host
+        failure_threshold: Consecutive failures that open a host's circuit
+        reset_timeout: Seconds an open circuit waits before a probe request
+    """
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT,
+                 max_connections_per_host: int = DEFAULT_MAX_CONNECTIONS_PER_HOST,
+                 failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        self.timeout = timeout
+        self.max_connections_per_host = max_connections_per_host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.pools: Dict[Tuple[str, int], _HostPool] = {}
+        self.breakers: Dict[Tuple[str, int], CircuitBreaker] = {}
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="node-client", daemon=True)
+        self.thread.start()
+
+        self.stats = {
+            'requests': 0,
+            'failures': 0,
+            'circuit_rejections': 0,
+            'connections_opened': 0,
+            'connections_reused': 0,
+            'redirects_followed': 0
+        }
+
+    # Synchronous API
+
+    def request(self, method: str, url: str, json: Any = None, timeout: Optional[float] = None) -> NodeResponse:
+        """Send one request; raises NodeClientError (CircuitOpenError when the host is tripped)"""
+        timeout = self.timeout if timeout is None else timeout
+        future = asyncio.run_coroutine_threadsafe(self._request(method, url, json, timeout), self.loop)
+        return future.result(timeout + 1)
+
+    def get(self, url: str, timeout: Optional[float] = None) -> NodeResponse:
+        return self.request('GET', url, timeout=timeout)
+
+    def post(self, url: str, json: Any = None, timeout: Optional[float] = None) -> NodeResponse:
+        return self.request('POST', url, json=json, timeout=timeout)
+
+    def fan_out(self, requests: Sequence[Tuple], timeout: Optional[float] = None
+                ) -> List[Union[NodeResponse, NodeClientError]]:
+        """
+        Send (method, url) or (method, url, json) requests concurrently.
+        Returns, in request order, a NodeResponse or the NodeClientError
+        for each one; the whole batch takes at most about one timeout.
+        """
+        if not requests:
+            return []
+        timeout = self.timeout if timeout is None else timeout
+        future = asyncio.run_coroutine_threadsafe(self._fan_out(requests, timeout), self.loop)
+        return future.result(timeout + 1)
+
+    def get_many(self, urls: Sequence[str], timeout: Optional[float] = None
+                 ) -> List[Union[NodeResponse, NodeClientError]]:
+        return self.fan_out([('GET', url) for url in urls], timeout)
+
+    def close(self):
+        async def close_pools():
+            for pool in self.pools.values():
+                pool.close()
+        asyncio.run_coroutine_threadsafe(close_pools(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def get_stats(self) -> dict:
+        return {
+            'hosts': len(self.pools),
+            'open_circuits': [f"{host}:{port}" for (host, port), breaker in list(self.breakers.items())
+                              if breaker.state != CircuitBreaker.CLOSED],
+            **self.stats
+        }
+
+    # Event loop side
+
+    async def _fan_out(self, requests: Sequence[Tuple], timeout: float):
+        calls = [self._request(entry[0], entry[1], entry[2] if len(entry) > 2 else None, timeout)
+                 for entry in requests]
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        return [result if isinstance(result, (NodeResponse, NodeClientError)) else NodeClientError(str(result))
+                for result in results]
+
+    async def _request(self, method: str, url: str, json: Any, timeout: float,
+                       redirects: int = MAX_REDIRECTS) -> NodeResponse:
+        parts = urlsplit(url)
+        if parts.scheme != 'http' or not parts.hostname:
+            raise NodeClientError(f"Unsupported URL {url}")
+        host, port = parts.hostname, parts.port or 80
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        body = jsonlib.dumps(json).encode('utf-8') if json is not None else b''
+
+        key = (host, port)
+        breaker = self.breakers.get(key)
+        if breaker is None:
+            breaker = self.breakers[key] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            self.pools[key] = _HostPool(self.max_connections_per_host)
+        self.stats['requests'] += 1
+        if not breaker.allow():
+            self.stats['circuit_rejections'] += 1
+            raise CircuitOpenError(f"Circuit open for {host}:{port}")
+
+        started = time.monotonic()
+        try:
+            status, headers, content = await asyncio.wait_for(
+                self._exchange(self.pools[key], host, port, method, path, body, json is not None), timeout)
+        except (OSError, EOFError, asyncio.TimeoutError, _ProtocolError, ValueError) as e:
+            breaker.record_failure()
+            self.stats['failures'] += 1
+            if breaker.state == CircuitBreaker.OPEN:
+                logger.debug(f"Circuit opened for {host}:{port} after {breaker.failures} failures")
+            raise NodeClientError(f"{method} {url} failed: {e or type(e).__name__}") from e
+        breaker.record_success()
+
+        location = headers.get('location')
+        if status in (307, 308) and location and redirects > 0:
+            target = urljoin(url, location)
+            target_parts = urlsplit(target)
+            if (target_parts.hostname, target_parts.port or 80) == key:
+                self.stats['redirects_followed'] += 1
+                return await self._request(method, target, json, timeout, redirects - 1)
+        return NodeResponse(url, status, headers, content, time.monotonic() - started)
+
+    async def _exchange(self, pool: _HostPool, host: str, port: int, method: str, path: str,
+                        body: bytes, is_json: bool):
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {host}:{port}\r\nConnection: keep-alive\r\n"
+                f"Accept: application/json\r\nContent-Length: {len(body)}\r\n")
+        if is_json:
+            head += "Content-Type: application/json\r\n"
+        request = head.encode('latin-1') + b"\r\n" + body
+
+        async with pool.semaphore:
+            connection = pool.take_idle()
+            if connection is not None:
+                self.stats['connections_reused'] += 1
+                try:
+                    return await self._send(pool, connection, request)
+                except (OSError, EOFError, _ProtocolError):
+                    pass  # The server closed the idle connection; retry on a fresh one
+            connection = await asyncio.open_connection(host, port)
+            self.stats['connections_opened'] += 1
+            return await self._send(pool, connection, request)
+
+    async def _send(self, pool: _HostPool, connection, request: bytes):
+        reader, writer = connection
+        try:
+            writer.write(request)
+            await writer.drain()
+            status, headers, content, keep_alive = await self._read_response(reader)
+        except BaseException:
+            writer.close()
+            raise
+        if keep_alive:
+            pool.idle.append((reader, writer, time.monotonic()))
+        else:
+            writer.close()
+        return status, headers, content
+
+    async def _read_response(self, reader: asyncio.StreamReader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise EOFError("connection closed before response")
+        fields = status_line.split(None, 2)
+        if len(fields) < 2 or not fields[0].startswith(b'HTTP/'):
+            raise _ProtocolError(f"bad status line {status_line[:40]!r}")
+        status = int(fields[1])
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = headers.get('connection', '').lower() != 'close'
+        if status in (204, 304) or 100 <= status < 200:
+            content = b''
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b';')[0].strip(), 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass  # Trailers
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            content = b''.join(chunks)
+        elif 'content-length' in headers:
+            content = await reader.readexactly(int(headers['content-length']))
+        else:
+            content = await reader.read()  # Body runs to connection close
+            keep_alive = False
+        return status, headers, content, keep_alive
+
+
+_shared_client: Optional[NodeClient] = None
+_shared_client_lock = threading.Lock()
+
+
+def get_node_client() -> NodeClient:
+    """Process-wide NodeClient, created on first use"""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = NodeClient()
+        return _shared_client
@@ -14,10 +14,14 @@ import os
 import time
 import threading
 import socket
-import requests
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from blockchain.utils.node_client import get_node_client
+
+# Candidate addresses probed concurrently per batch during a subnet scan
+SCAN_BATCH_SIZE = 256
+
 class NetworkDiscovery:
     """Handle peer discovery and network configuration"""
     
@@ -84,21 +88,25 @@ class NetworkDiscovery:
             
             print(f"🔍 Scanning subnet {subnet_prefix}.0/24 for blockchain nodes...")
             
-            for ip in network.hosts():
-                ip_str = str(ip)
-                if ip_str == self.node_ip:  # Skip self
-                    continue
-                
-                # Try to connect to potential API ports
-                for port_offset in range(10):  # Check first 10 possible nodes
-                    api_port = port_range[0] + port_offset
-                    if self._check_blockchain_node(ip_str, api_port):
+            # Every host (except self) on the first 10 possible API ports, probed concurrently in batches
+            candidates = [(str(ip), port_offset) for ip in network.hosts() if str(ip) != self.node_ip
+                          for port_offset in range(10)]
+            found_ips = set()
+            client = get_node_client()
+            for start in range(0, len(candidates), SCAN_BATCH_SIZE):
+                batch = candidates[start:start + SCAN_BATCH_SIZE]
+                responses = client.get_many(
+                    [f"http://{ip_str}:{port_range[0] + port_offset}/api/v1/blockchain/" for ip_str, port_offset in batch],
+                    timeout=2.0
+                )
+                for (ip_str, port_offset), response in zip(batch, responses):
+                    if ip_str not in found_ips and self._is_blockchain_response(response):
+                        found_ips.add(ip_str)
                         active_peers.append({
                             'ip': ip_str,
-                            'api_port': api_port,
+                            'api_port': port_range[0] + port_offset,
                             'p2p_port': 10000 + port_offset  # Assume standard port mapping
                         })
-                        break
             
             print(f"✅ Found {len(active_peers)} active blockchain nodes in subnet")
             return active_peers
@@ -110,19 +118,20 @@ class NetworkDiscovery:
     def _check_blockchain_node(self, ip: str, port: int, timeout: float = 2.0) -> bool:
         """Check if there's a blockchain node at given IP:port"""
         try:
-            response = requests.get(
-                f"http://{ip}:{port}/api/v1/blockchain/",
-                timeout=timeout
-            )
-            
-            # Check if response looks like our blockchain API
-            if response.status_code == 200:
+            response = get_node_client().get(f"http://{ip}:{port}/api/v1/blockchain/", timeout=timeout)
+        except Exception:
+            return False
+        return self._is_blockchain_response(response)
+    
+    @staticmethod
+    def _is_blockchain_response(response) -> bool:
+        """Whether a response (or request error) looks like our blockchain API"""
+        try:
+            if getattr(response, 'status_code', None) == 200:
                 data = response.json()
                 return 'blocks' in data or 'blockchain' in data
-        
         except Exception:
             pass
-        
         return False
     
     def _discovery_loop(self):
@@ -147,18 +156,24 @@ class NetworkDiscovery:
                 time.sleep(10)
     
     def _check_configured_peers(self):
-        """Check health of configured peers"""
-        for peer_id, peer_info in self.peers.items():
-            try:
-                api_port = peer_info['ports']['api']
-                if self._check_blockchain_node(peer_info['ip'], api_port, timeout=3.0):
-                    peer_info['last_seen'] = time.time()
-                    peer_info['status'] = 'active'
-                else:
-                    peer_info['status'] = 'inactive'
-            
-            except Exception as e:
+        """Check health of configured peers (all at once)"""
+        peers = list(self.peers.values())
+        try:
+            responses = get_node_client().get_many(
+                [f"http://{peer_info['ip']}:{peer_info['ports']['api']}/api/v1/blockchain/" for peer_info in peers],
+                timeout=3.0
+            )
+        except Exception:
+            for peer_info in peers:
                 peer_info['status'] = 'error'
+            return
+        
+        for peer_info, response in zip(peers, responses):
+            if self._is_blockchain_response(response):
+                peer_info['last_seen'] = time.time()
+                peer_info['status'] = 'active'
+            else:
+                peer_info['status'] = 'inactive'
     
     def _add_discovered_peers(self, discovered_peers: List[Dict]):
         """Add newly discovered peers to peer list"""
@@ -329,15 +344,18 @@ class EnhancedNodeManager:
                 print("⚠️ No active peers found for blockchain sync")
                 return
             
-            # Get blockchain length from peers
+            # Get blockchain length from up to 3 peers, queried concurrently
             peer_chain_info = []
-            for peer in active_peers[:3]:  # Check up to 3 peers
+            peers = active_peers[:3]
+            responses = get_node_client().get_many(
+                [f"http://{peer['ip']}:{peer['ports']['api']}/api/v1/blockchain/" for peer in peers],
+                timeout=5.0
+            )
+            for peer, response in zip(peers, responses):
                 try:
                     api_port = peer['ports']['api']
-                    response = requests.get(
-                        f"http://{peer['ip']}:{api_port}/api/v1/blockchain/",
-                        timeout=5.0
-                    )
+                    if isinstance(response, Exception):
+                        raise response
                     
                     if response.status_code == 200:
                         data = response.json()
@@ -0,0 +1,226 @@
+"""
+Weighted Active Set
+===================
+
+Chooses the peers a node pushes to. Every known peer carries a weight
+derived from its stake and its health, held in a Fenwick tree so that
+changing one peer's weight and drawing a weighted sample both cost
+O(log n) however many peers the cluster has.
+
+Each rotation replaces a fraction of the active set with fresh weighted
+draws, so push paths keep changing (as in Solana) while well-staked,
+healthy peers stay the most likely choices. Peers whose weight drops to
+zero (pruned or unhealthy) leave the set at once.
+"""
+
+import random
+from typing import Dict, List, Optional, Set
+
+WEIGHT_UNITS = 1_000_000  # Weights are integers so tree sums never drift
+
+
+def stake_weight(stake: float) -> float:
+    """Solana-style stake bucket weight: (bucket + 1)^2, bucket = bits of the stake"""
+    bucket = int(max(0.0, stake)).bit_length()
+    return float((bucket + 1) ** 2)
+
+
+def health_score(health_info) -> float:
+    """0..1 multiplier from a peer's HealthInfo; unknown peers count as healthy"""
+    if health_info is None:
+        return 1.0
+    if not health_info.is_healthy:
+        return 0.0
+    uptime = min(1.0, max(0.0, health_info.uptime_percentage / 100.0))
+    return uptime / (1 + health_info.consecutive_failures)
+
+
+class _WeightTree:
+    """Growable Fenwick tree over integer weights"""
+
+    def __init__(self, capacity: int = 64):
+        self.weights = [0] * capacity
+        self.tree = [0] * (capacity + 1)
+
+    @property
+    def capacity(self) -> int:
+        return len(self.weights)
+
+    def grow(self):
+        weights = self.weights + [0] * len(self.weights)
+        self.weights = weights
+        self.tree = [0] * (len(weights) + 1)
+        for i in range(1, len(weights) + 1):
+            self.tree[i] += weights[i - 1]
+            parent = i + (i & -i)
+            if parent <= len(weights):
+                self.tree[parent] += self.tree[i]
+
+    def set(self, index: int, weight: int):
+        delta = weight - self.weights[index]
+        if not delta:
+            return
+        self.weights[index] = weight
+        i = index + 1
+        size = len(self.weights)
+        while i <= size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def total(self) -> int:
+        total = 0
+        i = len(self.weights)
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def find(self, target: int) -> int:
+        """Smallest index whose inclusive prefix sum exceeds target"""
+        position = 0
+        step = 1 << (len(self.weights).bit_length() - 1)
+        while step:
+            next_position = position + step
+            if next_position <= len(self.weights) and self.tree[next_position] <= target:
+                position = next_position
+                target -= self.tree[next_position]
+            step >>= 1
+        return position
+
+
+class ActiveSetManager:
+    """
+    Stake- and health-weighted active push set
+
+    Args:
+        target_size: Peers kept in the active set
+        rotation_fraction: Share of the set replaced on every rotate()
+    """
+
+    def __init__(self, target_size: int = 8, rotation_fraction: float = 0.25, rng: random.Random = None):
+        self.target_size = target_size
+        self.rotation_fraction = rotation_fraction
+        self.rng = rng or random.Random()
+
+        self.tree = _WeightTree()
+        self.slots: Dict[str, int] = {}  # peer -> index in the tree
+        self.peers: List[Optional[str]] = [None] * self.tree.capacity
+        self.free_slots: List[int] = list(range(self.tree.capacity - 1, -1, -1))
+        self.stakes: Dict[str, float] = {}
+        self.health: Dict[str, float] = {}
+
+        # Mutated in place so holders of a reference always see the current set
+        self.active: Set[str] = set()
+
+        self.stats = {
+            'rotations': 0,
+            'peers_rotated_out': 0,
+            'samples': 0
+        }
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def __contains__(self, peer: str) -> bool:
+        return peer in self.slots
+
+    def weight(self, peer: str) -> float:
+        index = self.slots.get(peer)
+        return self.tree.weights[index] / WEIGHT_UNITS if index is not None else 0.0
+
+    def update_peer(self, peer: str, stake: float = None, health: float = None):
+        """Add a peer or change its stake and/or health score"""
+        if stake is not None:
+            self.stakes[peer] = stake
+        if health is not None:
+            self.health[peer] = health
+
+        index = self.slots.get(peer)
+        if index is None:
+            index = self._allocate(peer)
+        units = int(stake_weight(self.stakes.get(peer, 0.0)) * self.health.get(peer, 1.0) * WEIGHT_UNITS)
+        self.tree.set(index, units)
+        if units == 0:
+            self.active.discard(peer)
+
+    def remove_peer(self, peer: str):
+        """Forget a peer entirely (it can no longer be sampled)"""
+        index = self.slots.pop(peer, None)
+        self.stakes.pop(peer, None)
+        self.health.pop(peer, None)
+        self.active.discard(peer)
+        if index is not None:
+            self.tree.set(index, 0)
+            self.peers[index] = None
+            self.free_slots.append(index)
+
+    def _allocate(self, peer: str) -> int:
+        if not self.free_slots:
+            old_capacity = self.tree.capacity
+            self.tree.grow()
+            self.peers.extend([None] * old_capacity)
+            self.free_slots = list(range(self.tree.capacity - 1, old_capacity - 1, -1))
+        index = self.free_slots.pop()
+        self.slots[peer] = index
+        self.peers[index] = peer
+        return index
+
+    def sample(self, count: int, exclude: Set[str] = frozenset()) -> List[str]:
+        """
+        Weighted sample without replacement, O(log n) per draw
+
+        Drawn and excluded peers are zeroed while sampling and restored after.
+        """
+        removed: Dict[int, int] = {}
+        for peer in exclude:
+            index = self.slots.get(peer)
+            if index is not None and self.tree.weights[index]:
+                removed[index] = self.tree.weights[index]
+                self.tree.set(index, 0)
+
+        chosen = []
+        remaining = self.tree.total()
+        while len(chosen) < count and remaining > 0:
+            index = self.tree.find(self.rng.randrange(remaining))
+            chosen.append(self.peers[index])
+            removed[index] = self.tree.weights[index]
+            remaining -= removed[index]
+            self.tree.set(index, 0)
+
+        for index, units in removed.items():
+            self.tree.set(index, units)
+        self.stats['samples'] += len(chosen)
+        return chosen
+
+    def refill(self) -> Set[str]:
+        """Drop members that lost all weight and top the set up to target_size"""
+        # Peers added to the set directly (not tracked here) are left alone
+        for peer in [peer for peer in self.active if peer in self.slots and self.weight(peer) <= 0]:
+            self.active.discard(peer)
+        missing = self.target_size - len(self.active)
+        if missing > 0:
+            self.active.update(self.sample(missing, exclude=self.active))
+        return self.active
+
+    def rotate(self) -> Set[str]:
+        """Swap a fraction of the active set for fresh weighted draws"""
+        if self.active:
+            num_out = max(1, int(len(self.active) * self.rotation_fraction))
+            outgoing = self.rng.sample(sorted(self.active), min(num_out, len(self.active)))
+            # Draw replacements before releasing the outgoing peers so they are not redrawn
+            incoming = self.sample(len(outgoing), exclude=self.active)
+            if incoming:
+                for peer in outgoing[:len(incoming)]:
+                    self.active.discard(peer)
+                self.active.update(incoming)
+                self.stats['peers_rotated_out'] += len(incoming)
+        self.stats['rotations'] += 1
+        return self.refill()
+
+    def get_stats(self) -> Dict:
+        return {
+            'peers': len(self.slots),
+            'active': len(self.active),
+            'total_weight': self.tree.total() / WEIGHT_UNITS,
+            **self.stats
+        }
@@ -4,140 +4,196 @@ Bloom Filter Implementation for Efficient Gossip Protocol Pull Requests
 
 A probabilistic data structure that efficiently represents a set of hashes
 for determining what data a peer is missing.
+
+Bits are packed eight per byte in a bytearray. All k indices of an item
+come from one 128-bit digest via Kirsch-Mitzenmacher double hashing
+(g_i = h1 + i * h2 mod m), so adding an item costs a single hash. When
+NumPy is available, bulk adds and lookups are vectorised over whole hash
+arrays.
+
+Pull requests split the CRDS hash space by prefix into several filters
+(CrdsFilter), each sized for its share of the table, so no single filter
+saturates as the cluster grows.
 """
 
 import hashlib
-from typing import Set, List
 import math
+import struct
+from typing import Iterable, List, Sequence
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+_MAGIC = b'BF'
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct('>2sBIBI')  # magic, version, bit_array_size, num_hash_functions, num_elements_added
+_MASK64 = (1 << 64) - 1
+
+
+def item_digest(item: str) -> bytes:
+    """128-bit digest an item's filter indices are derived from"""
+    return hashlib.blake2b(item.encode(), digest_size=16).digest()
+
 
 class BloomFilter:
     """
     Bloom filter implementation for gossip protocol pull requests
-    
-    A space-efficient probabilistic data structure used to test whether 
+
+    A space-efficient probabilistic data structure used to test whether
     an element is in a set. False positives are possible but false negatives are not.
     """
-    
+
     def __init__(self, expected_elements: int = 10000, false_positive_rate: float = 0.01):
         """
         Initialize bloom filter with optimal size and hash functions
-        
+
         Args:
             expected_elements: Expected number of elements to be added
             false_positive_rate: Desired false positive rate (0.01 = 1%)
         """
-        self.expected_elements = expected_elements
+        self.expected_elements = max(1, expected_elements)
         self.false_positive_rate = false_positive_rate
-        
+
         # Calculate optimal bit array size and number of hash functions
         self.bit_array_size = self._calculate_bit_array_size()
         self.num_hash_functions = self._calculate_num_hash_functions()
-        
-        # Initialize bit array
-        self.bit_array = [False] * self.bit_array_size
+
+        # Initialize packed bit array
+        self.bits = bytearray((self.bit_array_size + 7) // 8)
         self.num_elements_added = 0
-        
+
     def _calculate_bit_array_size(self) -> int:
         """Calculate optimal bit array size"""
         # m = -(n * ln(p)) / (ln(2)^2)
         # where n = expected elements, p = false positive rate
         m = -(self.expected_elements * math.log(self.false_positive_rate)) / (math.log(2) ** 2)
-        return int(m)
-    
+        return max(8, int(m))
+
     def _calculate_num_hash_functions(self) -> int:
         """Calculate optimal number of hash functions"""
         # k = (m / n) * ln(2)
         # where m = bit array size, n = expected elements
         k = (self.bit_array_size / self.expected_elements) * math.log(2)
         return max(1, int(k))
-    
-    def _hash(self, item: str, seed: int) -> int:
-        """Generate hash with seed for multiple hash functions"""
-        hash_input = f"{item}:{seed}".encode()
-        hash_value = hashlib.sha256(hash_input).hexdigest()
-        return int(hash_value[:8], 16) % self.bit_array_size
-    
+
+    def _indices(self, digest: bytes) -> List[int]:
+        """Derive the k bit indices for a digest by double hashing"""
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:16], 'big') | 1  # Odd step never degenerates to h1 alone
+        m = self.bit_array_size
+        return [((h1 + i * h2) & _MASK64) % m for i in range(self.num_hash_functions)]
+
+    def _ensure_writable(self):
+        # Filters parsed from the network wrap the received buffer read-only
+        if not isinstance(self.bits, bytearray):
+            self.bits = bytearray(self.bits)
+
     def add(self, item: str):
         """Add an item to the bloom filter"""
-        for i in range(self.num_hash_functions):
-            index = self._hash(item, i)
-            self.bit_array[index] = True
+        self.add_digest(item_digest(item))
+
+    def add_digest(self, digest: bytes):
+        """Add an item by its precomputed item_digest()"""
+        self._ensure_writable()
+        bits = self.bits
+        for index in self._indices(digest):
+            bits[index >> 3] |= 1 << (index & 7)
         self.num_elements_added += 1
-    
+
     def contains(self, item: str) -> bool:
         """Check if an item might be in the set"""
-        for i in range(self.num_hash_functions):
-            index = self._hash(item, i)
-            if not self.bit_array[index]:
+        return self.contains_digest(item_digest(item))
+
+    def contains_digest(self, digest: bytes) -> bool:
+        bits = self.bits
+        for index in self._indices(digest):
+            if not bits[index >> 3] & (1 << (index & 7)):
                 return False
         return True
-    
-    def add_multiple(self, items: List[str]):
+
+    def add_multiple(self, items: Iterable[str]):
         """Add multiple items to the bloom filter"""
-        for item in items:
-            self.add(item)
-    
+        self.add_digests([item_digest(item) for item in items])
+
+    def add_digests(self, digests: Sequence[bytes]):
+        """Bulk add precomputed digests, vectorised when NumPy is available"""
+        if not digests:
+            return
+        if not NUMPY_AVAILABLE:
+            for digest in digests:
+                self.add_digest(digest)
+            return
+
+        self._ensure_writable()
+        indices = self._vector_indices(digests)
+        marked = np.zeros(self.bit_array_size, dtype=np.bool_)
+        marked[indices.ravel()] = True
+        packed = np.packbits(marked, bitorder='little')
+        view = np.frombuffer(self.bits, dtype=np.uint8)
+        np.bitwise_or(view, packed, out=view)
+        self.num_elements_added += len(digests)
+
+    def contains_multiple(self, items: Sequence[str]) -> List[bool]:
+        """Membership test for many items at once"""
+        return self.contains_digests([item_digest(item) for item in items])
+
+    def contains_digests(self, digests: Sequence[bytes]) -> List[bool]:
+        if not digests:
+            return []
+        if not NUMPY_AVAILABLE:
+            return [self.contains_digest(digest) for digest in digests]
+
+        indices = self._vector_indices(digests)
+        view = np.frombuffer(self.bits, dtype=np.uint8)
+        hits = (view[indices >> 3] >> (indices & 7).astype(np.uint8)) & 1
+        return hits.all(axis=1).tolist()
+
+    def _vector_indices(self, digests: Sequence[bytes]):
+        """(len(digests), k) array of bit indices, matching _indices() exactly"""
+        words = np.frombuffer(b''.join(digests), dtype='>u8').astype(np.uint64).reshape(-1, 2)
+        h1 = words[:, 0:1]
+        h2 = words[:, 1:2] | np.uint64(1)
+        steps = np.arange(self.num_hash_functions, dtype=np.uint64)
+        # uint64 arithmetic wraps mod 2^64, like the & _MASK64 in _indices()
+        return ((h1 + steps * h2) % np.uint64(self.bit_array_size)).astype(np.int64)
+
     def to_bytes(self) -> bytes:
         """Convert bloom filter to bytes for network transmission"""
-        # Pack metadata
-        metadata = {
-            'bit_array_size': self.bit_array_size,
-            'num_hash_functions': self.num_hash_functions,
-            'num_elements_added': self.num_elements_added
-        }
-        
-        # Convert bit array to bytes (pack 8 bits per byte)
-        bit_bytes = bytearray()
-        for i in range(0, len(self.bit_array), 8):
-            byte_value = 0
-            for j in range(8):
-                if i + j < len(self.bit_array) and self.bit_array[i + j]:
-                    byte_value |= (1 << j)
-            bit_bytes.append(byte_value)
-        
-        # Combine metadata and bit array
-        import json
-        metadata_bytes = json.dumps(metadata).encode()
-        metadata_length = len(metadata_bytes).to_bytes(4, 'big')
-        
-        return metadata_length + metadata_bytes + bytes(bit_bytes)
-    
+        header = _HEADER.pack(_MAGIC, _FORMAT_VERSION, self.bit_array_size,
+                              self.num_hash_functions, self.num_elements_added)
+        return b''.join((header, self.bits))
+
     @classmethod
     def from_bytes(cls, data: bytes) -> 'BloomFilter':
-        """Create bloom filter from bytes received over network"""
-        import json
-        
-        # Extract metadata length
-        metadata_length = int.from_bytes(data[:4], 'big')
-        
-        # Extract and parse metadata
-        metadata_bytes = data[4:4 + metadata_length]
-        metadata = json.loads(metadata_bytes.decode())
-        
-        # Create bloom filter with extracted parameters
+        """Create bloom filter from bytes received over network (the bits are not copied)"""
+        magic, version, bit_array_size, num_hash_functions, num_elements_added = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            raise ValueError("Unsupported bloom filter format")
+        if bit_array_size == 0 or num_hash_functions == 0:
+            raise ValueError("Empty bloom filter parameters")
+
+        num_bytes = (bit_array_size + 7) // 8
+        bits = memoryview(data)[_HEADER.size:_HEADER.size + num_bytes]
+        if len(bits) != num_bytes:
+            raise ValueError("Truncated bloom filter")
+
         filter_obj = cls.__new__(cls)
-        filter_obj.bit_array_size = metadata['bit_array_size']
-        filter_obj.num_hash_functions = metadata['num_hash_functions']
-        filter_obj.num_elements_added = metadata['num_elements_added']
-        filter_obj.expected_elements = metadata['num_elements_added']  # Approximation
+        filter_obj.bit_array_size = bit_array_size
+        filter_obj.num_hash_functions = num_hash_functions
+        filter_obj.num_elements_added = num_elements_added
+        filter_obj.expected_elements = max(1, num_elements_added)  # Approximation
         filter_obj.false_positive_rate = 0.01  # Default
-        
-        # Extract bit array
-        bit_bytes = data[4 + metadata_length:]
-        filter_obj.bit_array = [False] * filter_obj.bit_array_size
-        
-        for byte_index, byte_value in enumerate(bit_bytes):
-            for bit_index in range(8):
-                array_index = byte_index * 8 + bit_index
-                if array_index < filter_obj.bit_array_size:
-                    filter_obj.bit_array[array_index] = bool(byte_value & (1 << bit_index))
-        
+        filter_obj.bits = bits
         return filter_obj
-    
+
     def get_stats(self) -> dict:
         """Get bloom filter statistics"""
         current_false_positive_rate = self._estimate_false_positive_rate()
-        
+
         return {
             'bit_array_size': self.bit_array_size,
             'num_hash_functions': self.num_hash_functions,
@@ -145,15 +201,15 @@ class BloomFilter:
             'expected_elements': self.expected_elements,
             'target_false_positive_rate': self.false_positive_rate,
             'estimated_false_positive_rate': current_false_positive_rate,
-            'bits_set': sum(self.bit_array),
-            'memory_usage_bytes': len(self.bit_array) // 8
+            'bits_set': bin(int.from_bytes(self.bits, 'little')).count('1'),
+            'memory_usage_bytes': len(self.bits)
         }
-    
+
     def _estimate_false_positive_rate(self) -> float:
         """Estimate current false positive rate"""
         if self.num_elements_added == 0:
             return 0.0
-        
+
         # (1 - e^(-k*n/m))^k
         # where k = num_hash_functions, n = elements_added, m = bit_array_size
         try:
@@ -162,3 +218,68 @@ class BloomFilter:
             return min(1.0, rate)
         except (OverflowError, ZeroDivisionError):
             return 1.0
+
+
+def hash_prefix(value_hash: str) -> int:
+    """First 64 bits of a hex CRDS value hash, used for pull partitioning"""
+    return int(value_hash[:16], 16)
+
+
+def hash_partition(value_hash: str, mask_bits: int) -> int:
+    """Index of the pull partition a hash falls in for a given mask width"""
+    if mask_bits == 0:
+        return 0
+    return hash_prefix(value_hash) >> (64 - mask_bits)
+
+
+class CrdsFilter:
+    """
+    Bloom filter covering one prefix partition of the CRDS hash space
+
+    A hash belongs to the filter when its top ``mask_bits`` bits equal
+    ``partition``; with mask_bits == 0 the filter covers everything.
+    """
+
+    def __init__(self, mask_bits: int, partition: int, bloom: BloomFilter):
+        self.mask_bits = mask_bits
+        self.partition = partition
+        self.bloom = bloom
+
+    def covers(self, value_hash: str) -> bool:
+        return hash_partition(value_hash, self.mask_bits) == self.partition
+
+
+def _items_per_filter(false_positive_rate: float, max_filter_bytes: int) -> int:
+    """How many items fit in a filter of max_filter_bytes at the given rate"""
+    # Inverse of BloomFilter._calculate_bit_array_size
+    bits = max_filter_bytes * 8
+    return max(1, int(bits * (math.log(2) ** 2) / -math.log(false_positive_rate)))
+
+
+def build_pull_filters(value_hashes: Sequence[str], false_positive_rate: float = 0.01,
+                       max_filter_bytes: int = 4096) -> List[CrdsFilter]:
+    """
+    Partition value hashes by prefix into right-sized pull filters
+
+    The number of partitions is the smallest power of two that keeps every
+    filter within max_filter_bytes at the target false positive rate.
+    """
+    num_items = len(value_hashes)
+    capacity = _items_per_filter(false_positive_rate, max_filter_bytes)
+    mask_bits = 0
+    while num_items > capacity << mask_bits and mask_bits < 32:
+        mask_bits += 1
+
+    num_partitions = 1 << mask_bits
+    buckets: List[List[str]] = [[] for _ in range(num_partitions)]
+    for value_hash in value_hashes:
+        buckets[hash_partition(value_hash, mask_bits)].append(value_hash)
+
+    # Every partition is sized alike; uneven prefixes only nudge the rate
+    expected = max(64, -(-num_items // num_partitions))
+    filters = []
+    for partition, bucket in enumerate(buckets):
+        bloom = BloomFilter(expected_elements=expected, false_positive_rate=false_positive_rate)
+        bloom.add_multiple(bucket)
+        filters.append(CrdsFilter(mask_bits, partition, bloom))
+    return filters
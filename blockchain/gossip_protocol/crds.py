@@ -9,14 +9,22 @@ all known network information including contact info, votes, and leader schedule
 import time
 import hashlib
 import json
-from typing import Dict, List, Optional, Set, Any
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Any, Tuple
 from dataclasses import dataclass, asdict
-from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import ec
 import logging
+from .bloom_filter import hash_prefix
+from .schedule_codec import decode_schedule, schedule_hash
+from .signatures import SignatureVerifier, sign_payload, verify_payload
 
 logger = logging.getLogger(__name__)
 
+CRDS_SHARD_BITS = 12  # Prefix width of the hash index used to answer partitioned pulls
+
+# Values that describe their origin; the public key inside must be the signer's
+ORIGIN_BOUND_TYPES = frozenset({'ContactInfo', 'Vote', 'HealthInfo'})
+
 @dataclass
 class ContactInfo:
     """Basic contact information for a validator"""
@@ -59,6 +67,21 @@ class EpochSlots:
         if not self.signature:
             self.signature = f"epoch_sig_{self.epoch}_{int(self.timestamp)}"
 
+@dataclass
+class EpochScheduleFragment:
+    """One piece of an epoch's compressed leader schedule (see schedule_codec)"""
+    epoch: int
+    fragment_index: int
+    fragment_count: int
+    schedule_hash: str  # sha256 of the whole compressed schedule
+    data: str  # Hex of this fragment's bytes
+    timestamp: float
+    signature: str = ""
+    
+    def __post_init__(self):
+        if not self.signature:
+            self.signature = f"schedule_sig_{self.epoch}_{self.fragment_index}_{int(self.timestamp)}"
+
 @dataclass
 class HealthInfo:
     """Health information for a validator"""
@@ -78,68 +101,58 @@ class HealthInfo:
 class CrdsValue:
     """Base class for all CRDS values with signature verification"""
     
-    def __init__(self, data_type: str, data: Any, public_key: str, wallclock: float = None):
+    def __init__(self, data_type: str, data: Any, public_key: str, wallclock: float = None,
+                 signing_key=None):
         self.data_type = data_type
         self.data = data
         self.public_key = public_key
         self.wallclock = wallclock or time.time()
-        self.signature = self._sign_data()
+        self.signature = self._sign_data(signing_key)
     
-    def _sign_data(self) -> str:
-        """Create a signature for this CRDS value"""
+    def _sign_data(self, signing_key) -> str:
+        """Sign this CRDS value with the origin's private key"""
         payload = self.get_payload()
-        # In production, this would use actual cryptographic signing
-        return hashlib.sha256(f"{payload}_{self.public_key}".encode()).hexdigest()[:32]
+        if signing_key is None:
+            # Unauthenticated digest, only accepted by CRDS tables that do not require signatures
+            return hashlib.sha256(f"{payload}_{self.public_key}".encode()).hexdigest()[:32]
+        return sign_payload(signing_key, payload.encode())
     
     def get_payload(self) -> str:
         """Get the payload for signature verification"""
         return json.dumps({
             'data_type': self.data_type,
             'data': asdict(self.data) if hasattr(self.data, '__dict__') else str(self.data),
+            'public_key': self.public_key,
             'wallclock': self.wallclock
         }, sort_keys=True)
     
     def verify_signature(self) -> bool:
-        """Verify the signature of this CRDS value"""
-        # For gossip protocol, use simplified signature verification
-        # In production, this would use actual cryptographic verification
-        try:
-            expected_signature = hashlib.sha256(f"{self.get_payload()}_{self.public_key}".encode()).hexdigest()[:32]
-            
-            # Accept either the expected signature or any non-empty signature for gossip testing
-            if self.signature == expected_signature:
-                return True
-            
-            # For gossip protocol compatibility, accept any reasonable signature format
-            if self.signature and len(self.signature) >= 8:
-                return True
-                
-            return False
-        except Exception:
-            # If signature verification fails, accept any non-empty signature for gossip
-            return bool(self.signature)
+        """Verify the signature of this CRDS value against its origin's public key"""
+        return verify_payload(self.public_key, self.get_payload().encode(), self.signature)
+    
+    def key_suffix(self) -> str:
+        """Distinguishes values an origin holds several of at once"""
+        if self.data_type == 'EpochScheduleFragment':
+            return f"{self.data.epoch}:{self.data.fragment_index}"
+        return ""
     
     def get_hash(self) -> str:
-        """Get hash for bloom filter identification"""
-        return hashlib.sha256(f"{self.data_type}_{self.public_key}_{self.wallclock}".encode()).hexdigest()
+        """Get hash for bloom filter identification (computed once per value)"""
+        value_hash = self.__dict__.get('_hash')
+        if value_hash is None:
+            identity = f"{self.data_type}_{self.public_key}_{self.wallclock}"
+            suffix = self.key_suffix()
+            if suffix:
+                identity += f"_{suffix}"
+            value_hash = hashlib.sha256(identity.encode()).hexdigest()
+            self._hash = value_hash
+        return value_hash
     
     def to_dict(self) -> Dict:
         """Convert to dictionary for serialization"""
+        # Sent in full: any truncation would invalidate the origin's signature
         data_dict = asdict(self.data) if hasattr(self.data, '__dict__') else self.data
         
-        # Optimize for network transmission - truncate large data
-        if self.data_type == 'EpochSlots' and isinstance(data_dict, dict):
-            if 'slot_leaders' in data_dict and len(data_dict['slot_leaders']) > 5:
-                # Limit to first 5 slots to prevent message size issues
-                limited_slots = dict(list(data_dict['slot_leaders'].items())[:5])
-                data_dict = data_dict.copy()
-                data_dict['slot_leaders'] = limited_slots
-                
-        # Also truncate public keys for network efficiency
-        if 'public_key' in data_dict and isinstance(data_dict['public_key'], str) and len(data_dict['public_key']) > 100:
-            data_dict = data_dict.copy()
-            data_dict['public_key'] = data_dict['public_key'][:50] + "..."  # Truncate long public keys
-        
         return {
             'data_type': self.data_type,
             'data': data_dict,
@@ -169,6 +182,8 @@ class CrdsValue:
                 # Convert string keys back to integers
                 epoch_data['slot_leaders'] = {int(k): v for k, v in epoch_data['slot_leaders'].items()}
             instance.data = EpochSlots(**epoch_data)
+        elif instance.data_type == 'EpochScheduleFragment':
+            instance.data = EpochScheduleFragment(**data['data'])
         elif instance.data_type == 'HealthInfo':
             instance.data = HealthInfo(**data['data'])
         else:
@@ -177,44 +192,105 @@ class CrdsValue:
         return instance
 
 class CRDS:
-    """Contact Info and Replicated Data Store"""
+    """
+    Contact Info and Replicated Data Store
+    
+    Every insert or update is stamped with a monotonically increasing
+    ordinal, so callers can read everything new since a cursor without
+    sorting the table. Values are also indexed by data type, by origin
+    public key and by hash prefix.
     
-    def __init__(self, node_public_key: str):
+    With a signing key, values this node originates are signed and values
+    received from peers must carry a valid signature from their origin.
+    Without one (local test clusters) signatures are not enforced.
+    """
+    
+    def __init__(self, node_public_key: str, signing_key=None, verifier: SignatureVerifier = None):
         self.node_public_key = node_public_key
+        self.signing_key = signing_key
+        self.require_signatures = signing_key is not None
+        self.verifier = verifier or SignatureVerifier()
+        
+        # Keys whose current value was created here on behalf of another
+        # origin; it cannot carry that origin's signature, so it is not gossiped
+        self.local_only_keys: Set[str] = set()
         self.table: Dict[str, CrdsValue] = {}  # key -> CrdsValue
         self.last_updated = time.time()
         
+        # Insertion ordinals: key -> ordinal, and ordinal -> key in ascending order
+        self.ordinal = 0  # Ordinal of the most recent insert
+        self.ordinals: Dict[str, int] = {}
+        self.entries: "OrderedDict[int, str]" = OrderedDict()
+        
+        # Secondary indexes
+        self.by_type: Dict[str, Set[str]] = {}  # data_type -> keys
+        self.by_origin: Dict[str, Set[str]] = {}  # public_key -> keys
+        
+        # Hash-prefix index: shard -> keys whose value hash starts with that prefix
+        self.value_hashes: Dict[str, str] = {}  # key -> hash of the stored value
+        self.shards: List[Set[str]] = [set() for _ in range(1 << CRDS_SHARD_BITS)]
+        
         # Health tracking for pruning
         self.health_tracker: Dict[str, HealthInfo] = {}
         
+        # Decoded leader schedules by schedule hash, most recently used last
+        self.decoded_schedules: "OrderedDict[str, Dict[int, str]]" = OrderedDict()
+        self.max_decoded_schedules = 16
+        
         logger.info(f"CRDS initialized for node {node_public_key[:16]}...")
     
     def _generate_key(self, data_type: str, public_key: str, extra: str = "") -> str:
         """Generate a unique key for CRDS storage"""
         return f"{data_type}:{public_key}{':' + extra if extra else ''}"
     
-    def insert(self, crds_value: CrdsValue) -> bool:
+    def _value_key(self, crds_value: CrdsValue) -> str:
+        return self._generate_key(crds_value.data_type, crds_value.public_key, crds_value.key_suffix())
+    
+    def is_newer(self, crds_value: CrdsValue) -> bool:
+        """Whether a value would replace what we hold (cheap pre-check before verification)"""
+        key = self._value_key(crds_value)
+        existing = self.table.get(key)
+        # A value from its origin always supersedes our unsigned local stand-in
+        return existing is None or existing.wallclock < crds_value.wallclock or key in self.local_only_keys
+    
+    def insert(self, crds_value: CrdsValue, verified: bool = False, local: bool = False) -> bool:
         """
         Insert or update a CRDS value
         
+        Args:
+            crds_value: Value to store
+            verified: The signature was already checked (e.g. by verify_batch)
+            local: The value was created by this node rather than received
+        
         Returns:
             True if inserted/updated, False if rejected (older or invalid)
         """
-        if not crds_value.verify_signature():
-            logger.warning(f"Invalid signature for CRDS value from {crds_value.public_key[:16]}...")
+        if (crds_value.data_type in ORIGIN_BOUND_TYPES
+                and getattr(crds_value.data, 'public_key', None) != crds_value.public_key):
+            logger.warning(f"{crds_value.data_type} for another key from {crds_value.public_key[:16]}... rejected")
             return False
         
-        key = self._generate_key(crds_value.data_type, crds_value.public_key)
+        key = self._value_key(crds_value)
         
-        # Check if we already have this data
-        if key in self.table:
+        # Check if we already have this data; duplicates never reach verification
+        if key in self.table and (local or key not in self.local_only_keys):
             existing = self.table[key]
             if existing.wallclock >= crds_value.wallclock:
                 # Existing data is newer or same age
                 return False
         
+        if self.require_signatures and not (verified or local) and not self.verifier.verify(crds_value):
+            logger.warning(f"Invalid signature for CRDS value from {crds_value.public_key[:16]}...")
+            return False
+        
         # Insert the new/updated value
+        self._unindex(key)
         self.table[key] = crds_value
+        self._index(key, crds_value)
+        if local and self.require_signatures and crds_value.public_key != self.node_public_key:
+            self.local_only_keys.add(key)
+        else:
+            self.local_only_keys.discard(key)
         self.last_updated = time.time()
         
         # Update health tracking for ContactInfo
@@ -224,25 +300,84 @@ class CRDS:
         logger.debug(f"CRDS updated: {crds_value.data_type} from {crds_value.public_key[:16]}...")
         return True
     
+    def _index(self, key: str, crds_value: CrdsValue):
+        self.ordinal += 1
+        self.ordinals[key] = self.ordinal
+        self.entries[self.ordinal] = key
+        
+        self.by_type.setdefault(crds_value.data_type, set()).add(key)
+        self.by_origin.setdefault(crds_value.public_key, set()).add(key)
+        
+        value_hash = crds_value.get_hash()
+        self.value_hashes[key] = value_hash
+        self.shards[hash_prefix(value_hash) >> (64 - CRDS_SHARD_BITS)].add(key)
+    
+    def _unindex(self, key: str):
+        crds_value = self.table.get(key)
+        if crds_value is None:
+            return
+        
+        del self.entries[self.ordinals.pop(key)]
+        self._discard(self.by_type, crds_value.data_type, key)
+        self._discard(self.by_origin, crds_value.public_key, key)
+        
+        value_hash = self.value_hashes.pop(key)
+        self.shards[hash_prefix(value_hash) >> (64 - CRDS_SHARD_BITS)].discard(key)
+    
+    def _remove(self, key: str):
+        self._unindex(key)
+        del self.table[key]
+        self.local_only_keys.discard(key)
+    
+    @staticmethod
+    def _discard(index: Dict[str, Set[str]], index_key: str, key: str):
+        keys = index.get(index_key)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del index[index_key]
+    
+    def _values_of_type(self, data_type: str) -> List[CrdsValue]:
+        return [self.table[key] for key in self.by_type.get(data_type, ())]
+    
+    def is_gossipable(self, crds_value: CrdsValue) -> bool:
+        """Whether a stored value may be pushed or served to peers"""
+        return self._value_key(crds_value) not in self.local_only_keys
+    
+    def _insert_local(self, data_type: str, data: Any, public_key: str, wallclock: float = None) -> bool:
+        """Create, sign (when we are the origin) and insert a value produced by this node"""
+        signing_key = self.signing_key if public_key == self.node_public_key else None
+        crds_value = CrdsValue(data_type, data, public_key, wallclock, signing_key)
+        return self.insert(crds_value, local=True)
+    
     def insert_contact_info(self, contact_info: ContactInfo) -> bool:
         """Insert contact information"""
-        crds_value = CrdsValue('ContactInfo', contact_info, contact_info.public_key, contact_info.wallclock)
-        return self.insert(crds_value)
+        return self._insert_local('ContactInfo', contact_info, contact_info.public_key, contact_info.wallclock)
     
     def insert_vote(self, vote: Vote) -> bool:
         """Insert vote information"""
-        crds_value = CrdsValue('Vote', vote, vote.public_key)
-        return self.insert(crds_value)
+        return self._insert_local('Vote', vote, vote.public_key)
     
     def insert_epoch_slots(self, epoch_slots: EpochSlots) -> bool:
         """Insert epoch slots information"""
-        crds_value = CrdsValue('EpochSlots', epoch_slots, self.node_public_key)
-        return self.insert(crds_value)
+        return self._insert_local('EpochSlots', epoch_slots, self.node_public_key)
+    
+    def insert_schedule_fragments(self, fragments: List[EpochScheduleFragment]) -> int:
+        """Insert this node's fragments of an epoch schedule, dropping leftovers of an older encoding"""
+        inserted = sum(self._insert_local('EpochScheduleFragment', fragment, self.node_public_key)
+                       for fragment in fragments)
+        if fragments:
+            epoch, count = fragments[0].epoch, fragments[0].fragment_count
+            for key in list(self.by_origin.get(self.node_public_key, ())):
+                data = self.table[key].data
+                if (isinstance(data, EpochScheduleFragment) and data.epoch == epoch
+                        and data.fragment_index >= count):
+                    self._remove(key)
+        return inserted
     
     def insert_health_info(self, health_info: HealthInfo) -> bool:
         """Insert health information"""
-        crds_value = CrdsValue('HealthInfo', health_info, health_info.public_key)
-        success = self.insert(crds_value)
+        success = self._insert_local('HealthInfo', health_info, health_info.public_key)
         if success:
             self.health_tracker[health_info.public_key] = health_info
         return success
@@ -282,31 +417,72 @@ class CRDS:
     
     def get_all_contact_info(self) -> List[ContactInfo]:
         """Get all contact information"""
-        contacts = []
-        for key, value in self.table.items():
-            if value.data_type == 'ContactInfo':
-                contacts.append(value.data)
-        return contacts
+        return [value.data for value in self._values_of_type('ContactInfo')]
     
     def get_recent_votes(self, limit: int = 100) -> List[Vote]:
         """Get recent votes"""
-        votes = []
-        for key, value in self.table.items():
-            if value.data_type == 'Vote':
-                votes.append(value.data)
+        votes = [value.data for value in self._values_of_type('Vote')]
         
         # Sort by timestamp (newest first)
         votes.sort(key=lambda v: v.timestamp, reverse=True)
         return votes[:limit]
     
     def get_epoch_slots(self, epoch: int = None) -> List[EpochSlots]:
-        """Get epoch slots information"""
-        epoch_slots = []
-        for key, value in self.table.items():
-            if value.data_type == 'EpochSlots':
-                if epoch is None or value.data.epoch == epoch:
-                    epoch_slots.append(value.data)
-        return epoch_slots
+        """Get epoch slots information, including schedules reassembled from fragments"""
+        epoch_slots = [
+            value.data for value in self._values_of_type('EpochSlots')
+            if epoch is None or value.data.epoch == epoch
+        ]
+        return epoch_slots + self.get_fragmented_schedules(epoch)
+    
+    def get_fragmented_schedules(self, epoch: int = None) -> List[EpochSlots]:
+        """
+        Reassemble every complete set of schedule fragments
+        
+        Fragments are grouped by origin, epoch and schedule hash; a group is
+        complete once all fragment_count pieces are present, and its bytes
+        must hash to the advertised schedule hash before being decoded.
+        """
+        groups: Dict[Tuple[str, int, str], Dict[int, EpochScheduleFragment]] = {}
+        for value in self._values_of_type('EpochScheduleFragment'):
+            fragment = value.data
+            if epoch is not None and fragment.epoch != epoch:
+                continue
+            group_key = (value.public_key, fragment.epoch, fragment.schedule_hash)
+            groups.setdefault(group_key, {})[fragment.fragment_index] = fragment
+        
+        schedules = []
+        for (_, group_epoch, group_hash), fragments in groups.items():
+            count = next(iter(fragments.values())).fragment_count
+            if len(fragments) != count or any(index not in fragments for index in range(count)):
+                continue
+            slot_leaders = self._decode_schedule(group_hash, [fragments[index] for index in range(count)])
+            if slot_leaders is None:
+                continue
+            timestamp = max(fragment.timestamp for fragment in fragments.values())
+            schedules.append(EpochSlots(group_epoch, slot_leaders, timestamp, signature=group_hash))
+        return schedules
+    
+    def _decode_schedule(self, group_hash: str, fragments: List[EpochScheduleFragment]) -> Optional[Dict[int, str]]:
+        slot_leaders = self.decoded_schedules.get(group_hash)
+        if slot_leaders is not None:
+            self.decoded_schedules.move_to_end(group_hash)
+            return slot_leaders
+        
+        try:
+            blob = b''.join(bytes.fromhex(fragment.data) for fragment in fragments)
+            if schedule_hash(blob) != group_hash:
+                logger.warning(f"Leader schedule fragments do not match hash {group_hash[:16]}...")
+                return None
+            slot_leaders = decode_schedule(blob)
+        except (ValueError, zlib.error) as e:
+            logger.warning(f"Undecodable leader schedule {group_hash[:16]}...: {e}")
+            return None
+        
+        self.decoded_schedules[group_hash] = slot_leaders
+        while len(self.decoded_schedules) > self.max_decoded_schedules:
+            self.decoded_schedules.popitem(last=False)
+        return slot_leaders
     
     def get_healthy_nodes(self, max_failures: int = 3, max_age_seconds: int = 300) -> List[str]:
         """Get list of healthy node public keys based on health criteria"""
@@ -344,22 +520,66 @@ class CRDS:
         return unhealthy_nodes
     
     def get_newest_items(self, limit: int = 10) -> List[CrdsValue]:
-        """Get the newest CRDS items for pushing"""
-        items = list(self.table.values())
-        items.sort(key=lambda x: x.wallclock, reverse=True)
-        return items[:limit]
+        """Get the most recently inserted CRDS items, newest first"""
+        items = []
+        for ordinal in reversed(self.entries):
+            if len(items) >= limit:
+                break
+            items.append(self.table[self.entries[ordinal]])
+        return items
+    
+    def get_entries_since(self, cursor: int, limit: int = None) -> List[Tuple[int, CrdsValue]]:
+        """
+        (ordinal, value) pairs inserted after ``cursor``, oldest first
+        
+        Pass the last returned ordinal back as the next cursor. Only new
+        entries are visited.
+        """
+        newer = []
+        for ordinal in reversed(self.entries):
+            if ordinal <= cursor:
+                break
+            newer.append(ordinal)
+        newer.reverse()
+        if limit is not None:
+            newer = newer[:limit]
+        return [(ordinal, self.table[self.entries[ordinal]]) for ordinal in newer]
+    
+    def get_values_by_origin(self, public_key: str) -> List[CrdsValue]:
+        """All values published by one node"""
+        return [self.table[key] for key in self.by_origin.get(public_key, ())]
     
     def get_all_hashes(self) -> Set[str]:
         """Get all CRDS value hashes for bloom filter creation"""
-        return {value.get_hash() for value in self.table.values()}
+        return set(self.value_hashes.values())
+    
+    def get_partition_entries(self, mask_bits: int, partition: int) -> List[Tuple[str, CrdsValue]]:
+        """
+        (hash, value) pairs whose hash falls in a pull filter's partition
+        
+        Only the index shards under the partition's prefix are visited.
+        """
+        if mask_bits <= CRDS_SHARD_BITS:
+            span = CRDS_SHARD_BITS - mask_bits
+            first = partition << span
+            return [
+                (self.value_hashes[key], self.table[key])
+                for shard in range(first, first + (1 << span))
+                for key in self.shards[shard]
+            ]
+        
+        # Partition is narrower than a shard; filter the shard's keys by the full mask
+        shift = 64 - mask_bits
+        entries = []
+        for key in self.shards[partition >> (mask_bits - CRDS_SHARD_BITS)]:
+            value_hash = self.value_hashes[key]
+            if hash_prefix(value_hash) >> shift == partition:
+                entries.append((value_hash, self.table[key]))
+        return entries
     
     def get_missing_items(self, known_hashes: Set[str]) -> List[CrdsValue]:
         """Get items that are not in the provided hash set"""
-        missing = []
-        for value in self.table.values():
-            if value.get_hash() not in known_hashes:
-                missing.append(value)
-        return missing
+        return [self.table[key] for key, value_hash in self.value_hashes.items() if value_hash not in known_hashes]
     
     def cleanup_old_entries(self, max_age_seconds: int = 3600):
         """Remove old entries from CRDS table"""
@@ -372,7 +592,7 @@ class CRDS:
                 keys_to_remove.append(key)
         
         for key in keys_to_remove:
-            del self.table[key]
+            self._remove(key)
             logger.debug(f"Removed old CRDS entry: {key}")
         
         if keys_to_remove:
@@ -384,25 +604,18 @@ class CRDS:
     
     def get_stats(self) -> Dict:
         """Get CRDS statistics"""
-        stats = {
+        def count(data_type: str) -> int:
+            return len(self.by_type.get(data_type, ()))
+        
+        return {
             'total_entries': len(self.table),
-            'contact_info_count': 0,
-            'vote_count': 0,
-            'epoch_slots_count': 0,
-            'health_info_count': 0,
+            'contact_info_count': count('ContactInfo'),
+            'vote_count': count('Vote'),
+            'epoch_slots_count': count('EpochSlots'),
+            'schedule_fragment_count': count('EpochScheduleFragment'),
+            'health_info_count': count('HealthInfo'),
             'healthy_nodes': len(self.get_healthy_nodes()),
             'unhealthy_nodes': len(self.get_unhealthy_nodes()),
-            'last_updated': self.last_updated
+            'last_updated': self.last_updated,
+            'ordinal': self.ordinal
         }
-        
-        for value in self.table.values():
-            if value.data_type == 'ContactInfo':
-                stats['contact_info_count'] += 1
-            elif value.data_type == 'Vote':
-                stats['vote_count'] += 1
-            elif value.data_type == 'EpochSlots':
-                stats['epoch_slots_count'] += 1
-            elif value.data_type == 'HealthInfo':
-                stats['health_info_count'] += 1
-        
-        return stats
@@ -10,12 +10,20 @@ import asyncio
 import json
 import time
 import random
-import socket
 import logging
 from typing import Dict, List, Set, Optional, Tuple, Any
 from dataclasses import dataclass
-from .crds import CRDS, ContactInfo, Vote, EpochSlots, HealthInfo, CrdsValue
-from .bloom_filter import BloomFilter
+from .crds import CRDS, ContactInfo, Vote, HealthInfo, CrdsValue, EpochScheduleFragment
+from .bloom_filter import CrdsFilter, build_pull_filters
+from .received_cache import ReceivedCache
+from .active_set import ActiveSetManager, health_score
+from .vote_tally import VoteTally
+from .schedule_codec import encode_schedule, fragment_blob, schedule_hash
+from .transport import GossipTransport
+from .wire import (
+    ChunkAssembler, chunk_frame, decode_message, encode_crds_value, encode_message,
+    frame_type, is_wire_frame, MSG_CHUNK
+)
 from .messages import (
     PushMessage, PullRequest, PullResponse, PruneMessage,
     GossipMessageFactory, MessageValidator
@@ -31,10 +39,29 @@ class GossipConfig:
     pull_interval_ms: int = 2000  # Pull every 2 seconds
     prune_interval_ms: int = 30000  # Prune every 30 seconds
     max_active_peers: int = 200
+    active_set_size: int = 8  # Peers in the weighted active push set
+    active_set_rotation_fraction: float = 0.25  # Share of the active set replaced per rotation
+    active_set_rotation_interval_ms: int = 7500  # Rotate the active set every 7.5 seconds
     max_failures_before_prune: int = 3
     peer_timeout_seconds: int = 300  # 5 minutes
     bloom_filter_size: int = 10000
     bloom_filter_false_positive_rate: float = 0.01
+    max_datagram_bytes: int = 1232  # Larger encoded messages are sent as chunks
+    pull_filter_max_bytes: int = 1024  # Each pull partition's filter stays under this
+    pull_response_max_bytes: int = 1232  # Encoded size per pull response message, envelope included
+    pull_response_max_messages: int = 16  # Response messages sent per pull request
+    push_max_values: int = 256  # New values considered per peer per push round
+    push_max_bytes: int = 1232  # Encoded size per push message, envelope included
+    push_max_messages: int = 16  # Push messages sent per peer per round
+    prune_min_ingress_nodes: int = 2  # Peers kept pushing each origin to us
+    prune_min_upserts: int = 20  # New values from an origin before its pushers are ranked
+    origin_prune_ttl_seconds: float = 60.0  # How long an origin prune from a peer is honoured
+    send_queue_size: int = 4096  # Outbound frames queued before sends are dropped
+    recv_queue_size: int = 4096  # Inbound datagrams queued before receives are dropped
+    peer_send_rate: float = 2000.0  # Frames per second to one peer (0 = unlimited)
+    peer_recv_rate: float = 2000.0  # Datagrams per second from one peer (0 = unlimited)
+    peer_burst: float = 500.0  # Token bucket size for the per-peer rate limits
+    schedule_fragment_bytes: int = 704  # Compressed schedule bytes per fragment; a fragment plus envelope fits a datagram
 
 class GossipNode:
     """
@@ -44,7 +71,8 @@ class GossipNode:
     """
     
     def __init__(self, public_key: str, ip_address: str, gossip_port: int, 
-                 tpu_port: int, tvu_port: int, config: GossipConfig = None):
+                 tpu_port: int, tvu_port: int, config: GossipConfig = None, signing_key=None,
+                 vote_tally: VoteTally = None):
         self.public_key = public_key
         self.ip_address = ip_address
         self.gossip_port = gossip_port
@@ -52,27 +80,48 @@ class GossipNode:
         self.tvu_port = tvu_port
         self.config = config or GossipConfig()
         
-        # Initialize CRDS
-        self.crds = CRDS(public_key)
+        # Initialize CRDS; with a signing key our values are signed and peers' values verified
+        self.crds = CRDS(public_key, signing_key)
+        self.vote_tally = vote_tally or VoteTally()  # Stake-weighted tallies of every vote seen
         
         # Peer management
         self.known_peers: Dict[str, ContactInfo] = {}
-        self.active_gossip_set: Set[str] = set()  # Active peers for pushing
+        # Active peers for pushing, sampled by stake and health
+        self.active_set = ActiveSetManager(
+            min(self.config.active_set_size, self.config.max_active_peers),
+            self.config.active_set_rotation_fraction
+        )
+        self.active_gossip_set: Set[str] = self.active_set.active
         self.pruned_peers: Set[str] = set()  # Peers we've pruned
+        self.push_cursors: Dict[str, int] = {}  # Peer -> last CRDS ordinal pushed to it
+        
+        # Origin-specific prunes: who delivers each origin to us first, and
+        # which origins each peer asked us not to push to it (origin -> expiry)
+        self.received_cache = ReceivedCache(self.config.prune_min_ingress_nodes, self.config.prune_min_upserts)
+        self.origin_prunes: Dict[str, Dict[str, float]] = {}
+        
+        self.published_schedules: Dict[int, str] = {}  # Epoch -> hash of the schedule we published
+        
+        # Reassembly of messages that arrive split across datagrams
+        self.chunk_assembler = ChunkAssembler()
         
         # Network state
-        self.socket: Optional[socket.socket] = None
+        self.transport: Optional[GossipTransport] = None
         self.running = False
+        self._tasks: List[asyncio.Task] = []
         
         # Metrics
         self.stats = {
             'messages_sent': 0,
+            'messages_dropped': 0,
             'messages_received': 0,
             'push_messages_sent': 0,
             'pull_requests_sent': 0,
             'pull_responses_sent': 0,
             'prune_messages_sent': 0,
             'peers_pruned': 0,
+            'origin_prunes_sent': 0,
+            'origin_prunes_received': 0,
             'crds_updates': 0
         }
         
@@ -104,40 +153,67 @@ class GossipNode:
         if self.running:
             return
         
-        # Create UDP socket
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.socket.bind((self.ip_address, self.gossip_port))
-        self.socket.setblocking(False)
+        # Bind the UDP endpoint
+        self.transport = GossipTransport(
+            send_queue_size=self.config.send_queue_size,
+            recv_queue_size=self.config.recv_queue_size,
+            peer_send_rate=self.config.peer_send_rate,
+            peer_recv_rate=self.config.peer_recv_rate,
+            peer_burst=self.config.peer_burst,
+            on_send_error=self._on_send_error
+        )
+        await self.transport.open(self.ip_address, self.gossip_port)
         
         self.running = True
         logger.info(f"Gossip node started on {self.ip_address}:{self.gossip_port}")
         
-        # Start gossip tasks
-        await asyncio.gather(
-            self._gossip_loop(),
-            self._message_handler(),
-            self._maintenance_loop()
-        )
+        # Start gossip tasks; they run until stop() cancels them
+        self._tasks = [
+            asyncio.create_task(self._gossip_loop()),
+            asyncio.create_task(self._message_handler()),
+            asyncio.create_task(self._maintenance_loop())
+        ]
+        try:
+            await asyncio.gather(*self._tasks)
+        except asyncio.CancelledError:
+            if self.running:
+                raise
+        finally:
+            self.running = False
+            self._close_transport()
     
     async def stop(self):
         """Stop the gossip protocol node"""
         self.running = False
-        if self.socket:
-            self.socket.close()
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        self._close_transport()
         logger.info("Gossip node stopped")
     
+    def _close_transport(self):
+        if self.transport:
+            self.transport.close()
+    
     async def _gossip_loop(self):
         """Main gossip loop - push and pull operations"""
         last_push = 0
         last_pull = 0
+        last_rotation = time.time() * 1000
         
         while self.running:
             current_time = time.time() * 1000  # milliseconds
             
+            # Rotate part of the active set so push paths keep changing
+            if current_time - last_rotation >= self.config.active_set_rotation_interval_ms:
+                self.active_set.rotate()
+                last_rotation = current_time
+            
+            # Rounds only queue their messages, so neither waits on slow peers
             # PUSH phase
             if current_time - last_push >= self.config.push_interval_ms:
                 await self._perform_push()
+                await self._send_origin_prunes()
                 last_push = current_time
             
             # PULL phase  
@@ -145,77 +221,123 @@ class GossipNode:
                 await self._perform_pull()
                 last_pull = current_time
             
-            await asyncio.sleep(0.1)  # Small delay to prevent busy waiting
+            # Sleep until the next round is due
+            next_round = min(last_push + self.config.push_interval_ms, last_pull + self.config.pull_interval_ms)
+            await asyncio.sleep(max(0.0, next_round - time.time() * 1000) / 1000)
     
     async def _perform_push(self):
-        """Push newest CRDS data to active peers"""
+        """Push every CRDS value inserted since each peer's cursor"""
         if not self.active_gossip_set:
             self._update_active_gossip_set()
         
         if not self.active_gossip_set:
             return  # No peers to push to
         
-        # Get newest CRDS items (limit to prevent message size issues)
-        newest_items = self.crds.get_newest_items(1)  # Reduced to 1 item to prevent UDP size issues
-        if not newest_items:
-            return
-        
         # Select random peers to push to (up to fanout limit)
         push_targets = random.sample(
             list(self.active_gossip_set), 
             min(self.config.push_fanout, len(self.active_gossip_set))
         )
         
-        # Create and send push messages
-        push_message = GossipMessageFactory.create_push_message(self.public_key, newest_items)
-        
+        pushed_values = 0
         for target_key in push_targets:
             target_info = self.known_peers.get(target_key)
-            if target_info and target_key not in self.pruned_peers:
-                await self._send_message(target_info, push_message)
+            if not target_info or target_key in self.pruned_peers:
+                continue
+            
+            entries = self.crds.get_entries_since(self.push_cursors.get(target_key, 0), self.config.push_max_values)
+            if not entries:
+                continue
+            last_ordinal = entries[-1][0]
+            pruned_origins = self._pruned_origins(target_key)
+            entries = [
+                (ordinal, crds_value) for ordinal, crds_value in entries
+                if self.crds.is_gossipable(crds_value) and crds_value.public_key not in pruned_origins
+            ]
+            
+            batches, consumed = self._batch_by_bytes(
+                [crds_value for _, crds_value in entries],
+                self.config.push_max_bytes, self.config.push_max_messages,
+                envelope_bytes=self._envelope_bytes(GossipMessageFactory.create_push_message(self.public_key, []))
+            )
+            sent = 0
+            for batch in batches:
+                push_message = GossipMessageFactory.create_push_message(self.public_key, batch)
+                if not self._send_message(target_info, push_message):
+                    consumed = sent  # Retry the dropped values next round
+                    break
                 self.stats['push_messages_sent'] += 1
+                pushed_values += len(batch)
+                sent += len(batch)
+            
+            # Anything not consumed this round is picked up from here next round
+            self.push_cursors[target_key] = entries[consumed][0] - 1 if consumed < len(entries) else last_ordinal
         
-        logger.debug(f"Pushed {len(newest_items)} items to {len(push_targets)} peers")
+        if pushed_values:
+            logger.debug(f"Pushed {pushed_values} items to {len(push_targets)} peers")
+    
+    def _pruned_origins(self, peer_key: str) -> Set[str]:
+        """Origins ``peer_key`` asked us not to push to it, dropping expired prunes"""
+        prunes = self.origin_prunes.get(peer_key)
+        if not prunes:
+            return set()
+        now = time.time()
+        for origin in [origin for origin, expiry in prunes.items() if expiry <= now]:
+            del prunes[origin]
+        return set(prunes)
+    
+    async def _send_origin_prunes(self):
+        """Ask peers that only deliver duplicates of an origin to stop pushing it to us"""
+        for peer_key, origins in self.received_cache.take_prunes().items():
+            peer_info = self.known_peers.get(peer_key)
+            if not peer_info or peer_key == self.public_key:
+                continue
+            prune_message = GossipMessageFactory.create_prune_message(
+                self.public_key, peer_key, "redundant", origins
+            )
+            if self._send_message(peer_info, prune_message):
+                self.stats['origin_prunes_sent'] += 1
+            logger.debug(f"Pruned {len(origins)} origins from {peer_key[:16]}...")
     
     async def _perform_pull(self):
-        """Pull missing data from a random peer"""
+        """Pull missing data, sending each hash-prefix partition's filter to a random peer"""
         available_peers = [key for key in self.known_peers.keys() 
                           if key != self.public_key and key not in self.pruned_peers]
         
         if not available_peers:
             return
         
-        # Select random peer to pull from
-        target_key = random.choice(available_peers)
-        target_info = self.known_peers[target_key]
-        
-        # Create bloom filter of our current CRDS
-        bloom_filter = BloomFilter(
-            expected_elements=500,  # Reduced from config value
-            false_positive_rate=0.05  # Slightly higher rate for smaller size
-        )
-        
-        # Add all our CRDS hashes to bloom filter
-        all_hashes = self.crds.get_all_hashes()
-        bloom_filter.add_multiple(list(all_hashes))
+        # Partitioned bloom filters of our current CRDS
+        pull_filters = self._build_pull_filters(self.config.bloom_filter_false_positive_rate)
         
-        # Create and send pull request
-        pull_request = GossipMessageFactory.create_pull_request(self.public_key, bloom_filter)
-        await self._send_message(target_info, pull_request)
-        self.stats['pull_requests_sent'] += 1
+        for crds_filter in pull_filters:
+            target_key = random.choice(available_peers)
+            await self._send_pull_request(self.known_peers[target_key], crds_filter)
         
-        logger.debug(f"Sent pull request to {target_key[:16]}... (bloom filter: {len(all_hashes)} items)")
+        logger.debug(f"Sent {len(pull_filters)} pull requests (mask bits: {pull_filters[0].mask_bits})")
+    
+    def _build_pull_filters(self, false_positive_rate: float) -> List[CrdsFilter]:
+        """Prefix-partitioned bloom filters over every CRDS hash we hold"""
+        return build_pull_filters(
+            list(self.crds.get_all_hashes()),
+            false_positive_rate=false_positive_rate,
+            max_filter_bytes=self.config.pull_filter_max_bytes
+        )
+    
+    async def _send_pull_request(self, target_info: ContactInfo, crds_filter: CrdsFilter):
+        pull_request = GossipMessageFactory.create_pull_request(
+            self.public_key, crds_filter.bloom, crds_filter.mask_bits, crds_filter.partition
+        )
+        if self._send_message(target_info, pull_request):
+            self.stats['pull_requests_sent'] += 1
     
     async def _message_handler(self):
         """Handle incoming gossip messages"""
         while self.running:
+            data, addr = await self.transport.recv()
             try:
-                # Receive message
-                data, addr = await asyncio.get_event_loop().sock_recvfrom(self.socket, 65536)
-                message_dict = json.loads(data.decode())
-                
                 # Parse message
-                message = GossipMessageFactory.parse_message(message_dict)
+                message = self._decode_datagram(data, addr)
                 if not message:
                     continue
                 
@@ -231,11 +353,24 @@ class GossipNode:
                 
                 self.stats['messages_received'] += 1
                 
-            except asyncio.CancelledError:
-                break
             except Exception as e:
-                logger.warning(f"Error handling message: {e}")
-                await asyncio.sleep(0.1)
+                # One bad message must not stop the handler; the next datagram is already queued
+                logger.warning(f"Error handling message from {addr}: {e}")
+    
+    def _decode_datagram(self, data: bytes, addr: Tuple[str, int]) -> Optional[Any]:
+        """Decode one datagram; chunks yield a message only once it is complete"""
+        if not is_wire_frame(data):
+            # JSON messages from nodes that predate the binary format
+            return GossipMessageFactory.parse_message(json.loads(data.decode()))
+        try:
+            if frame_type(data) == MSG_CHUNK:
+                data = self.chunk_assembler.add(data, addr)
+                if data is None:
+                    return None
+            return decode_message(data)
+        except (ValueError, TypeError) as e:  # WireError, bad text or a field mismatch
+            logger.debug(f"Dropped malformed gossip frame from {addr}: {e}")
+            return None
     
     async def _handle_push_message(self, message: PushMessage, addr: Tuple[str, int]):
         """Handle received push message"""
@@ -246,21 +381,48 @@ class GossipNode:
         # Update health info for sender
         self._update_peer_health(message.sender_public_key, True, 0.0)
         
-        # Insert CRDS values
-        crds_values = message.get_crds_values()
-        updates_count = 0
+        # Insert CRDS values, scoring the sender as a source of each origin
+        updates_count = self._insert_received(message.get_crds_values(), push_source=message.sender_public_key)
         
+        if updates_count > 0:
+            self.stats['crds_updates'] += updates_count
+            logger.debug(f"Push message: {updates_count} new/updated items from {message.sender_public_key[:16]}...")
+    
+    def _insert_received(self, crds_values: List[CrdsValue], push_source: str = None) -> int:
+        """
+        Insert the values of one incoming message, returning how many were new
+        
+        Values we already hold at the same or a newer wallclock are dropped
+        first, and the rest are signature-checked as one batch. For pushes,
+        ``push_source`` is credited with first deliveries and duplicates.
+        """
+        fresh_values = []
         for crds_value in crds_values:
-            if self.crds.insert(crds_value):
+            if self.crds.is_newer(crds_value):
+                fresh_values.append(crds_value)
+            elif push_source:
+                self.received_cache.record(crds_value.public_key, push_source, duplicate=True)
+        
+        if self.crds.require_signatures and fresh_values:
+            valid = self.crds.verifier.verify_batch(fresh_values)
+            fresh_values = [crds_value for crds_value, ok in zip(fresh_values, valid) if ok]
+        
+        updates_count = 0
+        for crds_value in fresh_values:
+            if self.crds.insert(crds_value, verified=True):
                 updates_count += 1
+                if push_source:
+                    self.received_cache.record(crds_value.public_key, push_source, duplicate=False)
                 
                 # If this is contact info, add to known peers
                 if crds_value.data_type == 'ContactInfo':
                     self.known_peers[crds_value.public_key] = crds_value.data
-        
-        if updates_count > 0:
-            self.stats['crds_updates'] += updates_count
-            logger.debug(f"Push message: {updates_count} new/updated items from {message.sender_public_key[:16]}...")
+                    self._track_peer(crds_value.public_key)
+                elif crds_value.data_type == 'Vote':
+                    # Counted under the signed origin, which CRDS checked matches the vote
+                    vote = crds_value.data
+                    self.vote_tally.add_vote(crds_value.public_key, vote.slot, vote.block_hash)
+        return updates_count
     
     async def _handle_pull_request(self, message: PullRequest, addr: Tuple[str, int]):
         """Handle received pull request"""
@@ -271,33 +433,67 @@ class GossipNode:
         # Update health info for sender
         self._update_peer_health(message.sender_public_key, True, 0.0)
         
-        # Get bloom filter and find missing items
+        # Only values in the request's partition are candidates; test them in one bulk call
         bloom_filter = message.get_bloom_filter()
-        known_hashes = set()
-        
-        # Reconstruct the set of hashes the requester has
-        for crds_value in self.crds.table.values():
-            if bloom_filter.contains(crds_value.get_hash()):
-                known_hashes.add(crds_value.get_hash())
-        
-        # Find items we have that the requester doesn't (limit response size)
-        missing_items = self.crds.get_missing_items(known_hashes)[:3]  # Limit to 3 items
-        
-        # Create and send pull response
+        entries = self.crds.get_partition_entries(message.mask_bits, message.partition)
+        present = bloom_filter.contains_multiple([value_hash for value_hash, _ in entries])
+        missing_items = [
+            crds_value for (_, crds_value), known in zip(entries, present)
+            if not known and self.crds.is_gossipable(crds_value)
+        ]
+        
+        # Create and send pull responses
         if missing_items:
             sender_info = self.known_peers.get(self.public_key)
-            if sender_info:
-                pull_response = GossipMessageFactory.create_pull_response(
-                    self.public_key, message.sender_public_key, missing_items, message.message_id
+            requester_info = self.known_peers.get(message.sender_public_key)
+            if sender_info and requester_info:
+                envelope = GossipMessageFactory.create_pull_response(
+                    self.public_key, message.sender_public_key, [], message.message_id
                 )
-                
-                # Send to requester
-                requester_info = self.known_peers.get(message.sender_public_key)
-                if requester_info:
-                    await self._send_message(requester_info, pull_response)
+                batches, _ = self._batch_by_bytes(
+                    missing_items, self.config.pull_response_max_bytes, self.config.pull_response_max_messages,
+                    envelope_bytes=self._envelope_bytes(envelope)
+                )
+                for batch in batches:
+                    pull_response = GossipMessageFactory.create_pull_response(
+                        self.public_key, message.sender_public_key, batch, message.message_id
+                    )
+                    if not self._send_message(requester_info, pull_response):
+                        break  # Queue full or requester rate limited; it will pull again
                     self.stats['pull_responses_sent'] += 1
                     
-                    logger.debug(f"Sent pull response: {len(missing_items)} items to {message.sender_public_key[:16]}...")
+                    logger.debug(f"Sent pull response: {len(batch)} items to {message.sender_public_key[:16]}...")
+    
+    @staticmethod
+    def _envelope_bytes(empty_message: Any) -> int:
+        """Encoded size of a message carrying no CRDS values"""
+        return len(encode_message(empty_message))
+    
+    def _batch_by_bytes(self, crds_values: List[CrdsValue], max_bytes: int,
+                        max_messages: int, envelope_bytes: int = 0) -> Tuple[List[List[CrdsValue]], int]:
+        """
+        Pack values into as few messages as fit the datagram budget
+        
+        Each message holds as many values as fit in ``max_bytes`` including
+        the message envelope. A value too large for any datagram gets a
+        message of its own, which is chunked on send. Returns the batches and
+        how many leading values were consumed.
+        """
+        budget = max_bytes - envelope_bytes - 2  # Room for the value count varint
+        batches = []
+        batch, batch_bytes = [], 0
+        for consumed, crds_value in enumerate(crds_values):
+            value_bytes = len(encode_crds_value(crds_value))
+            if batch and batch_bytes + value_bytes > budget:
+                batches.append(batch)
+                if len(batches) >= max_messages:
+                    return batches, consumed
+                batch, batch_bytes = [], 0
+            batch.append(crds_value)
+            batch_bytes += value_bytes
+        if batch:
+            batches.append(batch)
+        return batches, len(crds_values)
     
     async def _handle_pull_response(self, message: PullResponse, addr: Tuple[str, int]):
         """Handle received pull response"""
@@ -309,16 +505,7 @@ class GossipNode:
         self._update_peer_health(message.sender_public_key, True, 0.0)
         
         # Insert received CRDS values
-        crds_values = message.get_crds_values()
-        updates_count = 0
-        
-        for crds_value in crds_values:
-            if self.crds.insert(crds_value):
-                updates_count += 1
-                
-                # If this is contact info, add to known peers
-                if crds_value.data_type == 'ContactInfo':
-                    self.known_peers[crds_value.public_key] = crds_value.data
+        updates_count = self._insert_received(message.get_crds_values())
         
         if updates_count > 0:
             self.stats['crds_updates'] += updates_count
@@ -329,7 +516,18 @@ class GossipNode:
         if not MessageValidator.validate_prune_message(message):
             return
         
-        if message.target_public_key == self.public_key:
+        if message.target_public_key != self.public_key:
+            return
+        
+        if message.origins:
+            # Stop pushing these origins to the sender; it gets them faster elsewhere
+            expiry = time.time() + self.config.origin_prune_ttl_seconds
+            prunes = self.origin_prunes.setdefault(message.sender_public_key, {})
+            for origin in message.origins:
+                prunes[origin] = expiry
+            self.stats['origin_prunes_received'] += 1
+            logger.debug(f"{message.sender_public_key[:16]}... pruned {len(message.origins)} origins")
+        else:
             # We've been pruned by the sender
             self.active_gossip_set.discard(message.sender_public_key)
             logger.info(f"Pruned by {message.sender_public_key[:16]}... (reason: {message.reason})")
@@ -368,6 +566,7 @@ class GossipNode:
             if peer_key in self.active_gossip_set:
                 self.active_gossip_set.discard(peer_key)
                 self.pruned_peers.add(peer_key)
+                self.active_set.remove_peer(peer_key)
                 
                 # Send prune message
                 peer_info = self.known_peers.get(peer_key)
@@ -375,10 +574,13 @@ class GossipNode:
                     prune_message = GossipMessageFactory.create_prune_message(
                         self.public_key, peer_key, "unhealthy"
                     )
-                    await self._send_message(peer_info, prune_message)
-                    self.stats['prune_messages_sent'] += 1
+                    if self._send_message(peer_info, prune_message):
+                        self.stats['prune_messages_sent'] += 1
                 
                 pruned_count += 1
+            elif peer_key in self.active_set:
+                # Not pushed to right now; just make sure it is not sampled
+                self.active_set.update_peer(peer_key, health=0.0)
         
         if pruned_count > 0:
             self.stats['peers_pruned'] += pruned_count
@@ -405,68 +607,41 @@ class GossipNode:
         healing_targets = min(3, len(available_peers))
         if healing_targets > 0:
             targets = random.sample(available_peers, healing_targets)
+            pull_filters = self._build_pull_filters(false_positive_rate=0.1)
             for target_key in targets:
                 target_info = self.known_peers[target_key]
                 
-                # Create bloom filter and send pull request
-                bloom_filter = BloomFilter(expected_elements=100, false_positive_rate=0.1)
-                all_hashes = self.crds.get_all_hashes()
-                bloom_filter.add_multiple(list(all_hashes))
-                
-                pull_request = GossipMessageFactory.create_pull_request(
-                    self.public_key, bloom_filter
-                )
-                
-                await self._send_message(target_info, pull_request)
-                self.stats['pull_requests_sent'] += 1
+                # Send every partition so each target can fill any gap
+                for crds_filter in pull_filters:
+                    await self._send_pull_request(target_info, crds_filter)
             
             logger.info(f"Network healing: Sent pull requests to {healing_targets} peers")
     
     def _update_active_gossip_set(self):
-        """Update the active gossip set with healthy peers and ensure network resilience"""
-        healthy_peers = self.crds.get_healthy_nodes()
-        
-        # Remove ourselves
-        healthy_peers = [peer for peer in healthy_peers if peer != self.public_key]
-        
-        # Remove already pruned peers
-        healthy_peers = [peer for peer in healthy_peers if peer not in self.pruned_peers]
-        
-        # NETWORK RESILIENCE IMPROVEMENT:
-        # If we don't have enough healthy peers in CRDS, expand from known_peers
-        min_target_peers = min(8, len(self.known_peers) - 1)  # Increased target to 8 peers
-        
-        if len(healthy_peers) < min_target_peers:
-            # Add healthy peers from known_peers that aren't in pruned set
-            additional_peers = []
-            for peer_key, peer_info in self.known_peers.items():
-                if (peer_key != self.public_key and 
-                    peer_key not in self.pruned_peers and 
-                    peer_key not in healthy_peers):
-                    
-                    # Check if this peer has recent activity or no health record (assume healthy)
-                    health_info = self.crds.get_health_info(peer_key)
-                    if health_info is None or health_info.is_healthy:
-                        additional_peers.append(peer_key)
-            
-            # Add additional peers to maintain connectivity
-            needed_peers = min_target_peers - len(healthy_peers)
-            healthy_peers.extend(additional_peers[:needed_peers])
-            logger.info(f"Network healing: Added {len(additional_peers[:needed_peers])} additional peers for resilience")
+        """Refill the active gossip set by stake- and health-weighted sampling"""
+        self.active_set.refill()
         
-        # Update active set (ensure robust connectivity)
-        target_size = min(max(min_target_peers, 4), self.config.max_active_peers)  # At least 4 peers
-        self.active_gossip_set = set(healthy_peers[:target_size])
-        
-        # Force inclusion of some healthy peers even if not in CRDS health records
+        # Force inclusion of some peers even if none has a positive weight
         if len(self.active_gossip_set) < 3 and len(self.known_peers) > 1:
             backup_peers = [key for key in self.known_peers.keys() 
-                           if key != self.public_key and key not in self.pruned_peers]
-            for peer in backup_peers[:3]:
+                           if key != self.public_key and key not in self.pruned_peers
+                           and key not in self.active_gossip_set]
+            for peer in backup_peers[:3 - len(self.active_gossip_set)]:
                 self.active_gossip_set.add(peer)
             logger.info(f"Emergency connectivity: Added {min(3, len(backup_peers))} backup peers")
         
-        logger.debug(f"Active gossip set updated: {len(self.active_gossip_set)} peers (target: {target_size})")
+        logger.debug(f"Active gossip set updated: {len(self.active_gossip_set)} peers (target: {self.active_set.target_size})")
+    
+    def _track_peer(self, public_key: str):
+        """Make a known peer eligible for the active set, weighted by its current health"""
+        if public_key == self.public_key or public_key in self.pruned_peers:
+            return
+        self.active_set.update_peer(public_key, health=health_score(self.crds.get_health_info(public_key)))
+    
+    def set_peer_stake(self, public_key: str, stake: float):
+        """Stake of a peer, used to weight active set sampling"""
+        if public_key != self.public_key:
+            self.active_set.update_peer(public_key, stake=stake)
     
     def _update_peer_health(self, public_key: str, is_healthy: bool, response_time: float):
         """Update health information for a peer"""
@@ -481,31 +656,33 @@ class GossipNode:
         )
         
         self.crds.insert_health_info(health_info)
+        if public_key in self.active_set:
+            self.active_set.update_peer(public_key, health=health_score(self.crds.get_health_info(public_key)))
     
-    async def _send_message(self, target_info: ContactInfo, message: Any):
-        """Send a message to a target peer"""
-        try:
-            message_data = json.dumps(message.to_dict()).encode()
-            message_size = len(message_data)
-            
-            # Check if message is too large for UDP (max 65507 bytes)
-            if message_size > 65507:
-                logger.warning(f"Message too large ({message_size} bytes) for UDP to {target_info.ip_address}:{target_info.gossip_port}")
-                return
-            
-            await asyncio.get_event_loop().sock_sendto(
-                self.socket, message_data, (target_info.ip_address, target_info.gossip_port)
-            )
-            self.stats['messages_sent'] += 1
-            
-            # Log large messages for debugging
-            if message_size > 1024:  # Log messages over 1KB
-                logger.debug(f"Large gossip message sent: {message_size} bytes to {target_info.ip_address}:{target_info.gossip_port}")
-            
-        except Exception as e:
-            logger.warning(f"Failed to send message to {target_info.ip_address}:{target_info.gossip_port}: {e}")
-            # Mark peer as unhealthy
-            self._update_peer_health(target_info.public_key, False, 999.0)
+    def _send_message(self, target_info: ContactInfo, message: Any) -> bool:
+        """Queue a message for a target peer; False if it was dropped (queue full or rate limited)"""
+        if not self.transport or not self.transport.is_open:
+            return False
+        
+        message_data = encode_message(message)
+        frames = chunk_frame(message_data, self.config.max_datagram_bytes)
+        if not self.transport.send(frames, (target_info.ip_address, target_info.gossip_port)):
+            self.stats['messages_dropped'] += 1
+            return False
+        self.stats['messages_sent'] += 1
+        
+        # Log chunked messages for debugging
+        if len(frames) > 1:
+            logger.debug(f"Large gossip message queued: {len(message_data)} bytes in {len(frames)} chunks to {target_info.ip_address}:{target_info.gossip_port}")
+        return True
+    
+    def _on_send_error(self, addr: Tuple[str, int], error: Exception):
+        """A queued frame could not be written; mark the peer at that address unhealthy"""
+        logger.warning(f"Failed to send message to {addr[0]}:{addr[1]}: {error}")
+        for peer_info in self.known_peers.values():
+            if (peer_info.ip_address, peer_info.gossip_port) == addr:
+                self._update_peer_health(peer_info.public_key, False, 999.0)
+                break
     
     # Public API methods
     
@@ -513,6 +690,7 @@ class GossipNode:
         """Add a bootstrap peer to start gossip with"""
         self.known_peers[peer_info.public_key] = peer_info
         self.crds.insert_contact_info(peer_info)
+        self._track_peer(peer_info.public_key)
         logger.info(f"Added bootstrap peer: {peer_info.public_key[:16]}...")
     
     def publish_vote(self, slot: int, block_hash: str):
@@ -524,21 +702,56 @@ class GossipNode:
             timestamp=time.time()
         )
         
+        if self.record_vote(vote):
+            logger.info(f"Published vote for slot {slot}")
+    
+    def record_vote(self, vote: Vote) -> bool:
+        """Store a locally produced vote in CRDS and count it in the vote tally"""
         success = self.crds.insert_vote(vote)
         if success:
-            logger.info(f"Published vote for slot {slot}")
+            self.vote_tally.add_vote(vote.public_key, vote.slot, vote.block_hash)
+        return success
     
     def publish_leader_schedule(self, epoch: int, slot_leaders: Dict[int, str]):
-        """Publish leader schedule information"""
-        epoch_slots = EpochSlots(
-            epoch=epoch,
-            slot_leaders=slot_leaders,
-            timestamp=time.time()
-        )
+        """
+        Publish an epoch's leader schedule as compressed fragments
+        
+        The schedule is run-length encoded against a validator table and
+        compressed (see schedule_codec), then split into fragments that each
+        fit a datagram. Republishing an unchanged schedule is a no-op.
+        """
+        blob = encode_schedule(slot_leaders)
+        blob_hash = schedule_hash(blob)
+        if self.published_schedules.get(epoch) == blob_hash:
+            return
         
-        success = self.crds.insert_epoch_slots(epoch_slots)
-        if success:
-            logger.info(f"Published leader schedule for epoch {epoch} ({len(slot_leaders)} slots)")
+        pieces = fragment_blob(blob, self.config.schedule_fragment_bytes)
+        timestamp = time.time()
+        fragments = [
+            EpochScheduleFragment(
+                epoch=epoch,
+                fragment_index=index,
+                fragment_count=len(pieces),
+                schedule_hash=blob_hash,
+                data=piece.hex(),
+                timestamp=timestamp
+            )
+            for index, piece in enumerate(pieces)
+        ]
+        
+        if self.crds.insert_schedule_fragments(fragments):
+            # Only the latest couple of epochs can be republished
+            self.published_schedules = {e: h for e, h in self.published_schedules.items() if e >= epoch - 1}
+            self.published_schedules[epoch] = blob_hash
+            logger.info(f"Published leader schedule for epoch {epoch} ({len(slot_leaders)} slots, "
+                        f"{len(blob)} bytes in {len(fragments)} fragments)")
+    
+    def get_epoch_schedule(self, epoch: int) -> Dict[int, str]:
+        """Most recently published complete schedule for an epoch"""
+        epoch_slots_list = self.crds.get_epoch_slots(epoch)
+        if not epoch_slots_list:
+            return {}
+        return max(epoch_slots_list, key=lambda x: x.timestamp).slot_leaders
     
     def get_leader_for_slot(self, slot: int, epoch: int = None) -> Optional[str]:
         """Get the leader for a specific slot"""
@@ -575,9 +788,13 @@ class GossipNode:
             'peer_stats': {
                 'known_peers': len(self.known_peers),
                 'active_gossip_set': len(self.active_gossip_set),
-                'pruned_peers': len(self.pruned_peers)
+                'pruned_peers': len(self.pruned_peers),
+                'active_set': self.active_set.get_stats()
             },
             'message_stats': self.stats,
+            'transport_stats': self.transport.get_stats() if self.transport else {},
+            'signature_stats': self.crds.verifier.get_stats(),
+            'vote_stats': self.vote_tally.get_stats(),
             'config': {
                 'push_fanout': self.config.push_fanout,
                 'push_interval_ms': self.config.push_interval_ms,
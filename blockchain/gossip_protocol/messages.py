@@ -13,7 +13,7 @@ Implements the four core gossip message types:
 import time
 import json
 from typing import List, Optional, Dict, Any
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from .crds import CrdsValue
 from .bloom_filter import BloomFilter
 
@@ -35,12 +35,11 @@ class PushMessage:
     
     def to_dict(self) -> Dict:
         """Convert to dictionary for network transmission"""
-        # Limit the number of CRDS values to prevent message size issues
-        limited_crds_values = self.crds_values[:1]  # Maximum 1 item per push to prevent UDP size issues
+        # Pushes are split by the sender's byte budget, so nothing is dropped here
         return {
             'type': 'PushMessage',
             'sender_public_key': self.sender_public_key,  # Keep full key for validation
-            'crds_values': limited_crds_values,
+            'crds_values': self.crds_values,
             'timestamp': self.timestamp,
             'message_id': self.message_id
         }
@@ -64,12 +63,16 @@ class PullRequest:
     """
     Message for requesting missing information from a peer
     
-    Contains a bloom filter representing all data the requester already has
+    Contains a bloom filter representing the data the requester already has
+    within one hash-prefix partition (the top ``mask_bits`` bits of a value
+    hash equal ``partition``)
     """
     sender_public_key: str
     bloom_filter_data: bytes
     timestamp: float
     message_id: str
+    mask_bits: int = 0
+    partition: int = 0
     
     def __post_init__(self):
         if not self.message_id:
@@ -81,9 +84,11 @@ class PullRequest:
         return {
             'type': 'PullRequest',
             'sender_public_key': self.sender_public_key,  # Keep full key for validation
-            'bloom_filter_data': base64.b64encode(self.bloom_filter_data[:1000]).decode(),  # Limit size
+            'bloom_filter_data': base64.b64encode(self.bloom_filter_data).decode(),  # Truncating would corrupt the filter
             'timestamp': self.timestamp,
-            'message_id': self.message_id
+            'message_id': self.message_id,
+            'mask_bits': self.mask_bits,
+            'partition': self.partition
         }
     
     @classmethod
@@ -94,7 +99,9 @@ class PullRequest:
             sender_public_key=data['sender_public_key'],
             bloom_filter_data=base64.b64decode(data['bloom_filter_data']),
             timestamp=data['timestamp'],
-            message_id=data['message_id']
+            message_id=data['message_id'],
+            mask_bits=data.get('mask_bits', 0),
+            partition=data.get('partition', 0)
         )
     
     def get_bloom_filter(self) -> BloomFilter:
@@ -121,13 +128,12 @@ class PullResponse:
     
     def to_dict(self) -> Dict:
         """Convert to dictionary for network transmission"""
-        # Limit the number of CRDS values to prevent message size issues
-        limited_crds_values = self.crds_values[:3]  # Maximum 3 items per response
+        # Responses are split by the sender's byte budget, so nothing is dropped here
         return {
             'type': 'PullResponse',
             'sender_public_key': self.sender_public_key,  # Keep full key for validation
             'requester_public_key': self.requester_public_key,  # Keep full key for validation
-            'crds_values': limited_crds_values,
+            'crds_values': self.crds_values,
             'timestamp': self.timestamp,
             'message_id': self.message_id,
             'request_id': self.request_id
@@ -154,13 +160,16 @@ class PruneMessage:
     """
     Message for managing gossip connection topology
     
-    Tells a peer to stop sending gossip messages (health-based pruning)
+    Tells a peer to stop sending gossip messages (health-based pruning), or
+    with ``origins`` set, to stop pushing only those origins' values because
+    the sender already receives them faster from other peers
     """
     sender_public_key: str
     target_public_key: str
-    reason: str  # Reason for pruning (e.g., "unhealthy", "unresponsive")
+    reason: str  # Reason for pruning (e.g., "unhealthy", "unresponsive", "redundant")
     timestamp: float
     message_id: str
+    origins: List[str] = field(default_factory=list)
     
     def __post_init__(self):
         if not self.message_id:
@@ -174,7 +183,8 @@ class PruneMessage:
             'target_public_key': self.target_public_key,
             'reason': self.reason,
             'timestamp': self.timestamp,
-            'message_id': self.message_id
+            'message_id': self.message_id,
+            'origins': self.origins
         }
     
     @classmethod
@@ -185,7 +195,8 @@ class PruneMessage:
             target_public_key=data['target_public_key'],
             reason=data['reason'],
             timestamp=data['timestamp'],
-            message_id=data['message_id']
+            message_id=data['message_id'],
+            origins=data.get('origins', [])
         )
 
 class GossipMessageFactory:
@@ -202,13 +213,16 @@ class GossipMessageFactory:
         )
     
     @staticmethod
-    def create_pull_request(sender_public_key: str, bloom_filter: BloomFilter) -> PullRequest:
-        """Create a pull request with bloom filter"""
+    def create_pull_request(sender_public_key: str, bloom_filter: BloomFilter,
+                            mask_bits: int = 0, partition: int = 0) -> PullRequest:
+        """Create a pull request with bloom filter for one hash-prefix partition"""
         return PullRequest(
             sender_public_key=sender_public_key,
             bloom_filter_data=bloom_filter.to_bytes(),
             timestamp=time.time(),
-            message_id=""
+            message_id="",
+            mask_bits=mask_bits,
+            partition=partition
         )
     
     @staticmethod
@@ -225,14 +239,16 @@ class GossipMessageFactory:
         )
     
     @staticmethod
-    def create_prune_message(sender_public_key: str, target_public_key: str, reason: str) -> PruneMessage:
-        """Create a prune message"""
+    def create_prune_message(sender_public_key: str, target_public_key: str, reason: str,
+                             origins: List[str] = None) -> PruneMessage:
+        """Create a prune message, optionally limited to specific origins"""
         return PruneMessage(
             sender_public_key=sender_public_key,
             target_public_key=target_public_key,
             reason=reason,
             timestamp=time.time(),
-            message_id=""
+            message_id="",
+            origins=origins or []
         )
     
     @staticmethod
@@ -288,6 +304,9 @@ class MessageValidator:
         if message.timestamp < current_time - 3600 or message.timestamp > current_time + 60:
             return False
         
+        if not 0 <= message.mask_bits <= 32 or not 0 <= message.partition < (1 << message.mask_bits):
+            return False
+        
         # Try to parse bloom filter
         try:
             BloomFilter.from_bytes(message.bloom_filter_data)
@@ -0,0 +1,83 @@
+"""
+Push Received Cache
+===================
+
+Tracks, per origin, which peers deliver that origin's pushed values first
+and which only ever deliver duplicates. Once enough new values from an
+origin have arrived, every peer outside the best few is asked to stop
+pushing that origin's values to us (an origin-specific prune, as in
+Solana), which trims redundant push traffic without cutting anyone off.
+
+Origins are kept in least-recently-updated order. When max_origins are
+tracked, a new origin evicts the one that has gone longest without a
+value, so origins that never reach min_upserts age out instead of
+filling the cache and shutting out new ones.
+"""
+
+from collections import OrderedDict
+from typing import Dict, List
+
+
+class _OriginEntry:
+    """Delivery scores of the peers pushing one origin's values"""
+
+    def __init__(self):
+        self.scores: Dict[str, int] = {}  # peer -> values it delivered first
+        self.num_upserts = 0
+
+    def record(self, peer: str, duplicate: bool):
+        if duplicate:
+            self.scores.setdefault(peer, 0)
+        else:
+            self.scores[peer] = self.scores.get(peer, 0) + 1
+            self.num_upserts += 1
+
+
+class ReceivedCache:
+    """
+    Per-origin ingress scores used to generate prunes
+
+    Args:
+        min_ingress_nodes: Peers kept for every origin, best scores first
+        min_upserts: New values from an origin needed before deciding
+        max_origins: Origins tracked at once; beyond it the least recently updated is evicted
+    """
+
+    def __init__(self, min_ingress_nodes: int = 2, min_upserts: int = 20, max_origins: int = 4096):
+        self.min_ingress_nodes = min_ingress_nodes
+        self.min_upserts = min_upserts
+        self.max_origins = max_origins
+        self.entries: "OrderedDict[str, _OriginEntry]" = OrderedDict()
+        self.evicted = 0
+
+    def record(self, origin: str, peer: str, duplicate: bool):
+        """Note that ``peer`` pushed a value from ``origin`` to us"""
+        entry = self.entries.get(origin)
+        if entry is None:
+            if len(self.entries) >= self.max_origins:
+                self.entries.popitem(last=False)
+                self.evicted += 1
+            entry = self.entries[origin] = _OriginEntry()
+        else:
+            self.entries.move_to_end(origin)
+        entry.record(peer, duplicate)
+
+    def take_prunes(self) -> Dict[str, List[str]]:
+        """
+        Peer -> origins it should stop pushing to us
+
+        Origins with enough evidence are decided and their scores reset,
+        so a pruned path can win its place back after the prune expires.
+        The origin itself is never pruned as a source of its own values.
+        """
+        prunes: Dict[str, List[str]] = {}
+        for origin in [o for o, e in self.entries.items() if e.num_upserts >= self.min_upserts]:
+            entry = self.entries.pop(origin)
+            ranked = sorted(entry.scores.items(), key=lambda item: item[1], reverse=True)
+            for peer, _ in ranked[self.min_ingress_nodes:]:
+                if peer != origin:
+                    prunes.setdefault(peer, []).append(origin)
+        return prunes
+
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -0,0 +1,111 @@
+"""
+Leader Schedule Codec
+=====================
+
+Compact encoding of an epoch's leader schedule for gossip.
+
+Leaders are replaced by indexes into a per-epoch validator table, the
+slots are run-length encoded as (gap, length, leader index) varint
+triples, and the result is zlib-compressed. The compressed blob is cut
+into fragments small enough for one datagram each, which travel as
+separate EpochScheduleFragment CRDS values and are reassembled by epoch
+and blob hash.
+"""
+
+import hashlib
+import zlib
+from typing import Dict, List, Tuple
+
+SCHEDULE_FORMAT_VERSION = 1
+
+
+def _write_varint(buffer: bytearray, value: int):
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        if offset >= len(data):
+            raise ValueError("Truncated leader schedule")
+        byte = data[offset]
+        offset += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, offset
+        shift += 7
+
+
+def encode_schedule(slot_leaders: Dict[int, str]) -> bytes:
+    """Compress a slot -> leader map into a schedule blob"""
+    leaders = sorted(set(slot_leaders.values()))
+    leader_index = {leader: index for index, leader in enumerate(leaders)}
+
+    # Runs of consecutive slots with the same leader
+    runs: List[List[int]] = []  # [start, length, leader index]
+    for slot in sorted(slot_leaders):
+        index = leader_index[slot_leaders[slot]]
+        if runs and runs[-1][0] + runs[-1][1] == slot and runs[-1][2] == index:
+            runs[-1][1] += 1
+        else:
+            runs.append([slot, 1, index])
+
+    buffer = bytearray([SCHEDULE_FORMAT_VERSION])
+    _write_varint(buffer, len(leaders))
+    for leader in leaders:
+        encoded = leader.encode()
+        _write_varint(buffer, len(encoded))
+        buffer += encoded
+
+    _write_varint(buffer, len(runs))
+    next_slot = 0
+    for start, length, index in runs:
+        _write_varint(buffer, start - next_slot)
+        _write_varint(buffer, length)
+        _write_varint(buffer, index)
+        next_slot = start + length
+
+    return zlib.compress(bytes(buffer), 9)
+
+
+def decode_schedule(blob: bytes) -> Dict[int, str]:
+    """Inverse of encode_schedule"""
+    data = zlib.decompress(blob)
+    if not data or data[0] != SCHEDULE_FORMAT_VERSION:
+        raise ValueError("Unsupported leader schedule format")
+
+    offset = 1
+    num_leaders, offset = _read_varint(data, offset)
+    leaders = []
+    for _ in range(num_leaders):
+        length, offset = _read_varint(data, offset)
+        leaders.append(data[offset:offset + length].decode())
+        offset += length
+
+    num_runs, offset = _read_varint(data, offset)
+    slot_leaders: Dict[int, str] = {}
+    next_slot = 0
+    for _ in range(num_runs):
+        gap, offset = _read_varint(data, offset)
+        length, offset = _read_varint(data, offset)
+        index, offset = _read_varint(data, offset)
+        if index >= len(leaders):
+            raise ValueError("Leader index out of range")
+        start = next_slot + gap
+        leader = leaders[index]
+        for slot in range(start, start + length):
+            slot_leaders[slot] = leader
+        next_slot = start + length
+    return slot_leaders
+
+
+def schedule_hash(blob: bytes) -> str:
+    return hashlib.sha256(blob).hexdigest()
+
+
+def fragment_blob(blob: bytes, max_fragment_bytes: int) -> List[bytes]:
+    """Cut a schedule blob into fragments of at most max_fragment_bytes"""
+    return [blob[i:i + max_fragment_bytes] for i in range(0, len(blob), max_fragment_bytes)] or [b'']
@@ -0,0 +1,217 @@
+"""
+Gossip Datagram Transport
+=========================
+
+asyncio-native UDP I/O for the gossip node. Datagrams are received by an
+asyncio.DatagramProtocol into a bounded inbound queue, and outgoing frames
+are placed on a bounded outbound queue that a writer task drains into the
+datagram transport. Callers never await a send, so a push or pull round
+costs only the time to enqueue its frames, whatever the peers are doing.
+
+Both directions are rate limited per peer address with token buckets.
+Anything that does not fit (a full queue or an empty bucket) is dropped
+and counted rather than allowed to stall the node.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Address = Tuple[str, int]
+
+
+class TokenBucket:
+    """Allows ``rate`` events per second with bursts of up to ``burst``"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def consume(self, count: float = 1.0) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < count:
+            return False
+        self.tokens -= count
+        return True
+
+
+class PeerRateLimiter:
+    """
+    Token bucket per peer address
+
+    Buckets are kept for at most ``max_peers`` addresses, least recently
+    used first out; a rate of 0 disables limiting.
+    """
+
+    def __init__(self, rate: float, burst: float, max_peers: int = 4096):
+        self.rate = rate
+        self.burst = burst
+        self.max_peers = max_peers
+        self.buckets: "OrderedDict[Address, TokenBucket]" = OrderedDict()
+
+    def allow(self, addr: Address, count: int = 1) -> bool:
+        if self.rate <= 0:
+            return True
+        bucket = self.buckets.get(addr)
+        if bucket is None:
+            bucket = self.buckets[addr] = TokenBucket(self.rate, self.burst)
+            if len(self.buckets) > self.max_peers:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(addr)
+        return bucket.consume(count)
+
+
+class GossipDatagramProtocol(asyncio.DatagramProtocol):
+    """Hands received datagrams to the owning GossipTransport"""
+
+    def __init__(self, owner: 'GossipTransport'):
+        self.owner = owner
+
+    def connection_made(self, transport):
+        self.owner._connection_made(transport)
+
+    def datagram_received(self, data: bytes, addr: Address):
+        self.owner._datagram_received(data, addr)
+
+    def error_received(self, exc: Exception):
+        # ICMP errors (e.g. port unreachable) for earlier sends
+        self.owner.stats['send_errors'] += 1
+        logger.debug(f"Gossip datagram error: {exc}")
+
+    def connection_lost(self, exc: Optional[Exception]):
+        self.owner._connection_lost()
+
+    def pause_writing(self):
+        self.owner._writable.clear()
+
+    def resume_writing(self):
+        self.owner._writable.set()
+
+
+class GossipTransport:
+    """
+    Bounded, rate-limited UDP endpoint for gossip traffic
+
+    Args:
+        send_queue_size: Frames waiting to be written before sends are dropped
+        recv_queue_size: Datagrams waiting to be handled before receives are dropped
+        peer_send_rate: Frames per second sent to one address (0 = unlimited)
+        peer_recv_rate: Datagrams per second accepted from one address (0 = unlimited)
+        peer_burst: Bucket size for both directions
+        on_send_error: Called with the address and exception of a failed write
+    """
+
+    def __init__(self, send_queue_size: int = 4096, recv_queue_size: int = 4096,
+                 peer_send_rate: float = 2000.0, peer_recv_rate: float = 2000.0, peer_burst: float = 500.0,
+                 on_send_error: Callable[[Address, Exception], None] = None):
+        self.send_queue: "asyncio.Queue[Tuple[bytes, Address]]" = asyncio.Queue(send_queue_size)
+        self.recv_queue: "asyncio.Queue[Tuple[bytes, Address]]" = asyncio.Queue(recv_queue_size)
+        self.send_limiter = PeerRateLimiter(peer_send_rate, peer_burst)
+        self.recv_limiter = PeerRateLimiter(peer_recv_rate, peer_burst)
+        self.on_send_error = on_send_error
+
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self._writable = asyncio.Event()
+        self._writable.set()
+        self._writer_task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            'datagrams_sent': 0,
+            'datagrams_received': 0,
+            'send_queue_drops': 0,
+            'recv_queue_drops': 0,
+            'send_rate_limited': 0,
+            'recv_rate_limited': 0,
+            'send_errors': 0,
+            'send_queue_high_water': 0,
+            'recv_queue_high_water': 0
+        }
+
+    async def open(self, ip_address: str, port: int):
+        """Bind the UDP endpoint and start the writer task"""
+        loop = asyncio.get_running_loop()
+        await loop.create_datagram_endpoint(lambda: GossipDatagramProtocol(self), local_addr=(ip_address, port))
+        self._writer_task = asyncio.create_task(self._writer())
+
+    def close(self):
+        if self._writer_task:
+            self._writer_task.cancel()
+            self._writer_task = None
+        if self.transport:
+            self.transport.close()
+            self.transport = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.transport is not None
+
+    def send(self, frames: List[bytes], addr: Address) -> bool:
+        """
+        Queue the frames of one message for ``addr``
+
+        All frames are accepted or none are, since a message missing a
+        chunk is useless to the receiver. Returns False when dropped.
+        """
+        if not self.send_limiter.allow(addr, len(frames)):
+            self.stats['send_rate_limited'] += 1
+            return False
+        if self.send_queue.maxsize - self.send_queue.qsize() < len(frames):
+            self.stats['send_queue_drops'] += 1
+            return False
+        for frame in frames:
+            self.send_queue.put_nowait((frame, addr))
+        self.stats['send_queue_high_water'] = max(self.stats['send_queue_high_water'], self.send_queue.qsize())
+        return True
+
+    async def recv(self) -> Tuple[bytes, Address]:
+        """Next received datagram and its source address"""
+        return await self.recv_queue.get()
+
+    async def _writer(self):
+        while True:
+            frame, addr = await self.send_queue.get()
+            await self._writable.wait()  # Honour the transport's flow control
+            if self.transport is None:
+                continue
+            try:
+                self.transport.sendto(frame, addr)
+                self.stats['datagrams_sent'] += 1
+            except OSError as e:
+                self.stats['send_errors'] += 1
+                if self.on_send_error:
+                    self.on_send_error(addr, e)
+
+    def _connection_made(self, transport):
+        self.transport = transport
+
+    def _connection_lost(self):
+        self.transport = None
+        self._writable.set()
+
+    def _datagram_received(self, data: bytes, addr: Address):
+        if not self.recv_limiter.allow(addr):
+            self.stats['recv_rate_limited'] += 1
+            return
+        try:
+            self.recv_queue.put_nowait((data, addr))
+        except asyncio.QueueFull:
+            self.stats['recv_queue_drops'] += 1
+            return
+        self.stats['datagrams_received'] += 1
+        self.stats['recv_queue_high_water'] = max(self.stats['recv_queue_high_water'], self.recv_queue.qsize())
+
+    def get_stats(self) -> Dict:
+        return {
+            'send_queue_depth': self.send_queue.qsize(),
+            'recv_queue_depth': self.recv_queue.qsize(),
+            **self.stats
+        }
@@ -0,0 +1,204 @@
+"""
+Vote Tally
+==========
+
+Stake-weighted vote aggregation for CRDS votes. Votes are accumulated
+as they arrive into per-(slot, block_hash) tallies, so supermajority and
+confirmation depth are answered in O(1) instead of by scanning votes.
+
+A validator's first vote in a slot is the one counted; a later vote for
+a different block in the same slot is recorded as an equivocation and
+ignored. Only registered stake counts: a vote from a validator with no
+registered stake carries zero weight and leaves the total stake alone,
+so made-up voter ids cannot inflate the supermajority threshold. If the
+validator's stake is registered later, its votes are re-weighted. Each block that reaches a supermajority (more than 2/3 of the
+known stake) is given the next confirmation number; its confirmation
+depth is how many blocks have been confirmed after it. Once a block is
+``root_depth`` confirmations deep its slot becomes the root and every
+older slot is pruned.
+"""
+
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+SUPERMAJORITY = 2 / 3
+
+
+class _BlockTally:
+    """Votes for one block in one slot"""
+
+    __slots__ = ('stake', 'voters', 'confirmation')
+
+    def __init__(self):
+        self.stake = 0.0
+        self.voters: List[str] = []
+        self.confirmation: Optional[int] = None  # Confirmation number once supermajority is reached
+
+
+class VoteTally:
+    """
+    Incremental stake-weighted tallies keyed by (slot, block_hash)
+
+    Args:
+        root_depth: Confirmations after which a confirmed slot becomes the root
+    """
+
+    def __init__(self, root_depth: int = 32):
+        self.root_depth = root_depth
+
+        self.stakes: Dict[str, float] = {}
+        self.total_stake = 0.0
+
+        self.slots: Dict[int, Dict[str, _BlockTally]] = {}
+        self.slot_votes: Dict[int, Dict[str, str]] = {}  # slot -> validator -> block hash voted
+        self.block_slots: Dict[str, int] = {}  # block hash -> slot
+        self.slot_heap: List[int] = []  # Slots held, for pruning below the root
+
+        self.confirmed: Dict[int, Tuple[str, int]] = {}  # confirmation number -> (block hash, slot)
+        self.num_confirmed = 0
+        self.root: Optional[int] = None
+
+        self.stats = {
+            'votes_counted': 0,
+            'unstaked_votes': 0,
+            'duplicate_votes': 0,
+            'equivocations': 0,
+            'stale_votes': 0,
+            'slots_pruned': 0
+        }
+
+    # Stake
+
+    def set_stake(self, validator: str, stake: float):
+        """Register or change a validator's stake, re-weighting the votes it already cast"""
+        old_stake = self.stakes.get(validator, 0.0)  # Votes cast before registration weigh nothing
+        self.stakes[validator] = stake
+        self.total_stake += stake - old_stake
+        if old_stake == stake:
+            return
+        for slot, votes in self.slot_votes.items():
+            block_hash = votes.get(validator)
+            if block_hash is not None:
+                block = self.slots[slot][block_hash]
+                block.stake += stake - old_stake
+                self._check_confirmation(slot, block_hash, block)
+
+    # Votes
+
+    def add_vote(self, validator: str, slot: int, block_hash: str) -> bool:
+        """Count one vote; returns False for duplicates, equivocations and votes below the root"""
+        if self.root is not None and slot < self.root:
+            self.stats['stale_votes'] += 1
+            return False
+
+        votes = self.slot_votes.get(slot)
+        if votes is None:
+            votes = self.slot_votes[slot] = {}
+            self.slots[slot] = {}
+            heapq.heappush(self.slot_heap, slot)
+        previous = votes.get(validator)
+        if previous is not None:
+            key = 'duplicate_votes' if previous == block_hash else 'equivocations'
+            self.stats[key] += 1
+            return False
+
+        votes[validator] = block_hash
+        block = self.slots[slot].get(block_hash)
+        if block is None:
+            block = self.slots[slot][block_hash] = _BlockTally()
+            self.block_slots[block_hash] = slot
+        stake = self.stakes.get(validator)
+        if stake is None:
+            stake = 0.0
+            self.stats['unstaked_votes'] += 1
+        block.stake += stake
+        block.voters.append(validator)
+        self.stats['votes_counted'] += 1
+
+        self._check_confirmation(slot, block_hash, block)
+        return True
+
+    def _check_confirmation(self, slot: int, block_hash: str, block: _BlockTally):
+        if block.confirmation is not None or not self._is_supermajority(block.stake):
+            return
+        self.num_confirmed += 1
+        block.confirmation = self.num_confirmed
+        self.confirmed[self.num_confirmed] = (block_hash, slot)
+
+        # The block root_depth confirmations back becomes the new root
+        rooted = self.confirmed.pop(self.num_confirmed - self.root_depth, None)
+        if rooted is not None and (self.root is None or rooted[1] > self.root):
+            self.set_root(rooted[1])
+
+    def _is_supermajority(self, stake: float) -> bool:
+        return self.total_stake > 0 and stake > self.total_stake * SUPERMAJORITY
+
+    # Queries (all O(1))
+
+    def _block(self, block_hash: str, slot: int = None) -> Optional[_BlockTally]:
+        if slot is None:
+            slot = self.block_slots.get(block_hash)
+        blocks = self.slots.get(slot)
+        return blocks.get(block_hash) if blocks else None
+
+    def get_stake(self, block_hash: str, slot: int = None) -> float:
+        block = self._block(block_hash, slot)
+        return block.stake if block else 0.0
+
+    def is_supermajority(self, block_hash: str, slot: int = None) -> bool:
+        block = self._block(block_hash, slot)
+        return block is not None and block.confirmation is not None
+
+    def confirmation_depth(self, block_hash: str, slot: int = None) -> int:
+        """Blocks confirmed after this one; -1 when it has no supermajority (yet)"""
+        block = self._block(block_hash, slot)
+        if block is None or block.confirmation is None:
+            return -1
+        return self.num_confirmed - block.confirmation
+
+    def get_block_status(self, block_hash: str, slot: int = None) -> Dict:
+        if slot is None:
+            slot = self.block_slots.get(block_hash)
+        block = self._block(block_hash, slot)
+        stake = block.stake if block else 0.0
+        confirmed = block is not None and block.confirmation is not None
+        return {
+            'block_hash': block_hash,
+            'slot': slot,
+            'votes': len(block.voters) if block else 0,
+            'voted_stake': stake,
+            'total_stake': self.total_stake,
+            'stake_fraction': stake / self.total_stake if self.total_stake else 0.0,
+            'supermajority': confirmed,
+            'confirmation_depth': self.num_confirmed - block.confirmation if confirmed else -1,
+            'rooted': confirmed and self.root is not None and slot <= self.root
+        }
+
+    def get_voters(self, block_hash: str, slot: int = None) -> List[str]:
+        block = self._block(block_hash, slot)
+        return list(block.voters) if block else []
+
+    # Pruning
+
+    def set_root(self, root: int):
+        """Drop every slot older than the root"""
+        self.root = root
+        while self.slot_heap and self.slot_heap[0] < root:
+            slot = heapq.heappop(self.slot_heap)
+            for block_hash, block in self.slots.pop(slot, {}).items():
+                if self.block_slots.get(block_hash) == slot:
+                    del self.block_slots[block_hash]
+                if block.confirmation is not None:
+                    self.confirmed.pop(block.confirmation, None)
+            self.slot_votes.pop(slot, None)
+            self.stats['slots_pruned'] += 1
+
+    def get_stats(self) -> Dict:
+        return {
+            'slots': len(self.slots),
+            'validators': len(self.stakes),
+            'total_stake': self.total_stake,
+            'confirmed_blocks': self.num_confirmed,
+            'root': self.root,
+            **self.stats
+        }
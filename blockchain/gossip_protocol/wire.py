@@ -0,0 +1,516 @@
+"""
+Binary Gossip Wire Format
+=========================
+
+Compact encoding for the four gossip message types, replacing JSON on the
+UDP path:
+
+- integers are zigzag LEB128 varints, floats are raw 8-byte doubles and
+  every length prefix is a varint
+- PEM public keys travel as their raw DER bytes and hex strings (hashes,
+  signatures) as raw bytes, and both are restored to the identical string
+- dataclass CRDS data is sent as field values in declaration order, with
+  no field names; leader schedules become a leader table plus
+  delta-encoded slots
+
+Every value keeps its exact Python type across the wire, so the signed
+JSON payload of a CRDS value rebuilds byte for byte on the receiver.
+
+Encoded messages larger than one datagram are split into CHUNK frames
+and reassembled by ChunkAssembler, so a full leader schedule propagates
+without being truncated.
+"""
+
+import base64
+import os
+import struct
+import time
+from dataclasses import fields, is_dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .crds import CrdsValue, ContactInfo, Vote, EpochSlots, HealthInfo, EpochScheduleFragment
+from .messages import PushMessage, PullRequest, PullResponse, PruneMessage
+
+MAGIC = b'GS'
+WIRE_VERSION = 1
+
+MSG_PUSH = 1
+MSG_PULL_REQUEST = 2
+MSG_PULL_RESPONSE = 3
+MSG_PRUNE = 4
+MSG_CHUNK = 5
+
+# Tagged value kinds
+TAG_NONE = 0
+TAG_FALSE = 1
+TAG_TRUE = 2
+TAG_INT = 3
+TAG_FLOAT = 4
+TAG_STR = 5
+TAG_KEY = 6  # PEM public key sent as DER
+TAG_HEX = 7  # Lowercase even-length hex string sent as bytes
+TAG_LIST = 8
+TAG_DICT = 9
+TAG_LEADER_MAP = 10  # {int slot: leader} as leader table + slot deltas
+
+DATA_TYPES = {'ContactInfo': ContactInfo, 'Vote': Vote, 'EpochSlots': EpochSlots, 'HealthInfo': HealthInfo,
+              'EpochScheduleFragment': EpochScheduleFragment}
+DATA_TYPE_IDS = {name: index for index, name in enumerate(DATA_TYPES, start=1)}
+DATA_TYPE_NAMES = {index: name for name, index in DATA_TYPE_IDS.items()}
+
+_PEM_HEADER = "-----BEGIN PUBLIC KEY-----\n"
+_PEM_FOOTER = "-----END PUBLIC KEY-----\n"
+_DOUBLE = struct.Struct('<d')
+_HEADER_SIZE = len(MAGIC) + 2
+_CHUNK_ID_SIZE = 8
+MAX_CHUNKS = 1024
+
+
+class WireError(ValueError):
+    """Raised for malformed or unsupported gossip frames"""
+
+
+def _pem_to_der(value: str) -> Optional[bytes]:
+    if not (value.startswith(_PEM_HEADER) and value.endswith(_PEM_FOOTER)):
+        return None
+    try:
+        der = base64.b64decode(value[len(_PEM_HEADER):-len(_PEM_FOOTER)].replace('\n', ''), validate=True)
+    except ValueError:
+        return None
+    # Only use DER when the PEM text can be rebuilt exactly
+    return der if _der_to_pem(der) == value else None
+
+
+def _der_to_pem(der: bytes) -> str:
+    body = base64.b64encode(der).decode()
+    lines = [body[i:i + 64] for i in range(0, len(body), 64)]
+    return _PEM_HEADER + '\n'.join(lines) + '\n' + _PEM_FOOTER
+
+
+def _hex_bytes(value: str) -> Optional[bytes]:
+    if not value or len(value) % 2:
+        return None
+    try:
+        raw = bytes.fromhex(value)
+    except ValueError:
+        return None
+    return raw if raw.hex() == value else None
+
+
+class _Writer:
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def varint(self, value: int):
+        if value < 0:
+            raise WireError("varint must be non-negative")
+        buffer = self.buffer
+        while value >= 0x80:
+            buffer.append((value & 0x7F) | 0x80)
+            value >>= 7
+        buffer.append(value)
+
+    def blob(self, data: bytes):
+        self.varint(len(data))
+        self.buffer += data
+
+    def text(self, value: str):
+        self.blob(value.encode())
+
+    def value(self, value: Any):
+        """Tagged value that decodes to the same type and contents"""
+        buffer = self.buffer
+        if value is None:
+            buffer.append(TAG_NONE)
+        elif value is True:
+            buffer.append(TAG_TRUE)
+        elif value is False:
+            buffer.append(TAG_FALSE)
+        elif isinstance(value, int):
+            buffer.append(TAG_INT)
+            self.varint(value << 1 if value >= 0 else ((-value) << 1) - 1)
+        elif isinstance(value, float):
+            buffer.append(TAG_FLOAT)
+            buffer += _DOUBLE.pack(value)
+        elif isinstance(value, str):
+            der = _pem_to_der(value) if value.startswith('-----') else None
+            if der is not None:
+                buffer.append(TAG_KEY)
+                self.blob(der)
+                return
+            raw = _hex_bytes(value)
+            if raw is not None:
+                buffer.append(TAG_HEX)
+                self.blob(raw)
+                return
+            buffer.append(TAG_STR)
+            self.text(value)
+        elif isinstance(value, (list, tuple)):
+            buffer.append(TAG_LIST)
+            self.varint(len(value))
+            for item in value:
+                self.value(item)
+        elif isinstance(value, dict):
+            if value and all(type(k) is int and k >= 0 for k in value) and all(isinstance(v, str) for v in value.values()):
+                self._leader_map(value)
+                return
+            buffer.append(TAG_DICT)
+            self.varint(len(value))
+            for key, item in value.items():
+                self.value(key)
+                self.value(item)
+        else:
+            raise WireError(f"Cannot encode {type(value).__name__}")
+
+    def _leader_map(self, slot_leaders: Dict[int, str]):
+        leaders: Dict[str, int] = {}
+        for leader in slot_leaders.values():
+            leaders.setdefault(leader, len(leaders))
+
+        self.buffer.append(TAG_LEADER_MAP)
+        self.varint(len(leaders))
+        for leader in leaders:
+            self.value(leader)
+        self.varint(len(slot_leaders))
+        previous = 0
+        for slot, leader in slot_leaders.items():
+            delta = slot - previous
+            self.varint(delta << 1 if delta >= 0 else ((-delta) << 1) - 1)
+            self.varint(leaders[leader])
+            previous = slot
+
+
+class _Reader:
+    def __init__(self, data: bytes, offset: int = 0):
+        self.view = memoryview(data)
+        self.offset = offset
+
+    def byte(self) -> int:
+        if self.offset >= len(self.view):
+            raise WireError("Truncated frame")
+        value = self.view[self.offset]
+        self.offset += 1
+        return value
+
+    def varint(self) -> int:
+        result = shift = 0
+        while True:
+            byte = self.byte()
+            result |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                return result
+            shift += 7
+            if shift > 70:
+                raise WireError("Varint too long")
+
+    def _zigzag(self) -> int:
+        raw = self.varint()
+        return (raw >> 1) if not raw & 1 else -((raw + 1) >> 1)
+
+    def raw(self, length: int) -> bytes:
+        end = self.offset + length
+        if end > len(self.view):
+            raise WireError("Truncated frame")
+        data = self.view[self.offset:end].tobytes()
+        self.offset = end
+        return data
+
+    def blob(self) -> bytes:
+        return self.raw(self.varint())
+
+    def text(self) -> str:
+        return self.blob().decode()
+
+    def rest(self) -> bytes:
+        return self.raw(len(self.view) - self.offset)
+
+    def value(self) -> Any:
+        tag = self.byte()
+        if tag == TAG_NONE:
+            return None
+        if tag == TAG_FALSE:
+            return False
+        if tag == TAG_TRUE:
+            return True
+        if tag == TAG_INT:
+            return self._zigzag()
+        if tag == TAG_FLOAT:
+            return _DOUBLE.unpack(self.raw(_DOUBLE.size))[0]
+        if tag == TAG_STR:
+            return self.text()
+        if tag == TAG_KEY:
+            return _der_to_pem(self.blob())
+        if tag == TAG_HEX:
+            return self.blob().hex()
+        if tag == TAG_LIST:
+            return [self.value() for _ in range(self.varint())]
+        if tag == TAG_DICT:
+            result = {}
+            for _ in range(self.varint()):
+                key = self.value()
+                result[key] = self.value()
+            return result
+        if tag == TAG_LEADER_MAP:
+            leaders = [self.value() for _ in range(self.varint())]
+            slot_leaders = {}
+            slot = 0
+            for _ in range(self.varint()):
+                slot += self._zigzag()
+                index = self.varint()
+                if index >= len(leaders):
+                    raise WireError("Leader index out of range")
+                slot_leaders[slot] = leaders[index]
+            return slot_leaders
+        raise WireError(f"Unknown value tag {tag}")
+
+
+# CRDS values
+
+def _write_crds_value(writer: _Writer, crds_value: CrdsValue):
+    type_id = DATA_TYPE_IDS.get(crds_value.data_type, 0)
+    writer.varint(type_id)
+    if not type_id:
+        writer.text(crds_value.data_type)
+    writer.value(crds_value.public_key)
+    writer.value(crds_value.wallclock)
+    writer.value(crds_value.signature)
+
+    data = crds_value.data
+    if type_id and is_dataclass(data):
+        values = [getattr(data, field.name) for field in fields(data)]
+        writer.varint(len(values))
+        for value in values:
+            writer.value(value)
+    else:
+        writer.varint(0)
+        writer.value(data)
+
+
+def _read_crds_value(reader: _Reader) -> CrdsValue:
+    type_id = reader.varint()
+    data_type = DATA_TYPE_NAMES.get(type_id) if type_id else reader.text()
+    if data_type is None:
+        raise WireError(f"Unknown CRDS data type {type_id}")
+
+    instance = CrdsValue.__new__(CrdsValue)
+    instance.data_type = data_type
+    instance.public_key = reader.value()
+    instance.wallclock = reader.value()
+    instance.signature = reader.value()
+
+    num_fields = reader.varint()
+    if num_fields:
+        data_class = DATA_TYPES[data_type]
+        names = [field.name for field in fields(data_class)]
+        if num_fields != len(names):
+            raise WireError(f"{data_type} field count mismatch")
+        instance.data = data_class(**{name: reader.value() for name in names})
+    else:
+        instance.data = reader.value()
+    return instance
+
+
+def encode_crds_value(crds_value: CrdsValue) -> bytes:
+    """Standalone encoding of one CRDS value (used to size batches)"""
+    writer = _Writer()
+    _write_crds_value(writer, crds_value)
+    return bytes(writer.buffer)
+
+
+def _write_crds_values(writer: _Writer, crds_values: List[Dict]):
+    writer.varint(len(crds_values))
+    for item in crds_values:
+        _write_crds_value(writer, item if isinstance(item, CrdsValue) else CrdsValue.from_dict(item))
+
+
+def _read_crds_values(reader: _Reader) -> List[Dict]:
+    return [_read_crds_value(reader).to_dict() for _ in range(reader.varint())]
+
+
+# Messages
+
+def _header(writer: _Writer, message_type: int):
+    writer.buffer += MAGIC
+    writer.buffer.append(WIRE_VERSION)
+    writer.buffer.append(message_type)
+
+
+def encode_message(message: Any) -> bytes:
+    """Encode a gossip message dataclass as one binary frame"""
+    writer = _Writer()
+    if isinstance(message, PushMessage):
+        _header(writer, MSG_PUSH)
+        writer.value(message.sender_public_key)
+        _write_crds_values(writer, message.crds_values)
+    elif isinstance(message, PullRequest):
+        _header(writer, MSG_PULL_REQUEST)
+        writer.value(message.sender_public_key)
+        writer.blob(message.bloom_filter_data)
+        writer.varint(message.mask_bits)
+        writer.varint(message.partition)
+    elif isinstance(message, PullResponse):
+        _header(writer, MSG_PULL_RESPONSE)
+        writer.value(message.sender_public_key)
+        writer.value(message.requester_public_key)
+        writer.value(message.request_id)
+        _write_crds_values(writer, message.crds_values)
+    elif isinstance(message, PruneMessage):
+        _header(writer, MSG_PRUNE)
+        writer.value(message.sender_public_key)
+        writer.value(message.target_public_key)
+        writer.value(message.reason)
+        writer.value(list(message.origins))
+    else:
+        raise WireError(f"Not a gossip message: {type(message).__name__}")
+    writer.value(message.timestamp)
+    writer.value(message.message_id)
+    return bytes(writer.buffer)
+
+
+def is_wire_frame(data: bytes) -> bool:
+    return len(data) >= _HEADER_SIZE and data[:len(MAGIC)] == MAGIC
+
+
+def frame_type(data: bytes) -> int:
+    if not is_wire_frame(data):
+        raise WireError("Not a gossip wire frame")
+    if data[len(MAGIC)] != WIRE_VERSION:
+        raise WireError(f"Unsupported wire version {data[len(MAGIC)]}")
+    return data[len(MAGIC) + 1]
+
+
+def decode_message(data: bytes) -> Any:
+    """Decode a complete (non-chunk) frame back into its message dataclass"""
+    message_type = frame_type(data)
+    reader = _Reader(data, _HEADER_SIZE)
+    if message_type == MSG_PUSH:
+        sender = reader.value()
+        crds_values = _read_crds_values(reader)
+        return PushMessage(sender, crds_values, reader.value(), reader.value())
+    if message_type == MSG_PULL_REQUEST:
+        sender = reader.value()
+        bloom_filter_data = reader.blob()
+        mask_bits = reader.varint()
+        partition = reader.varint()
+        return PullRequest(sender, bloom_filter_data, reader.value(), reader.value(), mask_bits, partition)
+    if message_type == MSG_PULL_RESPONSE:
+        sender = reader.value()
+        requester = reader.value()
+        request_id = reader.value()
+        crds_values = _read_crds_values(reader)
+        return PullResponse(sender, requester, crds_values, reader.value(), reader.value(), request_id)
+    if message_type == MSG_PRUNE:
+        sender = reader.value()
+        target = reader.value()
+        reason = reader.value()
+        origins = reader.value()
+        return PruneMessage(sender, target, reason, reader.value(), reader.value(), origins)
+    raise WireError(f"Unknown message type {message_type}")
+
+
+# Chunking
+
+def chunk_frame(data: bytes, max_datagram_bytes: int) -> List[bytes]:
+    """Split an encoded message into datagrams no larger than max_datagram_bytes"""
+    if len(data) <= max_datagram_bytes:
+        return [data]
+
+    # Header, chunk id and two varints of at most 2 bytes each (MAX_CHUNKS)
+    room = max_datagram_bytes - (_HEADER_SIZE + _CHUNK_ID_SIZE + 4)
+    if room <= 0:
+        raise WireError("Datagram budget too small for chunking")
+    count = -(-len(data) // room)
+    if count > MAX_CHUNKS:
+        raise WireError(f"Message needs {count} chunks (max {MAX_CHUNKS})")
+
+    chunk_id = os.urandom(_CHUNK_ID_SIZE)
+    frames = []
+    for index in range(count):
+        writer = _Writer()
+        _header(writer, MSG_CHUNK)
+        writer.buffer += chunk_id
+        writer.varint(index)
+        writer.varint(count)
+        writer.buffer += data[index * room:(index + 1) * room]
+        frames.append(bytes(writer.buffer))
+    return frames
+
+
+class _PendingChunks:
+    def __init__(self, count: int):
+        self.count = count
+        self.parts: Dict[int, bytes] = {}
+        self.size = 0
+        self.first_seen = time.time()
+
+
+class ChunkAssembler:
+    """
+    Bounded reassembly of chunked gossip frames
+
+    Partial messages are keyed by (sender address, chunk id) and dropped
+    after ``ttl_seconds`` or, oldest first, when more than ``max_pending``
+    messages or ``max_bytes`` of parts are held.
+    """
+
+    def __init__(self, max_pending: int = 256, max_bytes: int = 16 * 1024 * 1024, ttl_seconds: float = 10.0):
+        self.max_pending = max_pending
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.pending: Dict[Tuple[Any, bytes], _PendingChunks] = {}
+        self.pending_bytes = 0
+        self.stats = {
+            'chunks_received': 0,
+            'messages_reassembled': 0,
+            'messages_expired': 0
+        }
+
+    def add(self, data: bytes, addr: Any = None) -> Optional[bytes]:
+        """Take one CHUNK frame; returns the whole message once every part arrived"""
+        if frame_type(data) != MSG_CHUNK:
+            raise WireError("Not a chunk frame")
+        reader = _Reader(data, _HEADER_SIZE)
+        chunk_id = reader.raw(_CHUNK_ID_SIZE)
+        index = reader.varint()
+        count = reader.varint()
+        if not 0 < count <= MAX_CHUNKS or index >= count:
+            raise WireError("Bad chunk index")
+        part = reader.rest()
+        self.stats['chunks_received'] += 1
+
+        self._expire()
+        key = (addr, chunk_id)
+        pending = self.pending.get(key)
+        if pending is None:
+            pending = self.pending[key] = _PendingChunks(count)
+        elif pending.count != count:
+            raise WireError("Chunk count mismatch")
+
+        if index not in pending.parts:
+            pending.parts[index] = part
+            pending.size += len(part)
+            self.pending_bytes += len(part)
+
+        if len(pending.parts) == pending.count:
+            self._drop(key)
+            self.stats['messages_reassembled'] += 1
+            return b''.join(pending.parts[i] for i in range(pending.count))
+
+        self._enforce_limits()
+        return None
+
+    def _drop(self, key):
+        pending = self.pending.pop(key, None)
+        if pending is not None:
+            self.pending_bytes -= pending.size
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl_seconds
+        for key in [key for key, pending in self.pending.items() if pending.first_seen < cutoff]:
+            self._drop(key)
+            self.stats['messages_expired'] += 1
+
+    def _enforce_limits(self):
+        while self.pending and (len(self.pending) > self.max_pending or self.pending_bytes > self.max_bytes):
+            self._drop(next(iter(self.pending)))
+            self.stats['messages_expired'] += 1
@@ -13,13 +13,14 @@ Examples:
     python leader_monitor.py            # Default: monitor nodes 11000-11004
 """
 
-import requests
 import json
 import time
 import sys
 from datetime import datetime, timezone
 from typing import Dict, List, Optional
 
+from blockchain.utils.node_client import NodeClientError, get_node_client
+
 class LeaderMonitor:
     def __init__(self, base_port: int = 11000, num_nodes: int = 5):
         self.base_port = base_port
@@ -32,26 +33,36 @@ class LeaderMonitor:
     
     def query_node(self, port: int, endpoint: str, timeout: int = 3) -> Optional[Dict]:
         """Query a specific node endpoint with error handling"""
+        return self.query_nodes([port], endpoint, timeout)[port]
+    
+    def query_nodes(self, ports: List[int], endpoint: str, timeout: int = 3) -> Dict[int, Dict]:
+        """Query the same endpoint on several nodes concurrently; port -> result or {"error": ...}"""
+        responses = get_node_client().get_many([self.get_node_url(port, endpoint) for port in ports], timeout=timeout)
+        return {port: self._parse_response(response) for port, response in zip(ports, responses)}
+    
+    @staticmethod
+    def _parse_response(response) -> Dict:
+        if isinstance(response, NodeClientError):
+            return {"error": f"Connection failed: {str(response)}"}
+        if response.status_code != 200:
+            return {"error": f"HTTP {response.status_code}"}
         try:
-            url = self.get_node_url(port, endpoint)
-            response = requests.get(url, timeout=timeout)
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return {"error": f"HTTP {response.status_code}"}
-        except requests.exceptions.RequestException as e:
-            return {"error": f"Connection failed: {str(e)}"}
+            return response.json()
+        except ValueError as e:
+            return {"error": f"Invalid response: {str(e)}"}
     
     def get_current_leader_status(self) -> Dict:
         """Get current leader status from all nodes"""
         results = {}
+        current_leaders = self.query_nodes(self.node_ports, "/leader/current/")
+        quantum_selections = self.query_nodes(self.node_ports, "/leader/quantum-selection/")
         
         for port in self.node_ports:
             node_id = f"Node_{port}"
             
             # Get current leader info
-            current_leader = self.query_node(port, "/leader/current/")
-            quantum_selection = self.query_node(port, "/leader/quantum-selection/")
+            current_leader = current_leaders[port]
+            quantum_selection = quantum_selections[port]
             
             if current_leader and "error" not in current_leader:
                 leader_info = current_leader.get("current_leader_info", {})
@@ -82,12 +93,13 @@ class LeaderMonitor:
     def get_upcoming_leaders_status(self) -> Dict:
         """Get upcoming leaders information from all nodes"""
         results = {}
+        all_upcoming = self.query_nodes(self.node_ports, "/leader/upcoming/")
         
         for port in self.node_ports:
             node_id = f"Node_{port}"
             
             # Get upcoming leaders info
-            upcoming_leaders = self.query_node(port, "/leader/upcoming/")
+            upcoming_leaders = all_upcoming[port]
             
             if upcoming_leaders and "error" not in upcoming_leaders:
                 upcoming_list = upcoming_leaders.get("upcoming_leaders", [])
@@ -18,7 +18,6 @@ Usage:
 
 import json
 import time
-import requests
 import argparse
 import os
 import csv
@@ -29,6 +28,11 @@ import threading
 import signal
 import sys
 
+# Add blockchain module to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from blockchain.utils.node_client import NodeClientError, get_node_client
+
 
 @dataclass
 class NodeMetrics:
@@ -99,32 +103,38 @@ class BlockchainMonitor:
     
     def collect_node_metrics(self, node_id: int) -> Optional[NodeMetrics]:
         """Collect metrics from a single node"""
+        return self.collect_all_node_metrics([node_id])[node_id]
+    
+    def collect_all_node_metrics(self, node_ids: List[int]) -> Dict[int, NodeMetrics]:
+        """Collect metrics from several nodes, querying every endpoint of every node concurrently"""
+        urls = []
+        for node_id in node_ids:
+            api_port = self.base_api_port + node_id
+            urls.append(f"http://localhost:{api_port}/api/v1/blockchain/")
+            urls.append(f"http://localhost:{api_port}/api/v1/blockchain/quantum-metrics/")
+        responses = get_node_client().get_many(urls, timeout=3)
+        
+        return {
+            node_id: self._build_node_metrics(node_id, responses[2 * index], responses[2 * index + 1])
+            for index, node_id in enumerate(node_ids)
+        }
+    
+    def _build_node_metrics(self, node_id: int, blockchain_response, quantum_response) -> NodeMetrics:
         api_port = self.base_api_port + node_id
         node_port = 8000 + node_id
         
         try:
-            # Test basic connectivity
-            start_time = time.time()
-            blockchain_response = requests.get(
-                f"http://localhost:{api_port}/api/v1/blockchain/", 
-                timeout=3
-            )
-            response_time = time.time() - start_time
+            if isinstance(blockchain_response, NodeClientError):
+                raise blockchain_response
             
             if blockchain_response.status_code == 200:
                 blockchain_data = blockchain_response.json()
                 block_count = len(blockchain_data.get('blocks', []))
                 
-                # Get quantum metrics
-                quantum_response = requests.get(
-                    f"http://localhost:{api_port}/api/v1/blockchain/quantum-metrics/",
-                    timeout=3
-                )
-                
                 active_nodes = 0
                 probe_count = 0
                 
-                if quantum_response.status_code == 200:
+                if not isinstance(quantum_response, NodeClientError) and quantum_response.status_code == 200:
                     quantum_data = quantum_response.json()
                     active_nodes = quantum_data.get('active_nodes', 0)
                     probe_count = quantum_data.get('probe_count', 0)
@@ -137,7 +147,7 @@ class BlockchainMonitor:
                     block_count=block_count,
                     active_nodes=active_nodes,
                     probe_count=probe_count,
-                    response_time=response_time,
+                    response_time=blockchain_response.elapsed,
                     last_updated=datetime.now()
                 )
             else:
@@ -249,8 +259,7 @@ class BlockchainMonitor:
     def update_metrics(self):
         """Update all metrics"""
         # Collect node metrics
-        for node_id in range(self.num_nodes):
-            self.node_metrics[node_id] = self.collect_node_metrics(node_id)
+        self.node_metrics.update(self.collect_all_node_metrics(list(range(self.num_nodes))))
         
         # Collect network metrics
         network_metrics = self.collect_network_metrics()
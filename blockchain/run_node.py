@@ -70,6 +70,13 @@ if __name__ == "__main__":
         default="enhanced",
         help="P2P communication mode: 'enhanced' for Bitcoin-style INV/GETDATA, 'legacy' for direct broadcast (default: enhanced).",
     )
+    parser.add_argument(
+        "--data_dir",
+        required=False,
+        type=str,
+        default=None,
+        help="Directory for the on-disk block ledger and account state (optional; both are kept in memory without it).",
+    )
     args = parser.parse_args()
 
     # Set up signal handlers for graceful shutdown
@@ -106,7 +113,7 @@ if __name__ == "__main__":
         })
 
         # Create and start the node
-        node = Node(args.ip, args.node_port, args.key_file)
+        node = Node(args.ip, args.node_port, args.key_file, data_dir=args.data_dir)
         
         # Store node reference for cleanup in signal handler
         signal_handler.node = node
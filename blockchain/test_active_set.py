@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test the stake- and health-weighted gossip active set.
+
+Samples are drawn without replacement in proportion to each peer's
+weight, peers that lose their weight leave the set at once, and a
+rotation swaps only a fraction of the set.
+"""
+
+import random
+from collections import Counter
+
+from gossip_protocol.active_set import ActiveSetManager, _WeightTree, health_score, stake_weight
+from gossip_protocol.crds import HealthInfo
+
+
+def _manager(peers=200, target_size=8, seed=3):
+    manager = ActiveSetManager(target_size, rotation_fraction=0.25, rng=random.Random(seed))
+    for i in range(peers):
+        manager.update_peer(f"peer_{i:03d}", stake=float(i))
+    return manager
+
+
+def test_weights_from_stake_and_health():
+    assert stake_weight(0) == 1.0
+    assert stake_weight(1) == 4.0
+    assert stake_weight(1000) == 121.0  # 1000 has 10 bits
+    assert health_score(None) == 1.0
+    assert health_score(HealthInfo("peer", False, 0.0, 0.0, 0, 100.0, 0.0)) == 0.0
+    assert health_score(HealthInfo("peer", True, 0.0, 0.0, 1, 50.0, 0.0)) == 0.25
+
+
+def test_weight_tree_finds_prefix_sums_after_growing():
+    tree = _WeightTree(capacity=4)
+    weights = [3, 0, 5, 2]
+    for index, weight in enumerate(weights):
+        tree.set(index, weight)
+    tree.grow()
+    tree.set(6, 4)
+    weights += [0, 0, 4, 0]
+
+    assert tree.total() == sum(weights)
+    for target in range(sum(weights)):
+        running, expected = 0, None
+        for index, weight in enumerate(weights):
+            running += weight
+            if running > target:
+                expected = index
+                break
+        assert tree.find(target) == expected
+
+
+def test_samples_are_distinct_weighted_and_skip_excluded_peers():
+    manager = _manager()
+    manager.update_peer("peer_000", health=0.0)
+    total = manager.tree.total()
+    excluded = {"peer_199", "peer_198"}
+
+    counts = Counter()
+    for _ in range(300):
+        drawn = manager.sample(8, exclude=excluded)
+        assert len(drawn) == len(set(drawn)) == 8
+        counts.update(drawn)
+    assert manager.tree.total() == total  # Weights are restored after every draw
+    assert not excluded & set(counts)
+    assert "peer_000" not in counts
+    # Mean draws per peer rise with the stake bucket weight
+    heavy = sum(counts[f"peer_{i:03d}"] for i in range(128, 198)) / 70  # Weight 81
+    light = sum(counts[f"peer_{i:03d}"] for i in range(1, 4)) / 3  # Weights 4 and 9
+    assert heavy > 3 * light
+
+
+def test_refill_and_rotate_keep_the_set_full():
+    manager = _manager()
+    active = manager.active
+    assert len(manager.refill()) == 8
+
+    member = next(iter(active))
+    manager.update_peer(member, health=0.0)
+    assert member not in active
+    assert len(manager.refill()) == 8
+
+    before = set(active)
+    assert manager.rotate() is active
+    assert len(active) == 8
+    assert len(before - active) == 2  # A quarter of the set
+    assert manager.stats['peers_rotated_out'] == 2
+
+
+def test_removed_peers_free_their_slot():
+    manager = _manager(peers=100)
+    assert manager.tree.capacity == 128
+    manager.refill()
+    peer = next(iter(manager.active))
+    slot = manager.slots[peer]
+    manager.remove_peer(peer)
+    assert peer not in manager and peer not in manager.active
+    assert manager.weight(peer) == 0.0
+
+    manager.update_peer("newcomer", stake=5.0)
+    assert manager.slots["newcomer"] == slot
+    assert len(manager) == 100
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-q"])
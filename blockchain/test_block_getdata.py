@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test serving blocks by hash for GETDATA.
+
+The chain's hash index follows every append and chain replacement, and
+blocks are encoded once into a bounded LRU whose entries embed into
+BLOCK_DATA frames exactly as if the block itself had been encoded.
+"""
+
+from blockchain.block import Block
+from blockchain.p2p.codec import WireCodec
+from blockchain.p2p.message import Message, MessageType
+from blockchain.p2p.socket_connector import SocketConnector
+from blockchain.transaction.transaction import Transaction
+from blockchain.utils.helpers import BlockchainUtils
+
+
+def _chain(length=10):
+    from blockchain.blockchain import Blockchain
+    chain = Blockchain()
+    for height in range(1, length):
+        transactions = [Transaction(f"sender_{height}", f"receiver_{i}", float(i), "TRANSFER") for i in range(3)]
+        chain._append_block(Block(transactions, chain.block_hashes[-1], "proposer", height))
+    return chain
+
+
+def _hash(block):
+    return BlockchainUtils.hash(block.payload()).hex()
+
+
+def test_hash_index_follows_appends_and_replacement():
+    chain = _chain()
+    for height, block_hash in enumerate(chain.block_hashes):
+        assert chain.block_index[block_hash] == height
+        assert chain.get_block_by_hash(block_hash) is chain.blocks[height]
+    assert chain.get_block_by_hash("unknown") is None
+
+    old_tip = chain.block_hashes[-1]
+    chain.get_encoded_block(old_tip)
+    replacement = [chain.blocks[height] for height in range(4)]
+    chain.replace_blocks(replacement)
+    assert old_tip not in chain.block_index
+    assert not chain.encoded_blocks
+    assert [chain.block_index[_hash(block)] for block in replacement] == list(range(4))
+
+
+def test_encoded_blocks_are_cached_in_a_bounded_lru():
+    chain = _chain()
+    chain.ENCODED_BLOCK_CACHE_SIZE = 3
+    hashes = list(chain.block_hashes)
+
+    first = chain.get_encoded_block(hashes[1])
+    assert chain.get_encoded_block(hashes[1]) is first
+    for block_hash in hashes[2:5]:
+        chain.get_encoded_block(block_hash)
+    assert list(chain.encoded_blocks) == hashes[2:5]
+
+    chain.get_encoded_block(hashes[2])  # Most recently used again
+    chain.get_encoded_block(hashes[5])
+    assert list(chain.encoded_blocks) == [hashes[4], hashes[2], hashes[5]]
+
+    assert chain.get_encoded_block(hashes[6], cache=False) is not None
+    assert hashes[6] not in chain.encoded_blocks
+    assert chain.get_encoded_block("unknown") is None
+
+
+def test_cached_encodings_embed_into_block_data_frames():
+    chain = _chain()
+    connector = SocketConnector("127.0.0.1", 10001)
+    blocks = [chain.blocks[height] for height in (2, 3, 4)]
+    encoded = [chain.get_encoded_block(_hash(block)) for block in blocks]
+
+    message = Message(connector, MessageType.BLOCK_DATA, encoded)
+    direct = Message(connector, MessageType.BLOCK_DATA, blocks)
+    direct.timestamp, direct.message_id = message.timestamp, message.message_id
+    frame = WireCodec.encode(message)
+    assert frame == WireCodec.encode(direct)
+
+    decoded = WireCodec.decode(frame)
+    assert [block.to_dict() for block in decoded.data] == [block.to_dict() for block in blocks]
+    assert [_hash(block) for block in decoded.data] == [_hash(block) for block in blocks]
+
+
+if __name__ == "__main__":
+    test_hash_index_follows_appends_and_replacement()
+    test_encoded_blocks_are_cached_in_a_bounded_lru()
+    test_cached_encodings_embed_into_block_data_frames()
+    print("All block GETDATA tests passed")
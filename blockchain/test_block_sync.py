@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Test headers-first block sync.
+
+A node catches up from several peers by accepting linked headers, then
+downloading bodies in ranges spread over the peers. Bodies that do not
+match their header, and ranges a peer never answers, are fetched again
+from another peer, and the chain ends up identical to the peers'.
+"""
+
+import time
+from collections import deque
+from types import SimpleNamespace
+
+from blockchain.p2p.block_sync import BlockSync
+from blockchain.p2p.codec import WireCodec
+from blockchain.p2p.message import BlockHeader, HeadersMessage, MessageType
+from blockchain.p2p.socket_connector import SocketConnector
+from blockchain.transaction.transaction_pool import TransactionPool
+from blockchain.transaction.wallet import Wallet
+
+CLIENT = ("127.0.0.1", 10000)
+
+
+def _blockchain():
+    from blockchain.blockchain import Blockchain
+    return Blockchain()
+
+
+def _extend(chain, wallet, count):
+    for _ in range(count):
+        height = len(chain.blocks)
+        chain._append_block(wallet.create_block([], chain.block_hashes[-1], height))
+
+
+class _Network:
+    """Carries encoded frames between in-process nodes, one at a time on the test thread"""
+
+    def __init__(self):
+        self.frames = deque()
+        self.nodes = {}
+        self.sent = []  # (from, to, message type)
+        self.drop = lambda sender, message: False
+        self.alter = lambda sender, message: None
+
+    def add_node(self, address, chain, peers=()):
+        node = SimpleNamespace(blockchain=chain, transaction_pool=TransactionPool(), seen_blocks=set())
+        node.p2p = SimpleNamespace(
+            all_nodes=[SimpleNamespace(host=host, port=port) for host, port in peers],
+            socket_connector=SocketConnector(*address),
+            send_to_node=lambda peer, frame: self.frames.append((address, (peer.host, peer.port), frame))
+        )
+        node.block_sync = BlockSync(node)
+        self.nodes[address] = node
+        return node
+
+    def run_until(self, condition, timeout=10.0):
+        deadline = time.time() + timeout
+        while not condition() and time.time() < deadline:
+            if not self.frames:
+                time.sleep(0.01)
+                continue
+            sender, target, frame = self.frames.popleft()
+            message = WireCodec.decode(frame)
+            self.sent.append((sender, target, message.message_type))
+            if self.drop(sender, message):
+                continue
+            self.alter(sender, message)
+            handler = {
+                MessageType.GETHEADERS: 'handle_getheaders',
+                MessageType.HEADERS: 'handle_headers',
+                MessageType.GETBLOCKS: 'handle_getblocks',
+                MessageType.BLOCKS: 'handle_blocks'
+            }[message.message_type]
+            getattr(self.nodes[target].block_sync, handler)(SimpleNamespace(host=sender[0], port=sender[1]),
+                                                             message.data)
+        return condition()
+
+
+def _cluster(peer_count=2, length=150):
+    source = _blockchain()
+    _extend(source, Wallet(), length - 1)
+    network = _Network()
+    peers = [("127.0.0.1", 10001 + i) for i in range(peer_count)]
+    for address in peers:
+        network.add_node(address, source)
+    client = network.add_node(CLIENT, _blockchain(), peers)
+    assert client.blockchain.block_hashes[0] == source.block_hashes[0]
+    return network, client, source, peers
+
+
+def _synced(client, source):
+    return lambda: len(client.blockchain.blocks) == len(source.blocks) and not client.block_sync.active
+
+
+def test_sync_spreads_ranges_over_peers():
+    network, client, source, peers = _cluster()
+    client.block_sync.start()
+    assert network.run_until(_synced(client, source))
+
+    assert list(client.blockchain.block_hashes) == list(source.block_hashes)
+    stats = client.block_sync.get_stats()
+    assert stats['headers_accepted'] == len(source.blocks) - 1
+    assert stats['blocks_applied'] == len(source.blocks) - 1
+    for peer in peers:
+        assert (CLIENT, peer, MessageType.GETBLOCKS) in network.sent
+
+
+def test_bad_bodies_are_fetched_again_from_another_peer():
+    network, client, source, peers = _cluster()
+
+    def tamper(sender, message):
+        if sender == peers[0] and message.message_type == MessageType.BLOCKS and message.data.blocks:
+            message.data.blocks[-1].signature = "00" * 64
+    network.alter = tamper
+
+    client.block_sync.start()
+    assert network.run_until(_synced(client, source))
+    assert list(client.blockchain.block_hashes) == list(source.block_hashes)
+    assert client.block_sync.stats['bodies_rejected'] > 0
+
+
+def test_unanswered_ranges_time_out_and_move_to_another_peer():
+    network, client, source, peers = _cluster(length=80)
+    client.block_sync.RANGE_TIMEOUT = 0.2
+    network.drop = lambda sender, message: sender == peers[1] and message.message_type == MessageType.BLOCKS
+
+    client.block_sync.start()
+    assert network.run_until(_synced(client, source))
+    assert list(client.blockchain.block_hashes) == list(source.block_hashes)
+    assert client.block_sync.stats['ranges_timed_out'] > 0
+
+
+def test_single_peer_is_retried_after_a_timeout():
+    network, client, source, peers = _cluster(peer_count=1, length=80)
+    client.block_sync.RANGE_TIMEOUT = 0.2
+    client.block_sync.PEER_BACKOFF = 0.1
+    dropped = []
+
+    def drop_first_blocks(sender, message):
+        if message.message_type == MessageType.BLOCKS and not dropped:
+            dropped.append(message.data.start_height)
+            return True
+        return False
+    network.drop = drop_first_blocks
+
+    client.block_sync.start()
+    assert network.run_until(_synced(client, source))
+    assert list(client.blockchain.block_hashes) == list(source.block_hashes)
+    assert client.block_sync.stats['ranges_timed_out'] == 1
+    assert dropped == [1]
+
+
+def test_sync_stops_when_no_peer_covers_a_pending_range():
+    network, client, source, peers = _cluster(peer_count=1, length=40)
+    sync = client.block_sync
+    sync.start()
+    network.frames.clear()
+
+    headers = source.get_block_headers(1, 39)
+    sync.handle_headers(SimpleNamespace(host=peers[0][0], port=peers[0][1]), HeadersMessage(headers, 40))
+    network.frames.clear()  # The ranges never reach the peer
+    with sync.lock:
+        sync.peer_heights.clear()
+        sync.pending_ranges.extendleft(reversed(list(sync.in_flight)))
+        sync.in_flight.clear()
+        sync.lock.notify_all()
+    assert network.run_until(lambda: not sync.active, timeout=5.0)
+    assert sync.get_stats()['ranges_pending'] > 0
+
+    sync.start()  # A new round starts again from the local tip
+    assert network.run_until(_synced(client, source))
+    assert list(client.blockchain.block_hashes) == list(source.block_hashes)
+
+
+def test_headers_that_do_not_link_are_rejected():
+    network, client, source, peers = _cluster(peer_count=1, length=10)
+    sync = client.block_sync
+    sync.start()
+    network.frames.clear()
+
+    headers = source.get_block_headers(1, 9)
+    headers[4] = BlockHeader(5, "f" * 64, "not the previous hash", headers[4].forger, 0.0, 0)
+    sync.handle_headers(SimpleNamespace(host=peers[0][0], port=peers[0][1]), HeadersMessage(headers, 10))
+    assert sync.next_header_height == 5
+    assert sync.stats['headers_accepted'] == 4
+    assert sync.stats['headers_rejected'] == 1
+    sync.active = False
+
+
+def test_legacy_chain_request_gets_a_bounded_block_list():
+    network, client, source, peers = _cluster(peer_count=1, length=30)
+    server = network.nodes[peers[0]].block_sync
+    server.LEGACY_CHAIN_BLOCKS = 20
+    server.handle_blockchain_request(SimpleNamespace(host=CLIENT[0], port=CLIENT[1]))
+
+    sender, target, frame = network.frames.popleft()
+    assert (sender, target) == (peers[0], CLIENT)
+    message = WireCodec.decode(frame)
+    assert message.message_type == MessageType.BLOCKCHAIN
+    blocks = message.data.blocks
+    assert [block.block_count for block in blocks] == list(range(20))
+    assert [block.to_dict() for block in blocks] == [block.to_dict() for block in source.blocks[:20]]
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-q"])
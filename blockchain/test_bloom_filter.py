@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test the packed Bloom filter and the partitioned CRDS pull filters.
+
+Added items are always found, the false positive rate stays near its
+target, the vectorised and scalar paths agree bit for bit, and pull
+filters split the hash space so that every hash falls in exactly one.
+"""
+
+import hashlib
+
+import pytest
+
+from gossip_protocol import bloom_filter
+from gossip_protocol.bloom_filter import BloomFilter, build_pull_filters, hash_partition, item_digest
+
+
+def _hashes(count, salt="value"):
+    return [hashlib.sha256(f"{salt}-{i}".encode()).hexdigest() for i in range(count)]
+
+
+def test_no_false_negatives_and_bounded_false_positives():
+    bloom = BloomFilter(expected_elements=2000, false_positive_rate=0.01)
+    members = _hashes(2000)
+    bloom.add_multiple(members)
+    assert all(bloom.contains_multiple(members))
+    assert all(bloom.contains(member) for member in members[:100])
+
+    others = _hashes(20000, salt="other")
+    false_positives = sum(bloom.contains_multiple(others))
+    assert false_positives / len(others) < 0.02
+
+
+def test_vectorised_and_scalar_paths_agree(monkeypatch):
+    items = _hashes(500)
+    probes = items[:50] + _hashes(500, salt="probe")
+    vectorised = BloomFilter(expected_elements=500, false_positive_rate=0.1)
+    vectorised.add_multiple(items)
+    vectorised_hits = vectorised.contains_multiple(probes)
+
+    monkeypatch.setattr(bloom_filter, "NUMPY_AVAILABLE", False)
+    scalar = BloomFilter(expected_elements=500, false_positive_rate=0.1)
+    scalar.add_multiple(items)
+    assert scalar.bits == vectorised.bits
+    assert scalar.contains_multiple(probes) == vectorised_hits
+    assert vectorised_hits == [scalar.contains_digest(item_digest(probe)) for probe in probes]
+
+
+def test_serialization_round_trip():
+    bloom = BloomFilter(expected_elements=100)
+    bloom.add_multiple(_hashes(100))
+    decoded = BloomFilter.from_bytes(bloom.to_bytes())
+    assert bytes(decoded.bits) == bytes(bloom.bits)
+    assert decoded.num_hash_functions == bloom.num_hash_functions
+    assert all(decoded.contains_multiple(_hashes(100)))
+    decoded.add("new item")  # Received filters become writable on demand
+    assert decoded.contains("new item")
+
+
+@pytest.mark.parametrize("data", [
+    b"XX" + bytes(12),
+    BloomFilter(expected_elements=100).to_bytes()[:-1],
+])
+def test_malformed_filters_are_rejected(data):
+    with pytest.raises(ValueError):
+        BloomFilter.from_bytes(data)
+
+
+def test_pull_filters_partition_the_hash_space():
+    hashes = _hashes(20000)
+    filters = build_pull_filters(hashes, max_filter_bytes=1024)
+    mask_bits = filters[0].mask_bits
+    assert mask_bits > 0 and len(filters) == 1 << mask_bits
+    assert all(len(pull_filter.bloom.bits) <= 1024 for pull_filter in filters)
+    for value_hash in hashes[:500]:
+        covering = [pull_filter for pull_filter in filters if pull_filter.covers(value_hash)]
+        assert len(covering) == 1
+        assert covering[0].partition == hash_partition(value_hash, mask_bits)
+        assert covering[0].bloom.contains(value_hash)
+
+
+def test_small_tables_use_one_filter():
+    filters = build_pull_filters(_hashes(10))
+    assert len(filters) == 1 and filters[0].mask_bits == 0
+    assert filters[0].covers("f" * 64)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test the CRDS insertion ordinals and secondary indexes.
+
+Every insert or update gets a new ordinal, so reading from a cursor
+returns exactly what changed since; the type, origin and hash indexes
+follow every update and removal; and each peer's push cursor means a
+value is pushed to a peer once.
+"""
+
+import asyncio
+import time
+
+from gossip_protocol.crds import CRDS, ContactInfo, CrdsValue, Vote
+from gossip_protocol.gossip_node import GossipNode
+
+
+def _vote(origin, slot, wallclock):
+    return CrdsValue('Vote', Vote(origin, slot, f"block_{slot}", wallclock), origin, wallclock)
+
+
+def _contact(origin, wallclock):
+    return CrdsValue('ContactInfo', ContactInfo(origin, "127.0.0.1", 8000, 8001, 8002, wallclock=wallclock),
+                     origin, wallclock)
+
+
+def test_entries_since_a_cursor_are_the_new_ones_in_order():
+    crds = CRDS("node")
+    for i in range(10):
+        assert crds.insert(_vote(f"origin_{i}", i, 1000.0 + i))
+    entries = crds.get_entries_since(0)
+    assert [value.public_key for _, value in entries] == [f"origin_{i}" for i in range(10)]
+
+    cursor = entries[4][0]
+    assert [value.public_key for _, value in crds.get_entries_since(cursor)] == [f"origin_{i}" for i in range(5, 10)]
+    assert len(crds.get_entries_since(cursor, limit=2)) == 2
+    assert crds.get_entries_since(entries[-1][0]) == []
+
+
+def test_updates_move_a_value_past_the_cursor():
+    crds = CRDS("node")
+    for i in range(5):
+        assert crds.insert(_vote(f"origin_{i}", i, 1000.0))
+    cursor = crds.ordinal
+
+    assert not crds.insert(_vote("origin_1", 1, 999.0))  # Older than what is held
+    assert crds.get_entries_since(cursor) == []
+    assert crds.insert(_vote("origin_1", 7, 1001.0))
+    (ordinal, value), = crds.get_entries_since(cursor)
+    assert value.data.slot == 7 and ordinal == crds.ordinal
+    assert len(crds.entries) == len(crds.table) == 5
+    assert crds.get_newest_items(1)[0] is value
+
+
+def test_indexes_follow_updates_and_removals():
+    crds = CRDS("node")
+    now = time.time()
+    assert crds.insert(_vote("a", 1, now))
+    assert crds.insert(_contact("a", now))
+    assert crds.insert(_vote("b", 1, now - 7200))
+
+    assert {value.data_type for value in crds.get_values_by_origin("a")} == {'Vote', 'ContactInfo'}
+    assert len(crds.by_type['Vote']) == 2
+
+    assert crds.insert(_vote("a", 2, now + 1))
+    assert [value.data.slot for value in crds._values_of_type('Vote') if value.public_key == "a"] == [2]
+    assert crds.get_all_hashes() == {value.get_hash() for value in crds.get_all_values()}
+
+    crds.cleanup_old_entries(max_age_seconds=3600)
+    assert "b" not in crds.by_origin
+    assert len(crds.by_type['Vote']) == 1
+    assert len(crds.value_hashes) == len(crds.ordinals) == len(crds.entries) == len(crds.table)
+    assert sum(len(shard) for shard in crds.shards) == len(crds.table)
+
+
+def test_push_sends_each_value_to_a_peer_once(monkeypatch):
+    node = GossipNode("node", "127.0.0.1", 9000, 9001, 9002)
+    node.known_peers["peer"] = ContactInfo("peer", "127.0.0.1", 9100, 9101, 9102)
+    node.active_gossip_set.add("peer")
+    pushed = []
+    monkeypatch.setattr(node, '_send_message',
+                        lambda target_info, message: pushed.extend(message.crds_values) or True)
+
+    for i in range(20):
+        assert node.crds.insert(_vote(f"origin_{i}", i, 1000.0 + i))
+    asyncio.run(node._perform_push())
+    assert len(pushed) == len(node.crds.table)
+
+    pushed.clear()
+    asyncio.run(node._perform_push())
+    assert pushed == []
+
+    assert node.crds.insert(_vote("origin_3", 30, 2000.0))
+    asyncio.run(node._perform_push())
+    assert [(value['public_key'], value['data']['slot']) for value in pushed] == [("origin_3", 30)]
+
+
+def test_push_resumes_after_a_dropped_send(monkeypatch):
+    node = GossipNode("node", "127.0.0.1", 9000, 9001, 9002)
+    node.known_peers["peer"] = ContactInfo("peer", "127.0.0.1", 9100, 9101, 9102)
+    node.active_gossip_set.add("peer")
+    for i in range(20):
+        assert node.crds.insert(_vote(f"origin_{i}", i, 1000.0 + i))
+
+    monkeypatch.setattr(node, '_send_message', lambda target_info, message: False)
+    asyncio.run(node._perform_push())
+    assert node.push_cursors["peer"] == 0
+
+    pushed = []
+    monkeypatch.setattr(node, '_send_message',
+                        lambda target_info, message: pushed.extend(message.crds_values) or True)
+    asyncio.run(node._perform_push())
+    assert len(pushed) == len(node.crds.table)
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-q"])
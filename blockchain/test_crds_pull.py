@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test partitioned pull requests against the CRDS hash-prefix index.
+
+A partition query returns exactly the values whose hash falls under the
+partition's prefix, whether the partition is wider or narrower than an
+index shard, and pull responses only carry values the requester's filter
+lacks, packed into byte-bounded messages.
+"""
+
+import asyncio
+
+from gossip_protocol.bloom_filter import hash_partition
+from gossip_protocol.crds import CRDS, CRDS_SHARD_BITS, ContactInfo, CrdsValue, Vote
+from gossip_protocol.gossip_node import GossipConfig, GossipNode
+from gossip_protocol.messages import GossipMessageFactory
+from gossip_protocol.wire import encode_message
+
+
+def _votes(count, salt="origin"):
+    return [CrdsValue('Vote', Vote(f"{salt}_{i:04d}", i, f"block_{i}", 1000.0 + i), f"{salt}_{i:04d}")
+            for i in range(count)]
+
+
+def _node(name, port, config=None):
+    return GossipNode(name, "127.0.0.1", port, port + 1, port + 2, config=config)
+
+
+def _capture_sends(monkeypatch, node):
+    sent = []
+    monkeypatch.setattr(node, '_send_message', lambda target_info, message: sent.append(message) or True)
+    return sent
+
+
+def test_partition_entries_match_the_hash_prefix():
+    crds = CRDS("node")
+    for value in _votes(3000):
+        assert crds.insert(value)
+    hashes = {value.get_hash() for value in crds.get_all_values()}
+
+    for mask_bits in (0, 3, CRDS_SHARD_BITS, CRDS_SHARD_BITS + 2):
+        covered = set()
+        for partition in range(1 << mask_bits):
+            entries = crds.get_partition_entries(mask_bits, partition)
+            for value_hash, value in entries:
+                assert value.get_hash() == value_hash
+                assert hash_partition(value_hash, mask_bits) == partition
+            covered.update(value_hash for value_hash, _ in entries)
+        assert covered == hashes
+
+
+def test_batches_stay_within_the_byte_budget():
+    node = _node("node", 9000)
+    values = _votes(200)
+    envelope = GossipMessageFactory.create_push_message(node.public_key, [])
+    batches, consumed = node._batch_by_bytes(values, 1232, 100, envelope_bytes=node._envelope_bytes(envelope))
+
+    assert consumed == len(values)
+    assert [value for batch in batches for value in batch] == values
+    assert len(batches) > 1
+    for batch in batches:
+        assert len(encode_message(GossipMessageFactory.create_push_message(node.public_key, batch))) <= 1232
+
+
+def test_batches_stop_at_the_message_limit():
+    node = _node("node", 9000)
+    batches, consumed = node._batch_by_bytes(_votes(200), 1232, 2)
+    assert len(batches) == 2
+    assert consumed == sum(len(batch) for batch in batches) < 200
+
+
+def test_pull_response_carries_only_values_the_requester_lacks(monkeypatch):
+    config = GossipConfig(pull_filter_max_bytes=128, pull_response_max_messages=1000)
+    responder = _node("responder", 9000, config)
+    requester = _node("requester", 9100, config)
+    responder.known_peers[requester.public_key] = ContactInfo(requester.public_key, "127.0.0.1", 9100, 9101, 9102)
+
+    values = _votes(600)
+    for value in values:
+        assert responder.crds.insert(value)
+    for value in values[:300]:
+        assert requester.crds.insert(value)
+    held = requester.crds.get_all_hashes()
+
+    sent = _capture_sends(monkeypatch, responder)
+    pull_filters = requester._build_pull_filters(0.01)
+    assert len(pull_filters) > 1
+    for crds_filter in pull_filters:
+        request = GossipMessageFactory.create_pull_request(
+            requester.public_key, crds_filter.bloom, crds_filter.mask_bits, crds_filter.partition
+        )
+        asyncio.run(responder._handle_pull_request(request, ("127.0.0.1", 9100)))
+
+    returned = [CrdsValue.from_dict(value) for message in sent for value in message.crds_values]
+    returned_hashes = [value.get_hash() for value in returned]
+    assert len(returned_hashes) == len(set(returned_hashes))
+    assert not held & set(returned_hashes)
+    # Only bloom false positives may be withheld
+    assert len(returned) >= 0.95 * (len(responder.crds.get_all_hashes()) - len(held))
+    for message in sent:
+        assert len(encode_message(message)) <= config.pull_response_max_bytes
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-q"])
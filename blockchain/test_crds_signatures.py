@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test signed CRDS values.
+
+A node with a signing key signs what it originates and only accepts
+values from peers that carry a valid signature from their origin.
+Verified values are cached, so duplicates skip the signature check, but
+a forged copy of a cached value is still rejected. A validator cannot
+sign a vote on behalf of another key to spend that key's stake.
+"""
+
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+from gossip_protocol.crds import CRDS, CrdsValue, Vote
+from gossip_protocol.gossip_node import GossipNode
+
+
+def _keypair(ed25519_key=False):
+    private_key = ed25519.Ed25519PrivateKey.generate() if ed25519_key else ec.generate_private_key(ec.SECP256R1())
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+    return private_key, public_pem
+
+
+def _vote(public_key, slot, signing_key=None, wallclock=None):
+    wallclock = wallclock or time.time()
+    return CrdsValue('Vote', Vote(public_key, slot, f"block_{slot}", wallclock), public_key, wallclock, signing_key)
+
+
+def test_signatures_survive_serialization_and_catch_tampering():
+    for ed25519_key in (False, True):
+        private_key, public_key = _keypair(ed25519_key)
+        value = CrdsValue.from_dict(_vote(public_key, 5, private_key).to_dict())
+        assert value.verify_signature()
+
+        value.data.slot = 6
+        assert not value.verify_signature()
+
+        _, other_key = _keypair(ed25519_key)
+        impostor = _vote(public_key, 5, private_key)
+        impostor.public_key = other_key
+        assert not impostor.verify_signature()
+
+
+def test_signed_table_rejects_unsigned_and_forged_values():
+    node_key, node_public = _keypair()
+    peer_key, peer_public = _keypair()
+    crds = CRDS(node_public, node_key)
+
+    assert not crds.insert(_vote(peer_public, 1))
+    assert not crds.insert(_vote(peer_public, 1, node_key))  # Signed by the wrong key
+    assert crds.insert(_vote(peer_public, 1, peer_key))
+    assert crds.verifier.stats['failed'] == 2
+
+
+def test_local_stand_ins_are_not_gossiped_until_replaced():
+    node_key, node_public = _keypair()
+    peer_key, peer_public = _keypair()
+    crds = CRDS(node_public, node_key)
+
+    wallclock = time.time()
+    assert crds._insert_local('Vote', Vote(peer_public, 1, "block_1", wallclock), peer_public, wallclock)
+    stand_in, = crds.get_values_by_origin(peer_public)
+    assert not crds.is_gossipable(stand_in)
+
+    # The origin's own value replaces the stand-in even at the same wallclock
+    signed = _vote(peer_public, 1, peer_key, wallclock)
+    assert crds.is_newer(signed)
+    assert crds.insert(signed)
+    assert crds.is_gossipable(signed)
+
+    assert crds.insert_vote(Vote(node_public, 2, "block_2", time.time()))
+    own, = crds.get_values_by_origin(node_public)
+    assert own.verify_signature() and crds.is_gossipable(own)
+
+
+def test_duplicates_are_verified_once():
+    node_key, node_public = _keypair()
+    peer_key, peer_public = _keypair()
+    node = GossipNode(node_public, "127.0.0.1", 9000, 9001, 9002, signing_key=node_key)
+    values = [_vote(peer_public, slot, peer_key, 1000.0 + slot) for slot in range(5)]
+    copies = [CrdsValue.from_dict(value.to_dict()) for value in values]
+
+    assert node._insert_received(values + copies) == 5
+    assert node.crds.verifier.stats['verified'] == 5
+
+    verifier = node.crds.verifier
+    assert all(verifier.verify_batch(copies))
+    assert verifier.stats['verified'] == 5 and verifier.stats['cache_hits'] == 5
+
+    forged = CrdsValue.from_dict(values[0].to_dict())
+    forged.data.block_hash = "forged"
+    assert verifier.verify_batch([forged]) == [False]
+
+
+def test_votes_signed_for_another_key_are_rejected():
+    node_key, node_public = _keypair()
+    attacker_key, attacker_public = _keypair()
+    _, victim_public = _keypair()
+    node = GossipNode(node_public, "127.0.0.1", 9000, 9001, 9002, signing_key=node_key)
+    node.vote_tally.set_stake(attacker_public, 1.0)
+    node.vote_tally.set_stake(victim_public, 99.0)
+
+    wallclock = time.time()
+    forged = CrdsValue('Vote', Vote(victim_public, 1, "block_1", wallclock), attacker_public, wallclock, attacker_key)
+    assert forged.verify_signature()
+    assert node._insert_received([forged]) == 0
+    assert node.vote_tally.get_stake("block_1") == 0
+
+    assert node._insert_received([_vote(attacker_public, 1, attacker_key, wallclock)]) == 1
+    assert node.vote_tally.get_stake("block_1") == 1.0
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-q"])
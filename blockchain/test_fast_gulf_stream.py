@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Test batched Gulf Stream forwarding.
+
+Transactions for the current and next leader are packed into one batch
+datagram per leader that never exceeds max_datagram_bytes; a full batch
+goes out at once and a partial one after flush_interval. The leader
+window is looked up once per slot, a receiving forwarder puts every
+transaction into its intake, malformed batches are counted and dropped,
+and the JSON datagrams of unbatched peers are still accepted.
+"""
+
+import json
+import socket
+import time
+
+from blockchain.fast_gulf_stream import BATCH_MAGIC, DEFAULT_MAX_DATAGRAM_BYTES, FastGulfStreamForwarder
+from blockchain.p2p.codec import WireCodec
+from blockchain.transaction.transaction import Transaction
+
+
+class _Schedule:
+    """Leader schedule stand-in with a slot the test moves by hand"""
+
+    def __init__(self, current_leader, next_leader):
+        self.current_epoch = 1
+        self.slot = 0
+        self.current_leader = current_leader
+        self.next_leader = next_leader
+        self.lookups = 0
+
+    def get_current_slot(self):
+        return self.slot
+
+    def get_current_leader(self):
+        self.lookups += 1
+        return self.current_leader
+
+    def get_upcoming_leaders(self, num_slots=200):
+        return [(self.slot + 1, self.next_leader, time.time() + 0.4)][:num_slots]
+
+
+def _transaction(i):
+    transaction = Transaction(f"sender_{i}", "receiver", float(i), "TRANSFER")
+    transaction.sign("3045" + "ab" * 68)
+    return transaction
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def _leader_socket():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('localhost', 0))
+    sock.settimeout(2.0)
+    return sock
+
+
+def _forwarder(schedule, port_base, leaders=(), **kwargs):
+    forwarder = FastGulfStreamForwarder("forwarding_node", schedule, port_base=port_base, **kwargs)
+    for public_key, sock in leaders:
+        forwarder.register_node(public_key, 'localhost', sock.getsockname()[1])
+    return forwarder
+
+
+def _receive(sock, count):
+    return [sock.recvfrom(65536)[0] for _ in range(count)]
+
+
+def test_batches_go_to_each_leader_and_fit_the_datagram_limit():
+    current, upcoming = _leader_socket(), _leader_socket()
+    schedule = _Schedule("leader_a", "leader_b")
+    forwarder = _forwarder(schedule, 41000, [("leader_a", current), ("leader_b", upcoming)], flush_interval=0.05)
+    try:
+        transactions = [_transaction(i) for i in range(60)]
+        for transaction in transactions:
+            result = forwarder.forward_transaction_fast(transaction)
+            assert result['current_leader_sent'] and result['next_leader_sent']
+        forwarder.flush()
+
+        datagrams = forwarder.forwarding_stats['datagrams_sent']
+        assert datagrams % 2 == 0 and 2 < datagrams < 2 * len(transactions)
+        for sock in (current, upcoming):
+            batches = _receive(sock, datagrams // 2)
+            assert all(batch[:2] == BATCH_MAGIC and len(batch) <= DEFAULT_MAX_DATAGRAM_BYTES for batch in batches)
+        assert forwarder.forwarding_stats['batched_transactions'] == 2 * len(transactions)
+        assert forwarder.get_fast_forwarding_stats()['batching']['pending_transactions'] == 0
+    finally:
+        forwarder.shutdown()
+        current.close()
+        upcoming.close()
+
+
+def test_full_batches_send_at_once_and_partial_ones_on_the_timer():
+    leader = _leader_socket()
+    schedule = _Schedule("leader_a", None)
+    forwarder = _forwarder(schedule, 42000, [("leader_a", leader)], flush_interval=0.2)
+    try:
+        count = 0
+        while forwarder.forwarding_stats['full_flushes'] == 0:
+            forwarder.forward_transaction_fast(_transaction(count))
+            count += 1
+        assert len(leader.recvfrom(65536)[0]) <= DEFAULT_MAX_DATAGRAM_BYTES
+        assert forwarder.forwarding_stats['timed_flushes'] == 0
+
+        assert _wait_for(lambda: forwarder.forwarding_stats['timed_flushes'] == 1)
+        leader.recvfrom(65536)
+        assert forwarder.forwarding_stats['batched_transactions'] == count
+        assert forwarder.forwarding_stats['batch_latency_ms_max'] >= 150
+    finally:
+        forwarder.shutdown()
+        leader.close()
+
+
+def test_leader_window_is_looked_up_once_per_slot():
+    leader = _leader_socket()
+    schedule = _Schedule("leader_a", "leader_b")
+    forwarder = _forwarder(schedule, 43000, [("leader_a", leader)])
+    try:
+        refreshes = forwarder.forwarding_stats['leader_window_refreshes']
+        for i in range(20):
+            forwarder.forward_transaction_fast(_transaction(i))
+        assert schedule.lookups == 1
+        schedule.slot += 1
+        forwarder.forward_transaction_fast(_transaction(20))
+        assert schedule.lookups == 2
+        assert forwarder.forwarding_stats['leader_window_refreshes'] == refreshes + 2
+
+        schedule.current_leader = "forwarding_node"  # No datagrams to ourselves
+        schedule.slot += 1
+        result = forwarder.forward_transaction_fast(_transaction(21))
+        assert not result['current_leader_sent'] and result['next_leader_sent']
+    finally:
+        forwarder.shutdown()
+        leader.close()
+
+
+def test_receiving_forwarder_takes_every_transaction_into_its_intake():
+    receiver = FastGulfStreamForwarder("leader_a", _Schedule(None, None), port_base=44000)
+    sender = FastGulfStreamForwarder("forwarding_node", _Schedule("leader_a", None), port_base=45000)
+    try:
+        sender.register_node("leader_a", 'localhost', receiver.server_port)
+        transactions = [_transaction(i) for i in range(50)]
+        for transaction in transactions:
+            sender.forward_transaction_fast(transaction)
+            sender.forward_transaction_fast(transaction)  # Duplicates are dropped by the intake
+
+        assert _wait_for(lambda: receiver.forwarding_stats['transactions_received'] == 2 * len(transactions))
+        assert receiver.forwarding_stats['invalid_datagrams'] == 0
+        received = receiver.intake.take()
+        assert sorted(transaction.id for transaction in received) == sorted(t.id for t in transactions)
+    finally:
+        sender.shutdown()
+        receiver.shutdown()
+
+
+def test_malformed_batches_are_dropped_and_legacy_json_is_accepted():
+    receiver = FastGulfStreamForwarder("leader_a", _Schedule(None, None), port_base=46000)
+    try:
+        frame = WireCodec.encode(_transaction(1))
+        transaction = _transaction(2)
+        malformed = [
+            BATCH_MAGIC + b'\x09\x00\x01',  # Unknown version
+            BATCH_MAGIC + b'\x01\x00\x02' + len(frame).to_bytes(2, 'big') + frame,  # Count too high
+            BATCH_MAGIC + b'\x01\x00\x01' + len(frame).to_bytes(2, 'big') + frame[:-5],  # Truncated entry
+            b'not json'
+        ]
+        legacy = json.dumps({
+            'type': 'gulf_stream_transaction',
+            'transaction': WireCodec.encode_text(transaction),
+            'sender_node': 'old_node',
+            'timestamp': time.time()
+        }).encode('utf-8')
+
+        address = ('localhost', receiver.server_port)
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            for datagram in malformed:
+                sock.sendto(datagram, address)
+            sock.sendto(legacy, address)
+
+        assert _wait_for(lambda: len(receiver.intake) == 1)
+        assert receiver.forwarding_stats['invalid_datagrams'] == len(malformed)
+        assert [received.id for received in receiver.intake.take()] == [transaction.id]
+    finally:
+        receiver.shutdown()
+
+
+if __name__ == "__main__":
+    test_batches_go_to_each_leader_and_fit_the_datagram_limit()
+    test_full_batches_send_at_once_and_partial_ones_on_the_timer()
+    test_leader_window_is_looked_up_once_per_slot()
+    test_receiving_forwarder_takes_every_transaction_into_its_intake()
+    test_malformed_batches_are_dropped_and_legacy_json_is_accepted()
+    print("All Fast Gulf Stream tests passed")
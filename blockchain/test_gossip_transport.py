@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test the asyncio gossip datagram transport.
+
+Sends never wait: a message's frames are queued together or dropped
+together, and both directions are bounded by queue size and per-peer
+token buckets, with every drop counted.
+"""
+
+import asyncio
+
+from gossip_protocol.transport import GossipTransport, PeerRateLimiter, TokenBucket
+
+PEER = ("127.0.0.1", 9000)
+
+
+def test_token_bucket_allows_bursts_then_the_rate():
+    bucket = TokenBucket(rate=1000.0, burst=5)
+    assert all(bucket.consume() for _ in range(5))
+    assert not bucket.consume()
+    bucket.updated -= 0.002  # Two tokens' worth of time
+    assert bucket.consume(2)
+    assert not bucket.consume()
+
+
+def test_rate_limiter_is_per_peer_and_bounded():
+    limiter = PeerRateLimiter(rate=1.0, burst=2, max_peers=2)
+    assert limiter.allow(PEER, 2)
+    assert not limiter.allow(PEER)
+    assert limiter.allow(("127.0.0.1", 9001))
+    assert limiter.allow(("127.0.0.1", 9002))
+    assert PEER not in limiter.buckets  # Least recently used bucket evicted
+    assert all(PeerRateLimiter(rate=0, burst=1).allow(PEER) for _ in range(100))
+
+
+def test_messages_are_queued_whole_or_dropped():
+    async def scenario():
+        transport = GossipTransport(send_queue_size=5, peer_send_rate=0)
+        assert transport.send([b"a", b"b", b"c"], PEER)
+        assert not transport.send([b"d", b"e", b"f"], PEER)
+        assert transport.send([b"d", b"e"], PEER)
+        assert transport.send_queue.qsize() == 5
+        assert transport.stats['send_queue_drops'] == 1
+
+        limited = GossipTransport(peer_send_rate=1.0, peer_burst=2)
+        assert not limited.send([b"a", b"b", b"c"], PEER)
+        assert limited.send([b"a", b"b"], PEER)
+        assert limited.stats['send_rate_limited'] == 1
+    asyncio.run(scenario())
+
+
+def test_receive_side_limits_are_counted():
+    async def scenario():
+        transport = GossipTransport(recv_queue_size=3, peer_recv_rate=1.0, peer_burst=2)
+        for _ in range(4):
+            transport._datagram_received(b"x", PEER)
+        assert transport.stats['datagrams_received'] == 2
+        assert transport.stats['recv_rate_limited'] == 2
+
+        for port in range(9100, 9103):
+            transport._datagram_received(b"y", ("127.0.0.1", port))
+        assert transport.stats['recv_queue_drops'] == 2
+        assert transport.get_stats()['recv_queue_depth'] == 3
+    asyncio.run(scenario())
+
+
+def test_frames_travel_over_udp():
+    async def scenario():
+        sender, receiver = GossipTransport(), GossipTransport()
+        await sender.open("127.0.0.1", 0)
+        await receiver.open("127.0.0.1", 0)
+        try:
+            addr = receiver.transport.get_extra_info('sockname')[:2]
+            frames = [bytes([i]) * 100 for i in range(10)]
+            assert sender.send(frames, addr)
+            received = [await asyncio.wait_for(receiver.recv(), 5.0) for _ in frames]
+            assert [data for data, _ in received] == frames
+            assert received[0][1] == sender.transport.get_extra_info('sockname')[:2]
+            assert sender.stats['datagrams_sent'] == len(frames)
+        finally:
+            sender.close()
+            receiver.close()
+        assert not sender.is_open
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-q"])
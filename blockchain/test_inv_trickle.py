@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test trickled INV announcements.
+
+Hashes queued for a peer before its timer fires go out together in one
+INV, each hash is announced once, oversized queues are split across
+flushes, and nothing is sent to a peer after it is removed.
+"""
+
+import random
+import threading
+import time
+
+from blockchain.p2p.inv_trickle import InventoryTrickler
+
+
+class _Recorder:
+    def __init__(self, result=True):
+        self.result = result
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def __call__(self, peer_id, items):
+        with self.lock:
+            self.sent.append((peer_id, list(items)))
+        return self.result
+
+    def items(self, peer_id):
+        with self.lock:
+            return [item for peer, items in self.sent if peer == peer_id for item in items]
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def _trickler(recorder, mean_interval=0.05, **kwargs):
+    return InventoryTrickler(recorder, mean_interval=mean_interval, rng=random.Random(5), **kwargs)
+
+
+def test_queued_hashes_coalesce_into_one_inv_per_peer():
+    recorder = _Recorder()
+    trickler = _trickler(recorder, mean_interval=0.2)
+    try:
+        for i in range(50):
+            trickler.queue("peer_a", "TX", [f"hash_{i}"])
+            trickler.queue("peer_b", "TX", [f"hash_{i}", f"hash_{i}"])
+        assert _wait_for(lambda: trickler.stats['items_announced'] == 100)
+        assert sorted(peer for peer, _ in recorder.sent) == ["peer_a", "peer_b"]
+        assert recorder.items("peer_a") == [("TX", f"hash_{i}") for i in range(50)]
+        assert trickler.stats['items_queued'] == 100
+        assert trickler.get_stats()['items_pending'] == 0
+    finally:
+        trickler.stop()
+
+
+def test_large_queues_are_split_across_flushes():
+    recorder = _Recorder()
+    trickler = _trickler(recorder, max_items_per_inv=10, max_queue_per_peer=25)
+    try:
+        trickler.queue("peer", "TX", [f"hash_{i}" for i in range(30)])
+        assert trickler.stats['items_dropped'] == 5
+        assert _wait_for(lambda: trickler.stats['items_announced'] == 25)
+        assert [len(items) for _, items in recorder.sent] == [10, 10, 5]
+        assert recorder.items("peer") == [("TX", f"hash_{i}") for i in range(25)]
+    finally:
+        trickler.stop()
+
+
+def test_removed_peers_get_nothing():
+    recorder = _Recorder()
+    trickler = _trickler(recorder, mean_interval=0.5)
+    try:
+        trickler.queue("gone", "TX", ["hash_1"])
+        trickler.queue("kept", "TX", ["hash_2"])
+        trickler.remove_peer("gone")
+        assert trickler.queued_items("gone") == 0
+        assert _wait_for(lambda: trickler.stats['inv_messages_sent'] == 1)
+        time.sleep(0.2)
+        assert recorder.sent == [("kept", [("TX", "hash_2")])]
+    finally:
+        trickler.stop()
+
+
+def test_failed_sends_are_counted():
+    recorder = _Recorder(result=False)
+    trickler = _trickler(recorder)
+    try:
+        trickler.queue("peer", "BLOCK", ["hash_1"])
+        assert _wait_for(lambda: trickler.stats['send_failures'] == 1)
+        assert trickler.stats['items_announced'] == 0
+    finally:
+        trickler.stop()
+    trickler.thread.join(timeout=2.0)
+    assert not trickler.thread.is_alive()
+
+
+if __name__ == "__main__":
+    test_queued_hashes_coalesce_into_one_inv_per_peer()
+    test_large_queues_are_split_across_flushes()
+    test_removed_peers_get_nothing()
+    test_failed_sends_are_counted()
+    print("All INV trickle tests passed")
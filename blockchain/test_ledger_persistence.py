@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test that a node's chain and account state survive a restart.
+
+The ledger, the account store and a whole Blockchain are written to a
+temporary data directory, closed and reopened; the reopened copy must
+hold the same blocks, balances and committed height.
+"""
+
+import shutil
+import tempfile
+
+from blockchain.account_model import AccountModel
+from blockchain.account_store import AccountStore
+from blockchain.block import Block
+from blockchain.ledger import BlockLedger
+from blockchain.transaction.transaction import Transaction
+from blockchain.utils.helpers import BlockchainUtils
+
+
+def _make_block(count, last_hash, transactions=()):
+    block = Block(list(transactions), last_hash, "test_proposer", count)
+    return block, BlockchainUtils.hash(block.payload()).hex()
+
+
+def test_ledger_reopen():
+    """Blocks appended to a ledger are all there, in order, after reopening it"""
+    data_dir = tempfile.mkdtemp()
+    try:
+        ledger = BlockLedger(data_dir, tail_size=2)
+        hashes = []
+        last_hash = ""
+        for count in range(5):
+            block, last_hash = _make_block(count, last_hash)
+            ledger.append(block, last_hash)
+            hashes.append(last_hash)
+        ledger.close()
+
+        reopened = BlockLedger(data_dir, tail_size=2)
+        assert len(reopened) == 5
+        assert list(reopened.hashes) == hashes
+        assert reopened.hash_index[hashes[3]] == 3
+        # Heights below the tail are read back from the segment files
+        assert reopened[0].block_count == 0
+        assert BlockchainUtils.hash(reopened[1].payload()).hex() == hashes[1]
+        assert reopened[-1].block_count == 4
+        reopened.close()
+    finally:
+        shutil.rmtree(data_dir)
+
+
+def test_account_store_reopen():
+    """Committed balances and height are reloaded; uncommitted changes are not"""
+    data_dir = tempfile.mkdtemp()
+    try:
+        store = AccountStore(f"{data_dir}/state.db")
+        model = AccountModel(store=store, cache_size=1)
+        model.update_balance("alice", 100.0)
+        model.update_balance("bob", 5.0)
+        model.commit_block(0, "hash0")
+        assert model.transfer("alice", "bob", 40.0)
+        model.commit_block(1, "hash1")
+        model.update_balance("carol", 7.0)  # Never committed
+        store.close()
+
+        reopened = AccountModel(store=AccountStore(f"{data_dir}/state.db"))
+        assert reopened.committed_height == 1
+        assert reopened.store.block_hash == "hash1"
+        assert reopened.get_balance("alice") == 60.0
+        assert reopened.get_balance("bob") == 45.0
+        assert "carol" not in reopened.get_all_balances()
+        reopened.store.close()
+    finally:
+        shutil.rmtree(data_dir)
+
+
+def test_blockchain_reopen():
+    """A Blockchain reopened on its data_dir has the same chain and balances"""
+    from blockchain.blockchain import Blockchain
+
+    data_dir = tempfile.mkdtemp()
+    try:
+        blockchain = Blockchain(data_dir=data_dir)
+        genesis_balances = blockchain.account_model.get_all_balances()
+        sender = max(genesis_balances, key=genesis_balances.get)
+        transaction = Transaction(sender, "receiver_public_key", 25.0, "TRANSFER")
+        block, _ = _make_block(1, blockchain.block_hashes[-1], [transaction])
+        blockchain.add_block(block)
+        balances = blockchain.account_model.get_all_balances()
+        block_hashes = list(blockchain.block_hashes)
+        blockchain.blocks.close()
+        blockchain.account_model.store.close()
+
+        reopened = Blockchain(data_dir=data_dir)
+        assert list(reopened.block_hashes) == block_hashes
+        assert reopened.account_model.committed_height == 1
+        assert reopened.account_model.get_all_balances() == balances
+        assert reopened.account_model.get_balance("receiver_public_key") == 25.0
+        assert reopened.account_model.get_balance(sender) == genesis_balances[sender] - 25.0
+        reopened.blocks.close()
+        reopened.account_model.store.close()
+    finally:
+        shutil.rmtree(data_dir)
+
+
+if __name__ == "__main__":
+    test_ledger_reopen()
+    test_account_store_reopen()
+    test_blockchain_reopen()
+    print("All ledger persistence tests passed")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test the pooled inter-node HTTP client against a local HTTP server.
+
+Covers keep-alive reuse, concurrent fan-out, FastAPI-style trailing
+slash redirects and the per-host circuit breaker.
+"""
+
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from blockchain.utils.node_client import CircuitOpenError, NodeClient, NodeClientError
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, status, body=b"", headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._reply(200, json.dumps({"path": self.path}).encode())
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if not self.path.endswith("/"):
+            # What FastAPI does for a route declared with a trailing slash
+            host = self.headers["Host"]
+            self._reply(307, headers=[("Location", f"http://{host}{self.path}/")])
+            return
+        self._reply(200, json.dumps({"path": self.path, "received": json.loads(body)}).encode())
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _closed_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def test_get_reuses_connections():
+    server = _start_server()
+    client = NodeClient()
+    try:
+        base = f"http://127.0.0.1:{server.server_port}"
+        for i in range(5):
+            response = client.get(f"{base}/item/{i}")
+            assert response.ok
+            assert response.json() == {"path": f"/item/{i}"}
+        assert client.stats['connections_opened'] == 1
+        assert client.stats['connections_reused'] == 4
+    finally:
+        client.close()
+        server.shutdown()
+
+
+def test_post_follows_trailing_slash_redirect():
+    server = _start_server()
+    client = NodeClient()
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/api/v1/blockchain/turbine/shreds"
+        response = client.post(url, json={"shreds": [1, 2]})
+        assert response.status_code == 200
+        assert response.json() == {"path": "/api/v1/blockchain/turbine/shreds/", "received": {"shreds": [1, 2]}}
+        assert client.stats['redirects_followed'] == 1
+    finally:
+        client.close()
+        server.shutdown()
+
+
+def test_fan_out_keeps_request_order():
+    server = _start_server()
+    client = NodeClient()
+    try:
+        base = f"http://127.0.0.1:{server.server_port}"
+        unreachable = f"http://127.0.0.1:{_closed_port()}/"
+        responses = client.fan_out([('GET', f"{base}/a"), ('GET', unreachable), ('POST', f"{base}/b/", {"x": 1})])
+        assert responses[0].json()["path"] == "/a"
+        assert isinstance(responses[1], NodeClientError)
+        assert responses[2].json()["received"] == {"x": 1}
+    finally:
+        client.close()
+        server.shutdown()
+
+
+def test_circuit_opens_after_repeated_failures():
+    client = NodeClient(failure_threshold=2, reset_timeout=60)
+    try:
+        url = f"http://127.0.0.1:{_closed_port()}/"
+        for _ in range(2):
+            try:
+                client.get(url, timeout=1)
+                assert False, "request to a closed port succeeded"
+            except CircuitOpenError:
+                assert False, "circuit opened too early"
+            except NodeClientError:
+                pass
+        try:
+            client.get(url, timeout=1)
+            assert False, "circuit did not open"
+        except CircuitOpenError:
+            pass
+        assert client.stats['circuit_rejections'] == 1
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    test_get_reuses_connections()
+    test_post_follows_trailing_slash_redirect()
+    test_fan_out_keeps_request_order()
+    test_circuit_opens_after_repeated_failures()
+    print("All node client tests passed")
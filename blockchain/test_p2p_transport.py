@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test the asyncio P2P transport and the dispatcher on top of it.
+
+Frames must arrive intact and in order, and frames no peer should
+send (garbage, hostile nesting) must be dropped without stopping the
+dispatcher thread. Peers stalled on a full inbound queue must not tie
+up threads, and messages are sent as binary frames.
+"""
+
+import socket
+import struct
+import threading
+import time
+
+from blockchain.p2p.codec import FORMAT_VERSION, MAGIC, TAG_LIST, WireCodec
+from blockchain.p2p.message import Message
+from blockchain.p2p.socket_communication import SocketCommunication
+from blockchain.p2p.socket_connector import SocketConnector
+from blockchain.p2p.transport import AsyncTransport
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+class _RecordingNode:
+    def __init__(self):
+        self.transactions = []
+
+    def handle_transaction(self, transaction):
+        self.transactions.append(transaction)
+
+
+def test_frames_arrive_in_order():
+    server = AsyncTransport("127.0.0.1", _free_port())
+    client = AsyncTransport("127.0.0.1", _free_port())
+    server.start()
+    client.start()
+    try:
+        connection = client.connect(server.host, server.port).result(timeout=5)
+        assert connection is not None
+        payloads = [f"frame-{i}".encode() * (i + 1) for i in range(500)]
+        for payload in payloads:
+            assert connection.send(payload, block=True, timeout=5)
+
+        received = []
+        deadline = time.time() + 5
+        while len(received) < len(payloads) and time.time() < deadline:
+            received += [payload for _, payload in server.receive(64, 0.1)]
+        assert received == payloads
+    finally:
+        client.stop()
+        server.stop()
+
+
+def test_stalled_peers_hold_no_threads():
+    connected = []
+    server = AsyncTransport("127.0.0.1", _free_port(), on_connected=connected.append, max_inbound_frames=1)
+    server.start()
+    peers = []
+    try:
+        # More stalled peers than the loop's default executor has workers
+        for i in range(40):
+            peer = socket.create_connection((server.host, server.port))
+            frames = [f"peer-{i}-frame-{n}".encode() for n in range(2)]
+            peer.sendall(b"".join(struct.pack('>I', len(frame)) + frame for frame in frames))
+            peers.append(peer)
+        assert _wait_for(lambda: server.stats['inbound_stalls'] >= 39)
+
+        # Callbacks still run while every reader is stalled
+        peers.append(socket.create_connection((server.host, server.port)))
+        assert _wait_for(lambda: len(connected) == 41)
+
+        received = []
+        deadline = time.time() + 5
+        while len(received) < 80 and time.time() < deadline:
+            received += [payload for _, payload in server.receive(8, 0.1)]
+        assert sorted(received) == sorted(f"peer-{i}-frame-{n}".encode() for i in range(40) for n in range(2))
+        assert server.stalled_readers == 0
+    finally:
+        for peer in peers:
+            peer.close()
+        server.stop()
+
+
+def test_messages_are_sent_as_binary_frames():
+    communication = SocketCommunication("127.0.0.1", _free_port())
+    frame = communication.peer_discovery_handler.handshake_message()
+    assert isinstance(frame, bytes)
+    assert WireCodec.decode(frame).message_type == "DISCOVERY"
+
+
+def test_dispatcher_survives_hostile_frames():
+    communication = SocketCommunication("127.0.0.1", _free_port())
+    node = _RecordingNode()
+    communication.node = node
+    communication.init_server()
+    communication.running = True
+    communication.dispatcher = threading.Thread(target=communication._dispatch_loop, daemon=True)
+    communication.dispatcher.start()
+    try:
+        hostile = [
+            b"not a frame",
+            MAGIC + bytes([FORMAT_VERSION]) + (bytes([TAG_LIST]) + struct.pack('>I', 1)) * 25000 + b"\x00",
+            WireCodec.encode({"a": 1}),  # Decodes, but is not a Message
+        ]
+        valid = WireCodec.encode(Message(SocketConnector("127.0.0.1", 1), "TRANSACTION", "tx-after-garbage"))
+        with socket.create_connection((communication.host, communication.port)) as peer:
+            for frame in hostile + [valid]:
+                peer.sendall(struct.pack('>I', len(frame)) + frame)
+            assert _wait_for(lambda: node.transactions == ["tx-after-garbage"])
+
+        assert communication.dispatcher.is_alive()
+        assert communication.stats['decode_errors'] == len(hostile)
+    finally:
+        communication.stop()
+
+
+if __name__ == "__main__":
+    test_frames_arrive_in_order()
+    test_stalled_peers_hold_no_threads()
+    test_messages_are_sent_as_binary_frames()
+    test_dispatcher_survives_hostile_frames()
+    print("All P2P transport tests passed")
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test the push received cache that decides origin-specific prunes.
+
+Peers outside the best min_ingress_nodes for an origin are pruned once
+enough values arrived, and origins that never get there are evicted,
+least recently updated first, instead of shutting out new origins.
+"""
+
+from gossip_protocol.received_cache import ReceivedCache
+
+
+def test_prunes_peers_outside_the_best_ingress_nodes():
+    cache = ReceivedCache(min_ingress_nodes=2, min_upserts=3)
+    for _ in range(3):
+        cache.record("origin", "fast", duplicate=False)
+        cache.record("origin", "second", duplicate=True)
+        cache.record("origin", "slow", duplicate=True)
+        cache.record("origin", "origin", duplicate=True)
+    cache.record("origin", "second", duplicate=False)
+    prunes = cache.take_prunes()
+    assert prunes == {"slow": ["origin"]}
+    assert len(cache) == 0  # Decided origins start over
+
+
+def test_origin_below_min_upserts_is_not_decided():
+    cache = ReceivedCache(min_ingress_nodes=1, min_upserts=5)
+    cache.record("origin", "a", duplicate=False)
+    cache.record("origin", "b", duplicate=True)
+    assert cache.take_prunes() == {}
+    assert len(cache) == 1
+
+
+def test_stale_origins_are_evicted_for_new_ones():
+    cache = ReceivedCache(min_ingress_nodes=1, min_upserts=2, max_origins=3)
+    for origin in ("quiet_1", "quiet_2", "busy"):
+        cache.record(origin, "a", duplicate=False)
+    cache.record("quiet_1", "b", duplicate=True)  # Updated, so quiet_2 is now the oldest
+    cache.record("new", "a", duplicate=False)
+    assert list(cache.entries) == ["busy", "quiet_1", "new"]
+    assert cache.evicted == 1
+
+    cache.record("new", "a", duplicate=False)
+    cache.record("new", "b", duplicate=True)
+    assert cache.take_prunes() == {"b": ["new"]}
+
+
+if __name__ == "__main__":
+    test_prunes_peers_outside_the_best_ingress_nodes()
+    test_origin_below_min_upserts_is_not_decided()
+    test_stale_origins_are_evicted_for_new_ones()
+    print("All received cache tests passed")
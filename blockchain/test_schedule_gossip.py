@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test leader schedules gossiped as compressed fragments.
+
+A schedule round-trips through the codec far smaller than its JSON form,
+each published fragment fits one datagram, and a receiver only sees the
+schedule once every fragment has arrived and the blob matches its hash.
+"""
+
+import json
+import random
+
+from gossip_protocol.crds import CrdsValue
+from gossip_protocol.gossip_node import GossipNode
+from gossip_protocol.messages import GossipMessageFactory
+from gossip_protocol.schedule_codec import decode_schedule, encode_schedule
+from gossip_protocol.wire import encode_message
+
+LEADERS = [f"validator_{i:03d}_" + "k" * 40 for i in range(200)]
+
+
+def _schedule(slots=8192, first_slot=0, seed=7):
+    rng = random.Random(seed)
+    schedule = {}
+    for start in range(first_slot, first_slot + slots, 4):  # Each leader holds four consecutive slots
+        leader = rng.choice(LEADERS)
+        for slot in range(start, start + 4):
+            schedule[slot] = leader
+    return schedule
+
+
+def _node(name, port):
+    return GossipNode(name, "127.0.0.1", port, port + 1, port + 2)
+
+
+def _fragments(node):
+    return [value for value in node.crds.get_values_by_origin(node.public_key)
+            if value.data_type == 'EpochScheduleFragment']
+
+
+def test_codec_round_trip_is_compact():
+    schedule = _schedule()
+    blob = encode_schedule(schedule)
+    assert decode_schedule(blob) == schedule
+    assert len(blob) * 10 < len(json.dumps(schedule))
+    assert decode_schedule(encode_schedule({5: "a", 6: "a", 9: "b"})) == {5: "a", 6: "a", 9: "b"}
+
+
+def test_every_fragment_fits_a_datagram():
+    leader = _node("leader", 9000)
+    leader.publish_leader_schedule(3, _schedule())
+    fragments = _fragments(leader)
+    assert len(fragments) > 1
+    for fragment in fragments:
+        message = GossipMessageFactory.create_push_message(leader.public_key, [fragment])
+        assert len(encode_message(message)) <= leader.config.max_datagram_bytes
+
+    ordinal = leader.crds.ordinal
+    leader.publish_leader_schedule(3, _schedule())
+    assert leader.crds.ordinal == ordinal  # Unchanged schedule is not republished
+
+    leader.publish_leader_schedule(3, _schedule(slots=64))
+    assert len(_fragments(leader)) == 1  # Leftovers of the larger encoding are dropped
+
+
+def test_receiver_decodes_only_complete_schedules():
+    leader, receiver = _node("leader", 9000), _node("receiver", 9100)
+    schedule = _schedule(first_slot=3 * 8192)
+    leader.publish_leader_schedule(3, schedule)
+    fragments = [CrdsValue.from_dict(value.to_dict()) for value in _fragments(leader)]
+    random.Random(1).shuffle(fragments)
+
+    assert receiver._insert_received(fragments[:-1]) == len(fragments) - 1
+    assert receiver.crds.get_fragmented_schedules(3) == []
+    assert receiver._insert_received(fragments[-1:]) == 1
+    decoded, = receiver.crds.get_fragmented_schedules(3)
+    assert decoded.slot_leaders == schedule
+    assert receiver.get_epoch_schedule(3) == schedule
+    assert receiver.crds.get_fragmented_schedules(4) == []
+
+
+def test_corrupted_fragments_are_ignored():
+    leader, receiver = _node("leader", 9000), _node("receiver", 9100)
+    leader.publish_leader_schedule(3, _schedule())
+    fragments = [CrdsValue.from_dict(value.to_dict()) for value in _fragments(leader)]
+    fragments[0].data.data = "00" + fragments[0].data.data[2:]
+
+    receiver._insert_received(fragments)
+    assert receiver.crds.get_fragmented_schedules(3) == []
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test Turbine shred reassembly.
+
+FEC sets must decode from their data shreds, recover a missing data
+shred from a coding shred, drop duplicates, and retry a failed decode
+when the shred that makes recovery possible arrives later. Forged
+headers must not allocate oversized buffers or push the newest slot
+far past the local slot.
+"""
+
+import json
+
+from blockchain.block import Block
+from blockchain.shred_buffer import ShredReassemblyBuffer
+from blockchain.transaction.transaction import Transaction
+from blockchain.turbine_protocol import BlockShredder, Shred
+
+
+def _fec_set(shredder, fec_set_index=1):
+    transactions = [Transaction(f"sender_{i}", f"receiver_{i}", float(i), "TRANSFER") for i in range(60)]
+    shreds = shredder.shred_block(Block(transactions, "last_hash", "leader", 4))
+    members = [shred for shred in shreds if shred.fec_set_index == fec_set_index]
+    data = [shred for shred in members if shred.is_data_shred]
+    coding = sorted((shred for shred in members if not shred.is_data_shred), key=lambda shred: shred.index)
+    return data, coding
+
+
+def test_decodes_from_data_shreds():
+    shredder = BlockShredder()
+    buffer = ShredReassemblyBuffer(shredder)
+    data, _ = _fec_set(shredder)
+    results = [buffer.insert(shred) for shred in data]
+    assert all(accepted for accepted, _ in results)
+    payload = results[-1][1]
+    assert payload is not None
+    assert len(json.loads(payload.decode())) > 0
+    assert all(decoded is None for _, decoded in results[:-1])
+
+
+def test_duplicates_are_rejected():
+    shredder = BlockShredder()
+    buffer = ShredReassemblyBuffer(shredder)
+    data, coding = _fec_set(shredder)
+    assert buffer.insert(data[0])[0]
+    assert not buffer.insert(data[0])[0]
+    assert buffer.stats['duplicates_dropped'] == 1
+
+    # After the set decodes, new shreds are still accepted (for retransmission) once
+    for shred in data[1:]:
+        buffer.insert(shred)
+    assert buffer.insert(coding[0])[0]
+    assert not buffer.insert(coding[0])[0]
+
+
+def test_recovers_a_missing_data_shred():
+    shredder = BlockShredder()
+    buffer = ShredReassemblyBuffer(shredder)
+    data, coding = _fec_set(shredder)
+    missing = data[3]
+    for shred in data:
+        if shred is not missing:
+            assert buffer.insert(shred) == (True, None)
+    accepted, payload = buffer.insert(coding[0])
+    assert accepted and payload is not None
+    assert payload == b''.join(shred.data for shred in data).rstrip(b'\x00')
+
+
+def test_failed_decode_is_retried_when_a_coding_shred_arrives():
+    shredder = BlockShredder()
+    buffer = ShredReassemblyBuffer(shredder)
+    data, coding = _fec_set(shredder)
+    assert len(coding) >= 2
+    missing = data[3]
+    for shred in data:
+        if shred is not missing:
+            buffer.insert(shred)
+
+    # k shreds present, but this coding shred cannot rebuild the missing one
+    accepted, payload = buffer.insert(coding[1])
+    assert accepted and payload is None
+    attempts = buffer.stats['decode_attempts']
+
+    # No new data shred, but a new coding shred: decoding is retried and succeeds
+    accepted, payload = buffer.insert(coding[0])
+    assert buffer.stats['decode_attempts'] == attempts + 1
+    assert payload == b''.join(shred.data for shred in data).rstrip(b'\x00')
+
+
+def test_old_slots_are_evicted():
+    shredder = BlockShredder()
+    buffer = ShredReassemblyBuffer(shredder, max_slot_age=2)
+    data, _ = _fec_set(shredder)
+    buffer.insert(data[0])
+    for slot in range(data[0].slot + 1, data[0].slot + 5):
+        shred = data[1]
+        shred.slot = slot
+        buffer.insert(shred)
+    assert data[0].slot not in buffer.slots
+    assert buffer.stats['slots_evicted'] >= 1
+
+
+def test_forged_set_sizes_are_rejected_before_allocation():
+    shredder = BlockShredder()
+    buffer = ShredReassemblyBuffer(shredder, max_memory_bytes=64 * 1024)
+    oversized = Shred(0, 10**6, b'z' * shredder.shred_size, True, 'h', 10**6, slot=1)
+    assert buffer.insert(oversized) == (False, None)
+    wrong_size = Shred(0, 10**6, b'z' * 1200, True, 'h', 10**6, slot=1)
+    assert buffer.insert(wrong_size) == (False, None)
+    assert buffer.stats['malformed_dropped'] == 2
+
+    # Within the shredder's limits, but larger than the whole memory cap
+    too_big = shredder.max_data_shreds_per_fec_set
+    assert buffer.insert(Shred(0, too_big + 1, b'z' * shredder.shred_size, True, 'h', too_big, slot=1))[0] is False
+    assert buffer.stats['over_budget_dropped'] == 1
+    assert buffer.memory_bytes == 0 and not buffer.fec_sets
+
+    data, _ = _fec_set(shredder)
+    assert buffer.insert(data[0])[0]
+    short = Shred(1, data[0].total_shreds, b'z' * 10, True, data[0].block_hash, data[0].original_data_shred_count,
+                  slot=data[0].slot, fec_set_index=data[0].fec_set_index)
+    assert not buffer.fec_sets[(data[0].slot, data[0].fec_set_index)].insert(short)
+
+
+def test_far_future_slots_do_not_make_honest_shreds_stale():
+    shredder = BlockShredder()
+    local_slot = [4]
+    buffer = ShredReassemblyBuffer(shredder, max_slot_age=8, slot_clock=lambda: local_slot[0], max_future_slots=8)
+    data, _ = _fec_set(shredder)
+    forged = Shred(0, 2, b'z' * shredder.shred_size, True, 'forged', 1, slot=10**9)
+    assert buffer.insert(forged) == (False, None)
+    assert buffer.stats['future_dropped'] == 1
+
+    # The furthest slot the window allows still cannot age out the local slot
+    forged.slot = local_slot[0] + 8
+    assert buffer.insert(forged)[0]
+    results = [buffer.insert(shred) for shred in data]
+    assert all(accepted for accepted, _ in results) and results[-1][1] is not None
+    assert buffer.stats['stale_dropped'] == 0
+
+
+if __name__ == "__main__":
+    test_decodes_from_data_shreds()
+    test_duplicates_are_rejected()
+    test_recovers_a_missing_data_shred()
+    test_failed_decode_is_retried_when_a_coding_shred_arrives()
+    test_old_slots_are_evicted()
+    test_forged_set_sizes_are_rejected_before_allocation()
+    test_far_future_slots_do_not_make_honest_shreds_stale()
+    print("All shred buffer tests passed")
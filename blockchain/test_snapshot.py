@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test chunked state snapshots.
+
+Account rows are streamed from one store read transaction merged with
+uncommitted changes, and a received snapshot is staged in a temporary
+store that is installed only once the manifest verifies.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+from blockchain.account_model import AccountModel
+from blockchain.account_store import AccountStore
+from blockchain.snapshot import iter_snapshot, read_snapshot, write_snapshot
+
+
+def _store_model(data_dir, accounts=50):
+    model = AccountModel(store=AccountStore(os.path.join(data_dir, 'state.db')), cache_size=5)
+    for i in range(accounts):
+        model.update_balance(f"key_{i:03d}", float(i + 1))
+    model.commit_block(0, "hash0")
+    return model
+
+
+def test_row_batches_merge_uncommitted_changes():
+    data_dir = tempfile.mkdtemp()
+    try:
+        model = _store_model(data_dir)
+        model.update_balance("key_010", 100.0)   # Changed
+        model.update_balance("key_0000", 5.0)    # New, sorts between stored keys
+        model.update_balance("zzz", 7.0)         # New, after every stored key
+        account = model.get_account("key_020")
+        account.set_balance(0.0)
+        account.last_modified = 0
+        assert model.cleanup_empty_accounts() == 1  # Deleted, still in the store
+
+        batches = list(model.iter_row_batches(7))
+        assert all(len(batch) <= 7 for batch in batches)
+        assert [row for batch in batches for row in batch] == model.export_rows()
+        model.store.close()
+    finally:
+        shutil.rmtree(data_dir)
+
+
+def test_store_read_is_one_transaction():
+    data_dir = tempfile.mkdtemp()
+    try:
+        model = _store_model(data_dir)
+        batches = model.store.read_batches(10)
+        first = next(batches)
+        model.update_balance("key_049", 1000.0)
+        model.commit_block(1, "hash1")
+        rows = first + [row for batch in batches for row in batch]
+        assert len(rows) == 50
+        assert rows[-1] == ("key_049", 50.0, 0)  # The commit made while reading is not seen
+        assert model.get_balance("key_049") == 1050.0
+        model.store.close()
+    finally:
+        shutil.rmtree(data_dir)
+
+
+def _blockchain(data_dir=None):
+    from blockchain.blockchain import Blockchain
+    return Blockchain(data_dir=data_dir)
+
+
+def _close(blockchain):
+    blockchain.blocks.close()
+    if blockchain.account_model.store is not None:
+        blockchain.account_model.store.close()
+
+
+def test_snapshot_round_trip_through_staging_store():
+    source_dir, target_dir = tempfile.mkdtemp(), tempfile.mkdtemp()
+    try:
+        source = _blockchain(source_dir)
+        for i in range(25):
+            source.account_model.update_balance(f"account_{i:02d}", float(i))
+        source.account_model.commit_block(0, source.block_hashes[0])
+        path = os.path.join(source_dir, 'snapshot.ndjson')
+        write_snapshot(source, path, chunk_size=4)
+
+        for target in (_blockchain(target_dir), _blockchain()):
+            assert read_snapshot(target, path)
+            assert target.account_model.get_all_balances() == source.account_model.get_all_balances()
+            assert list(target.block_hashes) == list(source.block_hashes)
+            _close(target)
+        assert os.listdir(target_dir) != [] and not [name for name in os.listdir(target_dir)
+                                                     if name.startswith('snapshot-')]
+        _close(source)
+    finally:
+        shutil.rmtree(source_dir)
+        shutil.rmtree(target_dir)
+
+
+def test_tampered_snapshot_changes_nothing():
+    source_dir, target_dir = tempfile.mkdtemp(), tempfile.mkdtemp()
+    try:
+        source = _blockchain(source_dir)
+        source.account_model.update_balance("rich", 1e9)
+        source.account_model.commit_block(0, source.block_hashes[0])
+        lines = list(iter_snapshot(source, chunk_size=2))
+        record = json.loads(lines[0])
+        record['payload'] = record['payload'].replace('[', '[["forged",1,0],', 1)
+        lines[0] = (json.dumps(record) + '\n').encode()
+        path = os.path.join(source_dir, 'snapshot.ndjson')
+        with open(path, 'wb') as snapshot_file:
+            snapshot_file.writelines(lines)
+
+        target = _blockchain(target_dir)
+        balances = target.account_model.get_all_balances()
+        assert not read_snapshot(target, path)
+        assert target.account_model.get_all_balances() == balances
+        assert not [name for name in os.listdir(target_dir) if name.startswith('snapshot-')]
+        _close(target)
+        _close(source)
+    finally:
+        shutil.rmtree(source_dir)
+        shutil.rmtree(target_dir)
+
+
+if __name__ == "__main__":
+    test_row_batches_merge_uncommitted_changes()
+    test_store_read_is_one_transaction()
+    test_snapshot_round_trip_through_staging_store()
+    test_tampered_snapshot_changes_nothing()
+    print("All snapshot tests passed")
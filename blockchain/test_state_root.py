@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test the account state root.
+
+The root depends only on the account balances, so a store-backed model
+and an in-memory copy of the same state agree, and after the first
+computation a store-backed model only hashes the accounts a block changed.
+"""
+
+import os
+import shutil
+import tempfile
+
+from blockchain.account_model import AccountModel
+from blockchain.account_store import AccountStore
+from blockchain.sealevel_executor import SealevelExecutor
+
+
+def _memory_copy(model):
+    copy = AccountModel()
+    for public_key, balance in model.get_all_balances().items():
+        copy.create_account(public_key, balance)
+    return copy
+
+
+def test_root_ignores_order_and_history():
+    first, second = AccountModel(), AccountModel()
+    first.update_balance("a", 10.0)
+    first.update_balance("b", 5.0)
+    second.update_balance("b", 1.0)
+    second.update_balance("a", 10.0)
+    assert first.get_state_root_hash() != second.get_state_root_hash()
+    second.update_balance("b", 4.0)
+    assert first.get_state_root_hash() == second.get_state_root_hash()
+    assert len(first.get_state_root_hash()) == 64
+
+
+def test_store_root_is_incremental_and_matches_memory():
+    data_dir = tempfile.mkdtemp()
+    try:
+        model = AccountModel(store=AccountStore(os.path.join(data_dir, 'state.db')), cache_size=3)
+        for i in range(20):
+            model.update_balance(f"key_{i:02d}", float(i + 1))
+        model.commit_block(0, "hash0")
+        assert model.get_state_root_hash() == _memory_copy(model).get_state_root_hash()
+
+        def full_scan():
+            raise AssertionError("state root scanned the whole store")
+        model.store.iter_accounts = full_scan
+
+        for height in range(1, 4):
+            assert model.transfer(f"key_{height:02d}", "new_account", 1.0)
+            model.update_balance(f"key_{height + 10:02d}", 2.5)
+            root = model.get_state_root_hash()
+            model.commit_block(height, f"hash{height}")
+            assert model.get_state_root_hash() == root
+
+        account = model.get_account("key_19")
+        account.set_balance(0.0)
+        account.last_modified = 0
+        assert model.cleanup_empty_accounts() == 1
+        root = model.get_state_root_hash()
+        model.commit_block(4, "hash4")
+        assert model.get_state_root_hash() == root
+        del model.store.iter_accounts
+        assert root == _memory_copy(model).get_state_root_hash()
+        model.store.close()
+    finally:
+        shutil.rmtree(data_dir)
+
+
+def test_executor_reports_model_root():
+    model = AccountModel()
+    model.update_balance("a", 3.0)
+    assert SealevelExecutor()._compute_state_root_hash(model) == model.get_state_root_hash()
+
+
+if __name__ == "__main__":
+    test_root_ignores_order_and_history()
+    test_store_root_is_incremental_and_matches_memory()
+    test_executor_reports_model_root()
+    print("All state root tests passed")
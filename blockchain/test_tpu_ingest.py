@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test batched TPU ingestion.
+
+Transactions round-trip through the compact binary packet format with
+an identical payload, malformed packets are rejected with ValueError, and
+the ingest engine delivers every datagram in batches, sheds whole
+batches when verification falls behind, and never leaks a pool buffer.
+"""
+
+import json
+import socket
+import threading
+import time
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from blockchain.consensus.tpu_ingest import (BatchRing, PacketBufferPool, TPUIngestEngine,
+                                             decode_transaction_packet, encode_transaction_packet)
+from blockchain.transaction.transaction import Transaction
+
+
+def _public_key():
+    return ec.generate_private_key(ec.SECP256R1()).public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+
+
+def _transaction(amount=12.5):
+    transaction = Transaction(_public_key(), _public_key(), amount, "TRANSFER")
+    transaction.sign("3045" + "ab" * 68)
+    return transaction
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def _start_engine(handler, **kwargs):
+    engine = TPUIngestEngine('127.0.0.1', 0, handler, **kwargs)
+    engine.start()
+    return engine, engine.socket.getsockname()
+
+
+def test_packets_round_trip_the_transaction_payload():
+    for amount in (12.5, 7, "1e3"):
+        transaction = _transaction(amount)
+        packet = encode_transaction_packet(transaction, "source_node")
+        decoded, source_node = decode_transaction_packet(memoryview(packet))
+        assert source_node == "source_node"
+        assert decoded.to_dict() == transaction.to_dict()
+        assert list(decoded.payload()) == list(transaction.payload())
+    assert len(packet) * 2 < len(json.dumps(transaction.to_dict()))
+
+
+def test_malformed_packets_raise_value_error():
+    packet = encode_transaction_packet(_transaction(), "source_node")
+    with pytest.raises(ValueError):
+        decode_transaction_packet(b'\x00\x00' + packet[2:])
+    for length in range(0, len(packet), 5):
+        with pytest.raises(ValueError):
+            decode_transaction_packet(packet[:length])
+
+
+def test_ring_and_pool_are_bounded():
+    ring = BatchRing(2)
+    assert ring.put_nowait([1]) and ring.put_nowait([2])
+    assert not ring.put_nowait([3])
+    assert ring.get() == [1] and ring.get() == [2]
+    assert ring.get(timeout=0.01) is None
+
+    pool = PacketBufferPool(2, 64)
+    first, second = pool.acquire(), pool.acquire()
+    assert first != second
+    assert pool.acquire() is None
+    pool.release(first)
+    assert pool.available() == 1 and pool.acquire() == first
+
+
+def test_engine_delivers_every_packet_in_batches():
+    received = []
+    engine, addr = _start_engine(received.extend, pool_size=64)
+    try:
+        transactions = [_transaction(float(i)) for i in range(200)]
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.sendto(b"not a packet", addr)
+            for transaction in transactions:
+                sock.sendto(encode_transaction_packet(transaction, "source_node"), addr)
+
+        assert _wait_for(lambda: len(received) == len(transactions))
+        assert [transaction.id for transaction, _, _ in received] == [transaction.id for transaction in transactions]
+        stats = engine.get_stats()
+        assert stats['invalid_packets'] == 1
+        assert stats['packets_received'] == len(transactions) + 1
+        assert stats['wakeups'] <= stats['packets_received']
+        assert _wait_for(lambda: engine.pool.available() == 64)
+    finally:
+        engine.stop()
+
+
+def test_slow_verification_sheds_batches_without_leaking_buffers():
+    release = threading.Event()
+    received = []
+
+    def slow_handler(batch):
+        release.wait(5.0)
+        received.extend(batch)
+
+    engine, addr = _start_engine(slow_handler, pool_size=16, max_batch=1, ring_capacity=1)
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            for i in range(20):
+                sock.sendto(encode_transaction_packet(_transaction(float(i))), addr)
+        assert _wait_for(lambda: engine.stats['packets_received'] == 20)
+        release.set()
+        assert _wait_for(lambda: len(received) + engine.stats['packets_dropped'] == 20)
+        assert engine.stats['batches_dropped'] > 0
+        assert _wait_for(lambda: engine.pool.available() == 16)
+    finally:
+        release.set()
+        engine.stop()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
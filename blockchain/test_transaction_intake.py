@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test the leader transaction intake.
+
+Transactions are packed oldest first and accepted once. A transaction a
+block left out goes back in its arrival bucket, still deduplicated, and
+a transaction already in a block is never packed again.
+"""
+
+import shutil
+import tempfile
+import time
+
+from blockchain.transaction.transaction import Transaction
+from blockchain.transaction.transaction_intake import TransactionIntake
+
+
+def _transactions(count):
+    return [Transaction(f"sender_{i}", f"receiver_{i}", float(i + 1), "TRANSFER") for i in range(count)]
+
+
+def test_take_is_oldest_first_and_deduplicated():
+    intake = TransactionIntake()
+    transactions = _transactions(5)
+    assert intake.add_many(transactions, 'api') == 5
+    assert intake.add_many(transactions, 'p2p') == 0
+    assert intake.stats['duplicates'] == 5
+    assert intake.take(3) == transactions[:3]
+    assert intake.take() == transactions[3:]
+    assert len(intake) == 0
+    assert not intake.add(transactions[0])  # Already packed
+
+
+def test_removed_transactions_are_skipped():
+    intake = TransactionIntake()
+    transactions = _transactions(4)
+    intake.add_many(transactions)
+    intake.remove(transactions[1:3])  # Arrived in another leader's block
+    assert intake.take() == [transactions[0], transactions[3]]
+    assert not intake.add(transactions[1])
+
+
+def test_requeue_restores_arrival_order():
+    intake = TransactionIntake()
+    transactions = _transactions(5)
+    intake.add_many(transactions)
+    taken = intake.take()
+    assert intake.requeue([taken[1], taken[3]]) == 2
+    assert intake.stats['requeued'] == 2
+    assert not intake.add(taken[1])  # Still a duplicate while queued again
+
+    newer = _transactions(7)[5:]
+    intake.add_many(newer)
+    assert intake.take() == [taken[1], taken[3]] + newer
+
+
+def test_requeue_skips_transactions_in_a_block():
+    intake = TransactionIntake()
+    transactions = _transactions(2)
+    intake.add_many(transactions)
+    taken = intake.take()
+    intake.remove(taken[:1])
+    assert intake.requeue(taken) == 1
+    assert intake.take() == taken[1:]
+
+
+def test_requeued_transactions_keep_their_lifetime():
+    intake = TransactionIntake(slot_duration=0.01, retention_slots=5)
+    transactions = _transactions(2)
+    intake.add_many(transactions)
+    taken = intake.take()
+    time.sleep(0.1)
+    intake.expire()
+    assert intake.requeue(taken) == 0
+    assert len(intake) == 0
+    assert intake.add(taken[0])  # Forgotten once expired
+    assert not intake.taken
+
+
+def test_create_block_requeues_uncovered_transactions():
+    from blockchain.blockchain import Blockchain
+    from blockchain.transaction.wallet import Wallet
+
+    data_dir = tempfile.mkdtemp()
+    try:
+        blockchain = Blockchain(data_dir=data_dir)
+        blockchain.performance_monitor = None
+        sender, receiver = Wallet(), Wallet()
+        uncovered = sender.create_transaction(receiver.public_key_string(), 5000.0, "TRANSFER")
+        covered = sender.create_transaction(receiver.public_key_string(), 5.0, "TRANSFER")
+        intake = blockchain.transaction_intake
+        intake.add_many([uncovered, covered], 'api')
+
+        block = blockchain.create_block(sender)
+        assert [transaction.id for transaction in block.transactions] == [covered.id]
+        assert intake.take() == [uncovered]
+        assert not intake.add(covered)
+        blockchain.blocks.close()
+        blockchain.account_model.store.close()
+
+    finally:
+        shutil.rmtree(data_dir)
+
+if __name__ == "__main__":
+    test_take_is_oldest_first_and_deduplicated()
+    test_removed_transactions_are_skipped()
+    test_requeue_restores_arrival_order()
+    test_requeue_skips_transactions_in_a_block()
+    test_requeued_transactions_keep_their_lifetime()
+    test_create_block_requeues_uncovered_transactions()
+    print("All transaction intake tests passed")
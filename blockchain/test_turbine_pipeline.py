@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test the Turbine receive side: decoded FEC sets are assembled into
+blocks for the block handler, and received shreds are retransmitted to
+the node's children in batches.
+"""
+
+import time
+
+import pytest
+
+from blockchain.block import Block
+from blockchain.transaction.transaction import Transaction
+from blockchain.turbine_pipeline import TurbineBlockPipeline, TurbineRetransmitter
+from blockchain.turbine_protocol import TurbineProtocol
+
+VALIDATORS = [(f"validator_{i:02d}", 1.0, None) for i in range(12)]
+LEADER = "validator_00"
+
+
+def _block(transaction_count=80):
+    transactions = [Transaction(f"sender_{i}", f"receiver_{i}", float(i), "TRANSFER")
+                    for i in range(transaction_count)]
+    return Block(transactions, "last_hash", LEADER, 3)
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline and not condition():
+        time.sleep(0.01)
+    return condition()
+
+
+def test_pipeline_assembles_block_from_fec_sets():
+    handled = []
+    pipeline = TurbineBlockPipeline(handled.append, verify_signatures=False)
+    pipeline.start()
+    try:
+        block = _block()
+        receiver = TurbineProtocol()
+        for shred in receiver.shredder.shred_block(block):
+            receiver.receive_shred(shred, "validator_01")
+        fec_sets = receiver.drain_completed_fec_sets()
+        assert len(fec_sets) == fec_sets[0]['fec_set_count'] > 1
+
+        # Sets may complete in any order
+        for fec_set in reversed(fec_sets):
+            pipeline.submit_fec_set(fec_set)
+        assert _wait_for(lambda: len(handled) == 1)
+        rebuilt = handled[0]
+        assert rebuilt.payload() == block.payload()
+        assert pipeline.stats['blocks_assembled'] == 1
+    finally:
+        pipeline.stop()
+
+
+def test_pipeline_rejects_block_with_wrong_transaction_count():
+    pipeline = TurbineBlockPipeline(lambda block: None, verify_signatures=False)
+    receiver = TurbineProtocol()
+    for shred in receiver.shredder.shred_block(_block()):
+        receiver.receive_shred(shred, "validator_01")
+    fec_sets = receiver.drain_completed_fec_sets()
+    fec_sets[-1]['payload'] = fec_sets[-1]['payload'][:-1]
+    results = [pipeline.process_fec_set(fec_set) for fec_set in fec_sets]
+    assert all(result is None for result in results)
+    assert pipeline.stats['blocks_rejected'] == 1
+
+
+def test_payload_keys_cannot_shadow_methods():
+    with pytest.raises(ValueError):
+        Transaction.from_dict({'id': "tx", 'payload': "shadowed"})
+    with pytest.raises(ValueError):
+        Transaction.from_dict({1: "not a name"})
+    with pytest.raises(ValueError):
+        Block.from_dict({'transactions': [], 'to_dict': "shadowed"})
+
+    pipeline = TurbineBlockPipeline(lambda block: None, verify_signatures=False)
+    receiver = TurbineProtocol()
+    for shred in receiver.shredder.shred_block(_block()):
+        receiver.receive_shred(shred, "validator_01")
+    fec_sets = receiver.drain_completed_fec_sets()
+    fec_sets[1]['payload'][0]['payload'] = "shadowed"
+    assert [pipeline.process_fec_set(fec_set) for fec_set in fec_sets] == [None] * len(fec_sets)
+    assert pipeline.stats['blocks_rejected'] == 1
+
+    pipeline = TurbineBlockPipeline(lambda block: None, verify_signatures=False)
+    fec_sets = [dict(fec_set) for fec_set in fec_sets]
+    fec_sets[1]['payload'] = [dict(data) for data in fec_sets[1]['payload']]
+    del fec_sets[1]['payload'][0]['payload']
+    fec_sets[0]['payload'] = dict(fec_sets[0]['payload'], payload="shadowed")
+    assert [pipeline.process_fec_set(fec_set) for fec_set in fec_sets] == [None] * len(fec_sets)
+    assert pipeline.stats['blocks_rejected'] == 1 and pipeline.stats['blocks_assembled'] == 0
+
+
+def test_retransmitter_merges_tasks_per_target():
+    sent = []
+    retransmitter = TurbineRetransmitter(sent.append)
+    retransmitter.flush([
+        {'target_node': "a", 'shreds': [1, 2]},
+        {'target_node': "b", 'shreds': [3]},
+        {'target_node': "a", 'shreds': [4]},
+    ])
+    assert sent == [[
+        {'target_node': "a", 'shreds': [1, 2, 4], 'action': 'forward_shred'},
+        {'target_node': "b", 'shreds': [3], 'action': 'forward_shred'},
+    ]]
+    assert retransmitter.stats['shreds_forwarded'] == 4
+
+
+def test_retransmitter_drops_when_full():
+    retransmitter = TurbineRetransmitter(lambda tasks: None, max_queued_tasks=2)
+    queued = retransmitter.submit([{'target_node': str(i), 'shreds': [i]} for i in range(5)])
+    assert queued == 2
+    assert retransmitter.stats['tasks_dropped'] == 3
+
+
+def test_received_shreds_are_forwarded_to_children():
+    sent = []
+    retransmitter = TurbineRetransmitter(lambda tasks: sent.extend(tasks))
+    retransmitter.start()
+    try:
+        leader = TurbineProtocol(fanout=2)
+        leader.register_validators(VALIDATORS)
+        receiver = TurbineProtocol(fanout=2)
+        receiver.register_validators(VALIDATORS)
+
+        tasks = leader.broadcast_block(_block(), LEADER)
+        root_task = tasks[0]
+        expected = {}
+        for shred in root_task['shreds']:
+            forwarding = receiver.receive_shred(shred, root_task['target_node'])
+            retransmitter.submit(forwarding)
+            for task in forwarding:
+                expected[task['target_node']] = expected.get(task['target_node'], 0) + 1
+
+        assert expected, "the root of a 12 node tree has children"
+        assert _wait_for(lambda: sum(len(task['shreds']) for task in sent) == sum(expected.values()))
+        assert LEADER not in {task['target_node'] for task in sent}
+    finally:
+        retransmitter.stop()
+
+
+if __name__ == "__main__":
+    test_pipeline_assembles_block_from_fec_sets()
+    test_pipeline_rejects_block_with_wrong_transaction_count()
+    test_payload_keys_cannot_shadow_methods()
+    test_retransmitter_merges_tasks_per_target()
+    test_retransmitter_drops_when_full()
+    test_received_shreds_are_forwarded_to_children()
+    print("All Turbine pipeline tests passed")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test the stake-weighted Turbine propagation trees.
+
+Every node that registers the same validators must derive the same
+per-shred trees, so a block broadcast by the leader reaches every other
+validator exactly once per shred and is never sent back to the leader.
+"""
+
+from collections import Counter, deque
+
+from blockchain.block import Block
+from blockchain.transaction.transaction import Transaction
+from blockchain.turbine_pipeline import TurbineBlockPipeline
+from blockchain.turbine_protocol import Shred, TurbineProtocol
+from blockchain.turbine_tree import FenwickTree, TurbinePropagationTree, weighted_shuffle
+
+VALIDATORS = [(f"validator_{i:02d}", float(1 + i % 7), None) for i in range(40)]
+LEADER = "validator_05"
+
+
+def _block(transaction_count=120):
+    transactions = [Transaction(f"sender_{i}", f"receiver_{i}", float(i), "TRANSFER")
+                    for i in range(transaction_count)]
+    return Block(transactions, "last_hash", LEADER, 9)
+
+
+def test_fenwick_find_and_update():
+    tree = FenwickTree([3, 0, 5, 2])
+    assert tree.total() == 10
+    assert [tree.find(target) for target in range(10)] == [0, 0, 0, 2, 2, 2, 2, 2, 3, 3]
+    tree.update(2, -5)
+    assert tree.total() == 5
+    assert tree.find(3) == 3
+
+
+def test_weighted_shuffle_is_deterministic():
+    node_ids = [node_id for node_id, _, _ in VALIDATORS] + ["unstaked"]
+    weights = [int(stake) for _, stake, _ in VALIDATORS] + [0]
+    first = weighted_shuffle(node_ids, weights, seed=42)
+    assert first == weighted_shuffle(node_ids, weights, seed=42)
+    assert sorted(first) == sorted(node_ids)
+    assert first[-1] == "unstaked"  # Zero-stake nodes come last
+
+
+def test_per_shred_tree_covers_every_node_once():
+    tree = TurbinePropagationTree(fanout=4)
+    tree.register_nodes(VALIDATORS)
+    for shred_id in range(20):
+        root = tree.get_shred_root(3, shred_id, LEADER)
+        assert root is not None and root != LEADER
+        assert tree.get_retransmit_peers(root, 3, shred_id, LEADER)[0] == LEADER
+
+        reached = Counter()
+        to_visit = deque([root])
+        while to_visit:
+            node_id = to_visit.popleft()
+            reached[node_id] += 1
+            parent, children = tree.get_retransmit_peers(node_id, 3, shred_id, LEADER)
+            for child in children:
+                assert tree.get_retransmit_peers(child, 3, shred_id, LEADER)[0] == node_id
+            to_visit.extend(children)
+        assert set(reached) == {node_id for node_id, _, _ in VALIDATORS} - {LEADER}
+        assert set(reached.values()) == {1}
+
+
+def test_broadcast_sends_each_shred_to_its_root_only():
+    protocol = TurbineProtocol(fanout=4)
+    protocol.register_validators(VALIDATORS)
+    tasks = protocol.broadcast_block(_block(), LEADER)
+    sent = [shred for task in tasks for shred in task['shreds']]
+    assert len(sent) == len({(shred.fec_set_index, shred.index) for shred in sent})
+    assert len({task['target_node'] for task in tasks}) > 1
+    for task in tasks:
+        for shred in task['shreds']:
+            assert shred.leader == LEADER
+            assert task['target_node'] == protocol.propagation_tree.get_shred_root(shred.slot, shred.shred_id, LEADER)
+
+
+def test_block_reaches_every_validator_through_retransmission():
+    protocols = {}
+    for node_id, _, _ in VALIDATORS:
+        protocols[node_id] = TurbineProtocol(fanout=4)
+        protocols[node_id].register_validators(VALIDATORS)
+
+    block = _block()
+    in_flight = deque()
+    for task in protocols[LEADER].broadcast_block(block, LEADER):
+        in_flight.extend((task['target_node'], shred.to_bytes()) for shred in task['shreds'])
+    shred_count = len(in_flight)
+
+    deliveries = Counter()
+    while in_flight:
+        target, shred_bytes = in_flight.popleft()
+        shred = Shred.from_bytes(shred_bytes)
+        deliveries[(target, shred.shred_id)] += 1
+        for task in protocols[target].receive_shred(shred, target):
+            in_flight.extend((task['target_node'], forwarded.to_bytes()) for forwarded in task['shreds'])
+
+    assert not any(target == LEADER for target, _ in deliveries)
+    assert set(deliveries.values()) == {1}
+    assert len(deliveries) == (len(VALIDATORS) - 1) * shred_count  # Every shred reached every other node
+    for node_id, protocol in protocols.items():
+        if node_id == LEADER:
+            continue
+        fec_sets = protocol.drain_completed_fec_sets()
+        assert sorted(fec_set['fec_set_index'] for fec_set in fec_sets) == list(range(fec_sets[0]['fec_set_count']))
+        pipeline = TurbineBlockPipeline(lambda block: None, verify_signatures=False)
+        rebuilt = [pipeline.process_fec_set(fec_set) for fec_set in fec_sets][-1]
+        assert rebuilt.payload() == block.payload()
+
+
+if __name__ == "__main__":
+    test_fenwick_find_and_update()
+    test_weighted_shuffle_is_deterministic()
+    test_per_shred_tree_covers_every_node_once()
+    test_broadcast_sends_each_shred_to_its_root_only()
+    test_block_reaches_every_validator_through_retransmission()
+    print("All Turbine tree tests passed")
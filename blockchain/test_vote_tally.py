@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test stake-weighted vote tallies.
+
+Only registered stake counts toward a supermajority; votes from unknown
+validators carry no weight until their stake is registered.
+"""
+
+from gossip_protocol.vote_tally import VoteTally
+
+
+def _tally(stakes, root_depth=32):
+    tally = VoteTally(root_depth=root_depth)
+    for validator, stake in stakes.items():
+        tally.set_stake(validator, stake)
+    return tally
+
+
+def test_supermajority_needs_more_than_two_thirds_of_stake():
+    tally = _tally({"a": 40.0, "b": 26.0, "c": 34.0})
+    assert tally.add_vote("a", 1, "block1")
+    assert tally.add_vote("b", 1, "block1")
+    assert tally.get_stake("block1") == 66.0
+    assert not tally.is_supermajority("block1")
+    assert tally.add_vote("c", 1, "block1")
+    assert tally.is_supermajority("block1")
+    assert tally.confirmation_depth("block1") == 0
+
+
+def test_duplicates_and_equivocations_are_not_counted():
+    tally = _tally({"a": 1.0, "b": 1.0})
+    assert tally.add_vote("a", 1, "block1")
+    assert not tally.add_vote("a", 1, "block1")
+    assert not tally.add_vote("a", 1, "other")
+    assert tally.stats['duplicate_votes'] == 1
+    assert tally.stats['equivocations'] == 1
+    assert tally.get_stake("block1") == 1.0
+
+
+def test_unknown_voters_carry_no_stake():
+    tally = _tally({"a": 10.0, "b": 10.0, "c": 10.0})
+    assert tally.add_vote("a", 1, "block1")
+    for i in range(100):
+        assert tally.add_vote(f"sybil_{i}", 1, "block1")
+    assert tally.total_stake == 30.0
+    assert tally.get_stake("block1") == 10.0
+    assert not tally.is_supermajority("block1")
+    assert tally.stats['unstaked_votes'] == 100
+    assert tally.get_stats()['validators'] == 3
+
+
+def test_votes_are_reweighted_when_stake_is_registered():
+    tally = _tally({"a": 10.0, "b": 10.0})
+    assert tally.add_vote("late", 1, "block1")
+    assert tally.add_vote("a", 1, "block1")
+    assert not tally.is_supermajority("block1")
+    tally.set_stake("late", 20.0)
+    assert tally.get_stake("block1") == 30.0
+    assert tally.is_supermajority("block1")
+
+
+def test_old_slots_are_pruned_below_the_root():
+    tally = _tally({"a": 1.0}, root_depth=2)
+    for slot in range(1, 5):
+        assert tally.add_vote("a", slot, f"block{slot}")
+    assert tally.root == 2
+    assert not tally.add_vote("a", 1, "late")
+    assert tally.get_stake("block1") == 0.0
+    assert tally.stats['slots_pruned'] == 1
+
+
+if __name__ == "__main__":
+    test_supermajority_needs_more_than_two_thirds_of_stake()
+    test_duplicates_and_equivocations_are_not_counted()
+    test_unknown_voters_carry_no_stake()
+    test_votes_are_reweighted_when_stake_is_registered()
+    test_old_slots_are_pruned_below_the_root()
+    print("All vote tally tests passed")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Test the binary wire codec used on the P2P and UDP paths.
+
+Registered types must round-trip unchanged, and every malformed or
+hostile frame must be rejected with CodecError, never another exception.
+"""
+
+import struct
+
+import pytest
+
+from blockchain.block import Block
+from blockchain.p2p.codec import (FORMAT_VERSION, MAGIC, MAX_NESTING_DEPTH, TAG_DICT, TAG_INT, TAG_LIST,
+                                  TAG_OBJECT, TAG_STR, CodecError, WireCodec)
+from blockchain.p2p.message import BlockHeader, InventoryItem, InventoryMessage, Message
+from blockchain.p2p.socket_connector import SocketConnector
+from blockchain.transaction.transaction import Transaction
+
+HEADER = MAGIC + bytes([FORMAT_VERSION])
+
+
+def _str(value: str) -> bytes:
+    encoded = value.encode()
+    return bytes([TAG_STR]) + struct.pack('>I', len(encoded)) + encoded
+
+
+def _transaction(amount=10.0):
+    transaction = Transaction("sender_key", "receiver_key", amount, "TRANSFER")
+    transaction.sign("signature")
+    return transaction
+
+
+def test_transaction_round_trip():
+    transaction = _transaction()
+    decoded = WireCodec.decode(WireCodec.encode(transaction))
+    assert isinstance(decoded, Transaction)
+    assert decoded.to_dict() == transaction.to_dict()
+
+
+def test_block_round_trip_keeps_metadata():
+    block = Block([_transaction(), _transaction(2)], "last_hash", "proposer", 7)
+    block.poh_sequence = [{"hash": "abc", "count": 1}]
+    block.state_root_hash = "root"
+    decoded = WireCodec.decode(WireCodec.encode(block))
+    assert isinstance(decoded, Block)
+    assert decoded.payload() == block.payload()
+    assert decoded.poh_sequence == block.poh_sequence
+    assert decoded.state_root_hash == "root"
+    assert all(isinstance(transaction, Transaction) for transaction in decoded.transactions)
+
+
+def test_message_round_trip():
+    inventory = InventoryMessage([InventoryItem(1, "a" * 64), InventoryItem(2, "b" * 64)])
+    message = Message(SocketConnector("127.0.0.1", 10001), "INV", inventory)
+    decoded = WireCodec.decode(WireCodec.encode(message))
+    assert decoded.message_type == "INV"
+    assert decoded.sender_connector.port == 10001
+    assert [item.hash for item in decoded.data.inventory] == ["a" * 64, "b" * 64]
+
+    header = BlockHeader(3, "hash", "last", "forger", 1.5, 4)
+    assert vars(WireCodec.decode(WireCodec.encode(header))) == vars(header)
+
+
+def test_plain_values_round_trip():
+    value = {"int": 2 ** 70, "neg": -5, "float": 0.25, "bytes": b"\x00\x01", "none": None,
+             "flags": [True, False], "nested": {"list": [1, "two", [3]]}}
+    assert WireCodec.decode(WireCodec.encode(value)) == value
+    assert WireCodec.decode_text(WireCodec.encode_text(value)) == value
+
+
+def test_encoded_value_is_embedded_verbatim():
+    transaction = _transaction()
+    encoded = WireCodec.encode_value(transaction)
+    decoded = WireCodec.decode(WireCodec.encode([encoded, encoded]))
+    assert [item.id for item in decoded] == [transaction.id, transaction.id]
+
+
+def test_unregistered_type_is_rejected():
+    with pytest.raises(CodecError):
+        WireCodec.encode(object())
+
+
+@pytest.mark.parametrize("frame", [
+    b"",
+    b"XX\x01",
+    HEADER,
+    HEADER + bytes([TAG_STR]) + struct.pack('>I', 100) + b"short",
+    HEADER + bytes([TAG_STR]) + struct.pack('>I', 2) + b"\xff\xfe",
+    HEADER + bytes([99]),
+    HEADER + bytes([TAG_OBJECT]) + struct.pack('>HB', 999, 1),
+    WireCodec.encode("value") + b"trailing",
+])
+def test_malformed_frames_raise_codec_error(frame):
+    with pytest.raises(CodecError):
+        WireCodec.decode(frame)
+
+
+def test_deeply_nested_frame_is_rejected():
+    nested = bytes([TAG_LIST]) + struct.pack('>I', 1)
+    with pytest.raises(CodecError):
+        WireCodec.decode(HEADER + nested * 25000 + bytes([0]))
+
+    # Nesting up to the limit is still accepted
+    value = None
+    for _ in range(MAX_NESTING_DEPTH):
+        value = [value]
+    assert WireCodec.decode(WireCodec.encode(value)) == value
+
+
+def test_unhashable_dict_key_is_rejected():
+    frame = HEADER + bytes([TAG_DICT]) + struct.pack('>I', 1) + bytes([TAG_LIST]) + struct.pack('>I', 0) + _str("v")
+    with pytest.raises(CodecError):
+        WireCodec.decode(frame)
+
+
+def _block_frame_with_extra(key_bytes: bytes) -> bytes:
+    """A valid encoded Block whose trailing extras dict is replaced by {key: 'x'}"""
+    block = Block([], "last_hash", "proposer", 1)
+    frame = WireCodec.encode(block)
+    empty_extras = struct.pack('>I', 0)  # Extras are an untagged dict: count, then items
+    assert frame.endswith(empty_extras)
+    return frame[:-len(empty_extras)] + struct.pack('>I', 1) + key_bytes + _str("x")
+
+
+@pytest.mark.parametrize("key", [
+    _str("payload"),        # Would shadow a method
+    _str("__class__"),
+    _str("transactions"),   # Would overwrite a schema field
+    bytes([TAG_INT]) + struct.pack('>q', 1),  # Not a str
+])
+def test_extras_cannot_shadow_attributes(key):
+    with pytest.raises(CodecError):
+        WireCodec.decode(_block_frame_with_extra(key))
+
+
+def test_ordinary_extras_are_accepted():
+    decoded = WireCodec.decode(_block_frame_with_extra(_str("poh_sequence")))
+    assert decoded.poh_sequence == "x"
+    assert callable(decoded.payload)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])